@@ -12,6 +12,10 @@ from app.utils.logger import setup_logging
 from app.db_models import db
 from app.cli_commands import register_cli_commands
 from app.response_cache import init_response_cache
+from app.search_index import init_search_index
+from app.monthly.worksheet_change_hub import init_worksheet_change_hub
+from app.monthly.route_month_rollup import init_route_month_rollup
+from app.services.servicetrade import init_service_trade_client
 from dotenv import load_dotenv
 
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '.env'))
@@ -82,6 +86,10 @@ def create_app():
     register_cli_commands(app)
     setup_logging(app)
     init_response_cache(app)
+    init_search_index(app)
+    init_worksheet_change_hub(app)
+    init_route_month_rollup(app)
+    init_service_trade_client(app)
     register_blueprints(app)
     register_api_session_auth(app)
     register_spa_static_routes(app)
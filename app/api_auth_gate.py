@@ -12,10 +12,11 @@ _KEYS_ADMIN_MUTATION_RE = re.compile(r"^/api/keys(?:/\d+)?$")
 #   GET   /api/monthly_routes/routes/<id>/worksheet/stream   (SSE)
 #   PATCH /api/monthly_routes/routes/<id>/worksheet/rows/<locId>
 #   PATCH /api/monthly_routes/routes/<id>/worksheet/locations/<testingSiteId>
+#   POST  /api/monthly_routes/routes/<id>/worksheet/mutations   (offline queue replay)
 #   POST  /api/monthly_routes/routes/<id>/worksheet/reset_run
 #   GET   /api/monthly_routes/routes/<id>/worksheet/rows/<locId>/audit
 _PORTAL_WORKSHEET_PATH_RE = re.compile(
-    r"^/api/monthly_routes/routes/\d+(?:/worksheet(?:/(?:stream|reset_run|rows/\d+(?:/audit)?|stops/\d+))?)?$"
+    r"^/api/monthly_routes/routes/\d+(?:/worksheet(?:/(?:stream|reset_run|mutations|rows/\d+(?:/audit)?|stops/\d+))?)?$"
 )
 # Any route-scoped monthly API the technician portal may call while unlocked (worksheet, runs, etc.).
 _PORTAL_MONTHLY_ROUTE_API_RE = re.compile(r"^/api/monthly_routes/routes/\d+(?:/.*)?$")
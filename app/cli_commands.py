@@ -89,3 +89,29 @@ def register_cli_commands(app):
                 )
             elif missing and not alembic_rev:
                 print("\nTry: flask db upgrade\n")
+
+    @app.cli.command("rebuild-route-month-rollup")
+    def rebuild_route_month_rollup_command():
+        """Recompute monthly_route_month_rollup from monthly_location_month history."""
+        from app.monthly.route_month_rollup import rebuild_route_month_rollup
+
+        with app.app_context():
+            try:
+                written = rebuild_route_month_rollup()
+            except RuntimeError as e:
+                db.session.rollback()
+                print(f"ERROR: {e}")
+                return
+            db.session.commit()
+            print(f"Rebuilt monthly_route_month_rollup: {written} route-month rows.")
+
+    @app.cli.command("rebuild-search-index")
+    def rebuild_search_index_command():
+        """Recompute search_document for every monthly location and key."""
+        from app.search_index import rebuild_search_documents
+
+        with app.app_context():
+            counts = rebuild_search_documents()
+            db.session.commit()
+            for table, changed in counts.items():
+                print(f"{table}: {changed} search documents rewritten")
@@ -0,0 +1,111 @@
+"""Conditional GET (strong ``ETag`` / ``If-None-Match``) for read-heavy JSON endpoints.
+
+A view opts in with ``@conditional_json_response(probe)``. ``probe`` takes the view kwargs and
+returns the cheap revision parts its payload is built from (``rows_watermark`` of each table it
+reads, run headers, …) or ``None`` to skip (bad params, missing rows: the view answers those).
+The ETag hashes the parts with the path, query string and the session identity the payload may
+vary on, so a matching ``If-None-Match`` gets a 304 before any serialization runs.
+
+Responses carry ``Cache-Control: private, no-cache``: browsers keep the body and revalidate on
+every ``fetch``, turning unchanged reads into bodiless 304s without client code.
+
+The probe runs *before* the view. Views that write on read (worksheet materialization) therefore
+hand out the pre-write tag once and miss on the next request; probing afterwards could instead
+tag a payload older than the state it names and pin clients to it.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import logging
+from hashlib import sha256
+from typing import Any, Callable, Iterable
+
+from flask import Response, current_app, request, session
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.db_models import db
+
+log = logging.getLogger("conditional-get")
+
+CONDITIONAL_CACHE_CONTROL = "private, no-cache"
+#: Session keys that change what a read returns (staff vs portal, per-user edit flags).
+ETAG_SESSION_KEYS = ("authenticated", "tech_portal_unlocked", "username")
+
+_STATS = {"not_modified": 0, "full": 0, "skipped": 0, "probe_errors": 0}
+
+
+def conditional_get_stats() -> dict[str, int]:
+    return dict(_STATS)
+
+
+def rows_watermark(version_column, *criteria) -> tuple[object, int]:
+    """``(max(version_column), count)`` over rows matching ``criteria``.
+
+    ``version_column`` is an ``updated_at`` (or a monotonic id for append-only tables). The count
+    catches deletes, which never advance the max.
+    """
+    max_value, count = (
+        db.session.query(func.max(version_column), func.count())
+        .select_from(version_column.class_)
+        .filter(*criteria)
+        .one()
+    )
+    if hasattr(max_value, "isoformat"):
+        max_value = max_value.isoformat()
+    return (max_value, int(count or 0))
+
+
+def revision_etag(parts: Iterable[Any]) -> str:
+    raw = json.dumps(list(parts), default=str, separators=(",", ":"))
+    return sha256(raw.encode("utf-8")).hexdigest()[:40]
+
+
+def _request_scope() -> list[Any]:
+    return [
+        request.path,
+        sorted(request.args.items(multi=True)),
+        [session.get(key) for key in ETAG_SESSION_KEYS],
+    ]
+
+
+def conditional_json_response(
+    probe: Callable[..., Iterable[Any] | None],
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator: answer ``If-None-Match`` from ``probe(**view_kwargs)`` before running the view."""
+
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if request.method not in ("GET", "HEAD"):
+                return fn(*args, **kwargs)
+            try:
+                parts = probe(*args, **kwargs)
+            except SQLAlchemyError:
+                # A probe must never break the read it guards: serve it untagged instead.
+                db.session.rollback()
+                _STATS["probe_errors"] += 1
+                log.warning("Revision probe failed for %s", request.path, exc_info=True)
+                parts = None
+            if parts is None:
+                _STATS["skipped"] += 1
+                return fn(*args, **kwargs)
+            etag = revision_etag([*_request_scope(), *parts])
+
+            if request.if_none_match.contains(etag):
+                _STATS["not_modified"] += 1
+                response = Response(status=304)
+            else:
+                _STATS["full"] += 1
+                response = current_app.make_response(fn(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = CONDITIONAL_CACHE_CONTROL
+            return response
+
+        return wrapper
+
+    return decorator
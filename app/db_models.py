@@ -1,11 +1,14 @@
 from datetime import datetime, timezone
+import time
+import weakref
 from flask_sqlalchemy import SQLAlchemy
 from zoneinfo import ZoneInfo
 from sqlalchemy.orm import relationship
 from sqlalchemy import (
     UniqueConstraint,
     Index,
-    ForeignKey
+    ForeignKey,
+    inspect,
 )
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.dialects.postgresql import JSONB
@@ -17,6 +20,29 @@ def vancouver_now():
     return datetime.now(ZoneInfo("America/Vancouver"))  # for zoneinfo
 
 
+#: Seconds before a table found missing is looked up again (a migration may have created it).
+TABLE_ABSENT_RECHECK_SECONDS = 60
+_table_presence: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def table_available(table_name: str, bind=None, *, refresh: bool = False) -> bool:
+    """Whether ``table_name`` exists on ``bind`` (engine or connection; default ``db.engine``).
+
+    Optional tables (caches, rollups, snapshots) are missing on pre-migration databases and in
+    most SQLite tests. A present table is remembered per engine; a missing one is re-checked after
+    ``TABLE_ABSENT_RECHECK_SECONDS`` so ``flask db upgrade`` is picked up without a restart.
+    """
+    bind = bind if bind is not None else db.engine
+    checked = _table_presence.setdefault(bind.engine, {})
+    cached = checked.get(table_name)
+    now = time.monotonic()
+    if cached is not None and not refresh and (cached[0] or now - cached[1] < TABLE_ABSENT_RECHECK_SECONDS):
+        return cached[0]
+    present = inspect(bind).has_table(table_name)
+    checked[table_name] = (present, now)
+    return present
+
+
 class JobSummary(db.Model):
     __tablename__ = 'job_summary'
     
@@ -130,6 +156,27 @@ class ProcessingStatusIntraday(db.Model):
         )
 
 
+class ProcessingSnapshot(db.Model):
+    """
+    Latest assembled Processing Attack KPI snapshot, shared by the ``/processing_attack/*``
+    endpoints, the intraday capture and ``update_processing_data.py``.
+
+    ``appointment_max`` memoizes ``{job_id: [job.updated, latest appointment windowStart]}``
+    so a rebuild only refetches appointments for jobs ServiceTrade reports as changed.
+    """
+
+    __tablename__ = "processing_snapshot"
+
+    snapshot_key = db.Column(db.String(32), primary_key=True)
+    payload = db.Column(db.JSON, nullable=False)
+    appointment_max = db.Column(db.JSON, nullable=True)
+    built_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    build_ms = db.Column(db.Integer, nullable=True)
+
+    def __repr__(self):
+        return f"<ProcessingSnapshot {self.snapshot_key} built_at={self.built_at}>"
+
+
 class SchedulingAttack(db.Model):
     __tablename__ = 'scheduling_attack'
 
@@ -331,6 +378,8 @@ class DeficiencyServiceEligibility(db.Model):
     reason = db.Column(db.String(32), nullable=False, default="eligible")
     detail = db.Column(db.String(512), nullable=True)
     description_hash = db.Column(db.String(64), nullable=True)
+    #: ``phrase_set_version`` of the denylist this row was classified against.
+    phrase_set_version = db.Column(db.String(64), nullable=True)
     included_override = db.Column(db.Boolean, nullable=False, default=False)
     classified_at = db.Column(db.DateTime(timezone=True), default=vancouver_now, nullable=False)
 
@@ -556,6 +605,49 @@ class ServiceOccurrence(db.Model):
 
     def __repr__(self):
         return f"<ServiceOccurrence job={self.job_id} loc={self.location_id} month={self.observed_month}>"
+
+
+class ServiceEventSyncCheckpoint(db.Model):
+    """
+    Per-location progress of ``update_service_events.py``.
+
+    A row is written once the location's occurrences are committed. ``watermark`` (epoch
+    seconds) is when that sync started; the next run skips the location unless ServiceTrade
+    reports the location or one of its jobs, appointments or recurrences ``updated`` after it,
+    the checkpoint is older than ``--max-checkpoint-age-days``, or ``revisit_after`` (the
+    earliest upcoming scheduled inspection seen) has passed.
+    """
+
+    __tablename__ = "service_event_sync_checkpoint"
+
+    location_id = db.Column(db.BigInteger, primary_key=True)
+    watermark = db.Column(db.BigInteger, nullable=False)
+    rows_written = db.Column(db.Integer, nullable=False, default=0)
+    revisit_after = db.Column(db.BigInteger, nullable=True)
+    completed_at = db.Column(db.DateTime(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return f"<ServiceEventSyncCheckpoint loc={self.location_id} watermark={self.watermark}>"
+
+
+class ServiceTradeSyncWatermark(db.Model):
+    """
+    Last successful incremental sync of a ServiceTrade entity (``deficiency``, ``quote``)
+    by ``performance_summary.update_deficiencies`` / ``update_quotes``.
+
+    ``synced_through`` (epoch seconds) is when that sync started; the next sync only lists
+    records ServiceTrade reports ``updated`` after it.
+    """
+
+    __tablename__ = "servicetrade_sync_watermark"
+
+    entity = db.Column(db.String(32), primary_key=True)
+    synced_through = db.Column(db.BigInteger, nullable=False)
+    rows_synced = db.Column(db.Integer, nullable=False, default=0)
+    completed_at = db.Column(db.DateTime(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return f"<ServiceTradeSyncWatermark {self.entity} synced_through={self.synced_through}>"
     
 class BackflowAutomationMetric(db.Model):
     __tablename__ = "metric"
@@ -720,6 +812,62 @@ class MonthlyRouteCalculatedPath(db.Model):
     monthly_route = db.relationship("MonthlyRoute", back_populates="calculated_paths")
 
 
+class MapboxDirectionsLeg(db.Model):
+    """
+    One Mapbox Directions leg (stop → next stop) shared by every route path that uses it.
+
+    ``leg_key`` is ``"lng,lat;lng,lat"`` with coordinates rounded to 6 decimals, so a
+    reordered route only asks Mapbox for the legs it has never driven before.
+    """
+
+    __tablename__ = "mapbox_directions_leg"
+    __table_args__ = (
+        db.UniqueConstraint("profile", "leg_key", name="uq_mapbox_directions_leg_profile_key"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    profile = db.Column(db.String(32), nullable=False)
+    leg_key = db.Column(db.String(64), nullable=False)
+    #: GeoJSON ``LineString`` coordinates for this leg only.
+    coordinates = db.Column(db.JSON, nullable=False)
+    distance_meters = db.Column(db.Float, nullable=False)
+    duration_seconds = db.Column(db.Float, nullable=False)
+    fetched_at = db.Column(
+        db.DateTime(timezone=True),
+        server_default=db.func.now(),
+        nullable=False,
+    )
+
+
+class MapboxGeocodeCache(db.Model):
+    """
+    Cached Mapbox geocoding answer for one normalized query.
+
+    ``kind`` is ``"address"`` (single best match used to pin a location; ``latitude`` /
+    ``longitude`` are null when Mapbox found nothing in Greater Victoria) or ``"candidates"``
+    (the serialized autocomplete list behind the address pickers).
+    """
+
+    __tablename__ = "mapbox_geocode_cache"
+    __table_args__ = (
+        db.UniqueConstraint("kind", "query_key", name="uq_mapbox_geocode_cache_kind_key"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    kind = db.Column(db.String(16), nullable=False)
+    #: sha256 hex of the normalized query text.
+    query_key = db.Column(db.String(64), nullable=False)
+    query_text = db.Column(db.Text, nullable=False)
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+    candidates = db.Column(db.JSON, nullable=True)
+    fetched_at = db.Column(
+        db.DateTime(timezone=True),
+        server_default=db.func.now(),
+        nullable=False,
+    )
+
+
 class MonthlyRouteRun(db.Model):
     """
     One execution of a monthly route in a calendar month — the "run file."
@@ -1051,6 +1199,12 @@ class MonthlyLocation(db.Model):
             name="uq_monthly_location_address_pmc_label_normalized",
         ),
         db.Index("ix_monthly_location_status_normalized", "status_normalized"),
+        db.Index(
+            "ix_monthly_location_search_document_trgm",
+            "search_document",
+            postgresql_using="gin",
+            postgresql_ops={"search_document": "gin_trgm_ops"},
+        ),
         db.CheckConstraint(
             "(monitoring_company_id IS NULL OR pending_monitoring_company_proposal_id IS NULL)",
             name="ck_ml_monitoring_company_xor_pending_proposal",
@@ -1078,6 +1232,8 @@ class MonthlyLocation(db.Model):
     status_raw = db.Column(db.String(255), nullable=True)
 
     keys = db.Column(db.Text, nullable=True)
+    #: Casefolded library search fields; maintained by ``app.search_index``.
+    search_document = db.Column(db.Text, nullable=True)
     access_instructions = db.Column(db.Text, nullable=True)
     test_day = db.Column(db.String(255), nullable=True)
     display_address = db.Column(db.String(255), nullable=True)
@@ -1358,6 +1514,62 @@ class MonthlyLocationMonth(db.Model):
     )
 
 
+class MonthlyRouteMonthRollup(db.Model):
+    """
+    Per-route, per-month testing totals derived from ``monthly_location_month``.
+
+    Same attribution as the route detail history (stamped ``test_monthly_route_id`` wins,
+    unstamped legacy rows follow the site's current route). Maintained on flush by
+    ``app.monthly.route_month_rollup``; ``flask rebuild-route-month-rollup`` recomputes it.
+    """
+
+    __tablename__ = "monthly_route_month_rollup"
+
+    monthly_route_id = db.Column(
+        db.BigInteger,
+        db.ForeignKey("monthly_route.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    month_date = db.Column(db.Date, primary_key=True)
+    sites_tested_count = db.Column(db.Integer, nullable=False, default=0)
+    skipped_annual_count = db.Column(db.Integer, nullable=False, default=0)
+    skipped_non_annual_count = db.Column(db.Integer, nullable=False, default=0)
+    tested_revenue_total = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    tested_sites_missing_price_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(
+        db.DateTime(timezone=True),
+        server_default=db.func.now(),
+        onupdate=db.func.now(),
+        nullable=False,
+    )
+
+
+class MonthlyRouteAnnualScheduleSync(db.Model):
+    """
+    Freshness of the ServiceTrade annual flags cached on a route-month's
+    ``monthly_location_month`` rows.
+
+    Written by every route-level annual sync (nightly
+    ``sync_monthly_route_annual_schedules`` precompute or a live paperwork refresh).
+    Paperwork views serve the cached flags while ``synced_at`` is within the TTL.
+    """
+
+    __tablename__ = "monthly_route_annual_schedule_sync"
+
+    monthly_route_id = db.Column(
+        db.BigInteger,
+        db.ForeignKey("monthly_route.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    month_date = db.Column(db.Date, primary_key=True)
+    #: Last successful sync; ``None`` until one succeeds.
+    synced_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    last_attempt_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    last_error = db.Column(db.Text, nullable=True)
+    location_count = db.Column(db.Integer, nullable=True)
+    duration_ms = db.Column(db.Integer, nullable=True)
+
+
 class MonthlyStopClockEvent(db.Model):
     """One clock-in / clock-out pair for a portal worksheet location visit."""
 
@@ -1786,6 +1998,9 @@ class Key(db.Model):
 
     site_status = db.Column(db.String(255), nullable=True)
 
+    #: Casefolded keycode/barcode/address/etc.; maintained by ``app.search_index``.
+    search_document = db.Column(db.Text, nullable=True)
+
     addresses = relationship(
         "KeyAddress",
         back_populates="key",
@@ -1813,6 +2028,12 @@ class Key(db.Model):
 
     __table_args__ = (
         Index("ix_keys_route", "route"),
+        Index(
+            "ix_keys_search_document_trgm",
+            "search_document",
+            postgresql_using="gin",
+            postgresql_ops={"search_document": "gin_trgm_ops"},
+        ),
     )
 
 
@@ -2,7 +2,9 @@
 
 from __future__ import annotations
 
+import functools
 import hashlib
+import json
 import re
 from dataclasses import dataclass
 from datetime import datetime, timezone
@@ -35,26 +37,87 @@ def normalize_description(text: str | None) -> str:
     return collapsed
 
 
-def description_hash(text: str | None) -> str:
-    normalized = normalize_description(text)
+def _hash_normalized(normalized: str) -> str:
     return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
 
 
+def description_hash(text: str | None) -> str:
+    return _hash_normalized(normalize_description(text))
+
+
 def normalize_phrase(phrase: str) -> str:
     return normalize_description(phrase)
 
 
+def _needs_word_boundary(normalized_phrase: str) -> bool:
+    return len(normalized_phrase) <= WORD_BOUNDARY_PHRASE_MAX_LEN and normalized_phrase.isalnum()
+
+
 def phrase_matches(description: str | None, phrase: str) -> bool:
     normalized_desc = normalize_description(description)
     normalized_phrase = normalize_phrase(phrase)
     if not normalized_desc or not normalized_phrase:
         return False
-    if len(normalized_phrase) <= WORD_BOUNDARY_PHRASE_MAX_LEN and normalized_phrase.isalnum():
+    if _needs_word_boundary(normalized_phrase):
         pattern = rf"\b{re.escape(normalized_phrase)}\b"
         return re.search(pattern, normalized_desc) is not None
     return normalized_phrase in normalized_desc
 
 
+def phrase_set_version(phrases: Iterable[str]) -> str:
+    """Identity of an ordered denylist (order decides which phrase is reported as the match)."""
+    return _hash_normalized(json.dumps(list(phrases)))
+
+
+class PhraseMatcher:
+    """
+    A denylist compiled once, with the same rules as ``phrase_matches``.
+
+    One alternation regex over every normalized phrase screens each description in a single
+    scan. Only the descriptions it hits are checked phrase by phrase, which gives the first
+    matching phrase and the per-phrase tallies.
+    """
+
+    def __init__(self, phrases: Iterable[str]):
+        self.phrases = tuple(phrases)
+        self.version = phrase_set_version(self.phrases)
+        self._checks: list[tuple[str, str, re.Pattern | None]] = []
+        alternatives: list[str] = []
+        for phrase in self.phrases:
+            normalized = normalize_phrase(phrase)
+            if not normalized:
+                continue
+            pattern = None
+            if _needs_word_boundary(normalized):
+                pattern = re.compile(rf"\b{re.escape(normalized)}\b")
+                alternatives.append(pattern.pattern)
+            else:
+                alternatives.append(re.escape(normalized))
+            self._checks.append((phrase, normalized, pattern))
+        self._screen = re.compile("|".join(alternatives)) if alternatives else None
+
+    def matches(self, normalized_description: str) -> list[str]:
+        """Phrases found in an already-normalized description, in denylist order."""
+        if not normalized_description or self._screen is None:
+            return []
+        if self._screen.search(normalized_description) is None:
+            return []
+        return [
+            phrase
+            for phrase, normalized, pattern in self._checks
+            if (
+                pattern.search(normalized_description) is not None
+                if pattern is not None
+                else normalized in normalized_description
+            )
+        ]
+
+
+@functools.lru_cache(maxsize=16)
+def compile_phrase_matcher(phrases: tuple[str, ...]) -> PhraseMatcher:
+    return PhraseMatcher(phrases)
+
+
 def tally_phrase_matches(
     descriptions: Iterable[str | None],
     phrases: Iterable[str],
@@ -62,10 +125,10 @@ def tally_phrase_matches(
     """Count how many descriptions match each phrase (same rules as classification)."""
     phrase_list = list(phrases)
     counts = {phrase: 0 for phrase in phrase_list}
+    matcher = compile_phrase_matcher(tuple(phrase_list))
     for description in descriptions:
-        for phrase in phrase_list:
-            if phrase_matches(description, phrase):
-                counts[phrase] += 1
+        for phrase in matcher.matches(normalize_description(description)):
+            counts[phrase] += 1
     return counts
 
 
@@ -100,59 +163,41 @@ def _load_active_phrases() -> list[tuple[str, str]]:
     return [(row.phrase, row.label or row.phrase) for row in rows]
 
 
-def _match_keyword(
-    description: str | None, phrases: list[tuple[str, str]]
-) -> tuple[str, str] | None:
-    for phrase, label in phrases:
-        if phrase_matches(description, phrase):
-            return phrase, label
-    return None
-
-
 def compute_eligibility_records(
     deficiencies: list[DeficiencyInput],
     phrases: list[tuple[str, str]],
     *,
     classified_at: datetime,
+    tallies: dict[str, int] | None = None,
 ) -> list[dict]:
-    """Pure classification pass used by classify_all_deficiencies and unit tests."""
-    keyword_excluded: set[int] = set()
-    records: list[dict] = []
+    """Pure classification pass used by classify_all_deficiencies and unit tests.
 
-    for deficiency in deficiencies:
-        def_id = int(deficiency.deficiency_id)
-        desc_hash = description_hash(deficiency.description)
-
-        match = _match_keyword(deficiency.description, phrases)
-        if match is not None:
-            keyword_excluded.add(def_id)
-            records.append(
-                {
-                    "deficiency_id": def_id,
-                    "eligible": False,
-                    "reason": "keyword",
-                    "detail": match[0],
-                    "description_hash": desc_hash,
-                    "classified_at": classified_at,
-                }
-            )
+    Every description is normalized and hashed once and screened by the compiled matcher.
+    If ``tallies`` is given, it is updated with how many descriptions matched each phrase.
+    """
+    matcher = compile_phrase_matcher(tuple(phrase for phrase, _label in phrases))
+    keyword_records: list[dict] = []
+    eligible_records: list[dict] = []
 
     for deficiency in deficiencies:
         def_id = int(deficiency.deficiency_id)
-        if def_id in keyword_excluded:
-            continue
-        records.append(
-            {
-                "deficiency_id": def_id,
-                "eligible": True,
-                "reason": "eligible",
-                "detail": None,
-                "description_hash": description_hash(deficiency.description),
-                "classified_at": classified_at,
-            }
-        )
+        normalized = normalize_description(deficiency.description)
+        matched = matcher.matches(normalized)
+        if tallies is not None:
+            for phrase in matched:
+                tallies[phrase] = tallies.get(phrase, 0) + 1
+        record = {
+            "deficiency_id": def_id,
+            "eligible": not matched,
+            "reason": "keyword" if matched else "eligible",
+            "detail": matched[0] if matched else None,
+            "description_hash": _hash_normalized(normalized),
+            "phrase_set_version": matcher.version,
+            "classified_at": classified_at,
+        }
+        (keyword_records if matched else eligible_records).append(record)
 
-    return records
+    return keyword_records + eligible_records
 
 
 def summarize_eligibility_records(
@@ -171,30 +216,30 @@ def summarize_eligibility_records(
     }
 
 
-def classify_all_deficiencies(*, commit: bool = True) -> dict:
+def classify_all_deficiencies(
+    *, commit: bool = True, deficiency_ids: Iterable[int] | None = None
+) -> dict:
     """
     Full reclassification pass using the keyword denylist only.
-    Returns summary counts for logging and admin UI.
+
+    Rows already classified against the current phrase set whose description hash is
+    unchanged are kept as they are. A phrase edit changes the version and so reclassifies
+    everything. ``deficiency_ids`` limits the pass to those deficiencies (the rows an
+    incremental sync touched). Returns summary counts for logging and admin UI.
     """
     classified_at = datetime.now(timezone.utc)
 
-    deficiencies = Deficiency.query.all()
+    if deficiency_ids is None:
+        deficiencies = Deficiency.query.all()
+    else:
+        scope = {int(def_id) for def_id in deficiency_ids}
+        deficiencies = (
+            Deficiency.query.filter(Deficiency.deficiency_id.in_(scope)).all() if scope else []
+        )
     phrases = _load_active_phrases()
+    version = phrase_set_version(phrase for phrase, _label in phrases)
 
-    inputs = [
-        DeficiencyInput(
-            deficiency_id=int(row.deficiency_id),
-            description=row.description,
-            deficiency_created_on=row.deficiency_created_on,
-        )
-        for row in deficiencies
-    ]
-    records = compute_eligibility_records(
-        inputs,
-        phrases,
-        classified_at=classified_at,
-    )
-    def_ids = [int(record["deficiency_id"]) for record in records]
+    def_ids = [int(row.deficiency_id) for row in deficiencies]
     existing_by_id: dict[int, DeficiencyServiceEligibility] = {}
     if def_ids:
         existing_by_id = {
@@ -203,6 +248,33 @@ def classify_all_deficiencies(*, commit: bool = True) -> dict:
                 DeficiencyServiceEligibility.deficiency_id.in_(def_ids)
             ).all()
         }
+
+    inputs: list[DeficiencyInput] = []
+    unchanged: list[dict] = []
+    for deficiency in deficiencies:
+        def_id = int(deficiency.deficiency_id)
+        row = existing_by_id.get(def_id)
+        if (
+            row is not None
+            and not row.included_override
+            and row.phrase_set_version == version
+            and row.description_hash == description_hash(deficiency.description)
+        ):
+            unchanged.append({"deficiency_id": def_id, "reason": row.reason})
+            continue
+        inputs.append(
+            DeficiencyInput(
+                deficiency_id=def_id,
+                description=deficiency.description,
+                deficiency_created_on=deficiency.deficiency_created_on,
+            )
+        )
+
+    records = compute_eligibility_records(
+        inputs,
+        phrases,
+        classified_at=classified_at,
+    )
     for record in records:
         def_id = int(record["deficiency_id"])
         row = existing_by_id.get(def_id)
@@ -216,13 +288,18 @@ def classify_all_deficiencies(*, commit: bool = True) -> dict:
         row.reason = record["reason"]
         row.detail = record["detail"]
         row.description_hash = record["description_hash"]
+        row.phrase_set_version = record["phrase_set_version"]
         row.classified_at = record["classified_at"]
         row.included_override = False
 
     if commit:
         db.session.commit()
 
-    return summarize_eligibility_records(records, len(deficiencies), classified_at)
+    summary = summarize_eligibility_records(records + unchanged, len(deficiencies), classified_at)
+    summary["reclassified"] = len(records)
+    summary["skipped_unchanged"] = len(unchanged)
+    summary["phrase_set_version"] = version
+    return summary
 
 
 def classify_single_deficiency(
@@ -256,6 +333,7 @@ def classify_single_deficiency(
     row.reason = record["reason"]
     row.detail = record["detail"]
     row.description_hash = record["description_hash"]
+    row.phrase_set_version = record["phrase_set_version"]
     row.classified_at = record["classified_at"]
     row.included_override = False
     if commit:
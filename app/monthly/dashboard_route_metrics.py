@@ -2,11 +2,19 @@
 
 from __future__ import annotations
 
+from dataclasses import dataclass, field
 from datetime import date
 
-from sqlalchemy import func
+from sqlalchemy import and_, func, or_
 
-from app.db_models import MonthlyLocation, MonthlyRoute, MonthlyRouteRun, db
+from app.db_models import (
+    MonthlyLocation,
+    MonthlyLocationMonth,
+    MonthlyRoute,
+    MonthlyRouteRun,
+    MonthlyRouteRunTimingMonth,
+    db,
+)
 from app.monthly.route_expense_constants import (
     LABOUR_RATE_PER_HOUR,
     TRUCK_CHARGE_PER_MONTH,
@@ -15,9 +23,11 @@ from app.monthly.route_expense_constants import (
     is_avg_hours_capped_for_billing,
     serialize_cost_constants,
 )
+from app.monthly.route_month_rollup import route_month_rollup_by_route
 from app.monthly.route_run_timing import (
-    route_median_run_duration_minutes,
-    route_typical_end_time,
+    median_run_duration_from_rows,
+    timing_rows_by_route_for_window,
+    typical_end_time_from_rows,
 )
 from app.monthly.run_workflow import derive_run_workflow_stage, next_month_first
 from app.monthly.technician_demo_route import is_technician_demo_route
@@ -152,7 +162,7 @@ def resolve_breakdown_period(
     return period_start, as_of, month_keys, "Last 12 months"
 
 
-def _active_routes_excluding_demo() -> list[MonthlyRoute]:
+def _active_building_counts() -> dict[int, int]:
     count_rows = (
         db.session.query(
             MonthlyLocation.monthly_route_id,
@@ -165,7 +175,12 @@ def _active_routes_excluding_demo() -> list[MonthlyRoute]:
         .group_by(MonthlyLocation.monthly_route_id)
         .all()
     )
-    count_map: dict[int, int] = {int(mid): int(n) for mid, n in count_rows if mid is not None}
+    return {int(mid): int(n) for mid, n in count_rows if mid is not None}
+
+
+def _active_routes_excluding_demo(count_map: dict[int, int] | None = None) -> list[MonthlyRoute]:
+    if count_map is None:
+        count_map = _active_building_counts()
     routes = MonthlyRoute.query.order_by(MonthlyRoute.route_number.asc()).all()
     out: list[MonthlyRoute] = []
     for route in routes:
@@ -189,7 +204,10 @@ def _active_building_count(route_id: int) -> int:
 def _route_revenue_total(route_id: int, month_keys: set[str]) -> float:
     from app.routes.monthly_routes import _route_testing_by_month
 
-    testing_by_month = _route_testing_by_month(route_id)
+    return _revenue_total_from_testing(_route_testing_by_month(route_id), month_keys)
+
+
+def _revenue_total_from_testing(testing_by_month: dict[str, dict], month_keys: set[str]) -> float:
     total = 0.0
     for month_key in month_keys:
         cell = testing_by_month.get(month_key)
@@ -237,8 +255,18 @@ def _route_monthly_revenues(
 ) -> list[dict[str, object]]:
     from app.routes.monthly_routes import _route_testing_by_month, _runs_by_month_for_route
 
-    testing_by_month = _route_testing_by_month(route_id)
-    runs_by_month = _runs_by_month_for_route(route_id)
+    return _monthly_revenues_from_testing(
+        _route_testing_by_month(route_id),
+        _runs_by_month_for_route(route_id),
+        revenue_columns,
+    )
+
+
+def _monthly_revenues_from_testing(
+    testing_by_month: dict[str, dict],
+    runs_by_month: dict[str, dict[str, object]],
+    revenue_columns: list[dict[str, str]],
+) -> list[dict[str, object]]:
     entries: list[dict[str, object]] = []
     for column in revenue_columns:
         month_key = column["month_key"]
@@ -264,7 +292,13 @@ def _route_monthly_revenues(
 def _route_avg_monthly_revenue(route_id: int, month_keys: set[str]) -> tuple[float, int]:
     from app.routes.monthly_routes import _route_testing_by_month
 
-    testing_by_month = _route_testing_by_month(route_id)
+    return _avg_monthly_revenue_from_testing(_route_testing_by_month(route_id), month_keys)
+
+
+def _avg_monthly_revenue_from_testing(
+    testing_by_month: dict[str, dict],
+    month_keys: set[str],
+) -> tuple[float, int]:
     months_with_revenue = 0
     total = 0.0
     for month_key in month_keys:
@@ -325,6 +359,131 @@ def _route_period_fully_skipped(skipped_month_keys: set[str], month_keys: set[st
     return bool(month_keys) and month_keys <= skipped_month_keys
 
 
+@dataclass
+class DashboardRouteBatch:
+    """Everything the route earnings / breakdown tables read, loaded for all routes at once.
+
+    Replaces the per-route ``_route_testing_by_month`` / ``_runs_by_month_for_route`` /
+    timing / building-count lookups (O(routes × months) queries) with five grouped queries.
+    ``testing_by_route`` cells carry only ``tested_revenue_total`` (all these tables read), and
+    ``runs_by_route`` only ``workflow_stage`` / ``source``.
+    """
+
+    routes: list[MonthlyRoute]
+    building_counts: dict[int, int]
+    testing_by_route: dict[int, dict[str, dict]] = field(default_factory=dict)
+    runs_by_route: dict[int, dict[str, dict[str, object]]] = field(default_factory=dict)
+    timing_rows_by_route: dict[int, list[MonthlyRouteRunTimingMonth]] = field(default_factory=dict)
+
+    def testing_by_month(self, route_id: int) -> dict[str, dict]:
+        return self.testing_by_route.get(int(route_id), {})
+
+    def runs_by_month(self, route_id: int) -> dict[str, dict[str, object]]:
+        return self.runs_by_route.get(int(route_id), {})
+
+    def office_skipped_month_keys(self, route_id: int, month_keys: set[str]) -> set[str]:
+        """Same as :func:`_office_skipped_month_keys_by_route` for one route."""
+        return {
+            key
+            for key, run in self.runs_by_month(route_id).items()
+            if key in month_keys and run.get("workflow_stage") == "skipped"
+        }
+
+    def timing_rows(self, route_id: int) -> list[MonthlyRouteRunTimingMonth]:
+        return self.timing_rows_by_route.get(int(route_id), [])
+
+
+def _tested_revenue_by_route_month(
+    route_ids: list[int],
+    month_dates: list[date],
+) -> dict[int, dict[str, dict]]:
+    """Batched ``_route_testing_by_month`` revenue for ``route_ids`` limited to ``month_dates``.
+
+    Attribution matches the per-route helper: a row counts toward its stamped
+    ``test_monthly_route_id``; unstamped legacy rows count toward the site's current route.
+    Reads ``monthly_route_month_rollup`` when it exists.
+    """
+    from app.routes.monthly_routes import _history_row_outcome_bucket, _history_row_revenue_total
+
+    rollup = route_month_rollup_by_route(route_ids, month_dates)
+    if rollup is not None:
+        return rollup
+    out: dict[int, dict[str, dict]] = {route_id: {} for route_id in route_ids}
+    if not route_ids or not month_dates:
+        return out
+    rows = (
+        db.session.query(MonthlyLocationMonth, MonthlyLocation)
+        .outerjoin(MonthlyLocation, MonthlyLocation.id == MonthlyLocationMonth.monthly_location_id)
+        .filter(
+            MonthlyLocationMonth.month_date.in_(month_dates),
+            or_(
+                MonthlyLocationMonth.test_monthly_route_id.in_(route_ids),
+                and_(
+                    MonthlyLocationMonth.test_monthly_route_id.is_(None),
+                    MonthlyLocation.monthly_route_id.in_(route_ids),
+                ),
+            ),
+        )
+        .all()
+    )
+    for row, loc in rows:
+        if row.test_monthly_route_id is not None:
+            route_id = int(row.test_monthly_route_id)
+        else:
+            route_id = int(loc.monthly_route_id)
+        entry = out[route_id].setdefault(row.month_date.isoformat(), {"tested_revenue_total": 0.0})
+        bucket = _history_row_outcome_bucket(row)
+        revenue = _history_row_revenue_total(row, loc, outcome_bucket=bucket)
+        if revenue > 0:
+            entry["tested_revenue_total"] += revenue
+    return out
+
+
+def _run_stages_by_route_month(
+    route_ids: list[int],
+    month_dates: list[date],
+) -> dict[int, dict[str, dict[str, object]]]:
+    out: dict[int, dict[str, dict[str, object]]] = {route_id: {} for route_id in route_ids}
+    if not route_ids or not month_dates:
+        return out
+    runs = (
+        MonthlyRouteRun.query.filter(
+            MonthlyRouteRun.monthly_route_id.in_(route_ids),
+            MonthlyRouteRun.month_date.in_(month_dates),
+        )
+        .order_by(MonthlyRouteRun.monthly_route_id.asc(), MonthlyRouteRun.month_date.asc())
+        .all()
+    )
+    for run in runs:
+        out[int(run.monthly_route_id)][run.month_date.isoformat()] = {
+            "workflow_stage": derive_run_workflow_stage(run),
+            "source": run.source,
+        }
+    return out
+
+
+def load_dashboard_route_batch(
+    month_keys: set[str],
+    *,
+    include_runs: bool = True,
+    include_timing: bool = True,
+) -> DashboardRouteBatch:
+    building_counts = _active_building_counts()
+    routes = _active_routes_excluding_demo(building_counts)
+    route_ids = [int(route.id) for route in routes]
+    month_dates = sorted(date.fromisoformat(key) for key in month_keys)
+    batch = DashboardRouteBatch(
+        routes=routes,
+        building_counts=building_counts,
+        testing_by_route=_tested_revenue_by_route_month(route_ids, month_dates),
+    )
+    if include_runs:
+        batch.runs_by_route = _run_stages_by_route_month(route_ids, month_dates)
+    if include_timing:
+        batch.timing_rows_by_route = timing_rows_by_route_for_window(route_ids, month_keys)
+    return batch
+
+
 def build_dashboard_route_earnings(*, trailing_months: int = 12) -> dict[str, object]:
     from app.routes.monthly_routes import (
         _current_pacific_month_first,
@@ -334,11 +493,13 @@ def build_dashboard_route_earnings(*, trailing_months: int = 12) -> dict[str, ob
     end_month = _current_pacific_month_first()
     period_start, month_keys = _trailing_month_iso_keys(end_month, trailing_months)
 
+    batch = load_dashboard_route_batch(month_keys, include_runs=False)
+
     rows_payload: list[dict[str, object]] = []
-    for route in _active_routes_excluding_demo():
+    for route in batch.routes:
         route_id = int(route.id)
-        revenue_total = _route_revenue_total(route_id, month_keys)
-        typical_end_time, months_sampled = route_typical_end_time(route_id, month_keys)
+        revenue_total = _revenue_total_from_testing(batch.testing_by_month(route_id), month_keys)
+        typical_end_time, months_sampled = typical_end_time_from_rows(batch.timing_rows(route_id))
         rows_payload.append(
             {
                 "route": _serialize_monthly_route_entity(route),
@@ -393,21 +554,26 @@ def build_dashboard_route_breakdown(
     show_avg_monthly_revenue = range_key != BREAKDOWN_RANGE_LAST_MONTH
     show_total_revenue = show_avg_monthly_revenue
 
-    active_routes = _active_routes_excluding_demo()
-    route_ids = [int(route.id) for route in active_routes]
-    skipped_months_by_route = _office_skipped_month_keys_by_route(route_ids, month_keys)
+    column_keys = {column["month_key"] for column in revenue_columns}
+    batch = load_dashboard_route_batch(month_keys | column_keys)
 
     rows_payload: list[dict[str, object]] = []
-    for route in active_routes:
+    for route in batch.routes:
         route_id = int(route.id)
-        duration_minutes, hours_months = route_median_run_duration_minutes(route_id, month_keys)
+        testing_by_month = batch.testing_by_month(route_id)
+        timing_rows = [row for row in batch.timing_rows(route_id) if row.month_first.isoformat() in month_keys]
+        duration_minutes, hours_months = median_run_duration_from_rows(timing_rows)
         avg_hours = round(duration_minutes / 60.0, 1) if duration_minutes is not None else None
         avg_hours_billed = billed_avg_hours(avg_hours)
-        avg_monthly_revenue, revenue_months = _route_avg_monthly_revenue(route_id, month_keys)
-        monthly_revenues = _route_monthly_revenues(route_id, revenue_columns)
+        avg_monthly_revenue, revenue_months = _avg_monthly_revenue_from_testing(testing_by_month, month_keys)
+        monthly_revenues = _monthly_revenues_from_testing(
+            testing_by_month,
+            batch.runs_by_month(route_id),
+            revenue_columns,
+        )
         tech_count = effective_tech_count(route)
         period_fully_skipped = _route_period_fully_skipped(
-            skipped_months_by_route.get(route_id, set()),
+            batch.office_skipped_month_keys(route_id, month_keys),
             month_keys,
         )
         if period_fully_skipped and hours_months == 0:
@@ -431,7 +597,7 @@ def build_dashboard_route_breakdown(
         rows_payload.append(
             {
                 "route": _serialize_monthly_route_entity(route),
-                "building_count": _active_building_count(route_id),
+                "building_count": batch.building_counts.get(route_id, 0),
                 "avg_hours": avg_hours,
                 "avg_hours_billed": avg_hours_billed,
                 "avg_hours_capped_for_billing": is_avg_hours_capped_for_billing(avg_hours),
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+from datetime import date
+
 from sqlalchemy.orm import joinedload
 
 from app.db_models import MonthlyLocation, MonthlyRoute, MonthlyRouteCalculatedPath, db
@@ -23,6 +25,7 @@ from app.monthly.location_monitoring import location_has_monitoring
 from app.monthly.mapbox_routes import MAPBOX_DIRECTIONS_PROFILE
 from app.monthly.route_expense_constants import effective_tech_count
 from app.monthly.route_field_timing import route_median_field_timing
+from app.monthly.route_month_rollup import route_month_rollup_by_route
 from app.monthly.route_run_timing import route_median_run_duration_minutes
 
 MAPBOX_PROFILE_DRIVING = MAPBOX_DIRECTIONS_PROFILE
@@ -163,13 +166,20 @@ def build_dashboard_route_performance(
     active_routes = _active_routes_excluding_demo()
     route_ids = [int(route.id) for route in active_routes]
     skipped_months_by_route = _office_skipped_month_keys_by_route(route_ids, month_keys)
+    rollup_by_route = route_month_rollup_by_route(
+        route_ids,
+        [date.fromisoformat(key) for key in month_keys],
+    )
     calculated_paths = _calculated_paths_by_route(route_ids)
     monitoring_counts = _monitoring_counts_by_route(route_ids)
 
     rows_payload: list[dict[str, object]] = []
     for route in active_routes:
         route_id = int(route.id)
-        testing_by_month = _route_testing_by_month(route_id)
+        if rollup_by_route is not None:
+            testing_by_month = rollup_by_route[route_id]
+        else:
+            testing_by_month = _route_testing_by_month(route_id)
         skipped_non_annual, skipped_months_sampled = _skipped_non_annual_for_range(
             testing_by_month,
             month_keys,
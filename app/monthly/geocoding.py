@@ -0,0 +1,464 @@
+"""Mapbox geocoding for monthly locations, behind the persistent ``mapbox_geocode_cache``.
+
+Request paths only read the cache: ``apply_cached_coordinates`` fills library rows from it and
+``geocode_candidates`` answers repeated address-picker lookups. Stops that are still missing
+coordinates go through ``geocode_locations``, which checks the cache first and then sends each
+distinct uncached query to Mapbox, a few at a time. It runs inline for an explicit "geocode"
+action, or on a background thread via ``start_background_geocode``. Poll
+``geocode_batch_progress`` to follow a background run.
+
+Matches are cached for ``MAPBOX_GEOCODE_CACHE_TTL_DAYS``. "Not found in Greater Victoria"
+answers are cached for ``MAPBOX_GEOCODE_MISS_TTL_HOURS``, so an address that Mapbox learns
+later is picked up soon. Transport errors are never cached. Until the table exists (before the
+migration, and in most SQLite tests) every lookup is a miss and nothing is stored.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+from typing import Iterable
+from urllib import parse as url_parse, request as url_request
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.db_models import MapboxGeocodeCache, MonthlyLocation, db, table_available
+
+logger = logging.getLogger(__name__)
+
+VICTORIA_PROXIMITY_LNG = -123.3656
+VICTORIA_PROXIMITY_LAT = 48.4284
+# Approx Greater Victoria bounding box: west,south,east,north
+VICTORIA_BBOX = (-123.75, 48.25, -123.10, 48.75)
+VICTORIA_MAX_DISTANCE_KM = 80.0
+
+GEOCODE_KIND_ADDRESS = "address"
+GEOCODE_KIND_CANDIDATES = "candidates"
+GEOCODE_CANDIDATE_LIMIT = 6
+MAPBOX_GEOCODE_DEFAULT_WORKERS = 4
+GEOCODE_CACHE_DEFAULT_TTL_DAYS = 90
+GEOCODE_MISS_DEFAULT_TTL_HOURS = 24
+_CACHE_LOOKUP_CHUNK = 500
+
+_GEOCODE_ENDPOINT = "https://api.mapbox.com/geocoding/v5/mapbox.places/"
+_USER_AGENT = "schedule-assist-monthly-routes/1.0"
+
+_batches: dict[str, "GeocodeBatchProgress"] = {}
+_batches_lock = threading.Lock()
+
+
+def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    r = 6371.0
+    d_lat = math.radians(lat2 - lat1)
+    d_lon = math.radians(lon2 - lon1)
+    a = (
+        math.sin(d_lat / 2) ** 2
+        + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(d_lon / 2) ** 2
+    )
+    return 2 * r * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def is_victoria_area(lat: float, lng: float) -> bool:
+    west, south, east, north = VICTORIA_BBOX
+    if west <= lng <= east and south <= lat <= north:
+        return True
+    return _haversine_km(VICTORIA_PROXIMITY_LAT, VICTORIA_PROXIMITY_LNG, lat, lng) <= VICTORIA_MAX_DISTANCE_KM
+
+
+def build_geocode_query(loc: MonthlyLocation) -> str:
+    parts = [loc.address, loc.label, loc.property_management_company]
+    tokens = [str(part).strip() for part in parts if part and str(part).strip()]
+    tokens.append("Victoria, BC, Canada")
+    return ", ".join(tokens)
+
+
+def normalize_geocode_query(query: str) -> str:
+    """Cache identity for a query: case-folded with whitespace collapsed."""
+    return " ".join(str(query).casefold().split())
+
+
+def _query_key(normalized: str) -> str:
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def geocode_workers() -> int:
+    try:
+        return max(1, int(os.getenv("MAPBOX_GEOCODE_WORKERS") or MAPBOX_GEOCODE_DEFAULT_WORKERS))
+    except ValueError:
+        return MAPBOX_GEOCODE_DEFAULT_WORKERS
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return max(0.0, float(os.getenv(name) or default))
+    except ValueError:
+        return default
+
+
+def _cache_ttl() -> timedelta:
+    return timedelta(days=_env_float("MAPBOX_GEOCODE_CACHE_TTL_DAYS", GEOCODE_CACHE_DEFAULT_TTL_DAYS))
+
+
+def _miss_ttl() -> timedelta:
+    return timedelta(hours=_env_float("MAPBOX_GEOCODE_MISS_TTL_HOURS", GEOCODE_MISS_DEFAULT_TTL_HOURS))
+
+
+# --- Mapbox -----------------------------------------------------------------
+
+
+def _mapbox_features(query: str, access_token: str, *, limit: int, autocomplete: bool) -> list | None:
+    """Raw Mapbox features; ``None`` when the request itself failed (not cacheable)."""
+    url = (
+        f"{_GEOCODE_ENDPOINT}{url_parse.quote(query)}.json"
+        f"?access_token={url_parse.quote(access_token)}"
+        f"&limit={limit}&autocomplete={'true' if autocomplete else 'false'}&country=ca&types=address"
+        f"&proximity={VICTORIA_PROXIMITY_LNG},{VICTORIA_PROXIMITY_LAT}"
+        f"&bbox={VICTORIA_BBOX[0]},{VICTORIA_BBOX[1]},{VICTORIA_BBOX[2]},{VICTORIA_BBOX[3]}"
+    )
+    req = url_request.Request(url, headers={"User-Agent": _USER_AGENT})
+    try:
+        with url_request.urlopen(req, timeout=8) as response:
+            payload = json.loads(response.read().decode("utf-8"))
+    except (OSError, ValueError):
+        # ``URLError``/timeouts/dropped connections are ``OSError``; bad JSON is ``ValueError``.
+        return None
+    features = payload.get("features") if isinstance(payload, dict) else None
+    return features if isinstance(features, list) else []
+
+
+def _feature_coordinates(feature: object) -> tuple[float, float] | None:
+    center = feature.get("center") if isinstance(feature, dict) else None
+    if (
+        not isinstance(center, list)
+        or len(center) < 2
+        or not isinstance(center[0], (int, float))
+        or not isinstance(center[1], (int, float))
+    ):
+        return None
+    lat, lng = float(center[1]), float(center[0])
+    if not is_victoria_area(lat, lng):
+        return None
+    return (lat, lng)
+
+
+def serialize_geocode_candidate(feature: dict[str, object]) -> dict[str, object] | None:
+    place_name = feature.get("place_name")
+    coords = _feature_coordinates(feature)
+    if coords is None or not isinstance(place_name, str):
+        return None
+    return {
+        "display_address": place_name,
+        "latitude": coords[0],
+        "longitude": coords[1],
+    }
+
+
+def _fetch_address(query: str, access_token: str) -> tuple[bool, tuple[float, float] | None]:
+    """``(answered, coordinates)``: ``answered`` is false when Mapbox could not be reached."""
+    features = _mapbox_features(query, access_token, limit=1, autocomplete=False)
+    if features is None:
+        return False, None
+    return True, (_feature_coordinates(features[0]) if features else None)
+
+
+# --- Cache ------------------------------------------------------------------
+
+
+def _cache_available() -> bool:
+    """Whether ``mapbox_geocode_cache`` exists (pre-migration DBs, most SQLite tests)."""
+    return table_available(MapboxGeocodeCache.__tablename__)
+
+
+def _row_coordinates(row: MapboxGeocodeCache) -> tuple[float, float] | None:
+    if row.latitude is None or row.longitude is None:
+        return None
+    return (float(row.latitude), float(row.longitude))
+
+
+def _row_is_miss(row: MapboxGeocodeCache) -> bool:
+    if row.kind == GEOCODE_KIND_CANDIDATES:
+        return not row.candidates
+    return _row_coordinates(row) is None
+
+
+def _load_cached(kind: str, normalized_queries: Iterable[str]) -> dict[str, MapboxGeocodeCache]:
+    """Fresh cache rows by normalized query."""
+    if not _cache_available():
+        return {}
+    by_key = {_query_key(query): query for query in normalized_queries}
+    if not by_key:
+        return {}
+    now = datetime.now(timezone.utc)
+    hit_cutoff, miss_cutoff = now - _cache_ttl(), now - _miss_ttl()
+    keys = list(by_key)
+    fresh: dict[str, MapboxGeocodeCache] = {}
+    for start in range(0, len(keys), _CACHE_LOOKUP_CHUNK):
+        rows = MapboxGeocodeCache.query.filter(
+            MapboxGeocodeCache.kind == kind,
+            MapboxGeocodeCache.query_key.in_(keys[start : start + _CACHE_LOOKUP_CHUNK]),
+        ).all()
+        for row in rows:
+            fetched_at = row.fetched_at
+            if fetched_at is not None and fetched_at.tzinfo is None:
+                fetched_at = fetched_at.replace(tzinfo=timezone.utc)
+            cutoff = miss_cutoff if _row_is_miss(row) else hit_cutoff
+            if fetched_at is not None and fetched_at >= cutoff:
+                fresh[by_key[row.query_key]] = row
+    return fresh
+
+
+def _store_cached(kind: str, answers: dict[str, dict[str, object]]) -> None:
+    """Upsert ``{normalized_query: {latitude, longitude, candidates}}`` on its own connection."""
+    if not answers or not _cache_available():
+        return
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "kind": kind,
+            "query_key": _query_key(query),
+            "query_text": query,
+            "latitude": answer.get("latitude"),
+            "longitude": answer.get("longitude"),
+            "candidates": answer.get("candidates"),
+            "fetched_at": now,
+        }
+        for query, answer in answers.items()
+    ]
+    table = MapboxGeocodeCache.__table__
+    try:
+        with db.engine.begin() as conn:
+            insert = pg_insert if conn.dialect.name == "postgresql" else sqlite_insert
+            stmt = insert(table).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.kind, table.c.query_key],
+                set_={
+                    "latitude": stmt.excluded.latitude,
+                    "longitude": stmt.excluded.longitude,
+                    "candidates": stmt.excluded.candidates,
+                    "fetched_at": stmt.excluded.fetched_at,
+                },
+            )
+            conn.execute(stmt)
+    except SQLAlchemyError:
+        logger.warning("Could not store %d Mapbox geocode answers", len(rows), exc_info=True)
+
+
+def _address_answer(coords: tuple[float, float] | None) -> dict[str, object]:
+    return {"latitude": coords[0] if coords else None, "longitude": coords[1] if coords else None}
+
+
+def geocode_address(query: str, access_token: str) -> tuple[float, float] | None:
+    """Single best Greater Victoria match for ``query``, served from the cache when fresh."""
+    normalized = normalize_geocode_query(query)
+    cached = _load_cached(GEOCODE_KIND_ADDRESS, [normalized]).get(normalized)
+    if cached is not None:
+        return _row_coordinates(cached)
+    answered, coords = _fetch_address(query, access_token)
+    if answered:
+        _store_cached(GEOCODE_KIND_ADDRESS, {normalized: _address_answer(coords)})
+    return coords
+
+
+def geocode_candidates(query: str, access_token: str) -> list[dict[str, object]]:
+    """Autocomplete candidates for the address pickers, served from the cache when fresh."""
+    normalized = normalize_geocode_query(query)
+    cached = _load_cached(GEOCODE_KIND_CANDIDATES, [normalized]).get(normalized)
+    if cached is not None:
+        return list(cached.candidates or [])
+    features = _mapbox_features(query, access_token, limit=GEOCODE_CANDIDATE_LIMIT, autocomplete=True)
+    if features is None:
+        return []
+    candidates = [
+        candidate
+        for candidate in (
+            serialize_geocode_candidate(feature) for feature in features if isinstance(feature, dict)
+        )
+        if candidate
+    ]
+    _store_cached(GEOCODE_KIND_CANDIDATES, {normalized: {"candidates": candidates}})
+    return candidates
+
+
+def _missing_coordinates(locations: Iterable[MonthlyLocation]) -> list[MonthlyLocation]:
+    return [loc for loc in locations if loc.latitude is None or loc.longitude is None]
+
+
+def apply_cached_coordinates(locations: list[MonthlyLocation]) -> list[MonthlyLocation]:
+    """Fill missing coordinates from cached matches (no Mapbox calls).
+
+    Returns the locations whose query is not cached at all; cached misses are left alone.
+    """
+    missing = _missing_coordinates(locations)
+    if not missing:
+        return []
+    queries = {int(loc.id): normalize_geocode_query(build_geocode_query(loc)) for loc in missing}
+    cached = _load_cached(GEOCODE_KIND_ADDRESS, set(queries.values()))
+    uncached: list[MonthlyLocation] = []
+    for loc in missing:
+        row = cached.get(queries[int(loc.id)])
+        if row is None:
+            uncached.append(loc)
+            continue
+        coords = _row_coordinates(row)
+        if coords is not None:
+            loc.latitude, loc.longitude = coords
+    return uncached
+
+
+# --- Batches ----------------------------------------------------------------
+
+
+@dataclass
+class GeocodeBatchProgress:
+    """Progress of one ``geocode_locations`` run. Only the thread running the batch writes it."""
+
+    key: str
+    total: int = 0
+    done: int = 0
+    updated: int = 0
+    cache_hits: int = 0
+    requests: int = 0
+    failed_location_ids: list[int] = field(default_factory=list)
+    status: str = "running"
+    error: str | None = None
+    started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: datetime | None = None
+
+    def to_dict(self) -> dict[str, object]:
+        return {
+            "key": self.key,
+            "status": self.status,
+            "total": self.total,
+            "done": self.done,
+            "updated": self.updated,
+            "cache_hits": self.cache_hits,
+            "requests": self.requests,
+            "failed_location_ids": list(self.failed_location_ids),
+            "error": self.error,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+def geocode_locations(
+    locations: list[MonthlyLocation],
+    access_token: str,
+    *,
+    progress: GeocodeBatchProgress | None = None,
+    max_workers: int | None = None,
+) -> GeocodeBatchProgress:
+    """Fill missing coordinates on ``locations`` in place; the caller commits.
+
+    Stops sharing a query (same address/label/PM) cost one lookup. Cached answers are applied
+    first; the remaining distinct queries go to Mapbox on up to ``max_workers`` threads (HTTP
+    only; ORM objects are only touched on the calling thread).
+    """
+    progress = progress or GeocodeBatchProgress(key="inline")
+    missing = _missing_coordinates(locations)
+    progress.total = len(missing)
+    by_query: dict[str, list[MonthlyLocation]] = {}
+    raw_queries: dict[str, str] = {}
+    for loc in missing:
+        query = build_geocode_query(loc)
+        normalized = normalize_geocode_query(query)
+        by_query.setdefault(normalized, []).append(loc)
+        raw_queries.setdefault(normalized, query)
+
+    def settle(normalized: str, coords: tuple[float, float] | None) -> None:
+        for loc in by_query[normalized]:
+            if coords is not None:
+                loc.latitude, loc.longitude = coords
+                progress.updated += 1
+            else:
+                progress.failed_location_ids.append(int(loc.id))
+            progress.done += 1
+
+    cached = _load_cached(GEOCODE_KIND_ADDRESS, by_query)
+    pending: list[str] = []
+    for normalized, stops in by_query.items():
+        row = cached.get(normalized)
+        if row is None:
+            pending.append(normalized)
+            continue
+        progress.cache_hits += len(stops)
+        settle(normalized, _row_coordinates(row))
+    if not pending:
+        return progress
+
+    answers: dict[str, dict[str, object]] = {}
+    workers = min(max_workers or geocode_workers(), len(pending))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mapbox-geocode") as pool:
+        futures = {
+            pool.submit(_fetch_address, raw_queries[normalized], access_token): normalized
+            for normalized in pending
+        }
+        for future in as_completed(futures):
+            normalized = futures[future]
+            answered, coords = future.result()
+            progress.requests += 1
+            if answered:
+                answers[normalized] = _address_answer(coords)
+            settle(normalized, coords)
+    _store_cached(GEOCODE_KIND_ADDRESS, answers)
+    return progress
+
+
+def geocode_batch_progress(key: str) -> GeocodeBatchProgress | None:
+    with _batches_lock:
+        return _batches.get(key)
+
+
+def start_background_geocode(
+    app,
+    key: str,
+    location_ids: Iterable[int],
+    access_token: str,
+) -> GeocodeBatchProgress:
+    """Geocode ``location_ids`` on a daemon thread; one running batch per ``key``.
+
+    A second request for a key that is still running gets the running batch's progress, and
+    its ids are not added. Stops still uncached after that batch are picked up by the next
+    request.
+    """
+    ids = sorted({int(location_id) for location_id in location_ids})
+    with _batches_lock:
+        current = _batches.get(key)
+        if current is not None and current.status == "running":
+            return current
+        progress = GeocodeBatchProgress(key=key, total=len(ids))
+        _batches[key] = progress
+
+    def runner() -> None:
+        from app.monthly.mapbox_routes import invalidate_monthly_route_path
+
+        try:
+            with app.app_context():
+                try:
+                    locations = MonthlyLocation.query.filter(MonthlyLocation.id.in_(ids)).all()
+                    geocode_locations(locations, access_token, progress=progress)
+                    for route_id in {
+                        loc.monthly_route_id for loc in locations if loc.latitude is not None
+                    }:
+                        invalidate_monthly_route_path(route_id)
+                    db.session.commit()
+                    progress.status = "done"
+                finally:
+                    db.session.remove()
+        except Exception as exc:
+            progress.status = "error"
+            progress.error = str(exc)
+            app.logger.exception("Background geocoding %s failed", key)
+        finally:
+            progress.finished_at = datetime.now(timezone.utc)
+
+    threading.Thread(target=runner, daemon=True, name=f"geocode-{key}").start()
+    return progress
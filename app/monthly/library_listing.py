@@ -0,0 +1,99 @@
+"""Keyset cursors for ``GET /api/monthly_routes/library``.
+
+Library listings sort by ``(address, id)``, or ``(route_stop_order NULLS LAST, address, id)``
+when filtered to one route. A cursor is the sort key of the last row on the previous page
+(URL-safe base64 JSON), so the next page is an index range scan instead of an ``OFFSET``
+over everything before it. Cursors remember which ordering produced them; replaying one
+against the other ordering is rejected.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from itertools import islice
+from typing import Iterator
+
+from sqlalchemy import and_, or_
+
+from app.db_models import MonthlyLocation
+
+#: Rows per ``yield_per`` batch / NDJSON ``locations`` line when streaming the library.
+LIBRARY_STREAM_BATCH_SIZE = 500
+
+
+@dataclass(frozen=True)
+class LibraryCursor:
+    by_stop_order: bool
+    route_stop_order: int | None
+    address: str
+    id: int
+
+
+def library_order_by(*, by_stop_order: bool) -> list:
+    if by_stop_order:
+        return [
+            MonthlyLocation.route_stop_order.asc().nulls_last(),
+            MonthlyLocation.address.asc(),
+            MonthlyLocation.id.asc(),
+        ]
+    return [MonthlyLocation.address.asc(), MonthlyLocation.id.asc()]
+
+
+def encode_library_cursor(loc: MonthlyLocation, *, by_stop_order: bool) -> str:
+    key: list[object] = [loc.address or "", int(loc.id)]
+    if by_stop_order:
+        key.insert(0, loc.route_stop_order)
+    raw = json.dumps({"s": int(by_stop_order), "k": key}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_library_cursor(token: str, *, by_stop_order: bool) -> LibraryCursor | None:
+    """Parse a cursor for the requested ordering; ``None`` when malformed or mismatched."""
+    try:
+        padded = token.strip() + "=" * (-len(token.strip()) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if bool(data["s"]) != by_stop_order:
+            return None
+        key = list(data["k"])
+        stop_order = key.pop(0) if by_stop_order else None
+        address, row_id = key
+        if stop_order is not None:
+            stop_order = int(stop_order)
+        return LibraryCursor(by_stop_order, stop_order, str(address), int(row_id))
+    except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError, IndexError):
+        return None
+
+
+def library_keyset_after(cursor: LibraryCursor):
+    """Predicate for rows strictly after ``cursor`` in ``library_order_by`` order."""
+    address_id_after = or_(
+        MonthlyLocation.address > cursor.address,
+        and_(MonthlyLocation.address == cursor.address, MonthlyLocation.id > cursor.id),
+    )
+    if not cursor.by_stop_order:
+        return address_id_after
+    stop_order = MonthlyLocation.route_stop_order
+    if cursor.route_stop_order is None:
+        return and_(stop_order.is_(None), address_id_after)
+    return or_(
+        stop_order > cursor.route_stop_order,
+        and_(stop_order == cursor.route_stop_order, address_id_after),
+        stop_order.is_(None),
+    )
+
+
+def iter_library_batches(
+    ordered_query,
+    batch_size: int | None = None,
+) -> Iterator[list[MonthlyLocation]]:
+    """Stream ``ordered_query`` with ``yield_per`` in lists of ``batch_size`` rows."""
+    batch_size = batch_size or LIBRARY_STREAM_BATCH_SIZE
+    rows = iter(ordered_query.yield_per(batch_size))
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
@@ -1,23 +1,34 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 import hashlib
 import json
+import logging
 import os
 from urllib import error as url_error, parse as url_parse, request as url_request
 
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
 from app.db_models import (
+    MapboxDirectionsLeg,
     MonthlyLocation,
     MonthlyRouteCalculatedPath,
     db,
+    table_available,
 )
 
+logger = logging.getLogger(__name__)
 
 MAPBOX_DIRECTIONS_PROFILE = "driving"
 MAPBOX_DIRECTIONS_PROVIDER = "mapbox"
 MAPBOX_DIRECTIONS_MAX_WAYPOINTS = 25
+MAPBOX_DIRECTIONS_DEFAULT_WORKERS = 4
+MAPBOX_LEG_CACHE_DEFAULT_MAX_AGE_DAYS = 30
+
 
 
 class MapboxRouteError(RuntimeError):
@@ -137,6 +148,7 @@ def calculated_path_payload(
             "distance_meters": cache.distance_meters,
             "duration_seconds": cache.duration_seconds,
             "calculated_at": cache.calculated_at.isoformat() if cache.calculated_at else None,
+            "provider_response_summary": cache.provider_response_summary,
         }
 
     access_token = os.getenv("MAPBOX_ACCESS_TOKEN")
@@ -152,7 +164,12 @@ def calculated_path_payload(
         }
 
     try:
-        result = _directions_for_locations(valid_locations, access_token, profile=profile)
+        result = _directions_for_locations(
+            valid_locations,
+            access_token,
+            profile=profile,
+            use_leg_cache=not refresh,
+        )
     except MapboxRouteError as exc:
         return {
             **base_payload,
@@ -184,6 +201,7 @@ def calculated_path_payload(
         "distance_meters": cache.distance_meters,
         "duration_seconds": cache.duration_seconds,
         "calculated_at": cache.calculated_at.isoformat() if cache.calculated_at else None,
+        "provider_response_summary": cache.provider_response_summary,
     }
 
 
@@ -253,30 +271,242 @@ def _apply_calculated_path_values(
     cache.calculated_at = calculated_at
 
 
+@dataclass(frozen=True)
+class _PathSegment:
+    """Driven geometry from waypoint ``start`` to waypoint ``end`` (one leg or a whole chunk)."""
+
+    start: int
+    end: int
+    coordinates: list
+    distance: float
+    duration: float
+
+
+def _directions_workers() -> int:
+    try:
+        return max(1, int(os.getenv("MAPBOX_DIRECTIONS_WORKERS") or MAPBOX_DIRECTIONS_DEFAULT_WORKERS))
+    except ValueError:
+        return MAPBOX_DIRECTIONS_DEFAULT_WORKERS
+
+
+def _leg_cache_max_age() -> timedelta:
+    try:
+        days = float(os.getenv("MAPBOX_LEG_CACHE_MAX_AGE_DAYS") or MAPBOX_LEG_CACHE_DEFAULT_MAX_AGE_DAYS)
+    except ValueError:
+        days = MAPBOX_LEG_CACHE_DEFAULT_MAX_AGE_DAYS
+    return timedelta(days=max(0.0, days))
+
+
+def _leg_cache_available() -> bool:
+    """Whether ``mapbox_directions_leg`` exists (pre-migration DBs, most SQLite tests)."""
+    return table_available(MapboxDirectionsLeg.__tablename__)
+
+
+def _leg_key(origin: MonthlyLocation, destination: MonthlyLocation) -> str:
+    return ";".join(
+        f"{_rounded_coordinate(loc.longitude):.6f},{_rounded_coordinate(loc.latitude):.6f}"
+        for loc in (origin, destination)
+    )
+
+
+def _load_cached_legs(profile: str, leg_keys: list[str]) -> dict[str, MapboxDirectionsLeg]:
+    cutoff = datetime.now(timezone.utc) - _leg_cache_max_age()
+    rows = MapboxDirectionsLeg.query.filter(
+        MapboxDirectionsLeg.profile == profile,
+        MapboxDirectionsLeg.leg_key.in_(set(leg_keys)),
+    ).all()
+    fresh: dict[str, MapboxDirectionsLeg] = {}
+    for row in rows:
+        fetched_at = row.fetched_at
+        if fetched_at is not None and fetched_at.tzinfo is None:
+            fetched_at = fetched_at.replace(tzinfo=timezone.utc)
+        if fetched_at is not None and fetched_at >= cutoff:
+            fresh[row.leg_key] = row
+    return fresh
+
+
+def _store_legs(profile: str, legs: dict[str, _PathSegment]) -> None:
+    """Upsert fetched legs on their own connection, independent of the path cache commit."""
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "profile": profile,
+            "leg_key": key,
+            "coordinates": leg.coordinates,
+            "distance_meters": leg.distance,
+            "duration_seconds": leg.duration,
+            "fetched_at": now,
+        }
+        for key, leg in legs.items()
+    ]
+    table = MapboxDirectionsLeg.__table__
+    try:
+        with db.engine.begin() as conn:
+            insert = pg_insert if conn.dialect.name == "postgresql" else sqlite_insert
+            stmt = insert(table).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.profile, table.c.leg_key],
+                set_={
+                    "coordinates": stmt.excluded.coordinates,
+                    "distance_meters": stmt.excluded.distance_meters,
+                    "duration_seconds": stmt.excluded.duration_seconds,
+                    "fetched_at": stmt.excluded.fetched_at,
+                },
+            )
+            conn.execute(stmt)
+    except SQLAlchemyError:
+        logger.warning("Could not store %d Mapbox directions legs", len(rows), exc_info=True)
+
+
+def _consecutive_runs(indexes: list[int]) -> list[tuple[int, int]]:
+    """``[1, 2, 3, 7, 8]`` → ``[(1, 3), (7, 8)]`` (inclusive)."""
+    runs: list[tuple[int, int]] = []
+    for index in indexes:
+        if runs and runs[-1][1] == index - 1:
+            runs[-1] = (runs[-1][0], index)
+        else:
+            runs.append((index, index))
+    return runs
+
+
+def _route_coordinates(geometry: object) -> list | None:
+    coords = geometry.get("coordinates") if isinstance(geometry, dict) else None
+    return coords if isinstance(coords, list) else None
+
+
+def _chunk_segment(route: dict[str, object], start: int, end: int) -> _PathSegment:
+    coords = _route_coordinates(route.get("geometry"))
+    if not coords:
+        raise MapboxRouteError("Mapbox response did not include route geometry.")
+    return _PathSegment(
+        start=start,
+        end=end,
+        coordinates=coords,
+        distance=float(route.get("distance") or 0),
+        duration=float(route.get("duration") or 0),
+    )
+
+
+def _leg_segments(route: dict[str, object], start: int, waypoint_count: int) -> list[_PathSegment] | None:
+    """Per-leg geometry from step geometries, or ``None`` when the response lacks it."""
+    legs = route.get("legs")
+    if not isinstance(legs, list) or len(legs) != waypoint_count - 1:
+        return None
+    segments: list[_PathSegment] = []
+    for offset, leg in enumerate(legs):
+        if not isinstance(leg, dict) or not isinstance(leg.get("steps"), list):
+            return None
+        coords: list = []
+        for step in leg["steps"]:
+            points = _route_coordinates(step.get("geometry") if isinstance(step, dict) else None)
+            if points is None:
+                return None
+            for point in points:
+                if not coords or coords[-1] != point:
+                    coords.append(point)
+        if not coords:
+            return None
+        if len(coords) == 1:
+            # Consecutive stops at the same spot: zero-length leg.
+            coords = [coords[0], coords[0]]
+        segments.append(
+            _PathSegment(
+                start=start + offset,
+                end=start + offset + 1,
+                coordinates=coords,
+                distance=float(leg.get("distance") or 0),
+                duration=float(leg.get("duration") or 0),
+            )
+        )
+    return segments
+
+
+def _request_chunks(
+    chunks: list[list[MonthlyLocation]],
+    access_token: str,
+    *,
+    profile: str,
+) -> list[dict[str, object]]:
+    """Directions for every chunk, requested concurrently, returned in chunk order."""
+
+    def fetch(chunk: list[MonthlyLocation]) -> dict[str, object]:
+        return _request_mapbox_directions(chunk, access_token, profile=profile)
+
+    if len(chunks) <= 1:
+        return [fetch(chunk) for chunk in chunks]
+    workers = min(len(chunks), _directions_workers())
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mapbox-directions") as pool:
+        return list(pool.map(fetch, chunks))
+
+
 def _directions_for_locations(
     locations: list[MonthlyLocation],
     access_token: str,
     *,
     profile: str,
+    use_leg_cache: bool = True,
 ) -> dict[str, object]:
+    """Route geometry through ``locations`` from cached legs plus fresh Mapbox chunks.
+
+    Only maximal runs of uncached legs are requested (split into overlapping
+    ``MAPBOX_DIRECTIONS_MAX_WAYPOINTS`` chunks and fetched concurrently); their legs are then
+    cached by rounded coordinate pair + profile. ``use_leg_cache=False`` refetches every leg.
+    """
+    leg_keys = [_leg_key(locations[i], locations[i + 1]) for i in range(len(locations) - 1)]
+    cache_available = _leg_cache_available()
+    cached = _load_cached_legs(profile, leg_keys) if use_leg_cache and cache_available else {}
+
+    segments: dict[int, _PathSegment] = {}
+    for index, key in enumerate(leg_keys):
+        row = cached.get(key)
+        if row is not None:
+            segments[index] = _PathSegment(
+                start=index,
+                end=index + 1,
+                coordinates=list(row.coordinates),
+                distance=float(row.distance_meters),
+                duration=float(row.duration_seconds),
+            )
+    leg_cache_hits = len(segments)
+
+    # (first waypoint index, chunk) for every request still needed.
+    chunk_requests: list[tuple[int, list[MonthlyLocation]]] = []
+    missing = [index for index in range(len(leg_keys)) if index not in segments]
+    for first_leg, last_leg in _consecutive_runs(missing):
+        start = first_leg
+        for chunk in _overlapping_chunks(
+            locations[first_leg : last_leg + 2],
+            MAPBOX_DIRECTIONS_MAX_WAYPOINTS,
+        ):
+            chunk_requests.append((start, chunk))
+            start += len(chunk) - 1
+
+    routes = _request_chunks([chunk for _, chunk in chunk_requests], access_token, profile=profile)
+    fetched_legs: dict[str, _PathSegment] = {}
+    for (start, chunk), route in zip(chunk_requests, routes):
+        legs = _leg_segments(route, start, len(chunk))
+        if legs is None:
+            segments[start] = _chunk_segment(route, start, start + len(chunk) - 1)
+            continue
+        for leg in legs:
+            segments[leg.start] = leg
+            fetched_legs[leg_keys[leg.start]] = leg
+    if fetched_legs and cache_available:
+        _store_legs(profile, fetched_legs)
+
     total_distance = 0.0
     total_duration = 0.0
     merged_coordinates: list[list[float]] = []
-    chunk_count = 0
-
-    for chunk in _overlapping_chunks(locations, MAPBOX_DIRECTIONS_MAX_WAYPOINTS):
-        chunk_count += 1
-        route = _request_mapbox_directions(chunk, access_token, profile=profile)
-        geometry = route.get("geometry")
-        coords = geometry.get("coordinates") if isinstance(geometry, dict) else None
-        if not isinstance(coords, list) or not coords:
-            raise MapboxRouteError("Mapbox response did not include route geometry.")
+    index = 0
+    while index < len(leg_keys):
+        segment = segments[index]
         if merged_coordinates:
-            merged_coordinates.extend(coords[1:])
+            merged_coordinates.extend(segment.coordinates[1:])
         else:
-            merged_coordinates.extend(coords)
-        total_distance += float(route.get("distance") or 0)
-        total_duration += float(route.get("duration") or 0)
+            merged_coordinates.extend(segment.coordinates)
+        total_distance += segment.distance
+        total_duration += segment.duration
+        index = segment.end
 
     if len(merged_coordinates) < 2:
         raise MapboxRouteError("Mapbox response did not include enough route coordinates.")
@@ -289,8 +519,11 @@ def _directions_for_locations(
         "distance_meters": total_distance,
         "duration_seconds": total_duration,
         "provider_response_summary": {
-            "chunks": chunk_count,
+            "chunks": len(chunk_requests),
             "profile": profile,
+            "legs": len(leg_keys),
+            "leg_cache_hits": leg_cache_hits,
+            "leg_cache_hit_ratio": round(leg_cache_hits / len(leg_keys), 3) if leg_keys else None,
         },
     }
 
@@ -308,7 +541,8 @@ def _request_mapbox_directions(
             "access_token": access_token,
             "geometries": "geojson",
             "overview": "full",
-            "steps": "false",
+            # Step geometries give each leg its own line for the leg cache.
+            "steps": "true",
         }
     )
     req = url_request.Request(
@@ -0,0 +1,197 @@
+"""Revision probes for conditional GETs on monthly route reads.
+
+Each probe returns the ``rows_watermark`` of every table the matching payload serializes, plus
+the Pacific date (current-month and read-only rules roll over at midnight). They cost a handful
+of indexed aggregates, against the full worksheet / run-details serialization they let a 304
+skip. See ``app.conditional_get``.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Any
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy import or_, select
+
+from app.conditional_get import rows_watermark
+from app.db_models import (
+    Key,
+    KeyStatus,
+    MonitoringCompany,
+    MonthlyLocation,
+    MonthlyLocationComment,
+    MonthlyLocationDeficiency,
+    MonthlyLocationMonth,
+    MonthlyRoute,
+    MonthlyRouteComment,
+    MonthlyRouteRun,
+    MonthlyRouteRunTimingMonth,
+    MonthlyRouteSnapshot,
+    MonthlyRouteSpecialistMonth,
+    MonthlyRouteWorksheetAuditEvent,
+    MonthlyStopClockEvent,
+    db,
+)
+
+PACIFIC_TZ = ZoneInfo("America/Vancouver")
+
+
+def _pacific_today() -> str:
+    return datetime.now(PACIFIC_TZ).date().isoformat()
+
+
+def _route_month_location_ids(route_id: int, month_first: date) -> list[int]:
+    """Locations a route-month read can show: the current roster plus stops stamped to it."""
+    roster = select(MonthlyLocation.id).where(MonthlyLocation.monthly_route_id == route_id)
+    stamped = select(MonthlyLocationMonth.monthly_location_id).where(
+        MonthlyLocationMonth.month_date == month_first,
+        MonthlyLocationMonth.test_monthly_route_id == route_id,
+    )
+    return sorted({int(lid) for lid in db.session.execute(roster.union(stamped)).scalars()})
+
+
+def _linked_keys_revision(location_ids) -> list[Any]:
+    """Linked key identity and sign-out history (``keys`` rows carry no ``updated_at``)."""
+    keys = (
+        db.session.query(Key.id, Key.keycode, Key.barcode, Key.home_location)
+        .join(MonthlyLocation, MonthlyLocation.key_id == Key.id)
+        .filter(MonthlyLocation.id.in_(location_ids))
+        .order_by(Key.id)
+        .all()
+    )
+    if not keys:
+        return []
+    key_ids = [int(row.id) for row in keys]
+    return [
+        [list(row) for row in keys],
+        rows_watermark(KeyStatus.inserted_at, KeyStatus.key_id.in_(key_ids)),
+    ]
+
+
+def _route_month_stop_parts(route_id: int, month_first: date) -> list[Any]:
+    location_ids = _route_month_location_ids(route_id, month_first)
+    month_rows = (
+        MonthlyLocationMonth.month_date == month_first,
+        MonthlyLocationMonth.monthly_location_id.in_(location_ids),
+    )
+    month_row_ids = select(MonthlyLocationMonth.id).where(*month_rows)
+    return [
+        rows_watermark(MonthlyRoute.updated_at, MonthlyRoute.id == route_id),
+        rows_watermark(
+            MonthlyRouteRun.updated_at,
+            MonthlyRouteRun.monthly_route_id == route_id,
+            MonthlyRouteRun.month_date == month_first,
+        ),
+        rows_watermark(MonthlyLocation.updated_at, MonthlyLocation.id.in_(location_ids)),
+        rows_watermark(MonthlyLocationMonth.updated_at, *month_rows),
+        rows_watermark(
+            MonthlyStopClockEvent.updated_at,
+            MonthlyStopClockEvent.monthly_location_month_id.in_(month_row_ids),
+        ),
+        rows_watermark(
+            MonthlyLocationDeficiency.updated_at,
+            MonthlyLocationDeficiency.monthly_location_id.in_(location_ids),
+        ),
+        rows_watermark(MonitoringCompany.updated_at),
+        _linked_keys_revision(location_ids),
+        _pacific_today(),
+    ]
+
+
+def worksheet_read_revision(route_id: int, month_first: date) -> list[Any]:
+    """Technician worksheet: route header, run, stops, clock events, deficiencies."""
+    return ["worksheet", *_route_month_stop_parts(route_id, month_first)]
+
+
+def run_details_read_revision(route_id: int, month_first: date) -> list[Any]:
+    """Office run details: worksheet inputs plus audit trail, timing and specialists."""
+    parts: list[Any] = [
+        "run_details",
+        *_route_month_stop_parts(route_id, month_first),
+        rows_watermark(
+            MonthlyRouteWorksheetAuditEvent.id,
+            MonthlyRouteWorksheetAuditEvent.monthly_route_id == route_id,
+            MonthlyRouteWorksheetAuditEvent.month_date == month_first,
+        ),
+        rows_watermark(
+            MonthlyRouteRunTimingMonth.last_updated_at,
+            MonthlyRouteRunTimingMonth.monthly_route_id == route_id,
+            MonthlyRouteRunTimingMonth.month_first == month_first,
+        ),
+    ]
+    if sa_inspect(db.engine).has_table("monthly_route_specialist_month"):
+        parts.append(
+            rows_watermark(
+                MonthlyRouteSpecialistMonth.last_updated_at,
+                MonthlyRouteSpecialistMonth.monthly_route_id == route_id,
+                MonthlyRouteSpecialistMonth.month_first == month_first,
+            )
+        )
+    return parts
+
+
+def route_detail_read_revision(route: MonthlyRoute) -> list[Any]:
+    """Route detail: roster, all-month testing history, runs, comments, timing, specialists."""
+    route_id = int(route.id)
+    roster_ids = select(MonthlyLocation.id).where(MonthlyLocation.monthly_route_id == route_id)
+    history = or_(
+        MonthlyLocationMonth.test_monthly_route_id == route_id,
+        MonthlyLocationMonth.monthly_location_id.in_(roster_ids),
+    )
+    history_location_ids = select(MonthlyLocationMonth.monthly_location_id).where(history)
+    parts: list[Any] = [
+        "route_detail",
+        rows_watermark(MonthlyRoute.updated_at, MonthlyRoute.id == route_id),
+        rows_watermark(
+            MonthlyLocation.updated_at,
+            or_(
+                MonthlyLocation.monthly_route_id == route_id,
+                MonthlyLocation.id.in_(history_location_ids),
+            ),
+        ),
+        rows_watermark(MonthlyLocationMonth.updated_at, history),
+        rows_watermark(
+            MonthlyLocationDeficiency.updated_at,
+            MonthlyLocationDeficiency.monthly_location_id.in_(roster_ids),
+        ),
+        rows_watermark(MonthlyRouteRun.updated_at, MonthlyRouteRun.monthly_route_id == route_id),
+        rows_watermark(MonthlyRouteComment.updated_at, MonthlyRouteComment.monthly_route_id == route_id),
+        rows_watermark(
+            MonthlyRouteSpecialistMonth.last_updated_at,
+            MonthlyRouteSpecialistMonth.monthly_route_id == route_id,
+        ),
+        rows_watermark(
+            MonthlyRouteRunTimingMonth.last_updated_at,
+            MonthlyRouteRunTimingMonth.monthly_route_id == route_id,
+        ),
+        rows_watermark(MonitoringCompany.updated_at),
+        _linked_keys_revision(roster_ids),
+        _pacific_today(),
+    ]
+    if route.service_trade_route_location_id is not None:
+        parts.append(
+            rows_watermark(
+                MonthlyRouteSnapshot.last_updated_at,
+                MonthlyRouteSnapshot.location_id == int(route.service_trade_route_location_id),
+            )
+        )
+    return parts
+
+
+def library_location_read_revision(location_id: int) -> list[Any]:
+    """Library location detail: the location, its month history and runs, comments, routes."""
+    month_rows = MonthlyLocationMonth.monthly_location_id == location_id
+    run_ids = select(MonthlyLocationMonth.run_id).where(month_rows)
+    return [
+        "library_location",
+        rows_watermark(MonthlyLocation.updated_at, MonthlyLocation.id == location_id),
+        rows_watermark(MonthlyLocationMonth.updated_at, month_rows),
+        rows_watermark(MonthlyRouteRun.updated_at, MonthlyRouteRun.id.in_(run_ids)),
+        rows_watermark(MonthlyLocationComment.updated_at, MonthlyLocationComment.location_id == location_id),
+        rows_watermark(MonthlyRoute.updated_at),
+        rows_watermark(MonitoringCompany.updated_at),
+        _linked_keys_revision([int(location_id)]),
+        _pacific_today(),
+    ]
@@ -0,0 +1,356 @@
+"""Incrementally maintained ``monthly_route_month_rollup`` (route × month testing totals).
+
+Dashboard and hero reads used to rebuild per-route testing counts and revenue from every
+``monthly_location_month`` row on each request. The rollup keeps those totals per
+``(monthly_route_id, month_date)``:
+
+- Session ``after_flush`` collects the route-months touched by the flush: MLM inserts/deletes,
+  outcome/billing/stamp changes (old and new values), and ``MonthlyLocation`` price or route
+  moves (legacy unstamped rows follow the site's current route).
+- ``after_flush_postexec`` recomputes exactly those route-months on the flush connection with
+  the same bucket/revenue rules as ``_route_testing_by_month`` and replaces their rollup rows,
+  so the rollup commits (or rolls back) with the change that caused it.
+- Bulk ``Query.delete`` paths bypass flush events and call ``refresh_route_month_rollup``;
+  Core location upserts call ``refresh_route_month_rollup_for_locations``.
+- ``flask rebuild-route-month-rollup`` recomputes the whole table.
+
+Until the table exists (pre-migration, most SQLite tests) maintenance is skipped and readers
+return ``None`` so callers fall back to the live per-route computation.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import date
+from decimal import Decimal
+from typing import Iterable
+
+from sqlalchemy import and_, delete, event, func, inspect, or_, select
+
+from app.db_models import MonthlyLocation, MonthlyLocationMonth, MonthlyRouteMonthRollup, db, table_available
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_COUNT_FIELDS = (
+    "sites_tested_count",
+    "skipped_non_annual_count",
+    "skipped_annual_count",
+    "tested_sites_missing_price_count",
+)
+
+#: MLM columns that change a row's bucket, revenue, or route-month attribution.
+_MLM_TRACKED_ATTRS = (
+    "result_status",
+    "skip_reason",
+    "test_outcome",
+    "skip_category",
+    "billing_status",
+    "test_monthly_route_id",
+    "monthly_location_id",
+    "month_date",
+)
+_LOCATION_TRACKED_ATTRS = ("price_per_month", "monthly_route_id")
+
+_PENDING_KEY = "route_month_rollup_pending"
+_ROLLUP_TABLE = MonthlyRouteMonthRollup.__table__
+_MLM = MonthlyLocationMonth.__table__
+_LOC = MonthlyLocation.__table__
+
+
+RoutePair = tuple[int, date]
+
+
+def route_month_rollup_available(connection=None) -> bool:
+    """Whether ``monthly_route_month_rollup`` exists on this engine."""
+    conn = connection if connection is not None else db.session.connection()
+    return table_available(_ROLLUP_TABLE.name, conn)
+
+
+def _fresh_cell() -> dict:
+    return {
+        "sites_tested_count": 0,
+        "skipped_non_annual_count": 0,
+        "skipped_annual_count": 0,
+        "tested_revenue_total": 0.0,
+        "tested_sites_missing_price_count": 0,
+    }
+
+
+def _history_select():
+    return select(
+        _MLM.c.monthly_location_id,
+        _MLM.c.month_date,
+        _MLM.c.test_monthly_route_id,
+        _MLM.c.result_status,
+        _MLM.c.skip_reason,
+        _MLM.c.test_outcome,
+        _MLM.c.skip_category,
+        _MLM.c.billing_status,
+        _LOC.c.id.label("location_id"),
+        _LOC.c.monthly_route_id.label("location_route_id"),
+        _LOC.c.price_per_month,
+    ).select_from(_MLM.outerjoin(_LOC, _LOC.c.id == _MLM.c.monthly_location_id))
+
+
+def _accumulate(rows) -> dict[RoutePair, dict]:
+    from app.routes.monthly_routes import _history_row_outcome_bucket, _history_row_revenue_total
+
+    cells: dict[RoutePair, dict] = {}
+    for row in rows:
+        if row.test_monthly_route_id is not None:
+            route_id = int(row.test_monthly_route_id)
+        elif row.location_route_id is not None:
+            route_id = int(row.location_route_id)
+        else:
+            continue
+        cell = cells.setdefault((route_id, row.month_date), _fresh_cell())
+        bucket = _history_row_outcome_bucket(row)
+        loc = row if row.location_id is not None else None
+        if bucket == "skipped_annual":
+            cell["skipped_annual_count"] += 1
+        elif bucket == "skipped_non_annual":
+            cell["skipped_non_annual_count"] += 1
+        elif bucket == "tested":
+            cell["sites_tested_count"] += 1
+            if loc is None or loc.price_per_month is None:
+                cell["tested_sites_missing_price_count"] += 1
+        revenue = _history_row_revenue_total(row, loc, outcome_bucket=bucket)
+        if revenue > 0:
+            cell["tested_revenue_total"] += revenue
+    return cells
+
+
+def compute_route_month_cells(
+    connection,
+    pairs: Iterable[RoutePair] | None = None,
+) -> dict[RoutePair, dict]:
+    """Testing totals keyed by ``(route_id, month_date)``; all route-months when ``pairs`` is None."""
+    stmt = _history_select()
+    wanted: set[RoutePair] | None = None
+    if pairs is not None:
+        wanted = {(int(r), m) for r, m in pairs}
+        if not wanted:
+            return {}
+        route_ids = sorted({r for r, _ in wanted})
+        months = sorted({m for _, m in wanted})
+        stmt = stmt.where(
+            _MLM.c.month_date.in_(months),
+            or_(
+                _MLM.c.test_monthly_route_id.in_(route_ids),
+                and_(
+                    _MLM.c.test_monthly_route_id.is_(None),
+                    _LOC.c.monthly_route_id.in_(route_ids),
+                ),
+            ),
+        )
+    cells = _accumulate(connection.execute(stmt))
+    if wanted is not None:
+        cells = {key: cell for key, cell in cells.items() if key in wanted}
+    return cells
+
+
+def _rollup_row(pair: RoutePair, cell: dict) -> dict:
+    route_id, month_date = pair
+    return {
+        "monthly_route_id": route_id,
+        "month_date": month_date,
+        **{name: int(cell[name]) for name in ROLLUP_COUNT_FIELDS},
+        "tested_revenue_total": Decimal(str(round(cell["tested_revenue_total"], 2))),
+    }
+
+
+def refresh_route_month_rollup(pairs: Iterable[RoutePair], *, connection=None) -> int:
+    """Recompute and replace rollup rows for ``pairs``; returns the number of rows written."""
+    conn = connection if connection is not None else db.session.connection()
+    wanted = {(int(r), m) for r, m in pairs if r is not None and m is not None}
+    if not wanted or not route_month_rollup_available(conn):
+        return 0
+    cells = compute_route_month_cells(conn, wanted)
+    months_by_route: dict[int, set[date]] = {}
+    for route_id, month_date in wanted:
+        months_by_route.setdefault(route_id, set()).add(month_date)
+    for route_id, months in months_by_route.items():
+        conn.execute(
+            delete(_ROLLUP_TABLE).where(
+                _ROLLUP_TABLE.c.monthly_route_id == route_id,
+                _ROLLUP_TABLE.c.month_date.in_(sorted(months)),
+            )
+        )
+    if cells:
+        conn.execute(_ROLLUP_TABLE.insert(), [_rollup_row(pair, cell) for pair, cell in cells.items()])
+    return len(cells)
+
+
+def refresh_route_month_rollup_for_locations(location_ids: Iterable[int], *, connection=None) -> int:
+    """Refresh every route-month holding history for ``location_ids`` (e.g. after a Core reprice)."""
+    conn = connection if connection is not None else db.session.connection()
+    ids = sorted({int(i) for i in location_ids})
+    if not ids or not route_month_rollup_available(conn):
+        return 0
+    route_id = func.coalesce(_MLM.c.test_monthly_route_id, _LOC.c.monthly_route_id)
+    pairs: set[RoutePair] = set()
+    for start in range(0, len(ids), 1000):
+        stmt = (
+            select(route_id, _MLM.c.month_date)
+            .select_from(_MLM.join(_LOC, _LOC.c.id == _MLM.c.monthly_location_id))
+            .where(_MLM.c.monthly_location_id.in_(ids[start : start + 1000]), route_id.is_not(None))
+            .distinct()
+        )
+        pairs.update((int(r), m) for r, m in conn.execute(stmt))
+    return refresh_route_month_rollup(pairs, connection=conn)
+
+
+def rebuild_route_month_rollup(*, connection=None) -> int:
+    """Drop and recompute every rollup row; returns the number of route-months written."""
+    conn = connection if connection is not None else db.session.connection()
+    if not table_available(_ROLLUP_TABLE.name, conn, refresh=True):
+        raise RuntimeError(f"{_ROLLUP_TABLE.name} does not exist; run `flask db upgrade` first")
+    cells = compute_route_month_cells(conn)
+    conn.execute(delete(_ROLLUP_TABLE))
+    rows = [_rollup_row(pair, cell) for pair, cell in sorted(cells.items())]
+    for start in range(0, len(rows), 1000):
+        conn.execute(_ROLLUP_TABLE.insert(), rows[start : start + 1000])
+    return len(rows)
+
+
+def route_month_rollup_by_route(
+    route_ids: Iterable[int],
+    month_dates: Iterable[date] | None = None,
+) -> dict[int, dict[str, dict]] | None:
+    """``{route_id: {month_iso: cell}}`` from the rollup, or ``None`` when it is unavailable.
+
+    Cells carry the count/revenue keys of ``_route_testing_by_month`` (not the skipped-site
+    lists) and exist for every route-month with at least one attributed history row.
+    """
+    ids = sorted({int(r) for r in route_ids})
+    if not route_month_rollup_available():
+        return None
+    out: dict[int, dict[str, dict]] = {route_id: {} for route_id in ids}
+    if not ids:
+        return out
+    query = MonthlyRouteMonthRollup.query.filter(MonthlyRouteMonthRollup.monthly_route_id.in_(ids))
+    if month_dates is not None:
+        months = sorted(set(month_dates))
+        if not months:
+            return out
+        query = query.filter(MonthlyRouteMonthRollup.month_date.in_(months))
+    for row in query.all():
+        out[int(row.monthly_route_id)][row.month_date.isoformat()] = {
+            **{name: int(getattr(row, name) or 0) for name in ROLLUP_COUNT_FIELDS},
+            "tested_revenue_total": float(row.tested_revenue_total or 0),
+        }
+    return out
+
+
+def route_month_rollup_for_route(route_id: int) -> dict[str, dict] | None:
+    by_route = route_month_rollup_by_route([route_id])
+    return None if by_route is None else by_route[int(route_id)]
+
+
+# --- flush maintenance ---------------------------------------------------------------------
+
+
+def _old_and_new(state, attr: str) -> list:
+    hist = state.attrs[attr].history
+    values = list(hist.added or ()) + list(hist.deleted or ())
+    if not values:
+        values = list(hist.unchanged or ())
+    if not values and attr in state.dict:
+        values = [state.dict[attr]]
+    return values
+
+
+def _collect_pending(session) -> None:
+    pending = session.info.setdefault(_PENDING_KEY, {"pairs": set(), "legacy": set(), "locations": {}})
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, MonthlyLocationMonth):
+            state = inspect(obj)
+            if obj in session.dirty and not any(
+                state.attrs[a].history.has_changes() for a in _MLM_TRACKED_ATTRS
+            ):
+                continue
+            stamps = _old_and_new(state, "test_monthly_route_id")
+            months = [m for m in _old_and_new(state, "month_date") if m is not None]
+            loc_ids = [lid for lid in _old_and_new(state, "monthly_location_id") if lid is not None]
+            for month_date in months:
+                for stamp in stamps:
+                    if stamp is not None:
+                        pending["pairs"].add((int(stamp), month_date))
+                    else:
+                        pending["legacy"].update((int(lid), month_date) for lid in loc_ids)
+        elif isinstance(obj, MonthlyLocation):
+            state = inspect(obj)
+            if obj in session.new:
+                continue
+            deleted = obj in session.deleted
+            if not deleted and not any(
+                state.attrs[a].history.has_changes() for a in _LOCATION_TRACKED_ATTRS
+            ):
+                continue
+            if obj.id is None:
+                continue
+            routes = pending["locations"].setdefault(int(obj.id), set())
+            routes.update(int(r) for r in _old_and_new(state, "monthly_route_id") if r is not None)
+
+
+def _resolve_pending(conn, pending: dict) -> set[RoutePair]:
+    pairs: set[RoutePair] = set(pending["pairs"])
+    extra_routes: dict[int, set[int]] = pending["locations"]
+    legacy: set[tuple[int, date]] = set(pending["legacy"])
+
+    if extra_routes:
+        loc_rows = conn.execute(
+            select(_MLM.c.monthly_location_id, _MLM.c.month_date, _MLM.c.test_monthly_route_id).where(
+                _MLM.c.monthly_location_id.in_(sorted(extra_routes))
+            )
+        )
+        for loc_id, month_date, stamp in loc_rows:
+            if stamp is not None:
+                pairs.add((int(stamp), month_date))
+            else:
+                legacy.add((int(loc_id), month_date))
+
+    if legacy:
+        loc_ids = sorted({lid for lid, _ in legacy})
+        current_route = {
+            int(lid): route_id
+            for lid, route_id in conn.execute(
+                select(_LOC.c.id, _LOC.c.monthly_route_id).where(_LOC.c.id.in_(loc_ids))
+            )
+        }
+        for loc_id, month_date in legacy:
+            routes = set(extra_routes.get(loc_id, ()))
+            if current_route.get(loc_id) is not None:
+                routes.add(int(current_route[loc_id]))
+            pairs.update((route_id, month_date) for route_id in routes)
+    return pairs
+
+
+def _after_flush(session, _flush_context) -> None:
+    _collect_pending(session)
+
+
+def _after_flush_postexec(session, _flush_context) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending or not any(pending.values()):
+        return
+    conn = session.connection()
+    if not route_month_rollup_available(conn):
+        return
+    refresh_route_month_rollup(_resolve_pending(conn, pending), connection=conn)
+
+
+def _after_rollback(session, _previous_transaction) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+def init_route_month_rollup(app) -> None:
+    """Register flush listeners that keep ``monthly_route_month_rollup`` current."""
+    listeners = (
+        ("after_flush", _after_flush),
+        ("after_flush_postexec", _after_flush_postexec),
+        ("after_soft_rollback", _after_rollback),
+    )
+    for name, fn in listeners:
+        if not event.contains(db.session, name, fn):
+            event.listen(db.session, name, fn)
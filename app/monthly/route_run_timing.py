@@ -108,27 +108,48 @@ def _month_keys_to_dates(month_keys: set[str]) -> list[date]:
     return sorted(date.fromisoformat(key) for key in month_keys)
 
 
+def _timing_rows_query(month_keys: set[str]):
+    return MonthlyRouteRunTimingMonth.query.filter(
+        MonthlyRouteRunTimingMonth.month_first.in_(_month_keys_to_dates(month_keys)),
+        MonthlyRouteRunTimingMonth.sync_status == SYNC_STATUS_OK,
+        MonthlyRouteRunTimingMonth.duration_minutes.isnot(None),
+    )
+
+
 def _timing_rows_for_window(route_id: int, month_keys: set[str]) -> list[MonthlyRouteRunTimingMonth]:
     if not month_keys:
         return []
-    month_dates = _month_keys_to_dates(month_keys)
     return (
-        MonthlyRouteRunTimingMonth.query.filter(
-            MonthlyRouteRunTimingMonth.monthly_route_id == int(route_id),
-            MonthlyRouteRunTimingMonth.month_first.in_(month_dates),
-            MonthlyRouteRunTimingMonth.sync_status == SYNC_STATUS_OK,
-            MonthlyRouteRunTimingMonth.duration_minutes.isnot(None),
-        )
+        _timing_rows_query(month_keys)
+        .filter(MonthlyRouteRunTimingMonth.monthly_route_id == int(route_id))
         .order_by(MonthlyRouteRunTimingMonth.month_first.asc())
         .all()
     )
 
 
-def route_median_run_duration_minutes(
-    route_id: int,
+def timing_rows_by_route_for_window(
+    route_ids: list[int],
     month_keys: set[str],
-) -> tuple[int | None, int]:
-    rows = _timing_rows_for_window(route_id, month_keys)
+) -> dict[int, list[MonthlyRouteRunTimingMonth]]:
+    """One query for many routes; per-route lists match :func:`_timing_rows_for_window`."""
+    out: dict[int, list[MonthlyRouteRunTimingMonth]] = {int(rid): [] for rid in route_ids}
+    if not route_ids or not month_keys:
+        return out
+    rows = (
+        _timing_rows_query(month_keys)
+        .filter(MonthlyRouteRunTimingMonth.monthly_route_id.in_(list(out)))
+        .order_by(
+            MonthlyRouteRunTimingMonth.monthly_route_id.asc(),
+            MonthlyRouteRunTimingMonth.month_first.asc(),
+        )
+        .all()
+    )
+    for row in rows:
+        out[int(row.monthly_route_id)].append(row)
+    return out
+
+
+def median_run_duration_from_rows(rows: list[MonthlyRouteRunTimingMonth]) -> tuple[int | None, int]:
     month_durations = [int(row.duration_minutes) for row in rows if row.duration_minutes is not None]
     typical = median_minutes(month_durations)
     if typical is None:
@@ -136,11 +157,7 @@ def route_median_run_duration_minutes(
     return typical, len(month_durations)
 
 
-def route_typical_end_time(
-    route_id: int,
-    month_keys: set[str],
-) -> tuple[str | None, int]:
-    rows = _timing_rows_for_window(route_id, month_keys)
+def typical_end_time_from_rows(rows: list[MonthlyRouteRunTimingMonth]) -> tuple[str | None, int]:
     month_run_ends: list[int] = []
     for row in rows:
         if row.clock_out_at is None:
@@ -152,3 +169,17 @@ def route_typical_end_time(
     if typical is None:
         return None, 0
     return format_visit_clock_minutes(typical), len(month_run_ends)
+
+
+def route_median_run_duration_minutes(
+    route_id: int,
+    month_keys: set[str],
+) -> tuple[int | None, int]:
+    return median_run_duration_from_rows(_timing_rows_for_window(route_id, month_keys))
+
+
+def route_typical_end_time(
+    route_id: int,
+    month_keys: set[str],
+) -> tuple[str | None, int]:
+    return typical_end_time_from_rows(_timing_rows_for_window(route_id, month_keys))
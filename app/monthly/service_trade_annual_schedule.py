@@ -6,14 +6,23 @@ import os
 import logging
 import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from datetime import date, datetime
-from typing import Any
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Iterable
 from zoneinfo import ZoneInfo
 
 import requests
-
-from app.db_models import MonthlyLocation, MonthlyLocationMonth, MonthlyRoute, db
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.db_models import (
+    MonthlyLocation,
+    MonthlyLocationMonth,
+    MonthlyRoute,
+    MonthlyRouteAnnualScheduleSync,
+    db,
+    table_available,
+)
 from app.monthly.route_test_day import effective_route_test_day
 from app.monthly.service_trade_site_match import (
     SERVICE_TRADE_API_BASE,
@@ -23,6 +32,13 @@ from app.monthly.worksheet_locations import (
     _resolve_worksheet_route_locations,
     _worksheet_location_pairs_for_route_month,
 )
+from app.services.servicetrade import (
+    ServiceTradeClient,
+    authenticate_service_trade_session,
+    propagate_credentials,
+    service_trade_client,
+)
+from app.services.servicetrade.pagination import default_page_workers
 
 PACIFIC_TZ = ZoneInfo("America/Vancouver")
 
@@ -33,6 +49,11 @@ _paperwork_st_sync_lock = threading.Lock()
 _paperwork_st_sync_recent: dict[tuple[int, str], float] = {}
 PAPERWORK_ST_SYNC_DEDUP_SECONDS = 15.0
 
+# Paperwork views serve the persisted flags while the route-month's last successful sync is
+# younger than this; the nightly precompute keeps current + next month inside it.
+DEFAULT_ANNUAL_SCHEDULE_CACHE_TTL_SECONDS = 26 * 3600
+
+
 QUALIFYING_JOB_TYPES = frozenset({"inspection", "replacement", "upgrade", "installation"})
 
 _CANCELLED_STATUSES = frozenset({"cancelled", "canceled", "void", "deleted"})
@@ -184,7 +205,7 @@ def sync_saved_annual_month_for_location(
     if not user or not pwd:
         raise RuntimeError("Missing ServiceTrade creds. Set PROCESSING_USERNAME/PROCESSING_PASSWORD.")
 
-    http = session or requests.Session()
+    http = session or service_trade_client()
     own_session = session is None
     try:
         if own_session:
@@ -227,7 +248,7 @@ def sync_saved_annual_month_for_location(
             "synced_at": synced_at,
         }
     finally:
-        if own_session:
+        if own_session and not isinstance(http, ServiceTradeClient):
             http.close()
 
 
@@ -341,12 +362,8 @@ def _route_location_rows(route_id: int, month_first: date) -> list[MonthlyLocati
 
 
 def _authenticate_service_trade(http: requests.Session, *, username: str, password: str) -> None:
-    http.headers.setdefault("Accept", "application/json")
-    auth_resp = http.post(
-        f"{SERVICE_TRADE_API_BASE}/auth",
-        json={"username": username, "password": password},
-    )
-    auth_resp.raise_for_status()
+    # The shared client skips the login when these credentials already hold its cookie.
+    authenticate_service_trade_session(http, username, password)
 
 
 def _fetch_jobs_for_location_chunk(
@@ -406,6 +423,59 @@ def _fetch_appointments_for_job(
     return list(data.get("appointments") or [])
 
 
+class _JobAppointmentCache:
+    """``jobId`` → ``/appointment`` rows, fetched at most once per snapshot.
+
+    ``prefetch`` fans the fetches out over a small worker pool; ``get`` joins an in-flight
+    fetch instead of starting a second one, so a job seen under several locations (or by both
+    the unreleased check and the spanning-month contexts) costs a single request.
+    """
+
+    def __init__(self, http: requests.Session) -> None:
+        self._http = http
+        self._lock = threading.Lock()
+        self._futures: dict[int, Future] = {}
+
+    def _claim(self, job_id: int) -> tuple[Future, bool]:
+        with self._lock:
+            future = self._futures.get(job_id)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._futures[job_id] = future
+            return future, True
+
+    def _load(self, job_id: int, future: Future) -> None:
+        try:
+            future.set_result(_fetch_appointments_for_job(self._http, job_id))
+        except BaseException as exc:
+            future.set_exception(exc)
+
+    def prefetch(self, job_ids: Iterable[int], *, max_workers: int | None = None) -> None:
+        claimed = []
+        for job_id in job_ids:
+            future, owner = self._claim(int(job_id))
+            if owner:
+                claimed.append((int(job_id), future))
+        if not claimed:
+            return
+        workers = min(len(claimed), max(1, int(max_workers or default_page_workers())))
+        if workers == 1:
+            for job_id, future in claimed:
+                self._load(job_id, future)
+            return
+        load = propagate_credentials(self._load)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="st-annual-appts") as pool:
+            for job_id, future in claimed:
+                pool.submit(load, job_id, future)
+
+    def get(self, job_id: int) -> list[dict[str, Any]]:
+        future, owner = self._claim(int(job_id))
+        if owner:
+            self._load(int(job_id), future)
+        return list(future.result())
+
+
 @dataclass(frozen=True)
 class _JobAnnualContext:
     job_id: int
@@ -480,7 +550,7 @@ def _skip_month_for_spanning_job(
 
 
 def _build_job_contexts_for_month(
-    http: requests.Session,
+    appointments: _JobAppointmentCache,
     jobs: list[dict[str, Any]],
     *,
     st_location_ids: set[int],
@@ -516,7 +586,7 @@ def _build_job_contexts_for_month(
             continue
 
         seen_job_ids.add(job_id)
-        all_appointments = _fetch_appointments_for_job(http, job_id)
+        all_appointments = appointments.get(job_id)
         appt_dates: list[date] = []
         for appointment in all_appointments:
             day = _appointment_pacific_date(appointment, require_released=True)
@@ -824,6 +894,51 @@ def _location_annual_schedule_row(
     ).to_dict()
 
 
+def _location_annual_schedule_row_from_jobs(
+    loc: MonthlyLocation,
+    month_first: date,
+    *,
+    weekday_iso: int,
+    week_occurrence: int,
+    jobs: list[dict[str, Any]],
+    appointments: _JobAppointmentCache,
+) -> dict[str, object]:
+    """Assemble one linked location's row from its ``/job`` rows and the appointment cache."""
+    st_site_id = int(loc.service_trade_site_location_id)
+    start_ts, end_ts = month_window_pacific(month_first)
+    for job in jobs:
+        job_id = _job_id_int(job)
+        if job_id is not None:
+            job["_appointments"] = appointments.get(job_id)
+
+    contexts_by_st_id = _build_job_contexts_for_month(
+        appointments,
+        jobs,
+        st_location_ids={st_site_id},
+        month_first=month_first,
+        start_ts=start_ts,
+        end_ts=end_ts,
+    )
+    has_unreleased = _location_has_unreleased_annual_in_month(
+        jobs,
+        st_location_id=st_site_id,
+        start_ts=start_ts,
+        end_ts=end_ts,
+    )
+    return _location_annual_schedule_row(
+        loc,
+        month_first,
+        weekday_iso=weekday_iso,
+        week_occurrence=week_occurrence,
+        contexts=contexts_by_st_id.get(st_site_id, []),
+        has_unreleased_annual_in_month=has_unreleased,
+    )
+
+
+def _job_ids(jobs: Iterable[dict[str, Any]]) -> list[int]:
+    return [job_id for job_id in (_job_id_int(job) for job in jobs) if job_id is not None]
+
+
 def build_location_annual_schedule_row(
     loc: MonthlyLocation,
     month_first: date,
@@ -849,7 +964,7 @@ def build_location_annual_schedule_row(
     own_session = http is None
     if own_session:
         user, pwd = _service_trade_credentials(username=username, password=password)
-        http = requests.Session()
+        http = service_trade_client()
         _authenticate_service_trade(http, username=user, password=pwd)
 
     try:
@@ -859,39 +974,49 @@ def build_location_annual_schedule_row(
             start_ts=start_ts,
             end_ts=end_ts,
         )
-        for job in jobs:
-            job_id = _job_id_int(job)
-            if job_id is not None:
-                job["_appointments"] = _fetch_appointments_for_job(http, job_id)
-
-        contexts_by_st_id = _build_job_contexts_for_month(
-            http,
-            jobs,
-            st_location_ids={int(st_site_id)},
-            month_first=month_first,
-            start_ts=start_ts,
-            end_ts=end_ts,
-        )
-        contexts = contexts_by_st_id.get(int(st_site_id), [])
-        has_unreleased = _location_has_unreleased_annual_in_month(
-            jobs,
-            st_location_id=int(st_site_id),
-            start_ts=start_ts,
-            end_ts=end_ts,
-        )
-        return _location_annual_schedule_row(
+        appointments = _JobAppointmentCache(http)
+        appointments.prefetch(_job_ids(jobs))
+        return _location_annual_schedule_row_from_jobs(
             loc,
             month_first,
             weekday_iso=weekday_iso,
             week_occurrence=week_occurrence,
-            contexts=contexts,
-            has_unreleased_annual_in_month=has_unreleased,
+            jobs=jobs,
+            appointments=appointments,
         )
     finally:
-        if own_session and http is not None:
+        if own_session and http is not None and not isinstance(http, ServiceTradeClient):
             http.close()
 
 
+def _fetch_jobs_by_st_location(
+    http: requests.Session,
+    st_location_ids: list[int],
+    *,
+    start_ts: int,
+    end_ts: int,
+) -> dict[int, list[dict[str, Any]]]:
+    """``/job`` rows for many sites in ``_LOCATION_ID_CHUNK_SIZE`` chunks, grouped by site.
+
+    Each site keeps ServiceTrade's order; a job repeated across pages or chunks is kept once.
+    """
+    by_location: dict[int, list[dict[str, Any]]] = {sid: [] for sid in st_location_ids}
+    seen_job_ids: set[int] = set()
+    for offset in range(0, len(st_location_ids), _LOCATION_ID_CHUNK_SIZE):
+        chunk = st_location_ids[offset : offset + _LOCATION_ID_CHUNK_SIZE]
+        for job in _fetch_jobs_for_location_chunk(http, chunk, start_ts=start_ts, end_ts=end_ts):
+            st_location_id = _job_location_id(job)
+            if st_location_id not in by_location:
+                continue
+            job_id = _job_id_int(job)
+            if job_id is not None:
+                if job_id in seen_job_ids:
+                    continue
+                seen_job_ids.add(job_id)
+            by_location[st_location_id].append(job)
+    return by_location
+
+
 def build_route_annual_schedule_snapshot(
     route_id: int,
     month_first: date,
@@ -914,27 +1039,50 @@ def build_route_annual_schedule_snapshot(
     own_session = http is None
     if own_session and st_location_ids:
         user, pwd = _service_trade_credentials(username=username, password=password)
-        http = requests.Session()
+        http = service_trade_client()
         _authenticate_service_trade(http, username=user, password=pwd)
 
     locations: dict[str, dict[str, object]] = {}
     warning_count = 0
     try:
-        for loc in locs:
-            row = build_location_annual_schedule_row(
-                loc,
-                month_first,
-                weekday_iso=weekday_iso,
-                week_occurrence=week_occurrence,
-                http=http,
-                username=username,
-                password=password,
+        # One chunked /job walk for the whole route, then every job's appointments in parallel.
+        jobs_by_st_id: dict[int, list[dict[str, Any]]] = {}
+        appointments = _JobAppointmentCache(http) if st_location_ids else None
+        if appointments is not None:
+            start_ts, end_ts = month_window_pacific(month_first)
+            jobs_by_st_id = _fetch_jobs_by_st_location(
+                http,
+                sorted(st_location_ids),
+                start_ts=start_ts,
+                end_ts=end_ts,
             )
+            appointments.prefetch(
+                _job_ids(job for jobs in jobs_by_st_id.values() for job in jobs)
+            )
+
+        for loc in locs:
+            if loc.service_trade_site_location_id is None or appointments is None:
+                row = _location_annual_schedule_row(
+                    loc,
+                    month_first,
+                    weekday_iso=weekday_iso,
+                    week_occurrence=week_occurrence,
+                    contexts=[],
+                )
+            else:
+                row = _location_annual_schedule_row_from_jobs(
+                    loc,
+                    month_first,
+                    weekday_iso=weekday_iso,
+                    week_occurrence=week_occurrence,
+                    jobs=list(jobs_by_st_id.get(int(loc.service_trade_site_location_id), [])),
+                    appointments=appointments,
+                )
             locations[str(int(loc.id))] = row
             if row.get("prep_warning"):
                 warning_count += 1
     finally:
-        if own_session and http is not None:
+        if own_session and http is not None and not isinstance(http, ServiceTradeClient):
             http.close()
 
     checked_at = datetime.now(PACIFIC_TZ).isoformat()
@@ -1203,10 +1351,117 @@ def build_route_annual_schedule_payload_from_db(
     return payload
 
 
-def sync_route_annual_schedule(route_id: int, month_first: date) -> dict[str, object]:
-    """Live ServiceTrade sync, persist to DB (respecting manual locks), return DB payload."""
-    snapshot = build_route_annual_schedule_snapshot(route_id, month_first)
-    persist_route_annual_schedule_snapshot(route_id, month_first, snapshot)
+def annual_schedule_cache_ttl() -> timedelta:
+    raw = (os.getenv("MONTHLY_ANNUAL_SCHEDULE_TTL_SECONDS") or "").strip()
+    try:
+        seconds = float(raw) if raw else DEFAULT_ANNUAL_SCHEDULE_CACHE_TTL_SECONDS
+    except ValueError:
+        seconds = DEFAULT_ANNUAL_SCHEDULE_CACHE_TTL_SECONDS
+    return timedelta(seconds=max(0.0, seconds))
+
+
+def _annual_schedule_sync_table_available() -> bool:
+    """Whether ``monthly_route_annual_schedule_sync`` exists (pre-migration DBs, SQLite tests)."""
+    return table_available(MonthlyRouteAnnualScheduleSync.__tablename__)
+
+
+def record_route_annual_schedule_sync(
+    route_id: int,
+    month_first: date,
+    *,
+    error: str | None = None,
+    location_count: int | None = None,
+    duration_ms: int | None = None,
+) -> None:
+    """Stamp a route-month sync attempt; ``synced_at`` only advances on success."""
+    if not _annual_schedule_sync_table_available():
+        return
+    now = datetime.now(PACIFIC_TZ)
+    try:
+        row = db.session.get(MonthlyRouteAnnualScheduleSync, (int(route_id), month_first))
+        if row is None:
+            row = MonthlyRouteAnnualScheduleSync(monthly_route_id=int(route_id), month_date=month_first)
+            db.session.add(row)
+        row.last_attempt_at = now
+        row.duration_ms = duration_ms
+        if error is None:
+            row.synced_at = now
+            row.last_error = None
+            row.location_count = location_count
+        else:
+            row.last_error = error[:2000]
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        logger.warning(
+            "Could not record annual schedule sync for route %s month %s",
+            route_id,
+            month_first.isoformat(),
+            exc_info=True,
+        )
+
+
+def route_annual_schedule_synced_at(route_id: int, month_first: date) -> datetime | None:
+    if not _annual_schedule_sync_table_available():
+        return None
+    row = db.session.get(MonthlyRouteAnnualScheduleSync, (int(route_id), month_first))
+    if row is None or row.synced_at is None:
+        return None
+    synced_at = row.synced_at
+    # SQLite drops the offset; stored values are always aware.
+    return synced_at if synced_at.tzinfo is not None else synced_at.replace(tzinfo=timezone.utc)
+
+
+def route_annual_schedule_cache_fresh(
+    route_id: int,
+    month_first: date,
+    *,
+    ttl: timedelta | None = None,
+    now: datetime | None = None,
+) -> bool:
+    """True when the route-month synced within ``ttl`` and every worksheet stop has flags."""
+    synced_at = route_annual_schedule_synced_at(route_id, month_first)
+    if synced_at is None:
+        return False
+    now = now or datetime.now(PACIFIC_TZ)
+    if now - synced_at > (ttl if ttl is not None else annual_schedule_cache_ttl()):
+        return False
+    # Stops added since the last sync have no flags yet.
+    return route_annual_schedule_has_db_cache(route_id, month_first)
+
+
+def sync_route_annual_schedule(
+    route_id: int,
+    month_first: date,
+    *,
+    session: requests.Session | None = None,
+) -> dict[str, object]:
+    """Live ServiceTrade sync, persist to DB (respecting manual locks), return DB payload.
+
+    Every attempt is stamped in ``monthly_route_annual_schedule_sync``.
+    """
+    started = time.monotonic()
+    try:
+        if session is None:
+            snapshot = build_route_annual_schedule_snapshot(route_id, month_first)
+        else:
+            snapshot = build_route_annual_schedule_snapshot(route_id, month_first, session=session)
+        persist_route_annual_schedule_snapshot(route_id, month_first, snapshot)
+    except Exception as exc:
+        db.session.rollback()
+        record_route_annual_schedule_sync(
+            route_id,
+            month_first,
+            error=str(exc).strip() or exc.__class__.__name__,
+            duration_ms=int((time.monotonic() - started) * 1000),
+        )
+        raise
+    record_route_annual_schedule_sync(
+        route_id,
+        month_first,
+        location_count=len(snapshot.get("locations") or {}),
+        duration_ms=int((time.monotonic() - started) * 1000),
+    )
     return build_route_annual_schedule_payload_from_db(route_id, month_first)
 
 
@@ -1216,7 +1471,12 @@ def sync_route_annual_schedule_for_paperwork_view(
     *,
     force: bool = False,
 ) -> bool:
-    """Best-effort live ST sync when office or portal paperwork is opened."""
+    """Best-effort live ST sync when office or portal paperwork is opened.
+
+    Skipped while the route-month's cached flags are fresh (see ``annual_schedule_cache_ttl``).
+    """
+    if not force and route_annual_schedule_cache_fresh(route_id, month_first):
+        return False
     key = (int(route_id), month_first.isoformat())
     now = time.monotonic()
     if not force:
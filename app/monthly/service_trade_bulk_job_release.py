@@ -2,12 +2,17 @@
 
 from __future__ import annotations
 
+import logging
 import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import date
-from typing import Any, Iterator, Literal
+from typing import Any, Callable, Iterator, Literal
 
 import requests
+from flask import current_app, has_app_context
 from sqlalchemy import func
 
 from app import db
@@ -15,10 +20,10 @@ from app.db_models import MonthlyLocation, MonthlyRoute, MonthlyRouteRunTimingMo
 from app.monthly.route_run_timing import upsert_route_month_timing_row
 from app.monthly.service_trade_annual_schedule import month_window_pacific
 from app.monthly.service_trade_route_run_timing import (
-    SERVICE_TRADE_API_BASE,
     SYNC_STATUS_NO_JOB,
     SYNC_STATUS_NO_ST_LINK,
     SYNC_STATUS_SCHEDULED,
+    RouteRunTimingSyncResult,
     _appointment_released,
     _job_status_normalized,
     _job_with_appointments,
@@ -28,10 +33,16 @@ from app.monthly.service_trade_route_run_timing import (
     sync_route_month_timing,
     update_appointment_released,
 )
+from app.services.servicetrade import authenticate_service_trade_session, propagate_credentials
+
+log = logging.getLogger("st-bulk-job-release")
 
 BulkReleaseAction = Literal["release", "unrelease"]
 ProgressStatus = Literal["success", "skipped", "failed"]
 
+#: Released routes per ``monthly_route_run_timing_month`` commit.
+BULK_RELEASE_COMMIT_BATCH = 10
+
 
 @dataclass(frozen=True)
 class EligibleRouteReleaseRow:
@@ -153,9 +164,21 @@ def authenticate_service_trade(http: requests.Session) -> None:
     password = os.getenv("PROCESSING_PASSWORD")
     if not username or not password:
         raise RuntimeError("Missing PROCESSING_USERNAME/PROCESSING_PASSWORD environment vars.")
-    auth_url = f"{SERVICE_TRADE_API_BASE}/auth"
-    response = http.post(auth_url, json={"username": username, "password": password})
-    response.raise_for_status()
+    # The shared client skips the login when these credentials already hold its cookie.
+    authenticate_service_trade_session(http, username, password)
+
+
+def _in_app_context(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Worker threads get the caller's app context (ServiceTrade helpers may log via ``current_app``)."""
+    if not has_app_context():
+        return fn
+    app = current_app._get_current_object()
+
+    def run(*args: Any, **kwargs: Any) -> Any:
+        with app.app_context():
+            return fn(*args, **kwargs)
+
+    return run
 
 
 def resolve_live_scheduled_testing_job(
@@ -185,6 +208,75 @@ def resolve_live_scheduled_testing_job(
     return int(job_id), int(appointment["id"]), _appointment_released(appointment)
 
 
+@dataclass(frozen=True)
+class _RouteReleaseOutcome:
+    status: ProgressStatus
+    message: str
+    sync_result: RouteRunTimingSyncResult | None = None
+
+
+def bulk_release_workers() -> int:
+    try:
+        return max(1, int((os.getenv("SERVICE_TRADE_BULK_RELEASE_WORKERS") or "").strip() or 4))
+    except ValueError:
+        return 4
+
+
+def _release_route_remote(
+    http: requests.Session,
+    st_route_id: int,
+    month_first: date,
+    *,
+    target_released: bool,
+    cancelled: threading.Event,
+) -> _RouteReleaseOutcome:
+    """ServiceTrade half of one route's release (worker thread: HTTP only, no DB session)."""
+    if cancelled.is_set():
+        return _RouteReleaseOutcome("skipped", "Cancelled")
+    resolved = resolve_live_scheduled_testing_job(http, st_route_id, month_first)
+    if resolved is None:
+        return _RouteReleaseOutcome("skipped", "No scheduled testing job for this month")
+
+    _job_id, appointment_id, currently_released = resolved
+    if target_released and currently_released is True:
+        return _RouteReleaseOutcome("skipped", "Already released")
+    if not target_released and currently_released is not True:
+        return _RouteReleaseOutcome("skipped", "Already unreleased")
+    # Last point to back out before ServiceTrade is mutated.
+    if cancelled.is_set():
+        return _RouteReleaseOutcome("skipped", "Cancelled")
+
+    update_appointment_released(http, appointment_id, released=target_released)
+    sync_result = sync_route_month_timing(http, st_route_id=st_route_id, month_first=month_first)
+    verb = "Released" if target_released else "Unreleased"
+    return _RouteReleaseOutcome("success", verb, sync_result)
+
+
+def _commit_timing_batch(month_first: date, batch: list[tuple[int, RouteRunTimingSyncResult]]) -> None:
+    """Upsert refreshed timing rows for released routes in one transaction.
+
+    The ServiceTrade side already happened, so a failed commit is logged rather than reported as
+    a failed route; the next timing sync repairs the cached ``released`` flags.
+    """
+    if not batch:
+        return
+    try:
+        for monthly_route_id, sync_result in batch:
+            upsert_route_month_timing_row(
+                monthly_route_id=monthly_route_id,
+                month_first=month_first,
+                result=sync_result,
+            )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        log.exception(
+            "Bulk ST release: timing rows not saved for routes %s",
+            [monthly_route_id for monthly_route_id, _ in batch],
+        )
+    batch.clear()
+
+
 def iter_bulk_st_job_release(
     http: requests.Session,
     *,
@@ -192,7 +284,17 @@ def iter_bulk_st_job_release(
     action: BulkReleaseAction,
     routes: list[MonthlyRoute],
     timing_by_route_id: dict[int, MonthlyRouteRunTimingMonth],
+    max_workers: int | None = None,
+    commit_batch_size: int = BULK_RELEASE_COMMIT_BATCH,
 ) -> Iterator[dict[str, Any]]:
+    """Release/unrelease every eligible route, yielding NDJSON progress events in route order.
+
+    Up to ``max_workers`` routes are resolved and released against ServiceTrade concurrently
+    (``max_workers * 2`` in flight); events are still emitted strictly in eligible-route order.
+    Refreshed timing rows are committed every ``commit_batch_size`` successes. Closing the
+    generator (client disconnect) cancels queued routes, lets in-flight ones finish or back out
+    before mutating ServiceTrade, and still saves timing rows for whatever was released.
+    """
     eligible = eligible_routes_from_cache(routes, timing_by_route_id)
     routes_by_id = {int(route.id): route for route in routes}
     target_released = action == "release"
@@ -205,99 +307,83 @@ def iter_bulk_st_job_release(
     failed_count = 0
     failures: list[dict[str, object]] = []
 
-    for index, row in enumerate(eligible, start=1):
-        route = routes_by_id.get(row.route_id)
-        route_number = row.route_number
-        if route is None or route.service_trade_route_location_id is None:
-            skipped_count += 1
-            yield {
-                "type": "progress",
-                "index": index,
-                "total": total,
-                "route_number": route_number,
-                "status": "skipped",
-                "message": "No ServiceTrade route link",
-            }
-            continue
-
+    workers = max(1, int(max_workers or bulk_release_workers()))
+    window = workers * 2
+    cancelled = threading.Event()
+    release = propagate_credentials(_in_app_context(_release_route_remote))
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="st-bulk-release")
+    pending: deque[tuple[int, EligibleRouteReleaseRow, Future | None]] = deque()
+    batch: list[tuple[int, RouteRunTimingSyncResult]] = []
+    queue = iter(enumerate(eligible, start=1))
+    finished = False
+
+    def submit_next() -> bool:
         try:
-            resolved = resolve_live_scheduled_testing_job(
+            index, row = next(queue)
+        except StopIteration:
+            return False
+        route = routes_by_id.get(row.route_id)
+        future = None
+        if route is not None and route.service_trade_route_location_id is not None:
+            future = executor.submit(
+                release,
                 http,
                 int(route.service_trade_route_location_id),
                 month_first,
+                target_released=target_released,
+                cancelled=cancelled,
             )
-            if resolved is None:
-                skipped_count += 1
-                yield {
-                    "type": "progress",
-                    "index": index,
-                    "total": total,
-                    "route_number": route_number,
-                    "status": "skipped",
-                    "message": "No scheduled testing job for this month",
-                }
-                continue
-
-            _job_id, appointment_id, currently_released = resolved
-            if target_released and currently_released is True:
-                skipped_count += 1
-                yield {
-                    "type": "progress",
-                    "index": index,
-                    "total": total,
-                    "route_number": route_number,
-                    "status": "skipped",
-                    "message": "Already released",
-                }
-                continue
-            if not target_released and currently_released is not True:
-                skipped_count += 1
-                yield {
-                    "type": "progress",
-                    "index": index,
-                    "total": total,
-                    "route_number": route_number,
-                    "status": "skipped",
-                    "message": "Already unreleased",
-                }
-                continue
-
-            update_appointment_released(http, appointment_id, released=target_released)
-            sync_result = sync_route_month_timing(
-                http,
-                st_route_id=int(route.service_trade_route_location_id),
-                month_first=month_first,
-            )
-            upsert_route_month_timing_row(
-                monthly_route_id=int(route.id),
-                month_first=month_first,
-                result=sync_result,
-            )
-            db.session.commit()
+        pending.append((index, row, future))
+        return True
 
-            success_count += 1
-            verb = "Released" if target_released else "Unreleased"
-            yield {
-                "type": "progress",
-                "index": index,
-                "total": total,
-                "route_number": route_number,
-                "status": "success",
-                "message": verb,
-            }
-        except Exception as exc:  # noqa: BLE001 — per-route failure should not abort the batch
-            db.session.rollback()
-            failed_count += 1
-            message = str(exc).strip() or exc.__class__.__name__
-            failures.append({"route_number": route_number, "message": message})
-            yield {
+    try:
+        while len(pending) < window and submit_next():
+            pass
+        while pending:
+            index, row, future = pending.popleft()
+            submit_next()
+            event: dict[str, Any] = {
                 "type": "progress",
                 "index": index,
                 "total": total,
-                "route_number": route_number,
-                "status": "failed",
-                "message": message,
+                "route_number": row.route_number,
             }
+            if future is None:
+                skipped_count += 1
+                yield {**event, "status": "skipped", "message": "No ServiceTrade route link"}
+                continue
+            try:
+                outcome = future.result()
+            except Exception as exc:  # noqa: BLE001 — per-route failure should not abort the batch
+                failed_count += 1
+                message = str(exc).strip() or exc.__class__.__name__
+                failures.append({"route_number": row.route_number, "message": message})
+                yield {**event, "status": "failed", "message": message}
+                continue
+
+            if outcome.status == "success":
+                success_count += 1
+                batch.append((row.route_id, outcome.sync_result))
+                if len(batch) >= commit_batch_size:
+                    _commit_timing_batch(month_first, batch)
+            else:
+                skipped_count += 1
+            yield {**event, "status": outcome.status, "message": outcome.message}
+        finished = True
+    finally:
+        if not finished:
+            cancelled.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+            for _index, row, future in pending:
+                if future is None or future.cancelled() or future.exception() is not None:
+                    continue
+                outcome = future.result()
+                if outcome.status == "success":
+                    batch.append((row.route_id, outcome.sync_result))
+            log.info("Bulk ST %s cancelled with %d route(s) not reported", action, len(pending))
+        else:
+            executor.shutdown(wait=False)
+        _commit_timing_batch(month_first, batch)
 
     yield {
         "type": "done",
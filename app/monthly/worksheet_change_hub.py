@@ -0,0 +1,392 @@
+"""Push fan-out of worksheet revision changes to open SSE streams.
+
+Worksheet writes publish one ``(route_id, month_date, revision)`` event; every open
+``…/worksheet/stream`` tab for that route-month waits on a subscription instead of running
+revision-token queries on a timer, so DB load follows writes rather than open tabs.
+
+Backends (``WORKSHEET_CHANGE_BACKEND``):
+
+- ``memory``: in-process fan-out (single Waitress process, SQLite tests).
+- ``postgres``: ``pg_notify`` on publish plus one shared ``LISTEN`` thread per process, so
+  writes on one dyno/worker reach streams held by another.
+- ``auto`` (default): ``postgres`` when ``SQLALCHEMY_DATABASE_URI`` is Postgres, else ``memory``.
+
+Events also carry the location ids the committed write touched (collected by session flush
+listeners), so clients can fetch ``?since_revision=`` deltas instead of the whole route.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import select
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date
+
+from flask import current_app
+from sqlalchemy import event as sa_event
+from sqlalchemy import select as sa_select
+from sqlalchemy import text
+
+from app.db_models import (
+    MonthlyLocation,
+    MonthlyLocationDeficiency,
+    MonthlyLocationMonth,
+    MonthlyStopClockEvent,
+    db,
+)
+
+logger = logging.getLogger(__name__)
+
+WORKSHEET_CHANGE_CHANNEL = "worksheet_changes"
+_EXTENSION_KEY = "worksheet_change_hub"
+_LISTEN_IDLE_PING_SECONDS = 30.0
+_LISTEN_MAX_BACKOFF_SECONDS = 30.0
+_PENDING_IDS_KEY = "worksheet_change_pending_ids"
+_COMMITTED_IDS_KEY = "worksheet_change_committed_ids"
+
+#: Larger writes publish ``location_ids=None`` ("unknown, refetch"); keeps NOTIFY payloads < 8000 bytes.
+MAX_EVENT_LOCATION_IDS = 200
+
+
+@dataclass(frozen=True)
+class WorksheetChangeEvent:
+    route_id: int
+    month_date: date
+    revision: str
+    #: Locations the write touched; ``None`` when unknown (clients refetch the delta anyway).
+    location_ids: tuple[int, ...] | None = None
+
+    def to_json(self) -> str:
+        data: dict[str, object] = {
+            "route_id": int(self.route_id),
+            "month_date": self.month_date.isoformat(),
+            "revision": self.revision,
+        }
+        if self.location_ids is not None:
+            data["location_ids"] = list(self.location_ids)
+        return json.dumps(data, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, raw: str) -> WorksheetChangeEvent | None:
+        try:
+            data = json.loads(raw)
+            ids = data.get("location_ids")
+            return cls(
+                route_id=int(data["route_id"]),
+                month_date=date.fromisoformat(str(data["month_date"])),
+                revision=str(data["revision"]),
+                location_ids=tuple(int(i) for i in ids) if ids is not None else None,
+            )
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return None
+
+    def merged_with(self, newer: WorksheetChangeEvent) -> WorksheetChangeEvent:
+        """``newer`` with this event's location ids folded in (coalesced mailbox delivery)."""
+        if self.location_ids is None or newer.location_ids is None:
+            ids = None
+        else:
+            ids = _bounded_location_ids(set(self.location_ids) | set(newer.location_ids))
+        return WorksheetChangeEvent(newer.route_id, newer.month_date, newer.revision, ids)
+
+
+def _bounded_location_ids(ids: set[int]) -> tuple[int, ...] | None:
+    if len(ids) > MAX_EVENT_LOCATION_IDS:
+        return None
+    return tuple(sorted(ids))
+
+
+class WorksheetSubscription:
+    """One SSE stream's mailbox; keeps only the latest undelivered event (revisions coalesce,
+    touched location ids accumulate)."""
+
+    def __init__(self, hub: WorksheetChangeHub, route_id: int, month_date: date) -> None:
+        self.hub = hub
+        self.route_id = int(route_id)
+        self.month_date = month_date
+        self._cond = threading.Condition()
+        self._pending: WorksheetChangeEvent | None = None
+        self._closed = False
+
+    @property
+    def key(self) -> tuple[int, date]:
+        return (self.route_id, self.month_date)
+
+    def deliver(self, event: WorksheetChangeEvent) -> None:
+        with self._cond:
+            self._pending = event if self._pending is None else self._pending.merged_with(event)
+            self._cond.notify_all()
+
+    def wait(self, timeout: float | None) -> WorksheetChangeEvent | None:
+        """Block up to ``timeout`` seconds; return the latest event or ``None`` on timeout/close."""
+        with self._cond:
+            if self._pending is None and not self._closed:
+                self._cond.wait(timeout)
+            event, self._pending = self._pending, None
+            return event
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self.hub.unsubscribe(self)
+
+
+class InProcessChangeBackend:
+    name = "memory"
+
+    def __init__(self, hub: WorksheetChangeHub) -> None:
+        self.hub = hub
+
+    def has_remote_subscribers(self) -> bool:
+        return False
+
+    def ensure_started(self) -> None:
+        return None
+
+    def publish(self, event: WorksheetChangeEvent) -> None:
+        self.hub.dispatch(event)
+
+
+class PostgresNotifyChangeBackend:
+    """``pg_notify`` publisher + a single daemon ``LISTEN`` thread that feeds the local hub."""
+
+    name = "postgres"
+
+    def __init__(self, hub: WorksheetChangeHub, app, channel: str = WORKSHEET_CHANGE_CHANNEL) -> None:
+        self.hub = hub
+        self.app = app
+        self.channel = channel
+        self._start_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def has_remote_subscribers(self) -> bool:
+        # Other processes may hold streams for any route-month.
+        return True
+
+    def ensure_started(self) -> None:
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._listen_forever,
+                name="worksheet-change-listen",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def publish(self, event: WorksheetChangeEvent) -> None:
+        # Own short transaction so NOTIFY is delivered even if the caller's session is mid-rollback.
+        with db.engine.connect() as conn:
+            conn.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": self.channel, "payload": event.to_json()},
+            )
+            conn.commit()
+
+    def _listen_forever(self) -> None:
+        backoff = 1.0
+        while True:
+            conn = None
+            try:
+                with self.app.app_context():
+                    pooled = db.engine.raw_connection()
+                # Detached: a permanent LISTEN connection must not count against the request pool.
+                pooled.detach()
+                conn = pooled.driver_connection
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f'LISTEN "{self.channel}"')
+                logger.info("worksheet change listener connected channel=%s", self.channel)
+                backoff = 1.0
+                self._drain(conn)
+            except Exception:
+                logger.exception("worksheet change listener failed; reconnecting in %.0fs", backoff)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, _LISTEN_MAX_BACKOFF_SECONDS)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+    def _drain(self, conn) -> None:
+        while True:
+            ready, _, _ = select.select([conn], [], [], _LISTEN_IDLE_PING_SECONDS)
+            if not ready:
+                # Surface dead connections (RDS idle drops) instead of waiting forever.
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                continue
+            conn.poll()
+            while conn.notifies:
+                note = conn.notifies.pop(0)
+                event = WorksheetChangeEvent.from_json(note.payload)
+                if event is not None:
+                    self.hub.dispatch(event)
+
+
+class WorksheetChangeHub:
+    """Route-month keyed subscriber registry; ``publish`` goes through the configured backend."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subscribers: dict[tuple[int, date], set[WorksheetSubscription]] = {}
+        self.backend: InProcessChangeBackend | PostgresNotifyChangeBackend = InProcessChangeBackend(self)
+        self.stats = {"published": 0, "delivered": 0}
+
+    def subscribe(self, route_id: int, month_date: date) -> WorksheetSubscription:
+        self.backend.ensure_started()
+        sub = WorksheetSubscription(self, route_id, month_date)
+        with self._lock:
+            self._subscribers.setdefault(sub.key, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: WorksheetSubscription) -> None:
+        with self._lock:
+            subs = self._subscribers.get(sub.key)
+            if not subs:
+                return
+            subs.discard(sub)
+            if not subs:
+                self._subscribers.pop(sub.key, None)
+
+    def subscriber_count(self, route_id: int, month_date: date) -> int:
+        with self._lock:
+            return len(self._subscribers.get((int(route_id), month_date), ()))
+
+    def wants(self, route_id: int, month_date: date) -> bool:
+        """False when nobody (in this process or, for ``postgres``, any process) could be listening."""
+        return self.backend.has_remote_subscribers() or self.subscriber_count(route_id, month_date) > 0
+
+    def dispatch(self, event: WorksheetChangeEvent) -> int:
+        """Fan ``event`` out to local subscribers; returns the number of streams notified."""
+        with self._lock:
+            targets = list(self._subscribers.get((int(event.route_id), event.month_date), ()))
+            self.stats["delivered"] += len(targets)
+        for sub in targets:
+            sub.deliver(event)
+        return len(targets)
+
+    def publish(self, event: WorksheetChangeEvent) -> None:
+        # Released before handing off: the in-process backend dispatches (and locks) synchronously.
+        with self._lock:
+            self.stats["published"] += 1
+        self.backend.publish(event)
+
+
+def _backend_name_for_app(app) -> str:
+    raw = (os.getenv("WORKSHEET_CHANGE_BACKEND") or "auto").strip().lower()
+    if raw in ("memory", "postgres"):
+        return raw
+    uri = str(app.config.get("SQLALCHEMY_DATABASE_URI") or "").lower()
+    return "postgres" if uri.startswith("postgresql") else "memory"
+
+
+def _collect_touched_ids(session, _flush_context) -> None:
+    pending = session.info.setdefault(_PENDING_IDS_KEY, {"locations": set(), "mlm": set()})
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, MonthlyLocationMonth):
+            lid = obj.monthly_location_id
+        elif isinstance(obj, MonthlyLocationDeficiency):
+            lid = obj.monthly_location_id
+        elif isinstance(obj, MonthlyLocation):
+            lid = obj.id
+        elif isinstance(obj, MonthlyStopClockEvent):
+            if obj.monthly_location_month_id is not None:
+                pending["mlm"].add(int(obj.monthly_location_month_id))
+            continue
+        else:
+            continue
+        if lid is not None and (obj not in session.dirty or session.is_modified(obj)):
+            pending["locations"].add(int(lid))
+
+
+def _promote_touched_ids(session) -> None:
+    pending = session.info.pop(_PENDING_IDS_KEY, None)
+    if not pending:
+        return
+    committed = session.info.setdefault(_COMMITTED_IDS_KEY, {"locations": set(), "mlm": set()})
+    committed["locations"].update(pending["locations"])
+    committed["mlm"].update(pending["mlm"])
+
+
+def _discard_touched_ids(session, _previous_transaction) -> None:
+    session.info.pop(_PENDING_IDS_KEY, None)
+
+
+def _pop_committed_location_ids() -> tuple[int, ...] | None:
+    """Location ids written by this request's commits; ``None`` when none were tracked."""
+    committed = db.session.info.pop(_COMMITTED_IDS_KEY, None)
+    if not committed:
+        return None
+    ids = set(committed["locations"])
+    if committed["mlm"]:
+        ids.update(
+            int(lid)
+            for lid in db.session.execute(
+                sa_select(MonthlyLocationMonth.monthly_location_id).where(
+                    MonthlyLocationMonth.id.in_(sorted(committed["mlm"]))
+                )
+            ).scalars()
+        )
+    return _bounded_location_ids(ids) if ids else None
+
+
+def init_worksheet_change_hub(app) -> WorksheetChangeHub:
+    """Lifecycle hook for app startup; the ``LISTEN`` thread starts on the first SSE subscribe."""
+    listeners = (
+        ("after_flush", _collect_touched_ids),
+        ("after_commit", _promote_touched_ids),
+        ("after_soft_rollback", _discard_touched_ids),
+    )
+    for name, fn in listeners:
+        if not sa_event.contains(db.session, name, fn):
+            sa_event.listen(db.session, name, fn)
+    hub = WorksheetChangeHub()
+    if _backend_name_for_app(app) == "postgres":
+        hub.backend = PostgresNotifyChangeBackend(hub, app)
+    app.extensions[_EXTENSION_KEY] = hub
+    logger.info("worksheet change hub initialized backend=%s", hub.backend.name)
+    return hub
+
+
+def worksheet_change_hub() -> WorksheetChangeHub:
+    hub = current_app.extensions.get(_EXTENSION_KEY)
+    if hub is None:
+        hub = init_worksheet_change_hub(current_app._get_current_object())
+    return hub
+
+
+def publish_worksheet_change(route_id: int, month_first: date) -> WorksheetChangeEvent | None:
+    """Publish the committed worksheet revision for ``route_id`` / ``month_first``.
+
+    Call after ``db.session.commit()``. The revision is ``worksheet_attributed_revision_token``
+    so it is comparable with the token streams compute on connect; ``location_ids`` are the
+    locations this session's commits touched. Skips the token query entirely when no stream
+    could be listening.
+    """
+    from app.monthly.worksheet_locations import worksheet_attributed_revision_token
+
+    hub = worksheet_change_hub()
+    if not hub.wants(route_id, month_first):
+        db.session.info.pop(_COMMITTED_IDS_KEY, None)
+        return None
+    revision = worksheet_attributed_revision_token(int(route_id), month_first)
+    event = WorksheetChangeEvent(
+        route_id=int(route_id),
+        month_date=month_first,
+        revision=revision,
+        location_ids=_pop_committed_location_ids(),
+    )
+    try:
+        hub.publish(event)
+    except Exception:
+        # Streams still resync on ``WORKSHEET_SSE_RESYNC_SECONDS``; never fail the write response.
+        logger.exception("worksheet change publish failed route=%s month=%s", route_id, month_first)
+        return None
+    return event
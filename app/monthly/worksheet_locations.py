@@ -9,10 +9,10 @@ from __future__ import annotations
 
 from collections.abc import Iterable
 from dataclasses import dataclass
-from datetime import date
+from datetime import date, datetime, timedelta
 from typing import TYPE_CHECKING
 
-from sqlalchemy import func
+from sqlalchemy import and_, func, or_
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import joinedload
 
@@ -35,11 +35,15 @@ from app.monthly.site_field_template import (
 )
 from app.monthly.key_serialize import linked_key_fields_for_location
 from app.monthly.location_building import monthly_location_building_name
+from app.monthly.route_month_rollup import refresh_route_month_rollup
 from app.monthly.testing_site_fields import SNAPSHOT_STRING_FIELDS, SNAPSHOT_TEXT_FIELDS
 
 if TYPE_CHECKING:
     pass
 
+#: Delta reads re-send stops written up to this long before the client's revision watermark.
+WORKSHEET_DELTA_OVERLAP = timedelta(seconds=15)
+
 
 def _normalize_text(value: object) -> str | None:
     if value is None:
@@ -1603,6 +1607,30 @@ def worksheet_locations_for_route_month(
         )
 
     pairs = _worksheet_location_pairs_for_route_month(route_id, month_first, locs=locs)
+    return _serialize_worksheet_location_pairs(
+        route_id,
+        month_first,
+        pairs,
+        include_portal_extras=include_portal_extras,
+    )
+
+
+def _serialize_worksheet_location_pairs(
+    route_id: int,
+    month_first: date,
+    pairs: list[tuple[MonthlyLocationMonth | None, MonthlyLocation]],
+    *,
+    include_portal_extras: bool = True,
+    only_location_ids: set[int] | None = None,
+) -> list[dict[str, object]]:
+    """Serialize ``pairs`` in order; ``only_location_ids`` keeps full-route stop numbers."""
+    numbered = [
+        (idx, mlm, loc)
+        for idx, (mlm, loc) in enumerate(pairs, start=1)
+        if only_location_ids is None or int(loc.id) in only_location_ids
+    ]
+    if not numbered:
+        return []
 
     run = MonthlyRouteRun.query.filter_by(
         monthly_route_id=route_id,
@@ -1610,7 +1638,7 @@ def worksheet_locations_for_route_month(
     ).one_or_none()
 
     prefetch = (
-        _build_portal_workflow_extras_prefetch(pairs, run)
+        _build_portal_workflow_extras_prefetch([(mlm, loc) for _idx, mlm, loc in numbered], run)
         if include_portal_extras
         else None
     )
@@ -1627,7 +1655,7 @@ def worksheet_locations_for_route_month(
     except Exception:
         annual_schedule_by_location_id = None
     out: list[dict[str, object]] = []
-    for idx, (mlm, loc) in enumerate(pairs, start=1):
+    for idx, mlm, loc in numbered:
         out.append(
             serialize_worksheet_location(
                 loc,
@@ -1871,6 +1899,147 @@ def worksheet_stops_revision_token(route_id: int, month_first: date) -> str | No
     return f"mlm:{ts_part}:{int(count or 0)}"
 
 
+def worksheet_attributed_revision_token(route_id: int, month_first: date) -> str:
+    """Change token over every row the worksheet shows for the route-month.
+
+    Covers stamped rows and legacy unstamped rows whose site is on the route (the office
+    worksheet's attribution scope), so the change hub and SSE resyncs notice edits to either.
+    ``since_revision`` deltas keep using ``worksheet_stops_revision_token``.
+    """
+    attributed = or_(
+        MonthlyLocationMonth.test_monthly_route_id == route_id,
+        and_(
+            MonthlyLocationMonth.test_monthly_route_id.is_(None),
+            MonthlyLocation.monthly_route_id == route_id,
+        ),
+    )
+    max_ts, count = (
+        db.session.query(func.max(MonthlyLocationMonth.updated_at), func.count(MonthlyLocationMonth.id))
+        .outerjoin(MonthlyLocation, MonthlyLocation.id == MonthlyLocationMonth.monthly_location_id)
+        .filter(MonthlyLocationMonth.month_date == month_first, attributed)
+        .one()
+    )
+    ts_part = max_ts.isoformat() if max_ts is not None else "none"
+    return f"ws:{ts_part}:{int(count or 0)}"
+
+
+def parse_worksheet_stops_revision_token(token: object) -> datetime | None:
+    """``updated_at`` watermark of a ``worksheet_stops_revision_token``; ``None`` when unusable."""
+    raw = _normalize_text(token)
+    if raw is None or not raw.startswith("mlm:"):
+        return None
+    ts_part, sep, count_part = raw[len("mlm:"):].rpartition(":")
+    if not sep or not count_part.isdigit() or ts_part == "none":
+        return None
+    try:
+        return datetime.fromisoformat(ts_part)
+    except ValueError:
+        return None
+
+
+def worksheet_location_ids_changed_since(
+    route_id: int,
+    month_first: date,
+    since: datetime,
+    location_ids: Iterable[int],
+) -> set[int]:
+    """Locations among ``location_ids`` whose stop, library row, clock events or deficiencies
+    were written after ``since`` (minus ``WORKSHEET_DELTA_OVERLAP``)."""
+    loc_ids = sorted({int(lid) for lid in location_ids})
+    if not loc_ids:
+        return set()
+    after = _revision_watermark_with_overlap(since)
+    month_rows = (
+        MonthlyLocationMonth.month_date == month_first,
+        MonthlyLocationMonth.monthly_location_id.in_(loc_ids),
+    )
+    queries = (
+        db.session.query(MonthlyLocationMonth.monthly_location_id).filter(
+            *month_rows,
+            MonthlyLocationMonth.updated_at > after,
+        ),
+        db.session.query(MonthlyLocation.id).filter(
+            MonthlyLocation.id.in_(loc_ids),
+            MonthlyLocation.updated_at > after,
+        ),
+        db.session.query(MonthlyLocationMonth.monthly_location_id)
+        .join(
+            MonthlyStopClockEvent,
+            MonthlyStopClockEvent.monthly_location_month_id == MonthlyLocationMonth.id,
+        )
+        .filter(*month_rows, MonthlyStopClockEvent.updated_at > after),
+        db.session.query(MonthlyLocationDeficiency.monthly_location_id).filter(
+            MonthlyLocationDeficiency.monthly_location_id.in_(loc_ids),
+            MonthlyLocationDeficiency.updated_at > after,
+        ),
+    )
+    union = queries[0].union(*queries[1:])
+    return {int(lid) for (lid,) in union.all() if lid is not None}
+
+
+def _worksheet_location_ids_removed_since(
+    route_id: int,
+    month_first: date,
+    since: datetime,
+    current_location_ids: set[int],
+) -> list[int]:
+    """Stops stamped to this route-month and written after ``since`` that left the stop list."""
+    after = _revision_watermark_with_overlap(since)
+    rows = (
+        db.session.query(MonthlyLocationMonth.monthly_location_id)
+        .join(MonthlyLocation, MonthlyLocation.id == MonthlyLocationMonth.monthly_location_id)
+        .filter(
+            MonthlyLocationMonth.month_date == month_first,
+            MonthlyLocationMonth.test_monthly_route_id == route_id,
+            (MonthlyLocationMonth.updated_at > after) | (MonthlyLocation.updated_at > after),
+        )
+        .all()
+    )
+    return sorted({int(lid) for (lid,) in rows} - current_location_ids)
+
+
+def _revision_watermark_with_overlap(since: datetime) -> datetime:
+    # ``now()`` is transaction start on Postgres: a write that started before the client's
+    # read but committed after it carries an older timestamp than the token it read.
+    return since - WORKSHEET_DELTA_OVERLAP
+
+
+def worksheet_stops_delta_for_route_month(
+    route_id: int,
+    month_first: date,
+    since: datetime,
+    *,
+    include_portal_extras: bool = True,
+) -> dict[str, object] | None:
+    """Stops changed since a revision watermark, plus the full stop order and removed ids.
+
+    ``None`` when the route-month has no roster (attributed-history worksheets); callers then
+    fall back to the full payload.
+    """
+    locs = _resolve_worksheet_route_locations(route_id, month_first)
+    if not locs:
+        return None
+    pairs = _worksheet_location_pairs_for_route_month(route_id, month_first, locs=locs)
+    if not pairs:
+        return None
+    location_ids = [int(loc.id) for _mlm, loc in pairs]
+    current = set(location_ids)
+    changed = worksheet_location_ids_changed_since(route_id, month_first, since, location_ids)
+    return {
+        "stops": _serialize_worksheet_location_pairs(
+            route_id,
+            month_first,
+            pairs,
+            include_portal_extras=include_portal_extras,
+            only_location_ids=changed,
+        ),
+        "location_ids": location_ids,
+        "removed_location_ids": _worksheet_location_ids_removed_since(
+            route_id, month_first, since, current
+        ),
+    }
+
+
 def load_stop_for_patch(
     route_id: int,
     testing_site_id: int,
@@ -2134,6 +2303,7 @@ def prune_route_month_stops_not_on_active_library(
         .delete(synchronize_session=False)
     )
     db.session.flush()
+    refresh_route_month_rollup([(route_id, month_first)])
     return int(deleted or 0)
 
 
@@ -1,12 +1,17 @@
 import json
 import logging
+import os
+import sqlite3
+import tempfile
 import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from hashlib import sha256
-from typing import Any, Callable
+from typing import Any, Callable, Iterable
 
-from flask import jsonify, request, Response, session
+from flask import copy_current_request_context, current_app, has_app_context, jsonify, request, Response, session
 
 log = logging.getLogger("response-cache")
 
@@ -16,16 +21,417 @@ class _CacheEntry:
     data: Any
     status: int
     expires_at: float
+    prefix: str = ""
+    tags: tuple[str, ...] = ()
+    size: int = 0
+    #: Past ``expires_at`` but before this, the entry may be served while one thread refreshes.
+    stale_until: float = 0.0
+
+    @property
+    def evict_at(self) -> float:
+        return max(self.expires_at, self.stale_until)
 
 
 _LOCK = threading.RLock()
-_STORE: dict[str, _CacheEntry] = {}
-_STATS = {"hit": 0, "miss": 0, "set": 0, "evict": 0, "skip_bust": 0}
+_STATS = {
+    "hit": 0,
+    "miss": 0,
+    "set": 0,
+    "evict": 0,
+    "skip_bust": 0,
+    "expired": 0,
+    "lru_evict": 0,
+    "tag_evict": 0,
+    "coalesced": 0,
+    "stale_served": 0,
+    "refresh": 0,
+    "refresh_error": 0,
+    "flight_timeout": 0,
+}
+
+
+def _count(name: str, n: int = 1) -> int:
+    """Bump a stats counter under ``_LOCK`` (request, refresh and sweeper threads all count)."""
+    with _LOCK:
+        _STATS[name] += n
+        return _STATS[name]
+
+_DEFAULT_MAX_ENTRIES = 2000
+_DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+_DEFAULT_SWEEP_SECONDS = 60.0
+
+
+class MemoryLRUBackend:
+    """Per-process LRU bounded by entry count and approximate JSON bytes.
+
+    Keeps a prefix index and a tag index so invalidation touches only matching keys.
+    """
+
+    name = "memory"
+
+    def __init__(self, *, max_entries: int = _DEFAULT_MAX_ENTRIES, max_bytes: int = _DEFAULT_MAX_BYTES) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._by_prefix: dict[str, set[str]] = {}
+        self._by_tag: dict[str, set[str]] = {}
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: str) -> _CacheEntry | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: _CacheEntry) -> None:
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            self._by_prefix.setdefault(entry.prefix, set()).add(key)
+            for tag in entry.tags:
+                self._by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries or (
+                self._bytes > self.max_bytes and len(self._entries) > 1
+            ):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                _count("lru_evict")
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._remove(key)
+
+    def delete_prefix(self, prefix: str) -> int:
+        with self._lock:
+            doomed: list[str] = []
+            for group, keys in self._by_prefix.items():
+                if (group + ":").startswith(prefix):
+                    doomed.extend(keys)
+                elif prefix.startswith(group + ":"):
+                    doomed.extend(k for k in keys if k.startswith(prefix))
+            for key in doomed:
+                self._remove(key)
+            return len(doomed)
+
+    def delete_tags(self, tags: Iterable[str]) -> int:
+        with self._lock:
+            doomed: set[str] = set()
+            for tag in tags:
+                doomed.update(self._by_tag.get(tag, ()))
+            for key in doomed:
+                self._remove(key)
+            return len(doomed)
+
+    def sweep_expired(self, now: float) -> int:
+        with self._lock:
+            doomed = [k for k, e in self._entries.items() if e.evict_at <= now]
+            for key in doomed:
+                self._remove(key)
+            return len(doomed)
+
+    def _remove(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._bytes -= entry.size
+        group = self._by_prefix.get(entry.prefix)
+        if group is not None:
+            group.discard(key)
+            if not group:
+                self._by_prefix.pop(entry.prefix, None)
+        for tag in entry.tags:
+            tagged = self._by_tag.get(tag)
+            if tagged is not None:
+                tagged.discard(key)
+                if not tagged:
+                    self._by_tag.pop(tag, None)
+        return True
+
+
+class SQLiteCacheBackend:
+    """On-disk cache shared by every worker process on the host (WAL-mode SQLite file).
+
+    Same LRU bounds as ``MemoryLRUBackend``; recency is ``last_access`` (refreshed on hit).
+    """
+
+    name = "sqlite"
+
+    _SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS response_cache_entry (
+            key TEXT PRIMARY KEY,
+            prefix TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status INTEGER NOT NULL,
+            expires_at REAL NOT NULL,
+            stale_until REAL NOT NULL,
+            size INTEGER NOT NULL,
+            last_access REAL NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_response_cache_entry_stale ON response_cache_entry (stale_until)",
+        "CREATE INDEX IF NOT EXISTS ix_response_cache_entry_access ON response_cache_entry (last_access)",
+        """
+        CREATE TABLE IF NOT EXISTS response_cache_tag (
+            tag TEXT NOT NULL,
+            key TEXT NOT NULL,
+            PRIMARY KEY (tag, key)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_response_cache_tag_key ON response_cache_tag (key)",
+    )
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        max_entries: int = _DEFAULT_MAX_ENTRIES,
+        max_bytes: int = _DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.path = path
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self._local = threading.local()
+        with self._conn() as conn:
+            for stmt in self._SCHEMA:
+                conn.execute(stmt)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def __len__(self) -> int:
+        return int(self._conn().execute("SELECT COUNT(*) FROM response_cache_entry").fetchone()[0])
+
+    @property
+    def total_bytes(self) -> int:
+        row = self._conn().execute("SELECT COALESCE(SUM(size), 0) FROM response_cache_entry").fetchone()
+        return int(row[0])
+
+    def get(self, key: str) -> _CacheEntry | None:
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT prefix, payload, status, expires_at, stale_until, size FROM response_cache_entry WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE response_cache_entry SET last_access = ? WHERE key = ?", (time.time(), key))
+        tags = tuple(
+            t for (t,) in conn.execute("SELECT tag FROM response_cache_tag WHERE key = ?", (key,))
+        )
+        return _CacheEntry(
+            data=json.loads(row[1]),
+            status=int(row[2]),
+            expires_at=float(row[3]),
+            prefix=row[0],
+            tags=tags,
+            size=int(row[5]),
+            stale_until=float(row[4]),
+        )
+
+    def set(self, key: str, entry: _CacheEntry) -> None:
+        conn = self._conn()
+        payload = _encode_payload(entry.data)
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM response_cache_tag WHERE key = ?", (key,))
+            conn.execute(
+                "INSERT OR REPLACE INTO response_cache_entry "
+                "(key, prefix, payload, status, expires_at, stale_until, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    entry.prefix,
+                    payload,
+                    entry.status,
+                    entry.expires_at,
+                    entry.evict_at,
+                    len(payload),
+                    time.time(),
+                ),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO response_cache_tag (tag, key) VALUES (?, ?)",
+                [(tag, key) for tag in entry.tags],
+            )
+            self._trim(conn)
+
+    def _trim(self, conn: sqlite3.Connection) -> None:
+        count, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM response_cache_entry"
+        ).fetchone()
+        while count > self.max_entries or (total > self.max_bytes and count > 1):
+            over_entries = max(0, count - self.max_entries)
+            batch = max(1, over_entries)
+            victims = conn.execute(
+                "SELECT key, size FROM response_cache_entry ORDER BY last_access ASC LIMIT ?",
+                (batch,),
+            ).fetchall()
+            if not victims:
+                return
+            self._delete_keys(conn, [k for k, _ in victims])
+            _count("lru_evict", len(victims))
+            count -= len(victims)
+            total -= sum(int(s) for _, s in victims)
+
+    @staticmethod
+    def _delete_keys(conn: sqlite3.Connection, keys: list[str]) -> None:
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            marks = ",".join("?" for _ in chunk)
+            conn.execute(f"DELETE FROM response_cache_tag WHERE key IN ({marks})", chunk)
+            conn.execute(f"DELETE FROM response_cache_entry WHERE key IN ({marks})", chunk)
+
+    def _delete_where(self, where: str, params: tuple) -> int:
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            keys = [k for (k,) in conn.execute(f"SELECT key FROM response_cache_entry WHERE {where}", params)]
+            self._delete_keys(conn, keys)
+        return len(keys)
+
+    def delete(self, key: str) -> bool:
+        return self._delete_where("key = ?", (key,)) > 0
+
+    def delete_prefix(self, prefix: str) -> int:
+        # Range scan on the primary key instead of LIKE (prefixes contain ``_`` wildcards).
+        return self._delete_where("key >= ? AND key < ?", (prefix, prefix + "\U0010ffff"))
+
+    def delete_tags(self, tags: Iterable[str]) -> int:
+        tag_list = list(tags)
+        if not tag_list:
+            return 0
+        marks = ",".join("?" for _ in tag_list)
+        return self._delete_where(
+            f"key IN (SELECT key FROM response_cache_tag WHERE tag IN ({marks}))",
+            tuple(tag_list),
+        )
+
+    def sweep_expired(self, now: float) -> int:
+        return self._delete_where("stale_until <= ?", (now,))
+
+
+_BACKEND: MemoryLRUBackend | SQLiteCacheBackend = MemoryLRUBackend()
+_SWEEPER: threading.Thread | None = None
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int((os.getenv(name) or "").strip() or default)
+    except ValueError:
+        return default
+
+
+def _backend_from_env() -> MemoryLRUBackend | SQLiteCacheBackend:
+    max_entries = _env_int("RESPONSE_CACHE_MAX_ENTRIES", _DEFAULT_MAX_ENTRIES)
+    max_bytes = _env_int("RESPONSE_CACHE_MAX_BYTES", _DEFAULT_MAX_BYTES)
+    kind = (os.getenv("RESPONSE_CACHE_BACKEND") or "memory").strip().lower()
+    if kind == "sqlite":
+        path = (os.getenv("RESPONSE_CACHE_SQLITE_PATH") or "").strip() or os.path.join(
+            tempfile.gettempdir(), "schedule_assist_response_cache.sqlite3"
+        )
+        try:
+            return SQLiteCacheBackend(path, max_entries=max_entries, max_bytes=max_bytes)
+        except sqlite3.Error:
+            log.exception("response cache sqlite backend unavailable at %s; using memory", path)
+    return MemoryLRUBackend(max_entries=max_entries, max_bytes=max_bytes)
+
+
+def set_response_cache_backend(backend: MemoryLRUBackend | SQLiteCacheBackend) -> None:
+    global _BACKEND
+    with _LOCK:
+        _BACKEND = backend
+
+
+def get_response_cache_backend() -> MemoryLRUBackend | SQLiteCacheBackend:
+    return _BACKEND
+
+
+def sweep_expired_entries(now: float | None = None) -> int:
+    removed = _BACKEND.sweep_expired(time.time() if now is None else now)
+    if removed:
+        _count("expired", removed)
+        log.debug("response cache swept %s expired entries", removed)
+    return removed
+
+
+def _sweep_forever(interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        try:
+            sweep_expired_entries()
+        except Exception:
+            log.exception("response cache sweep failed")
+
+
+def _start_sweeper() -> None:
+    global _SWEEPER
+    try:
+        interval = float((os.getenv("RESPONSE_CACHE_SWEEP_SECONDS") or "").strip() or _DEFAULT_SWEEP_SECONDS)
+    except ValueError:
+        interval = _DEFAULT_SWEEP_SECONDS
+    if interval <= 0:
+        return
+    with _LOCK:
+        if _SWEEPER is not None and _SWEEPER.is_alive():
+            return
+        _SWEEPER = threading.Thread(
+            target=_sweep_forever,
+            args=(max(5.0, interval),),
+            name="response-cache-sweeper",
+            daemon=True,
+        )
+        _SWEEPER.start()
 
 
 def init_response_cache(_app) -> None:
-    """Lifecycle hook for app startup (in-memory cache is module-scoped)."""
-    log.info("response cache initialized (in-memory)")
+    """Lifecycle hook for app startup: pick the backend from env and start the expiry sweeper.
+
+    ``RESPONSE_CACHE_BACKEND``: ``memory`` (default, per process) or ``sqlite`` (shared file at
+    ``RESPONSE_CACHE_SQLITE_PATH``). Bounds: ``RESPONSE_CACHE_MAX_ENTRIES`` / ``RESPONSE_CACHE_MAX_BYTES``.
+    """
+    set_response_cache_backend(_backend_from_env())
+    _start_sweeper()
+    log.info(
+        "response cache initialized (%s, max_entries=%s, max_bytes=%s)",
+        _BACKEND.name,
+        _BACKEND.max_entries,
+        _BACKEND.max_bytes,
+    )
+
+
+def response_cache_stats() -> dict[str, Any]:
+    with _LOCK:
+        counts = dict(_STATS)
+    return {
+        **counts,
+        "backend": _BACKEND.name,
+        "entries": len(_BACKEND),
+        "bytes": _BACKEND.total_bytes,
+    }
+
+
+def _encode_payload(value: Any) -> str:
+    """JSON text as ``jsonify`` would render ``value`` (dates, decimals), so both backends serve one body."""
+    if has_app_context():
+        return current_app.json.dumps(value)
+    return json.dumps(value, default=str)
 
 
 def _stable_dump(value: Any) -> str:
@@ -74,15 +480,79 @@ def _coerce_result(result: Any) -> tuple[Any, int]:
     return result, 200
 
 
+def _resolve_tags(
+    tags: tuple[str, ...] | Callable[..., Iterable[str]] | None,
+    args: tuple,
+    kwargs: dict[str, Any],
+) -> tuple[str, ...]:
+    """Tag templates are formatted with the view kwargs (e.g. ``"route:{route_id}"``)."""
+    if not tags:
+        return ()
+    if callable(tags):
+        return tuple(str(t) for t in tags(*args, **kwargs) if t)
+    resolved: list[str] = []
+    for template in tags:
+        try:
+            resolved.append(template.format(**kwargs))
+        except (KeyError, IndexError):
+            log.warning("response cache tag %r missing view arg; skipped", template)
+    return tuple(resolved)
+
+
 def invalidate_cache_prefix(prefix: str) -> int:
+    removed = _BACKEND.delete_prefix(prefix)
+    if removed:
+        _count("evict", removed)
+        log.info("response cache evicted %s entries for prefix=%s", removed, prefix)
+    return removed
+
+
+def invalidate_cache_tags(*tags: str) -> int:
+    """Drop every cached response tagged with any of ``tags`` (e.g. ``"route:12"``, ``"month:2026-10"``)."""
+    removed = _BACKEND.delete_tags(t for t in tags if t)
+    if removed:
+        _count("tag_evict", removed)
+        log.info("response cache evicted %s entries for tags=%s", removed, ",".join(tags))
+    return removed
+
+
+class _Flight:
+    """One in-progress computation for a cache key; followers wait on ``done``."""
+
+    __slots__ = ("done", "ok", "payload", "status")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.ok = False
+        self.payload: Any = None
+        self.status = 200
+
+
+_INFLIGHT: dict[str, _Flight] = {}
+# Stale-while-revalidate refreshes run off the request thread (bounded like the webhook executor).
+_REFRESH_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="response-cache-refresh")
+_FLIGHT_WAIT_SECONDS = 60.0
+
+
+def _join_or_lead(key: str) -> tuple[_Flight, bool]:
+    """Return ``(flight, True)`` for the caller that must compute ``key``; followers get ``False``."""
     with _LOCK:
-        keys = [k for k in _STORE if k.startswith(prefix)]
-        for k in keys:
-            _STORE.pop(k, None)
-        if keys:
-            _STATS["evict"] += len(keys)
-            log.info("response cache evicted %s entries for prefix=%s", len(keys), prefix)
-        return len(keys)
+        flight = _INFLIGHT.get(key)
+        if flight is not None:
+            return flight, False
+        flight = _Flight()
+        _INFLIGHT[key] = flight
+        return flight, True
+
+
+def _finish_flight(key: str, flight: _Flight, payload: Any = None, status: int = 200, ok: bool = False) -> None:
+    with _LOCK:
+        if _INFLIGHT.get(key) is flight:
+            _INFLIGHT.pop(key, None)
+    flight.payload = payload
+    flight.status = status
+    flight.ok = ok
+    flight.done.set()
 
 
 def cached_json_response(
@@ -92,17 +562,70 @@ def cached_json_response(
     include_query: bool = True,
     include_body: bool = False,
     body_fields: tuple[str, ...] | None = None,
+    tags: tuple[str, ...] | Callable[..., Iterable[str]] | None = None,
+    stale_ttl_seconds: int = 0,
 ) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
     """
     Decorator for JSON endpoints.
     - Supports GET and read-like POST.
     - Returns cached jsonify(payload), status when hit.
+    - Concurrent misses for the same key are coalesced: one request computes, the rest wait
+      for its payload (single-flight, per process).
+    - ``stale_ttl_seconds``: after ``ttl_seconds`` the entry is still served for this long while a
+      single background refresh recomputes it (stale-while-revalidate).
+    - ``tags``: entity tags for ``invalidate_cache_tags``; format templates over the view
+      kwargs (``("route:{route_id}",)``) or a callable taking the view args.
     """
 
     def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        def compute_and_store(key: str, flight: _Flight, args: tuple, kwargs: dict[str, Any]) -> Any:
+            now = time.time()
+            try:
+                result = fn(*args, **kwargs)
+                payload, status = _coerce_result(result)
+            except BaseException:
+                _finish_flight(key, flight)
+                raise
+            if payload is None:
+                _finish_flight(key, flight)
+                return result
+
+            expires_at = now + max(1, int(ttl_seconds))
+            _BACKEND.set(
+                key,
+                _CacheEntry(
+                    data=payload,
+                    status=status,
+                    expires_at=expires_at,
+                    prefix=prefix,
+                    tags=_resolve_tags(tags, args, kwargs),
+                    size=len(_encode_payload(payload)),
+                    stale_until=expires_at + max(0, int(stale_ttl_seconds)),
+                ),
+            )
+            _finish_flight(key, flight, payload, status, ok=True)
+            if _count("set") % 50 == 0:
+                log.info("response cache stats=%s", response_cache_stats())
+            return jsonify(payload), status
+
+        def refresh_in_background(key: str, flight: _Flight, args: tuple, kwargs: dict[str, Any]) -> None:
+            @copy_current_request_context
+            def refresh() -> None:
+                try:
+                    compute_and_store(key, flight, args, kwargs)
+                    _count("refresh")
+                except Exception:
+                    _count("refresh_error")
+                    log.exception("response cache background refresh failed key=%s", key)
+
+            try:
+                _REFRESH_EXECUTOR.submit(refresh)
+            except RuntimeError:
+                _finish_flight(key, flight)
+
         def wrapped(*args, **kwargs):
             if request.args.get("cache_bust") in ("1", "true", "True"):
-                _STATS["skip_bust"] += 1
+                _count("skip_bust")
                 return fn(*args, **kwargs)
 
             key = _build_key(
@@ -113,32 +636,32 @@ def cached_json_response(
             )
             now = time.time()
 
-            with _LOCK:
-                hit = _STORE.get(key)
-                if hit and hit.expires_at > now:
-                    _STATS["hit"] += 1
-                    log.debug("response cache hit key=%s", key)
-                    return jsonify(hit.data), hit.status
-                _STATS["miss"] += 1
-                if hit:
-                    _STORE.pop(key, None)
-
-            result = fn(*args, **kwargs)
-            payload, status = _coerce_result(result)
-            if payload is None:
-                return result
-
-            with _LOCK:
-                _STORE[key] = _CacheEntry(
-                    data=payload,
-                    status=status,
-                    expires_at=now + max(1, int(ttl_seconds)),
-                )
-                _STATS["set"] += 1
-                if _STATS["set"] % 50 == 0:
-                    log.info("response cache stats=%s size=%s", dict(_STATS), len(_STORE))
+            hit = _BACKEND.get(key)
+            if hit and hit.expires_at > now:
+                _count("hit")
+                log.debug("response cache hit key=%s", key)
+                return jsonify(hit.data), hit.status
+            if hit and hit.stale_until > now:
+                flight, leader = _join_or_lead(key)
+                if leader:
+                    refresh_in_background(key, flight, args, kwargs)
+                _count("stale_served")
+                return jsonify(hit.data), hit.status
+            _count("miss")
+            if hit:
+                _BACKEND.delete(key)
+                _count("expired")
 
-            return jsonify(payload), status
+            flight, leader = _join_or_lead(key)
+            if not leader:
+                if flight.done.wait(_FLIGHT_WAIT_SECONDS) and flight.ok:
+                    _count("coalesced")
+                    return jsonify(flight.payload), flight.status
+                if not flight.done.is_set():
+                    _count("flight_timeout")
+                # Leader failed or is stuck: compute independently rather than fail this request.
+                flight = _Flight()
+            return compute_and_store(key, flight, args, kwargs)
 
         wrapped.__name__ = fn.__name__
         wrapped.__doc__ = fn.__doc__
@@ -1,12 +1,21 @@
-from flask import Blueprint, jsonify, session, request
+from flask import Blueprint, Response, current_app, jsonify, session, request, stream_with_context
 from dataclasses import asdict
 import requests
 import json
+import os
+import threading
+import time
 from datetime import datetime, timedelta, timezone
 from app.models.deficiency import Deficiency
+from app.services.servicetrade import (
+    iter_paginated_items,
+    iter_paginated_pages,
+    propagate_credentials,
+    service_trade_client,
+)
 from typing import Any, Dict
 from app.db_models import DeficiencyRecord
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 from sqlalchemy import and_
 import pytz
 from flask import redirect, url_for
@@ -14,7 +23,7 @@ from flask import redirect, url_for
 from app.spa import send_spa_index
 
 deficiency_tracker_bp = Blueprint('deficiency_tracker', __name__)
-api_session = requests.Session()
+api_session = service_trade_client()
 
 SERVICE_TRADE_API_BASE = "https://api.servicetrade.com/api"
 SERVICE_TRADE_JOB_BASE = "https://app.servicetrade.com/jobs"
@@ -144,116 +153,230 @@ def deficiency_tracker_hide_toggle():
     return jsonify({"success": True})
 
 
-def fetch_deficiencies(start_date: datetime, end_date: datetime):
+DEFICIENCY_PAGE_LIMIT = 500
+JOB_IDS_PER_REQUEST = 100
+DEFAULT_ENRICH_WORKERS = 10
+DEFAULT_LOCATION_CACHE_TTL_SECONDS = 3600
+
+# Location name -> (cached_at monotonic, {"is_monthly_access", "company"} or None when not found).
+_location_metadata_cache: dict[str, tuple[float, dict | None]] = {}
+_location_metadata_lock = threading.Lock()
+
+
+def _enrich_workers() -> int:
+    try:
+        return max(1, int(os.getenv("DEFICIENCY_ENRICH_WORKERS") or DEFAULT_ENRICH_WORKERS))
+    except ValueError:
+        return DEFAULT_ENRICH_WORKERS
+
+
+def _location_cache_ttl() -> float:
+    try:
+        return float(os.getenv("DEFICIENCY_LOCATION_CACHE_TTL_SECONDS") or DEFAULT_LOCATION_CACHE_TTL_SECONDS)
+    except ValueError:
+        return float(DEFAULT_LOCATION_CACHE_TTL_SECONDS)
+
+
+def _fetch_location_metadata(location_name):
+    """``{"is_monthly_access", "company"}`` for the first location named ``location_name``."""
+    loc_resp = call_service_trade_api(f"{SERVICE_TRADE_API_BASE}/location", {"name": location_name})
+    if not loc_resp:
+        raise requests.RequestException(f"location lookup failed for {location_name!r}")
+    locations = loc_resp.json().get("data", {}).get("locations", [])
+    if not locations:
+        return None
+    return {
+        "is_monthly_access": is_location_monthly_access(locations[0]),
+        "company": safe_get(locations[0], "company", "name"),
+    }
+
+
+def _location_metadata_for(location_names, executor):
+    """Location metadata by name, from the TTL cache or one concurrent lookup per new name."""
+    now = time.monotonic()
+    ttl = _location_cache_ttl()
+    found = {}
+    with _location_metadata_lock:
+        for name in location_names:
+            cached = _location_metadata_cache.get(name)
+            if cached is not None and now - cached[0] < ttl:
+                found[name] = cached[1]
+    missing = [name for name in location_names if name not in found]
+    fetch = propagate_credentials(_fetch_location_metadata)
+    futures = {name: executor.submit(fetch, name) for name in missing}
+    for name, future in futures.items():
+        try:
+            metadata = future.result()
+        except Exception as e:
+            # Not cached, so the next batch retries it.
+            print(f"⚠️ Error fetching location info for {name}: {e}")
+            continue
+        found[name] = metadata
+        with _location_metadata_lock:
+            _location_metadata_cache[name] = (now, metadata)
+    return found
+
+
+def _fetch_job_statuses(job_ids):
+    """``{job_id: status}`` from ``/job?jobIds=...`` (one paginated listing per chunk)."""
+    statuses = {}
+    for start in range(0, len(job_ids), JOB_IDS_PER_REQUEST):
+        params = {"jobIds": ",".join(str(job_id) for job_id in job_ids[start:start + JOB_IDS_PER_REQUEST])}
+
+        def fetch_page(page, params=params):
+            response = call_service_trade_api(f"{SERVICE_TRADE_API_BASE}/job", {**params, "page": page})
+            return response.json().get("data", {}) if response else None
+
+        for job in iter_paginated_items(fetch_page, "jobs"):
+            statuses[job.get("id")] = job.get("status")
+    return statuses
+
+
+def _fetch_job_status(job_id):
+    job_resp = call_service_trade_api(f"{SERVICE_TRADE_API_BASE}/job", {"id": job_id})
+    return job_resp.json().get("data", {}).get("status") if job_resp else None
+
+
+def _fetch_quote_flags(deficiency_id):
+    quote_resp = call_service_trade_api(f"{SERVICE_TRADE_API_BASE}/quote", {"deficiencyId": deficiency_id})
+    quotes = quote_resp.json().get("data", {}).get("quotes", []) if quote_resp else []
+    is_quote_approved = is_quote_sent = is_quote_in_draft = False
+    quote_expiry = None
+
+    for quote in quotes:
+        quote_status = safe_get(quote, "quoteRequest", "status")
+        if quote_status == "approved":
+            is_quote_approved = True
+        elif quote_status == "waiting":
+            is_quote_in_draft = True
+        elif quote_status == "quote_received":
+            is_quote_sent = True
+
+        exp_ts = quote.get("expiresOn")
+        if exp_ts:
+            quote_expiry = datetime.fromtimestamp(exp_ts, tz=timezone.utc).astimezone(
+                pytz.timezone("America/Los_Angeles"))
+
+    return {
+        "is_quote_sent": is_quote_sent,
+        "is_quote_approved": is_quote_approved,
+        "is_quote_in_draft": is_quote_in_draft,
+        "quote_expiry": quote_expiry,
+    }
+
+
+def _build_deficiency(deficiency, location, is_job_complete, quote_flags):
+    deficiency_id = deficiency.get("id")
+    timestamp = deficiency.get("reportedOn")
+    return Deficiency(
+        deficiency_id=deficiency_id,
+        status=deficiency.get("status", ""),
+        reported_on=datetime.fromtimestamp(timestamp) if timestamp else None,
+        address=safe_get(deficiency, "location", "address", "street"),
+        location_name=safe_get(deficiency, "location", "name"),
+        is_monthly_access=location["is_monthly_access"],
+        description=deficiency.get("description", ""),
+        proposed_solution=deficiency.get("proposedFix", ""),
+        company=location["company"],
+        tech_name=safe_get(deficiency, "reporter", "name"),
+        tech_image_link=safe_get(deficiency, "reporter", "avatar", "small"),
+        job_link=f"{SERVICE_TRADE_DEFICIENCY_BASE}/{deficiency_id}" if deficiency_id else "",
+        is_job_complete=is_job_complete,
+        job_id=safe_get(deficiency, "job", "id"),
+        service_line_name=safe_get(deficiency, "serviceLine", "name"),
+        service_line_icon_link=safe_get(deficiency, "serviceLine", "icon"),
+        severity=deficiency.get("severity", ""),
+        **quote_flags,
+    )
+
+
+def iter_deficiencies(start_date: datetime, end_date: datetime):
+    """
+    Yield enriched ``Deficiency`` objects page by page, in ServiceTrade order.
+
+    Every ``/deficiency`` page is read. Each page is enriched as a batch. Location metadata
+    (monthly-access flag, company) is looked up once per location name and cached across
+    requests for ``DEFICIENCY_LOCATION_CACHE_TTL_SECONDS``. Job statuses are listed by
+    ``jobIds`` once per job across the whole walk. Quotes are fetched concurrently per deficiency.
+    Deficiencies whose location cannot be found are dropped, as before.
+    """
     authenticate()
 
     deficiency_params = {
         "createdBefore": int(end_date.timestamp()),
-        "createdAfter": int(start_date.timestamp())
+        "createdAfter": int(start_date.timestamp()),
+        "limit": DEFICIENCY_PAGE_LIMIT,
     }
 
-    response = call_service_trade_api(f"{SERVICE_TRADE_API_BASE}/deficiency", deficiency_params)
-    deficiencies_json = response.json().get("data", {}).get("deficiencies", [])
+    def fetch_page(page):
+        response = call_service_trade_api(f"{SERVICE_TRADE_API_BASE}/deficiency", {**deficiency_params, "page": page})
+        return response.json().get("data", {}) if response else None
+
+    job_status = {}
+    yielded = 0
+    with ThreadPoolExecutor(max_workers=_enrich_workers(), thread_name_prefix="deficiency-enrich") as executor:
+        for result in iter_paginated_pages(fetch_page):
+            batch = result.data.get("deficiencies") or []
+            print(f"Enriching deficiency page {result.page}/{result.total_pages} ({len(batch)} deficiencies)")
+
+            location_names = list(dict.fromkeys(
+                name for name in (safe_get(d, "location", "name") for d in batch) if name
+            ))
+            locations = _location_metadata_for(location_names, executor)
+            batch = [d for d in batch if locations.get(safe_get(d, "location", "name"))]
+
+            new_job_ids = list(dict.fromkeys(
+                job_id for job_id in (safe_get(d, "job", "id") for d in batch)
+                if job_id and job_id not in job_status
+            ))
+            if new_job_ids:
+                try:
+                    job_status.update(_fetch_job_statuses(new_job_ids))
+                except Exception as e:
+                    print(f"⚠️ Error listing jobs for deficiency page {result.page}: {e}")
+                unlisted = [job_id for job_id in new_job_ids if job_id not in job_status]
+                fetch_status = propagate_credentials(_fetch_job_status)
+                for job_id, status in zip(unlisted, executor.map(fetch_status, unlisted)):
+                    job_status[job_id] = status
+
+            fetch_quotes = propagate_credentials(_fetch_quote_flags)
+            quote_futures = [executor.submit(fetch_quotes, d.get("id")) for d in batch]
+            for deficiency, future in zip(batch, quote_futures):
+                try:
+                    job_id = safe_get(deficiency, "job", "id")
+                    yield _build_deficiency(
+                        deficiency,
+                        locations[safe_get(deficiency, "location", "name")],
+                        bool(job_id) and job_status.get(job_id) == "completed",
+                        future.result(),
+                    )
+                    yielded += 1
+                except Exception as e:
+                    print(f"❌ Error processing deficiency {deficiency.get('id')}: {e}")
+
+    print(f"Number of deficiencies enriched: {yielded}")
 
-    print(f"Number of deficiencies found: {len(deficiencies_json)}")
-    print("Processing Deficiencies (multithreaded)...")
 
-    def process_deficiency(deficiency):
-        try:
-            deficiency_id = deficiency.get("id")
-            job_id = safe_get(deficiency, "job", "id")
-            status = deficiency.get("status", "")
-            timestamp = deficiency.get("reportedOn")
-            reported_on = datetime.fromtimestamp(timestamp) if timestamp else None
-            address = safe_get(deficiency, "location", "address", "street")
-            location_name = safe_get(deficiency, "location", "name")
-            description = deficiency.get("description", "")
-            proposed_solution = deficiency.get("proposedFix", "")
-            tech_name = safe_get(deficiency, "reporter", "name")
-            tech_image_link = safe_get(deficiency, "reporter", "avatar", "small")
-            job_link = f"{SERVICE_TRADE_DEFICIENCY_BASE}/{deficiency_id}" if deficiency_id else ""
-            service_line_name = safe_get(deficiency, "serviceLine", "name")
-            service_line_icon_link = safe_get(deficiency, "serviceLine", "icon")
-            severity = deficiency.get("severity", "")
-
-            # Location API call (with safeguard)
-            try:
-                loc_resp = call_service_trade_api(f"{SERVICE_TRADE_API_BASE}/location", {"name": location_name})
-                locations = loc_resp.json().get("data", {}).get("locations", [])
-                current_location = locations[0] if locations else {}
-
-                if not current_location:
-                    return None
-
-                is_monthly_access = is_location_monthly_access(current_location)
-                company = safe_get(current_location, "company", "name")
-            except Exception as e:
-                print(f"⚠️ Error fetching location info for deficiency {deficiency.get('id')}: {e}")
-                return None
-
-
-            # Job API call
-            is_job_complete = False
-            if job_id:
-                job_resp = call_service_trade_api(f"{SERVICE_TRADE_API_BASE}/job", {"id": job_id})
-                job_status = job_resp.json().get("data", {}).get("status")
-                is_job_complete = job_status == "completed"
-
-            # Quote API call
-            quote_resp = call_service_trade_api(f"{SERVICE_TRADE_API_BASE}/quote", {"deficiencyId": deficiency_id})
-            quotes = quote_resp.json().get("data", {}).get("quotes", [])
-            is_quote_approved = is_quote_sent = is_quote_in_draft = False
-            quote_expiry = None
-
-            for quote in quotes:
-                status = safe_get(quote, "quoteRequest", "status")
-                if status == "approved":
-                    is_quote_approved = True
-                elif status == "waiting":
-                    is_quote_in_draft = True
-                elif status == "quote_received":
-                    is_quote_sent = True
-
-                exp_ts = quote.get("expiresOn")
-                if exp_ts:
-                    quote_expiry = datetime.fromtimestamp(exp_ts, tz=timezone.utc).astimezone(
-                        pytz.timezone("America/Los_Angeles"))
-
-            return Deficiency(
-                deficiency_id=deficiency_id,
-                status=status,
-                reported_on=reported_on,
-                address=address,
-                location_name=location_name,
-                is_monthly_access=is_monthly_access,
-                description=description,
-                proposed_solution=proposed_solution,
-                company=company,
-                tech_name=tech_name,
-                tech_image_link=tech_image_link,
-                job_link=job_link,
-                is_job_complete=is_job_complete,
-                job_id=job_id,
-                service_line_name=service_line_name,
-                service_line_icon_link=service_line_icon_link,
-                severity=severity,
-                is_quote_sent=is_quote_sent,
-                is_quote_approved=is_quote_approved,
-                is_quote_in_draft=is_quote_in_draft,
-                quote_expiry=quote_expiry
-            )
-        except Exception as e:
-            print(f"❌ Error processing deficiency {deficiency.get('id')}: {e}")
-            return None
+def fetch_deficiencies(start_date: datetime, end_date: datetime):
+    """NDJSON stream of enriched deficiencies: one ``deficiency`` line each, then ``end``."""
 
-    # 🔄 Run with threads
-    deficiencies = []
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        future_to_def = {executor.submit(process_deficiency, d): d for d in deficiencies_json}
-        for i, future in enumerate(as_completed(future_to_def), 1):
-            result = future.result()
-            if result:
-                deficiencies.append(result)
-            
-
-    return jsonify({"data": [serialize_deficiency(d) for d in deficiencies]})
+    def generate():
+        streamed = 0
+        try:
+            for d in iter_deficiencies(start_date, end_date):
+                # The app's JSON provider, like the old ``jsonify`` body (``quote_expiry`` is a datetime).
+                yield current_app.json.dumps({"type": "deficiency", "deficiency": serialize_deficiency(d)}) + "\n"
+                streamed += 1
+        except Exception as exc:
+            yield json.dumps({"type": "error", "error": str(exc), "total": streamed}) + "\n"
+            return
+        yield json.dumps({"type": "end", "total": streamed}) + "\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="application/x-ndjson",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
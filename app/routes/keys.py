@@ -1,6 +1,6 @@
 # app/routes/keys.py
 from flask import Blueprint, request, jsonify, abort, redirect, url_for
-from sqlalchemy import or_, func, inspect, cast, String
+from sqlalchemy import func, inspect
 from sqlalchemy.sql import over
 from datetime import datetime, timedelta, timezone
 from sqlalchemy.orm import selectinload, aliased
@@ -10,6 +10,7 @@ import re
 from app.db_models import db, Key, KeyAddress, KeyStatus, MonthlyLocation
 from app.spa import send_spa_index
 from app.response_cache import cached_json_response, invalidate_cache_prefix
+from app.search_index import key_search_rank, search_document_filter
 
 keys_bp = Blueprint("keys", __name__)
 
@@ -363,33 +364,10 @@ def api_keys_search():
     if len(q) < 2:
         return jsonify({"data": []})
 
-    like = f"%{q}%"
-    # Also match while ignoring spaces so accidental spacing doesn't break search.
-    normalized_q = "".join(q.split())
-    normalized_like = f"%{normalized_q}%"
-
-    keycode_no_spaces = func.replace(func.coalesce(Key.keycode, ""), " ", "")
-    address_no_spaces = func.replace(func.coalesce(KeyAddress.address, ""), " ", "")
-
-    barcode_txt = cast(Key.barcode, String)
     query = (
         db.session.query(Key)
-        .outerjoin(KeyAddress, KeyAddress.key_id == Key.id)
-        .filter(
-            or_(
-                Key.keycode.ilike(like),
-                KeyAddress.address.ilike(like),
-                keycode_no_spaces.ilike(normalized_like),
-                address_no_spaces.ilike(normalized_like),
-                barcode_txt.ilike(like),
-                Key.route.ilike(like),
-                Key.area.ilike(like),
-                Key.home_location.ilike(like),
-                Key.annual_month.ilike(like),
-                Key.site_status.ilike(like),
-            )
-        )
-        .distinct()
+        .filter(search_document_filter(Key, q, ignore_spaces=True))
+        .order_by(key_search_rank(q), Key.keycode.asc())
         .limit(8)
     )
 
@@ -2,9 +2,10 @@ from flask import Blueprint, session, jsonify
 from datetime import datetime, timedelta, timezone
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
+from app.services.servicetrade import propagate_credentials, service_trade_client
 
 limbo_job_tracker_bp = Blueprint('limbo_job_tracker', __name__)
-api_session = requests.Session()
+api_session = service_trade_client()
 from app.response_cache import cached_json_response
 from app.spa import send_spa_index
 from flask import redirect, url_for
@@ -133,7 +134,8 @@ def get_limbo_jobs():
 
     # ---- STEP 2: Threaded API fetches ---- #
     with ThreadPoolExecutor(max_workers=10) as executor:
-        futures = [executor.submit(fetch_and_process_job_appts, job_id) for job_id in unsched_appt_job_ids]
+        fetch = propagate_credentials(fetch_and_process_job_appts)
+        futures = [executor.submit(fetch, job_id) for job_id in unsched_appt_job_ids]
         for future in as_completed(futures):
             job_id, recent_appt = future.result()
             if recent_appt:
@@ -519,7 +519,7 @@ def monday_meeting_service_admin_page():
 
 
 @monday_meeting_bp.route("/api/monday_meeting/service", methods=["GET"])
-@cached_json_response(prefix="monday_meeting:service", ttl_seconds=180)
+@cached_json_response(prefix="monday_meeting:service", ttl_seconds=180, stale_ttl_seconds=180)
 def monday_meeting_service():
     window_start, window_end = get_date_window()
     return jsonify(get_monday_meeting_service_metrics(window_start, window_end))
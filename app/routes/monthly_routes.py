@@ -1,16 +1,15 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import date, datetime
 from decimal import Decimal, InvalidOperation
 import os
-from urllib import error as url_error, parse as url_parse, request as url_request
 import json
-import math
 import time
 from zoneinfo import ZoneInfo
 
-from flask import Blueprint, Response, jsonify, request, session, stream_with_context
-from sqlalchemy import and_, func, or_
+from flask import Blueprint, Response, current_app, jsonify, request, session, stream_with_context
+from sqlalchemy import and_, func
 from sqlalchemy.orm import joinedload
 
 from app.db_models import (
@@ -29,6 +28,24 @@ from app.db_models import (
 )
 from app.monthly.key_serialize import linked_key_fields_for_location, serialize_linked_key_summary
 from app.monthly.key_resolve import sync_key_fk_for_location
+from app.monthly.library_listing import (
+    LIBRARY_STREAM_BATCH_SIZE,
+    decode_library_cursor,
+    encode_library_cursor,
+    iter_library_batches,
+    library_keyset_after,
+    library_order_by,
+)
+from app.monthly.geocoding import (
+    apply_cached_coordinates,
+    build_geocode_query,
+    geocode_address,
+    geocode_batch_progress,
+    geocode_candidates,
+    geocode_locations,
+    is_victoria_area,
+    start_background_geocode,
+)
 from app.monthly.location_building import monthly_location_building_name
 from app.monthly.monthly_location_tags import (
     apply_library_tag_filters,
@@ -49,16 +66,13 @@ from app.monthly.mapbox_routes import (
     calculated_path_payload,
     invalidate_monthly_route_path,
 )
-from app.response_cache import cached_json_response, invalidate_cache_prefix
+from app.conditional_get import conditional_json_response
+from app.response_cache import cached_json_response, invalidate_cache_prefix, invalidate_cache_tags
+from app.search_index import search_document_filter
 monthly_routes_bp = Blueprint("monthly_routes", __name__)
 # Max rows from ``monthly_route_specialist_month`` returned on route detail (align with script default lookback).
 _ROUTE_DETAIL_SPECIALIST_MONTHS_LIMIT = int(os.getenv("MONTHLY_ROUTE_DETAIL_SPECIALIST_MONTHS", "24"))
 PACIFIC_TZ = ZoneInfo("America/Vancouver")
-VICTORIA_PROXIMITY_LNG = -123.3656
-VICTORIA_PROXIMITY_LAT = 48.4284
-# Approx Greater Victoria bounding box: west,south,east,north
-VICTORIA_BBOX = (-123.75, 48.25, -123.10, 48.75)
-VICTORIA_MAX_DISTANCE_KM = 80.0
 
 # Web UI deep links for ``MonthlyRoute.service_trade_route_location_id`` (route pseudo-location).
 SERVICE_TRADE_APP_LOCATIONS_BASE = os.getenv(
@@ -123,13 +137,6 @@ def _parse_price(value: object) -> Decimal | None:
         raise ValueError("price_per_month must be a valid number or null")
 
 
-def _build_geocode_query(loc: MonthlyLocation) -> str:
-    parts = [loc.address, loc.label, loc.property_management_company]
-    tokens = [str(part).strip() for part in parts if part and str(part).strip()]
-    tokens.append("Victoria, BC, Canada")
-    return ", ".join(tokens)
-
-
 def _get_monthly_location(location_id: int) -> MonthlyLocation | None:
     return (
         MonthlyLocation.query.options(
@@ -175,73 +182,22 @@ def _route_counts_for_location_query(location_query) -> dict[str, int]:
     return counts
 
 
-def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    r = 6371.0
-    d_lat = math.radians(lat2 - lat1)
-    d_lon = math.radians(lon2 - lon1)
-    a = (
-        math.sin(d_lat / 2) ** 2
-        + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(d_lon / 2) ** 2
-    )
-    return 2 * r * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-
-def _is_victoria_area(lat: float, lng: float) -> bool:
-    west, south, east, north = VICTORIA_BBOX
-    if west <= lng <= east and south <= lat <= north:
-        return True
-    return _haversine_km(VICTORIA_PROXIMITY_LAT, VICTORIA_PROXIMITY_LNG, lat, lng) <= VICTORIA_MAX_DISTANCE_KM
-
-
-def _geocode_with_mapbox(query: str, access_token: str) -> tuple[float, float] | None:
-    endpoint = "https://api.mapbox.com/geocoding/v5/mapbox.places/"
-    url = (
-        f"{endpoint}{url_parse.quote(query)}.json"
-        f"?access_token={url_parse.quote(access_token)}"
-        f"&limit=1&autocomplete=false&country=ca&types=address"
-        f"&proximity={VICTORIA_PROXIMITY_LNG},{VICTORIA_PROXIMITY_LAT}"
-        f"&bbox={VICTORIA_BBOX[0]},{VICTORIA_BBOX[1]},{VICTORIA_BBOX[2]},{VICTORIA_BBOX[3]}"
-    )
-    req = url_request.Request(url, headers={"User-Agent": "schedule-assist-monthly-routes/1.0"})
-    try:
-        with url_request.urlopen(req, timeout=8) as response:
-            payload = json.loads(response.read().decode("utf-8"))
-    except (url_error.URLError, TimeoutError, json.JSONDecodeError):
-        return None
-
-    features = payload.get("features") if isinstance(payload, dict) else None
-    if not features:
-        return None
-    center = features[0].get("center")
-    if (
-        not isinstance(center, list)
-        or len(center) < 2
-        or not isinstance(center[0], (int, float))
-        or not isinstance(center[1], (int, float))
-    ):
-        return None
-    lat, lng = float(center[1]), float(center[0])
-    if not _is_victoria_area(lat, lng):
-        return None
-    return (lat, lng)
-
-
-def _populate_missing_coordinates(locations: list[MonthlyLocation]) -> None:
-    access_token = os.getenv("MAPBOX_ACCESS_TOKEN")
-    if not access_token:
+def _populate_missing_coordinates(locations: list[MonthlyLocation], *, commit: bool = True) -> None:
+    """Fill missing coordinates from the geocode cache; uncached stops are geocoded in the background."""
+    missing_before = sum(1 for loc in locations if loc.latitude is None or loc.longitude is None)
+    if not missing_before:
         return
-
-    updated = False
-    for loc in locations:
-        if loc.latitude is not None and loc.longitude is not None:
-            continue
-        query = _build_geocode_query(loc)
-        coords = _geocode_with_mapbox(query, access_token)
-        if not coords:
-            continue
-        loc.latitude, loc.longitude = coords
-        updated = True
-    if updated:
+    uncached = apply_cached_coordinates(locations)
+    access_token = os.getenv("MAPBOX_ACCESS_TOKEN")
+    if uncached and access_token:
+        start_background_geocode(
+            current_app._get_current_object(),
+            "library",
+            [int(loc.id) for loc in uncached],
+            access_token,
+        )
+    still_missing = sum(1 for loc in locations if loc.latitude is None or loc.longitude is None)
+    if commit and still_missing < missing_before:
         db.session.commit()
 
 
@@ -942,32 +898,6 @@ def _testing_history_rows_attributed_to_route_month(
     return list(merged.values())
 
 
-def _worksheet_attributed_revision_token(route_id: int, month_first: date) -> str | None:
-    """Stable fingerprint for worksheet rows attributed to ``route_id`` / ``month_first``.
-
-    Aligns with ``_testing_history_rows_attributed_to_route_month`` (same merge scope as GET worksheet).
-    ``None`` when the route does not exist.
-    """
-    if _get_monthly_route(route_id) is None:
-        return None
-    rows = _testing_history_rows_attributed_to_route_month(route_id, month_first)
-    if not rows:
-        return "none:0"
-    max_ts: datetime | None = None
-    for row in rows:
-        u = row.updated_at
-        if u is None:
-            continue
-        if max_ts is None or u > max_ts:
-            max_ts = u
-    ts_part = max_ts.isoformat() if max_ts is not None else "none"
-    return f"{ts_part}:{len(rows)}"
-
-
-# Sentinel revision for PIN portal worksheet SSE before ``MonthlyRouteRun`` exists (lazy preview).
-_WORKSHEET_SSE_PORTAL_PREVIEW_TOKEN = "__worksheet_sse_portal_preview_no_run__"
-
-
 def _worksheet_history_sort_key(
     hist: MonthlyLocationMonth,
     loc: MonthlyLocation | None,
@@ -1764,28 +1694,6 @@ def _serialize_location_row(
     return payload
 
 
-def _serialize_geocode_candidate(feature: dict[str, object]) -> dict[str, object] | None:
-    center = feature.get("center")
-    place_name = feature.get("place_name")
-    if (
-        not isinstance(center, list)
-        or len(center) < 2
-        or not isinstance(center[0], (int, float))
-        or not isinstance(center[1], (int, float))
-        or not isinstance(place_name, str)
-    ):
-        return None
-    lat = float(center[1])
-    lng = float(center[0])
-    if not _is_victoria_area(lat, lng):
-        return None
-    return {
-        "display_address": place_name,
-        "latitude": lat,
-        "longitude": lng,
-    }
-
-
 @monthly_routes_bp.get("/api/monthly_routes/library/tag_options")
 def monthly_library_tag_options():
     return jsonify({"tags": distinct_location_tags()})
@@ -1844,17 +1752,7 @@ def monthly_routes_library(*, list_view: bool | None = None):
     if active_only:
         location_query = location_query.filter(MonthlyLocation.status_normalized == "active")
     if q:
-        location_query = location_query.filter(
-            or_(
-                func.lower(func.coalesce(MonthlyLocation.address, "")).contains(q),
-                func.lower(func.coalesce(MonthlyLocation.label, "")).contains(q),
-                func.lower(func.coalesce(MonthlyLocation.label_normalized, "")).contains(q),
-                func.lower(func.coalesce(MonthlyLocation.building_name, "")).contains(q),
-                func.lower(func.coalesce(MonthlyLocation.test_day, "")).contains(q),
-                func.lower(func.coalesce(MonthlyLocation.property_management_company, "")).contains(q),
-                func.lower(func.coalesce(MonthlyLocation.keys, "")).contains(q),
-            )
-        )
+        location_query = location_query.filter(search_document_filter(MonthlyLocation, q))
     if route:
         location_query = location_query.filter(MonthlyLocation.test_day == route)
 
@@ -1864,15 +1762,22 @@ def monthly_routes_library(*, list_view: bool | None = None):
         exclude_tags=exclude_tags,
     )
 
-    if route:
-        ordered_location_query = location_query.order_by(
-            MonthlyLocation.route_stop_order.asc().nulls_last(),
-            MonthlyLocation.address.asc(),
-        )
-    else:
-        ordered_location_query = location_query.order_by(MonthlyLocation.address.asc())
+    by_stop_order = bool(route)
+    ordered_location_query = location_query.order_by(*library_order_by(by_stop_order=by_stop_order))
+
+    # ``cursor`` (even empty, for the first page) switches to keyset pagination.
+    cursor_raw = request.args.get("cursor")
+    keyset = cursor_raw is not None
+    after_cursor = None
+    if keyset and cursor_raw.strip():
+        after_cursor = decode_library_cursor(cursor_raw, by_stop_order=by_stop_order)
+        if after_cursor is None:
+            return jsonify({"error": "Invalid cursor", "code": "invalid_cursor"}), 400
+        ordered_location_query = ordered_location_query.filter(library_keyset_after(after_cursor))
+    stream_ndjson = (request.args.get("format") or "").strip().lower() == "ndjson"
 
     special_library_filters = skipped_any or annual_tested_conflict
+    next_cursor: str | None = None
 
     if special_library_filters:
         candidate_locations = ordered_location_query.all()
@@ -1911,10 +1816,14 @@ def monthly_routes_library(*, list_view: bool | None = None):
         matching_ids = set.intersection(*id_sets) if id_sets else set(candidate_ids)
         filtered_locations = [loc for loc in candidate_locations if loc.id in matching_ids]
         total_locations = len(filtered_locations)
-        if unpaginated:
+        if unpaginated or stream_ndjson:
             locations = filtered_locations
             page = 1
             total_pages = 1
+        elif keyset:
+            locations = filtered_locations[:page_size]
+            if len(filtered_locations) > page_size:
+                next_cursor = encode_library_cursor(locations[-1], by_stop_order=by_stop_order)
         else:
             total_pages = max((total_locations + page_size - 1) // page_size, 1)
             if page > total_pages:
@@ -1922,12 +1831,22 @@ def monthly_routes_library(*, list_view: bool | None = None):
             start_idx = (page - 1) * page_size
             end_idx = start_idx + page_size
             locations = filtered_locations[start_idx:end_idx]
+    elif stream_ndjson:
+        locations = None
+        total_locations = None
     else:
         if unpaginated:
             locations = ordered_location_query.all()
             total_locations = len(locations)
             page = 1
             total_pages = 1
+        elif keyset:
+            # Only the first keyset page pays for the count.
+            total_locations = location_query.count() if after_cursor is None else None
+            locations = ordered_location_query.limit(page_size + 1).all()
+            if len(locations) > page_size:
+                locations = locations[:page_size]
+                next_cursor = encode_library_cursor(locations[-1], by_stop_order=by_stop_order)
         else:
             total_locations = ordered_location_query.count()
             total_pages = max((total_locations + page_size - 1) // page_size, 1)
@@ -1940,55 +1859,97 @@ def monthly_routes_library(*, list_view: bool | None = None):
     else:
         route_counts = _route_counts_for_location_query(location_query)
     monthly_routes_meta, _ = _meta_monthly_routes_bundle()
+    meta = {
+        "routes": _library_route_test_day_options(),
+        "monthly_routes": monthly_routes_meta,
+        "min_month": min_month.isoformat() if min_month else None,
+        "max_month": max_month.isoformat() if max_month else None,
+        "route_counts": route_counts,
+    }
+    fixed_months: list[date] | None = None
+    if include_history and from_month and to_month:
+        fixed_months = _month_range(min(from_month, to_month), max(from_month, to_month))
+
+    if stream_ndjson:
+        if locations is not None:
+            batches = (
+                locations[i : i + LIBRARY_STREAM_BATCH_SIZE]
+                for i in range(0, len(locations), LIBRARY_STREAM_BATCH_SIZE)
+            )
+        else:
+            # Rows are serialized per ``yield_per`` partition; the full list is never built.
+            batches = iter_library_batches(ordered_location_query)
 
-    location_ids = [l.id for l in locations]
-    if not location_ids:
-        route_options = _library_route_test_day_options()
-        return jsonify(
-            {
-                "locations": [],
-                "month_columns": [],
-                "meta": {
-                    "routes": route_options,
-                    "monthly_routes": monthly_routes_meta,
-                    "min_month": min_month.isoformat() if min_month else None,
-                    "max_month": max_month.isoformat() if max_month else None,
-                    "route_counts": route_counts,
-                    "pagination": {
-                        "page": page,
-                        "page_size": page_size,
-                        "total": total_locations,
-                        "total_pages": total_pages,
-                    },
-                },
-            }
+        def generate():
+            streamed = 0
+            seen_months: set[date] = set()
+            try:
+                yield json.dumps({"type": "meta", "meta": meta}) + "\n"
+                for batch in batches:
+                    if include_coordinates:
+                        _populate_missing_coordinates(batch, commit=False)
+                    by_location, batch_months = _library_history_cells(
+                        [loc.id for loc in batch],
+                        include_history=include_history,
+                        range_conditions=range_conditions,
+                        list_view=list_view,
+                    )
+                    seen_months.update(batch_months)
+                    rows_payload = [
+                        _serialize_location_row(loc, by_location.get(loc.id, {}), list_view=list_view)
+                        for loc in batch
+                    ]
+                    streamed += len(rows_payload)
+                    yield json.dumps({"type": "locations", "locations": rows_payload}) + "\n"
+                if include_coordinates:
+                    db.session.commit()
+                months_out = fixed_months if fixed_months is not None else sorted(seen_months)
+                yield json.dumps(
+                    {
+                        "type": "end",
+                        "month_columns": [m.isoformat() for m in months_out],
+                        "total": streamed,
+                    }
+                ) + "\n"
+            finally:
+                db.session.remove()
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype="application/x-ndjson",
+            headers={
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no",
+            },
         )
 
+    if keyset:
+        meta["pagination"] = {
+            "page_size": page_size,
+            "total": total_locations,
+            "next_cursor": next_cursor,
+        }
+    else:
+        meta["pagination"] = {
+            "page": page,
+            "page_size": page_size,
+            "total": total_locations,
+            "total_pages": total_pages,
+        }
+
+    if not locations:
+        return jsonify({"locations": [], "month_columns": [], "meta": meta})
+
     if include_coordinates:
         _populate_missing_coordinates(locations)
 
-    months: list[date] = []
-    by_location: dict[int, dict[str, dict[str, object]]] = {}
-    if include_history:
-        hist_query = MonthlyLocationMonth.query.filter(
-            MonthlyLocationMonth.monthly_location_id.in_(location_ids)
-        )
-        if not list_view:
-            hist_query = hist_query.options(joinedload(MonthlyLocationMonth.test_monthly_route))
-        if range_conditions:
-            hist_query = hist_query.filter(and_(*range_conditions))
-        history_rows = hist_query.all()
-
-        if from_month and to_month:
-            start = min(from_month, to_month)
-            end = max(from_month, to_month)
-            months = _month_range(start, end)
-        else:
-            months = sorted({r.month_date for r in history_rows})
-        for row in history_rows:
-            by_location.setdefault(row.monthly_location_id, {})[row.month_date.isoformat()] = (
-                _serialize_month_cell(row, list_view=list_view)
-            )
+    by_location, seen_months = _library_history_cells(
+        [loc.id for loc in locations],
+        include_history=include_history,
+        range_conditions=range_conditions,
+        list_view=list_view,
+    )
+    months = fixed_months if fixed_months is not None else sorted(seen_months)
 
     rows_payload = []
     for loc in locations:
@@ -1996,29 +1957,42 @@ def monthly_routes_library(*, list_view: bool | None = None):
             _serialize_location_row(loc, by_location.get(loc.id, {}), list_view=list_view)
         )
 
-    route_options = _library_route_test_day_options()
-
     return jsonify(
         {
             "locations": rows_payload,
             "month_columns": [m.isoformat() for m in months],
-            "meta": {
-                "routes": route_options,
-                "monthly_routes": monthly_routes_meta,
-                "min_month": min_month.isoformat() if min_month else None,
-                "max_month": max_month.isoformat() if max_month else None,
-                "route_counts": route_counts,
-                "pagination": {
-                    "page": page,
-                    "page_size": page_size,
-                    "total": total_locations,
-                    "total_pages": total_pages,
-                },
-            },
+            "meta": meta,
         }
     )
 
 
+def _library_history_cells(
+    location_ids: list[int],
+    *,
+    include_history: bool,
+    range_conditions: list,
+    list_view: bool,
+) -> tuple[dict[int, dict[str, dict[str, object]]], set[date]]:
+    """Serialized month cells per location plus the months present."""
+    by_location: dict[int, dict[str, dict[str, object]]] = {}
+    months: set[date] = set()
+    if not include_history or not location_ids:
+        return by_location, months
+    hist_query = MonthlyLocationMonth.query.filter(
+        MonthlyLocationMonth.monthly_location_id.in_(location_ids)
+    )
+    if not list_view:
+        hist_query = hist_query.options(joinedload(MonthlyLocationMonth.test_monthly_route))
+    if range_conditions:
+        hist_query = hist_query.filter(and_(*range_conditions))
+    for row in hist_query.all():
+        months.add(row.month_date)
+        by_location.setdefault(row.monthly_location_id, {})[row.month_date.isoformat()] = (
+            _serialize_month_cell(row, list_view=list_view)
+        )
+    return by_location, months
+
+
 @monthly_routes_bp.get("/api/monthly_routes/billing_board")
 def get_monthly_billing_board():
     """Active locations with processor billing + test rollup per month in a calendar quarter."""
@@ -2134,7 +2108,16 @@ def patch_monthly_billing_quarter_billed(location_id: int):
     return jsonify(result)
 
 
+def _library_location_etag_probe(location_id: int) -> list[object] | None:
+    from app.monthly.read_revisions import library_location_read_revision
+
+    if _get_monthly_location(location_id) is None:
+        return None
+    return library_location_read_revision(location_id)
+
+
 @monthly_routes_bp.get("/api/monthly_routes/library/<int:location_id>")
+@conditional_json_response(_library_location_etag_probe)
 def get_monthly_route_location(location_id: int):
     loc = _get_monthly_location(location_id)
     if loc is None:
@@ -2414,10 +2397,9 @@ def dashboard_st_job_release():
     timing_by_route_id = timing_rows_for_month(month_first, [int(route.id) for route in routes])
 
     def generate():
-        import requests
+        from app.services.servicetrade import service_trade_client
 
-        http = requests.Session()
-        http.headers.update({"Accept": "application/json"})
+        http = service_trade_client()
         try:
             authenticate_service_trade(http)
         except Exception as exc:
@@ -2460,7 +2442,17 @@ def get_monthly_route_header(route_id: int):
     )
 
 
+def _route_detail_etag_probe(route_id: int) -> list[object] | None:
+    from app.monthly.read_revisions import route_detail_read_revision
+
+    mr = _get_monthly_route(route_id)
+    if mr is None:
+        return None
+    return route_detail_read_revision(mr)
+
+
 @monthly_routes_bp.get("/api/monthly_routes/routes/<int:route_id>")
+@conditional_json_response(_route_detail_etag_probe)
 def get_monthly_route_detail(route_id: int):
     mr = _get_monthly_route(route_id)
     if mr is None:
@@ -2530,7 +2522,12 @@ def get_monthly_route_detail(route_id: int):
 
 
 @monthly_routes_bp.get("/api/monthly_routes/routes/<int:route_id>/hero_summary")
-@cached_json_response(prefix="monthly:route_hero_summary", ttl_seconds=1800, include_query=False)
+@cached_json_response(
+    prefix="monthly:route_hero_summary",
+    ttl_seconds=1800,
+    include_query=False,
+    tags=("route:{route_id}",),
+)
 def get_route_hero_summary(route_id: int):
     """Lazy hero performance aggregates (kept off the main route detail payload for faster first paint)."""
     mr = _get_monthly_route(route_id)
@@ -2538,8 +2535,11 @@ def get_route_hero_summary(route_id: int):
         return jsonify({"error": "Route not found"}), 404
 
     from app.monthly.route_hero_summary import build_route_hero_summary
+    from app.monthly.route_month_rollup import route_month_rollup_for_route
 
-    testing_by_month = _route_testing_by_month(route_id)
+    testing_by_month = route_month_rollup_for_route(route_id)
+    if testing_by_month is None:
+        testing_by_month = _route_testing_by_month(route_id)
     return jsonify({"hero_summary": build_route_hero_summary(mr, testing_by_month)})
 
 
@@ -2762,7 +2762,26 @@ def _serialize_monthly_run_details_payload(
     }
 
 
+def _route_month_etag_probe(read_revision):
+    """``?month=`` route-month probe; ``None`` (no ETag) lets the view answer 400/404."""
+
+    def probe(route_id: int) -> list[object] | None:
+        month_dt = _parse_month((request.args.get("month") or "").strip())
+        if month_dt is None or _get_monthly_route(route_id) is None:
+            return None
+        return read_revision(route_id, date(month_dt.year, month_dt.month, 1))
+
+    return probe
+
+
+def _run_details_read_revision(route_id: int, month_first: date) -> list[object]:
+    from app.monthly.read_revisions import run_details_read_revision
+
+    return run_details_read_revision(route_id, month_first)
+
+
 @monthly_routes_bp.get("/api/monthly_routes/routes/<int:route_id>/run_details")
+@conditional_json_response(_route_month_etag_probe(_run_details_read_revision))
 def get_monthly_route_run_details(route_id: int):
     """Office run summary for one sheet month (read-only; does not materialize worksheet rows)."""
     month_raw = (request.args.get("month") or "").strip()
@@ -2913,7 +2932,7 @@ def get_monthly_routes_dashboard_route_earnings():
 
 
 @monthly_routes_bp.get("/api/monthly_routes/dashboard/route_breakdown")
-@cached_json_response(prefix="monthly:route_breakdown", ttl_seconds=1800)
+@cached_json_response(prefix="monthly:route_breakdown", ttl_seconds=1800, stale_ttl_seconds=1800)
 def get_monthly_routes_dashboard_route_breakdown():
     """Per-route expense breakdown vs average monthly billable revenue (cached 30 min)."""
     from app.monthly.dashboard_route_metrics import (
@@ -3420,7 +3439,8 @@ def get_monthly_route_testing_session(route_id: int):
 @monthly_routes_bp.post("/api/monthly_routes/library/<int:location_id>/geocode")
 def geocode_monthly_library_location(location_id: int):
     """Attempt Mapbox geocoding for one library location missing coordinates."""
-    if not os.getenv("MAPBOX_ACCESS_TOKEN"):
+    access_token = os.getenv("MAPBOX_ACCESS_TOKEN")
+    if not access_token:
         return jsonify({"error": "MAPBOX_ACCESS_TOKEN is not configured"}), 503
 
     loc = _get_monthly_location(location_id)
@@ -3429,7 +3449,8 @@ def geocode_monthly_library_location(location_id: int):
 
     already_had = loc.latitude is not None and loc.longitude is not None
     if not already_had:
-        _populate_missing_coordinates([loc])
+        geocode_locations([loc], access_token)
+        db.session.commit()
         db.session.refresh(loc)
 
     geocoded = loc.latitude is not None and loc.longitude is not None
@@ -3452,10 +3473,15 @@ def geocode_monthly_library_location(location_id: int):
 
 @monthly_routes_bp.post("/api/monthly_routes/routes/<int:route_id>/geocode_missing_coordinates")
 def geocode_missing_route_coordinates(route_id: int):
-    """Geocode all stops on a route that are missing latitude/longitude."""
+    """Geocode all stops on a route that are missing latitude/longitude.
+
+    ``?background=1`` queues the work on the batch geocoder and answers 202 with its progress
+    (poll the GET twin); otherwise the batch runs inline and the result lists each stop.
+    """
     from app.monthly.mapbox_routes import ordered_route_locations, serialize_route_stop
 
-    if not os.getenv("MAPBOX_ACCESS_TOKEN"):
+    access_token = os.getenv("MAPBOX_ACCESS_TOKEN")
+    if not access_token:
         return jsonify({"error": "MAPBOX_ACCESS_TOKEN is not configured"}), 503
 
     mr = _get_monthly_route(route_id)
@@ -3466,9 +3492,20 @@ def geocode_missing_route_coordinates(route_id: int):
     missing_before = [
         loc for loc in locations if loc.latitude is None or loc.longitude is None
     ]
+    if (request.args.get("background") or "").strip().lower() in {"1", "true", "yes"}:
+        progress = start_background_geocode(
+            current_app._get_current_object(),
+            f"route:{route_id}",
+            [int(loc.id) for loc in missing_before],
+            access_token,
+        )
+        return jsonify({"route_id": route_id, "progress": progress.to_dict()}), 202
+
+    cache_hits = 0
     if missing_before:
-        _populate_missing_coordinates(missing_before)
+        cache_hits = geocode_locations(missing_before, access_token).cache_hits
         invalidate_monthly_route_path(route_id)
+        db.session.commit()
 
     updated: list[dict[str, object]] = []
     failed: list[dict[str, object]] = []
@@ -3493,10 +3530,20 @@ def geocode_missing_route_coordinates(route_id: int):
             "updated_count": len(updated),
             "updated": updated,
             "failed": failed,
+            "cache_hits": cache_hits,
         }
     )
 
 
+@monthly_routes_bp.get("/api/monthly_routes/routes/<int:route_id>/geocode_missing_coordinates")
+def geocode_missing_route_coordinates_progress(route_id: int):
+    """Progress of the latest background geocoding batch for a route."""
+    progress = geocode_batch_progress(f"route:{route_id}")
+    if progress is None:
+        return jsonify({"route_id": route_id, "progress": None})
+    return jsonify({"route_id": route_id, "progress": progress.to_dict()})
+
+
 @monthly_routes_bp.get("/api/monthly_routes/routes/<int:route_id>/calculated_path")
 def get_monthly_route_calculated_path(route_id: int):
     mr = _get_monthly_route(route_id)
@@ -3561,8 +3608,10 @@ def _attach_worksheet_stops(
         return payload
     from app.monthly.worksheet_locations import (
         portal_worksheet_preview_stops,
+        worksheet_stops_delta_for_route_month,
         worksheet_stops_for_route_month,
         worksheet_stops_from_attributed_history,
+        worksheet_stops_revision_token,
     )
 
     run = payload.get("run")
@@ -3575,6 +3624,25 @@ def _attach_worksheet_stops(
         ).one_or_none()
         if run_orm is not None:
             _sync_worksheet_stops_for_route_month(route_id, month_first, run_orm)
+        payload["revision"] = worksheet_stops_revision_token(route_id, month_first)
+        since = _worksheet_since_revision()
+        delta = (
+            worksheet_stops_delta_for_route_month(route_id, month_first, since)
+            if since is not None
+            else None
+        )
+        if delta is not None:
+            changed_ids = {int(stop["location_id"]) for stop in delta["stops"]}
+            payload["rows"] = [
+                row for row in (payload.get("rows") or []) if int(row["location_id"]) in changed_ids
+            ]
+            payload["stops"] = delta["stops"]
+            payload["delta"] = {
+                "since_revision": (request.args.get("since_revision") or "").strip(),
+                "location_ids": delta["location_ids"],
+                "removed_location_ids": delta["removed_location_ids"],
+            }
+            return payload
         stops = worksheet_stops_for_route_month(route_id, month_first)
         if not stops and (payload.get("rows") or []):
             stops = worksheet_stops_from_attributed_history(route_id, month_first)
@@ -3582,6 +3650,13 @@ def _attach_worksheet_stops(
     return payload
 
 
+def _worksheet_since_revision() -> datetime | None:
+    """``?since_revision=`` watermark for delta worksheet reads; ``None`` means full payload."""
+    from app.monthly.worksheet_locations import parse_worksheet_stops_revision_token
+
+    return parse_worksheet_stops_revision_token(request.args.get("since_revision"))
+
+
 def _portal_worksheet_lazy_request() -> bool:
     """Use lazy run semantics for worksheet GET/SSE (no auto ``MonthlyRouteRun``).
 
@@ -3600,7 +3675,17 @@ def _portal_worksheet_lazy_request() -> bool:
     return True
 
 
+def _worksheet_read_revision(route_id: int, month_first: date) -> list[object]:
+    from app.monthly.read_revisions import worksheet_read_revision
+
+    # The live ServiceTrade annual refresh (deduped per route-month) runs on every open, 304 or
+    # not, and before the probe so its writes land in this tag.
+    _sync_st_annual_on_paperwork_view(route_id, month_first)
+    return worksheet_read_revision(route_id, month_first)
+
+
 @monthly_routes_bp.get("/api/monthly_routes/routes/<int:route_id>/worksheet")
+@conditional_json_response(_route_month_etag_probe(_worksheet_read_revision))
 def get_monthly_route_worksheet(route_id: int):
     month_raw = (request.args.get("month") or "").strip()
     month_dt = _parse_month(month_raw)
@@ -3609,7 +3694,7 @@ def get_monthly_route_worksheet(route_id: int):
     month_first = date(month_dt.year, month_dt.month, 1)
     if _get_monthly_route(route_id) is None:
         return jsonify({"error": "Route not found"}), 404
-    _sync_st_annual_on_paperwork_view(route_id, month_first)
+    # The ServiceTrade annual refresh already ran in the ETag probe (``_worksheet_read_revision``).
     portal_lazy = _portal_worksheet_lazy_request()
     if _portal_current_month_materialize_on_read(month_first):
         portal_lazy = False
@@ -3621,20 +3706,38 @@ def get_monthly_route_worksheet(route_id: int):
     return jsonify(payload)
 
 
+def _worksheet_sse_revision_probe(route_id: int, month_first: date) -> str | None:
+    """DB revision token for one worksheet SSE stream (connect + periodic resync only).
+
+    Same ``worksheet_attributed_revision_token`` the change hub publishes, covering legacy
+    unstamped rows the office worksheet shows, so a resync only emits when those rows really
+    changed outside the web app.
+    """
+    from app.monthly.worksheet_locations import worksheet_attributed_revision_token
+
+    if _get_monthly_route(route_id) is None:
+        return None
+    return worksheet_attributed_revision_token(route_id, month_first)
+
+
 @monthly_routes_bp.get("/api/monthly_routes/routes/<int:route_id>/worksheet/stream")
 def stream_monthly_route_worksheet(route_id: int):
-    """SSE stream: emits worksheet revision when attributed rows change (heartbeat polling).
+    """SSE stream: emits worksheet revision when attributed rows change (push via change hub).
 
     Requires session auth (staff ``authenticated`` or PIN-unlocked technician portal).
 
+    The stream probes the DB revision once on connect, then waits on a
+    ``app.monthly.worksheet_change_hub`` subscription: worksheet writes publish one event that
+    every open tab for the route-month receives, so DB load scales with writes, not open tabs.
+
     When the PIN portal is on lazy worksheet semantics and the Pacific-month run row does not
-    exist yet, the stream still polls and emits once the run appears or worksheet rows change
-    (second device ``Start Run`` / edits).
+    exist yet, the stream emits once ``Start Run`` on another device materializes the stops.
 
     Ops (nginx): disable buffering for this location e.g. ``proxy_buffering off`` and send
     ``X-Accel-Buffering: no`` (already set below). Increase proxy/read timeouts for long-lived streams.
 
-    Poll interval: ``WORKSHEET_SSE_POLL_SECONDS`` (default ``5``, clamped 1.5–120).
+    Safety resync: ``WORKSHEET_SSE_RESYNC_SECONDS`` (default ``60``, clamped 5–600; ``0`` disables)
+    re-runs the DB probe to catch writes made outside the web app (scripts, other backends).
     """
     month_raw = (request.args.get("month") or "").strip()
     month_dt = _parse_month(month_raw)
@@ -3645,75 +3748,80 @@ def stream_monthly_route_worksheet(route_id: int):
     if _get_monthly_route(route_id) is None:
         return jsonify({"error": "Route not found"}), 404
 
-    poll_raw = (os.getenv("WORKSHEET_SSE_POLL_SECONDS") or "5").strip()
+    resync_raw = (os.getenv("WORKSHEET_SSE_RESYNC_SECONDS") or "60").strip()
     try:
-        poll_sec = float(poll_raw)
+        resync_sec = float(resync_raw)
     except ValueError:
-        poll_sec = 5.0
-    poll_sec = max(1.5, min(poll_sec, 120.0))
+        resync_sec = 60.0
+    resync_sec = 0.0 if resync_sec <= 0 else max(5.0, min(resync_sec, 600.0))
 
     # Heroku's router closes idle connections after 30s (H12). Heartbeats must arrive more often.
-    heartbeat_sec = min(15.0, max(5.0, poll_sec * 2))
+    heartbeat_sec = 15.0
+
+    from app.monthly.worksheet_change_hub import worksheet_change_hub
+
+    hub = worksheet_change_hub()
+
+    def _emit(token: str, location_ids: tuple[int, ...] | None = None) -> str:
+        payload_out: dict[str, object] = {
+            "revision": token,
+            "route_id": route_id,
+            "month_date": month_first.isoformat(),
+        }
+        if location_ids is not None:
+            payload_out["location_ids"] = list(location_ids)
+        return f"data: {json.dumps(payload_out)}\n\n"
+
+    def _probe() -> str | None:
+        try:
+            # Long-lived SSE: roll back the implicit read transaction and expire ORM state so the
+            # probe sees DB commits from other requests/workers.
+            db.session.rollback()
+            db.session.expire_all()
+            return _worksheet_sse_revision_probe(route_id, month_first)
+        finally:
+            # Return connection to the pool between probes; otherwise each open worksheet tab
+            # holds one pool slot until the client disconnects (QueuePool timeout on other APIs).
+            db.session.remove()
 
     def generate():
-        last_sent: str | None = None
-        last_heartbeat = time.monotonic()
-        yield "retry: 15000\n\n"
-        # Release the connection acquired by route-level queries; this request stays open for SSE.
-        db.session.remove()
+        subscription = hub.subscribe(route_id, month_first)
         try:
+            yield "retry: 15000\n\n"
+            last_probe = _probe()
+            if last_probe is None:
+                yield f"event: worksheet_error\ndata: {json.dumps({'error': 'Route not found'})}\n\n"
+                return
+            last_sent = last_probe
+            yield _emit(last_sent)
+            now = time.monotonic()
+            next_heartbeat = now + heartbeat_sec
+            next_resync = now + resync_sec if resync_sec else None
             while True:
-                try:
-                    # Long-lived SSE: roll back the implicit read transaction and expire ORM state so
-                    # each poll sees DB commits from other requests/workers (SQLAlchemy identity map +
-                    # repeatable-read snapshots otherwise hide worksheet PATCH updates indefinitely).
-                    db.session.rollback()
-                    db.session.expire_all()
-                    if _worksheet_payload_includes_stops():
-                        from app.monthly.worksheet_locations import worksheet_stops_revision_token
-
-                        existing_run = MonthlyRouteRun.query.filter_by(
-                            monthly_route_id=route_id,
-                            month_date=month_first,
-                        ).one_or_none()
-                        if existing_run is None and _portal_worksheet_lazy_request():
-                            token = _WORKSHEET_SSE_PORTAL_PREVIEW_TOKEN
-                        else:
-                            token = worksheet_stops_revision_token(route_id, month_first)
-                    elif _portal_worksheet_lazy_request():
-                        existing_run = MonthlyRouteRun.query.filter_by(
-                            monthly_route_id=route_id,
-                            month_date=month_first,
-                        ).one_or_none()
-                        if existing_run is None:
-                            token = _WORKSHEET_SSE_PORTAL_PREVIEW_TOKEN
-                        else:
-                            token = _worksheet_attributed_revision_token(route_id, month_first)
-                    else:
-                        token = _worksheet_attributed_revision_token(route_id, month_first)
+                deadline = next_heartbeat if next_resync is None else min(next_heartbeat, next_resync)
+                event = subscription.wait(max(0.0, deadline - time.monotonic()))
+                # Clock/deficiency-only writes keep the ``mlm:`` token; their location ids still notify.
+                if event is not None and (event.revision != last_sent or event.location_ids):
+                    last_sent = event.revision
+                    yield _emit(last_sent, event.location_ids)
+                now = time.monotonic()
+                if next_resync is not None and now >= next_resync:
+                    token = _probe()
                     if token is None:
                         yield f"event: worksheet_error\ndata: {json.dumps({'error': 'Route not found'})}\n\n"
-                        break
-                    if token != last_sent:
-                        payload_out = {
-                            "revision": token,
-                            "route_id": route_id,
-                            "month_date": month_first.isoformat(),
-                        }
-                        yield f"data: {json.dumps(payload_out)}\n\n"
-                        last_sent = token
-                    now = time.monotonic()
-                    if now - last_heartbeat >= heartbeat_sec:
-                        yield ": heartbeat\n\n"
-                        last_heartbeat = now
-                finally:
-                    # Return connection to the pool between polls; otherwise each open worksheet tab
-                    # holds one pool slot until the client disconnects (QueuePool timeout on other APIs).
-                    db.session.remove()
-                time.sleep(poll_sec)
-        except GeneratorExit:
+                        return
+                    if token != last_probe:
+                        last_probe = token
+                        if token != last_sent:
+                            last_sent = token
+                            yield _emit(last_sent)
+                    next_resync = now + resync_sec
+                if now >= next_heartbeat:
+                    yield ": heartbeat\n\n"
+                    next_heartbeat = now + heartbeat_sec
+        finally:
+            subscription.close()
             db.session.remove()
-            return
 
     # Do not set Connection here — it is hop-by-hop (PEP 3333) and Waitress rejects it.
     return Response(
@@ -3726,19 +3834,123 @@ def stream_monthly_route_worksheet(route_id: int):
     )
 
 
-@monthly_routes_bp.patch("/api/monthly_routes/routes/<int:route_id>/worksheet/rows/<int:location_id>")
-def patch_monthly_route_worksheet_row(route_id: int, location_id: int):
-    month_raw = (request.args.get("month") or "").strip()
-    month_dt = _parse_month(month_raw)
+def _write_request_route_month() -> tuple[int, date] | None:
+    """``(route_id, month_first)`` for a route-month write (``?month=`` or JSON ``month_date``)."""
+    if request.method in ("GET", "HEAD", "OPTIONS"):
+        return None
+    view_args = request.view_args or {}
+    route_id = view_args.get("route_id")
+    if route_id is None:
+        return None
+    if "/worksheet" not in request.path and "/runs" not in request.path:
+        return None
+    month_dt = _parse_month((request.args.get("month") or "").strip())
+    if month_dt is None and request.is_json:
+        body = request.get_json(silent=True)
+        if isinstance(body, dict):
+            month_dt = _parse_month(_clean_text(body.get("month_date")))
     if month_dt is None:
-        return jsonify({"error": "Invalid or missing month query param (use YYYY-MM-DD, first of month)"}), 400
-    month_first = date(month_dt.year, month_dt.month, 1)
-    payload = request.get_json(silent=True) or {}
-    if not isinstance(payload, dict):
-        return jsonify({"error": "JSON object payload required"}), 400
+        return None
+    return int(route_id), date(month_dt.year, month_dt.month, 1)
+
+
+@monthly_routes_bp.after_request
+def _invalidate_route_cache_after_write(response):
+    """Successful writes under ``/routes/<route_id>`` drop that route's tagged cached reads."""
+    if response.status_code >= 400 or request.method in ("GET", "HEAD", "OPTIONS"):
+        return response
+    route_id = (request.view_args or {}).get("route_id")
+    if route_id is not None:
+        invalidate_cache_tags(f"route:{int(route_id)}")
+    return response
+
+
+@monthly_routes_bp.after_request
+def _publish_worksheet_change_after_write(response):
+    """Successful worksheet / run writes notify open worksheet streams (one revision probe per write)."""
+    if response.status_code >= 400:
+        return response
+    target = _write_request_route_month()
+    if target is None:
+        return response
+    from app.monthly.worksheet_change_hub import publish_worksheet_change
+
+    publish_worksheet_change(*target)
+    return response
+
+
+@dataclass
+class _WorksheetPatchApplied:
+    """One worksheet row/stop PATCH validated and applied to the session (not committed)."""
+
+    row: MonthlyLocationMonth
+    loc: MonthlyLocation
+    run: MonthlyRouteRun | None
+    testing_site: MonthlyLocation | None = None
+    changed: bool = False
+    deduped: bool = False
+
+
+def _applied_client_mutation_ids(client_mutation_ids) -> set[str]:
+    """Ids already recorded on worksheet audit events (``uq_mr_worksheet_audit_client_mutation``)."""
+    wanted = {mid for mid in client_mutation_ids if mid}
+    if not wanted:
+        return set()
+    rows = (
+        db.session.query(MonthlyRouteWorksheetAuditEvent.client_mutation_id)
+        .filter(MonthlyRouteWorksheetAuditEvent.client_mutation_id.in_(sorted(wanted)))
+        .all()
+    )
+    return {str(mid) for (mid,) in rows}
+
+
+def _worksheet_patch_run_lock(
+    route_id: int,
+    month_first: date,
+    run_for_month: MonthlyRouteRun | None,
+    *,
+    stop_patch: bool,
+) -> tuple[object, int] | None:
+    """Run-level locks shared by every worksheet row/stop PATCH for one route/month."""
+    if stop_patch and _office_staff_worksheet_patch():
+        from app.monthly.run_workflow import run_in_office_prep_phase
+
+        if run_for_month is None or run_in_office_prep_phase(run_for_month):
+            blocked = _reject_if_future_month_prep_blocked(route_id, month_first)
+            if blocked is not None:
+                return blocked
+    portal_blocks = [
+        _reject_patch_if_portal_run_completed(run_for_month),
+        _reject_patch_if_portal_field_ended(run_for_month),
+    ]
+    if stop_patch:
+        portal_blocks.append(_reject_if_portal_read_only(run_for_month))
+    for portal_block in portal_blocks:
+        if portal_block is not None:
+            return portal_block
+    return None
+
+
+def _apply_worksheet_row_patch(
+    route_id: int,
+    location_id: int,
+    month_first: date,
+    payload: dict,
+    *,
+    run_for_month: MonthlyRouteRun | None,
+    audit_ids,
+    audit_events: list[MonthlyRouteWorksheetAuditEvent],
+    applied_mutation_ids: set[str],
+    check_run_locks: bool = True,
+) -> tuple[_WorksheetPatchApplied | None, tuple[object, int] | None]:
+    """Validate and apply one ``worksheet/rows`` PATCH body without committing.
+
+    New audit events are appended to ``audit_events`` for the caller to insert. On error the
+    caller rolls back whatever was already applied to the session.
+    """
     changes = payload.get("changes")
     if not isinstance(changes, dict) or not changes:
-        return jsonify({"error": "changes object is required"}), 400
+        return None, (jsonify({"error": "changes object is required"}), 400)
 
     row = (
         db.session.query(MonthlyLocationMonth)
@@ -3746,33 +3958,30 @@ def patch_monthly_route_worksheet_row(route_id: int, location_id: int):
         .one_or_none()
     )
     if row is None:
-        return jsonify({"error": "Worksheet row not found for location/month"}), 404
+        return None, (jsonify({"error": "Worksheet row not found for location/month"}), 404)
     if row.test_monthly_route_id is not None and int(row.test_monthly_route_id) != int(route_id):
-        return jsonify({"error": "Worksheet row does not belong to this route"}), 404
+        return None, (jsonify({"error": "Worksheet row does not belong to this route"}), 404)
     loc = _get_monthly_location(location_id)
     if loc is None:
-        return jsonify({"error": "Location not found"}), 404
+        return None, (jsonify({"error": "Location not found"}), 404)
 
-    run_for_month = MonthlyRouteRun.query.filter_by(
-        monthly_route_id=route_id,
-        month_date=month_first,
-    ).one_or_none()
-    for portal_block in (
-        _reject_patch_if_portal_run_completed(run_for_month),
-        _reject_patch_if_portal_field_ended(run_for_month),
-    ):
+    if check_run_locks:
+        portal_block = _worksheet_patch_run_lock(route_id, month_first, run_for_month, stop_patch=False)
         if portal_block is not None:
-            return portal_block
+            return None, portal_block
 
     if run_for_month is not None and _run_explicitly_completed(run_for_month):
         outcome_fields = {"result_status", "skip_reason"}
         if outcome_fields.intersection(changes.keys()):
-            return jsonify(
-                {
-                    "error": "This run is completed; reopen it before changing tested/skipped outcomes.",
-                    "code": "run_completed_outcome_locked",
-                }
-            ), 409
+            return None, (
+                jsonify(
+                    {
+                        "error": "This run is completed; reopen it before changing tested/skipped outcomes.",
+                        "code": "run_completed_outcome_locked",
+                    }
+                ),
+                409,
+            )
 
     outcome_fields_mut = {"result_status", "skip_reason"}
     staff_browser_outcome_lock = (
@@ -3785,12 +3994,15 @@ def patch_monthly_route_worksheet_row(route_id: int, location_id: int):
         and _run_field_in_progress(run_for_month)
         and staff_browser_outcome_lock
     ):
-        return jsonify(
-            {
-                "error": "Technicians are actively logging this run; office cannot change tested/skipped outcomes until field work ends or the run is reset.",
-                "code": "run_active_office_outcome_locked",
-            }
-        ), 409
+        return None, (
+            jsonify(
+                {
+                    "error": "Technicians are actively logging this run; office cannot change tested/skipped outcomes until field work ends or the run is reset.",
+                    "code": "run_active_office_outcome_locked",
+                }
+            ),
+            409,
+        )
 
     from app.monthly.run_workflow import office_may_edit_outcomes
 
@@ -3800,12 +4012,15 @@ def patch_monthly_route_worksheet_row(route_id: int, location_id: int):
         and not office_may_edit_outcomes(run_for_month)
         and not _run_field_in_progress(run_for_month)
     ):
-        return jsonify(
-            {
-                "error": "Office can change tested/skipped outcomes after technicians end the field run.",
-                "code": "office_outcome_before_field_end",
-            }
-        ), 409
+        return None, (
+            jsonify(
+                {
+                    "error": "Office can change tested/skipped outcomes after technicians end the field run.",
+                    "code": "office_outcome_before_field_end",
+                }
+            ),
+            409,
+        )
 
     expected = _normalize_ws_text(payload.get("expected_updated_at"))
     current_version = row.updated_at.isoformat() if row.updated_at else None
@@ -3815,18 +4030,8 @@ def patch_monthly_route_worksheet_row(route_id: int, location_id: int):
     _ = current_version
 
     client_mutation_id = _normalize_ws_text(payload.get("client_mutation_id"))
-    if client_mutation_id:
-        existing_mutation = MonthlyRouteWorksheetAuditEvent.query.filter_by(
-            client_mutation_id=client_mutation_id
-        ).first()
-        if existing_mutation is not None:
-            return jsonify(
-                {
-                    "ok": True,
-                    "deduped": True,
-                    "row": _worksheet_row_from_history(row, loc, route_id=route_id),
-                }
-            )
+    if client_mutation_id and client_mutation_id in applied_mutation_ids:
+        return _WorksheetPatchApplied(row=row, loc=loc, run=run_for_month, deduped=True), None
 
     # All technician-editable fields are run-scoped (snapshotted on the history row).
     # The library "current" view (``MonthlyLocation``) is mirrored from history
@@ -3855,7 +4060,7 @@ def patch_monthly_route_worksheet_row(route_id: int, location_id: int):
     known_fields = set(editable_history_fields.keys())
     unknown = [k for k in changes.keys() if k not in known_fields]
     if unknown:
-        return jsonify({"error": f"Unsupported worksheet fields: {', '.join(sorted(unknown))}"}), 400
+        return None, (jsonify({"error": f"Unsupported worksheet fields: {', '.join(sorted(unknown))}"}), 400)
 
     changes_eff: dict[str, object] = dict(changes)
     clocking_in = "time_in" in changes_eff and _normalize_ws_text(changes_eff.get("time_in")) is not None
@@ -3875,11 +4080,11 @@ def patch_monthly_route_worksheet_row(route_id: int, location_id: int):
     if "result_status" in changes_eff:
         rs = _normalize_ws_text(changes_eff.get("result_status"))
         if rs is not None and rs not in {"tested", "skipped"}:
-            return jsonify({"error": "result_status must be tested, skipped, or null"}), 400
+            return None, (jsonify({"error": "result_status must be tested, skipped, or null"}), 400)
     if _normalize_ws_text(changes_eff.get("result_status")) == "skipped":
         merged_skip = _normalize_ws_text(changes_eff.get("skip_reason"))
         if merged_skip is None and row.skip_reason is None:
-            return jsonify({"error": "skip_reason is required when result_status is skipped"}), 400
+            return None, (jsonify({"error": "skip_reason is required when result_status is skipped"}), 400)
 
     if _patch_will_start_open_clock_in(row, changes_eff):
         other_rows = (
@@ -3897,21 +4102,23 @@ def patch_monthly_route_worksheet_row(route_id: int, location_id: int):
         )
         for other in other_rows:
             if _worksheet_row_open_clock_in(other):
-                return jsonify(
-                    {
-                        "error": "Clock out of the current stop before clocking in elsewhere.",
-                        "code": "open_clock_in_conflict",
-                        "location_id": other.monthly_location_id,
-                    }
-                ), 409
-
+                return None, (
+                    jsonify(
+                        {
+                            "error": "Clock out of the current stop before clocking in elsewhere.",
+                            "code": "open_clock_in_conflict",
+                            "location_id": other.monthly_location_id,
+                        }
+                    ),
+                    409,
+                )
+
     actor_username = _session_username_clean()
     actor_name = actor_username
     source = _normalize_ws_text(payload.get("source")) or "technician_app"
     client_mutated_at = _parse_iso_dt(payload.get("client_mutated_at"))
-    from app.monthly.worksheet_locations import WorksheetAuditEventIdAllocator
-
-    audit_ids = WorksheetAuditEventIdAllocator()
+    # The unique client id goes on the first event only so a replay finds it.
+    pending_mutation_id = client_mutation_id
 
     changed_any = False
     mirrored_history_changes: dict[str, object] = {}
@@ -3930,7 +4137,7 @@ def patch_monthly_route_worksheet_row(route_id: int, location_id: int):
         setattr(row, attr_name, new_val)
         if field_name in library_mirror_fields:
             mirrored_history_changes[field_name] = new_val
-        db.session.add(
+        audit_events.append(
             MonthlyRouteWorksheetAuditEvent(
                 **audit_ids.id_kwargs(),
                 monthly_route_id=route_id,
@@ -3943,10 +4150,11 @@ def patch_monthly_route_worksheet_row(route_id: int, location_id: int):
                 source=source,
                 changed_by_username=actor_username,
                 changed_by_name=actor_name,
-                client_mutation_id=client_mutation_id if len(changes_eff) == 1 else None,
+                client_mutation_id=pending_mutation_id,
                 changed_at_client=client_mutated_at,
             )
         )
+        pending_mutation_id = None
         changed_any = True
 
     # Mirror snapshot edits onto ``MonthlyLocation`` only when the patched
@@ -3961,13 +4169,53 @@ def patch_monthly_route_worksheet_row(route_id: int, location_id: int):
                 setattr(loc, attr, new_val)
     # Enforce invariant after merged state updates.
     if (row.result_status or "").strip().lower() == "skipped" and not _normalize_ws_text(row.skip_reason):
-        db.session.rollback()
-        return jsonify({"error": "skip_reason is required when result_status is skipped"}), 400
+        return None, (jsonify({"error": "skip_reason is required when result_status is skipped"}), 400)
 
     if (row.result_status or "").strip().lower() != "skipped":
         row.skip_reason = None
 
-    if changed_any:
+    return _WorksheetPatchApplied(row=row, loc=loc, run=run_for_month, changed=changed_any), None
+
+
+@monthly_routes_bp.patch("/api/monthly_routes/routes/<int:route_id>/worksheet/rows/<int:location_id>")
+def patch_monthly_route_worksheet_row(route_id: int, location_id: int):
+    from app.monthly.worksheet_locations import WorksheetAuditEventIdAllocator
+
+    month_raw = (request.args.get("month") or "").strip()
+    month_dt = _parse_month(month_raw)
+    if month_dt is None:
+        return jsonify({"error": "Invalid or missing month query param (use YYYY-MM-DD, first of month)"}), 400
+    month_first = date(month_dt.year, month_dt.month, 1)
+    payload = request.get_json(silent=True) or {}
+    if not isinstance(payload, dict):
+        return jsonify({"error": "JSON object payload required"}), 400
+
+    run_for_month = MonthlyRouteRun.query.filter_by(
+        monthly_route_id=route_id,
+        month_date=month_first,
+    ).one_or_none()
+    audit_events: list[MonthlyRouteWorksheetAuditEvent] = []
+    applied, error = _apply_worksheet_row_patch(
+        route_id,
+        location_id,
+        month_first,
+        payload,
+        run_for_month=run_for_month,
+        audit_ids=WorksheetAuditEventIdAllocator(),
+        audit_events=audit_events,
+        applied_mutation_ids=_applied_client_mutation_ids(
+            [_normalize_ws_text(payload.get("client_mutation_id"))]
+        ),
+    )
+    if error is not None:
+        db.session.rollback()
+        return error
+    row, loc = applied.row, applied.loc
+    if applied.deduped:
+        return jsonify({"ok": True, "deduped": True, "row": _worksheet_row_from_history(row, loc, route_id=route_id)})
+
+    if applied.changed:
+        db.session.add_all(audit_events)
         db.session.commit()
     else:
         db.session.rollback()
@@ -3992,66 +4240,54 @@ def _patch_stop_number_hint(payload: dict) -> int | None:
     return None
 
 
-@monthly_routes_bp.patch(
-    "/api/monthly_routes/routes/<int:route_id>/worksheet/stops/<int:location_id>"
-)
-@monthly_routes_bp.patch(
-    "/api/monthly_routes/routes/<int:route_id>/worksheet/locations/<int:location_id>"
-)
-def patch_monthly_route_worksheet_stop(route_id: int, location_id: int):
-    """PATCH route-month worksheet location (``MonthlyLocationMonth``)."""
+def _apply_worksheet_stop_patch(
+    route_id: int,
+    location_id: int,
+    month_first: date,
+    payload: dict,
+    *,
+    run_for_month: MonthlyRouteRun | None,
+    audit_ids,
+    audit_events: list[MonthlyRouteWorksheetAuditEvent],
+    applied_mutation_ids: set[str],
+    check_run_locks: bool = True,
+) -> tuple[_WorksheetPatchApplied | None, tuple[object, int] | None]:
+    """Validate and apply one ``worksheet/stops`` PATCH body without committing.
+
+    Same contract as ``_apply_worksheet_row_patch``; ``run`` on the result may be a run file
+    created for office prep.
+    """
     from app.monthly.worksheet_locations import (
         STOP_PATCH_FIELD_MAP,
-        STOP_PATCH_HISTORY_AUDIT_ATTR,
-        WorksheetAuditEventIdAllocator,
         apply_worksheet_stop_field_change,
         ensure_worksheet_stops_for_route_month,
-        find_open_clock_in_stop_on_route,
         is_primary_stop,
         load_stop_for_patch,
         patch_will_start_open_clock_in,
-        resolve_worksheet_stop_number,
+        find_open_clock_in_stop_on_route,
         stop_patch_audit_old_value,
-        serialize_worksheet_stop,
-        serialize_worksheet_stop_office_prep_patch,
         sync_primary_history_from_stop,
     )
+    from app.monthly.run_workflow import run_in_office_prep_phase
 
-    month_raw = (request.args.get("month") or "").strip()
-    month_dt = _parse_month(month_raw)
-    if month_dt is None:
-        return jsonify({"error": "Invalid or missing month query param (use YYYY-MM-DD, first of month)"}), 400
-    month_first = date(month_dt.year, month_dt.month, 1)
-    payload = request.get_json(silent=True) or {}
-    if not isinstance(payload, dict):
-        return jsonify({"error": "JSON object payload required"}), 400
     changes = payload.get("changes")
     if not isinstance(changes, dict) or not changes:
-        return jsonify({"error": "changes object is required"}), 400
-
-    run_for_month = MonthlyRouteRun.query.filter_by(
-        monthly_route_id=route_id,
-        month_date=month_first,
-    ).one_or_none()
-
-    if _office_staff_worksheet_patch():
-        from app.monthly.run_workflow import run_in_office_prep_phase
+        return None, (jsonify({"error": "changes object is required"}), 400)
 
+    if check_run_locks and _office_staff_worksheet_patch():
         if run_for_month is None or run_in_office_prep_phase(run_for_month):
             blocked = _reject_if_future_month_prep_blocked(route_id, month_first)
             if blocked is not None:
-                return blocked
+                return None, blocked
 
     mtsm, ts, loc = load_stop_for_patch(route_id, location_id, month_first)
     if ts is None or loc is None:
-        return jsonify({"error": "Worksheet location not found"}), 404
+        return None, (jsonify({"error": "Worksheet location not found"}), 404)
     if mtsm is None and run_for_month is not None and _tech_portal_patch_request():
         ensure_worksheet_stops_for_route_month(route_id, month_first, run_for_month)
         db.session.flush()
         mtsm, ts, loc = load_stop_for_patch(route_id, location_id, month_first)
     if mtsm is None and _office_staff_worksheet_patch():
-        from app.monthly.run_workflow import run_in_office_prep_phase
-
         if run_in_office_prep_phase(run_for_month):
             if run_for_month is None:
                 from app.monthly.runs import get_or_create_monthly_route_run
@@ -4066,26 +4302,30 @@ def patch_monthly_route_worksheet_stop(route_id: int, location_id: int):
             db.session.flush()
             mtsm, ts, loc = load_stop_for_patch(route_id, location_id, month_first)
     if mtsm is None:
-        return jsonify({"error": "Worksheet location not found for route/month"}), 404
+        return None, (jsonify({"error": "Worksheet location not found for route/month"}), 404)
     if mtsm.test_monthly_route_id is not None and int(mtsm.test_monthly_route_id) != int(route_id):
-        return jsonify({"error": "Worksheet location does not belong to this route"}), 404
-    for portal_block in (
-        _reject_patch_if_portal_run_completed(run_for_month),
-        _reject_patch_if_portal_field_ended(run_for_month),
-        _reject_if_portal_read_only(run_for_month),
-    ):
-        if portal_block is not None:
-            return portal_block
+        return None, (jsonify({"error": "Worksheet location does not belong to this route"}), 404)
+    if check_run_locks:
+        for portal_block in (
+            _reject_patch_if_portal_run_completed(run_for_month),
+            _reject_patch_if_portal_field_ended(run_for_month),
+            _reject_if_portal_read_only(run_for_month),
+        ):
+            if portal_block is not None:
+                return None, portal_block
 
     if run_for_month is not None and _run_explicitly_completed(run_for_month):
         outcome_fields = {"result_status", "skip_reason"}
         if outcome_fields.intersection(changes.keys()):
-            return jsonify(
-                {
-                    "error": "This run is completed; reopen it before changing tested/skipped outcomes.",
-                    "code": "run_completed_outcome_locked",
-                }
-            ), 409
+            return None, (
+                jsonify(
+                    {
+                        "error": "This run is completed; reopen it before changing tested/skipped outcomes.",
+                        "code": "run_completed_outcome_locked",
+                    }
+                ),
+                409,
+            )
 
     outcome_fields_mut = {"result_status", "skip_reason"}
     staff_browser_outcome_lock = (
@@ -4098,12 +4338,15 @@ def patch_monthly_route_worksheet_stop(route_id: int, location_id: int):
         and _run_field_in_progress(run_for_month)
         and staff_browser_outcome_lock
     ):
-        return jsonify(
-            {
-                "error": "Technicians are actively logging this run; office cannot change tested/skipped outcomes until field work ends or the run is reset.",
-                "code": "run_active_office_outcome_locked",
-            }
-        ), 409
+        return None, (
+            jsonify(
+                {
+                    "error": "Technicians are actively logging this run; office cannot change tested/skipped outcomes until field work ends or the run is reset.",
+                    "code": "run_active_office_outcome_locked",
+                }
+            ),
+            409,
+        )
 
     from app.monthly.run_workflow import office_may_edit_outcomes as _office_may_edit_outcomes
 
@@ -4113,51 +4356,29 @@ def patch_monthly_route_worksheet_stop(route_id: int, location_id: int):
         and not _office_may_edit_outcomes(run_for_month)
         and not _run_field_in_progress(run_for_month)
     ):
-        return jsonify(
-            {
-                "error": "Office can change tested/skipped outcomes after technicians end the field run.",
-                "code": "office_outcome_before_field_end",
-            }
-        ), 409
+        return None, (
+            jsonify(
+                {
+                    "error": "Office can change tested/skipped outcomes after technicians end the field run.",
+                    "code": "office_outcome_before_field_end",
+                }
+            ),
+            409,
+        )
 
     client_mutation_id = _normalize_ws_text(payload.get("client_mutation_id"))
-    if client_mutation_id:
-        existing_mutation = MonthlyRouteWorksheetAuditEvent.query.filter_by(
-            client_mutation_id=client_mutation_id
-        ).first()
-        if existing_mutation is not None:
-            from app.monthly.run_workflow import run_in_office_prep_phase
-
-            office_prep = _office_staff_worksheet_patch()
-            stop_num = resolve_worksheet_stop_number(
-                route_id,
-                month_first,
-                location_id,
-                hint=_patch_stop_number_hint(payload),
-            )
-            if office_prep and run_in_office_prep_phase(run_for_month):
-                stop_payload = serialize_worksheet_stop_office_prep_patch(
-                    loc, mtsm, month_first=month_first, stop_number=stop_num
-                )
-            else:
-                stop_payload = serialize_worksheet_stop(
-                    loc,
-                    mtsm,
-                    route_id=route_id,
-                    month_first=month_first,
-                    stop_number=stop_num,
-                    include_portal_extras=not office_prep,
-                )
-            return jsonify({"ok": True, "deduped": True, "stop": stop_payload})
+    if client_mutation_id and client_mutation_id in applied_mutation_ids:
+        return (
+            _WorksheetPatchApplied(row=mtsm, loc=loc, run=run_for_month, testing_site=ts, deduped=True),
+            None,
+        )
 
     known_fields = set(STOP_PATCH_FIELD_MAP.keys())
     unknown = [k for k in changes.keys() if k not in known_fields]
     if unknown:
-        return jsonify({"error": f"Unsupported worksheet fields: {', '.join(sorted(unknown))}"}), 400
+        return None, (jsonify({"error": f"Unsupported worksheet fields: {', '.join(sorted(unknown))}"}), 400)
 
     if "office_attention" in changes or "office_job_comment" in changes or "prior_month_out_of_order_dismissed" in changes:
-        from app.monthly.run_workflow import run_in_office_prep_phase
-
         if not _office_staff_worksheet_patch():
             code = (
                 "office_job_comment_office_only"
@@ -4168,7 +4389,7 @@ def patch_monthly_route_worksheet_stop(route_id: int, location_id: int):
                     else "office_attention_office_only"
                 )
             )
-            return (
+            return None, (
                 jsonify(
                     {
                         "error": "Only office staff can edit office prep fields on stops.",
@@ -4178,7 +4399,7 @@ def patch_monthly_route_worksheet_stop(route_id: int, location_id: int):
                 403,
             )
         if not run_in_office_prep_phase(run_for_month):
-            return (
+            return None, (
                 jsonify(
                     {
                         "error": "Office prep fields can only be edited before field work starts.",
@@ -4191,7 +4412,7 @@ def patch_monthly_route_worksheet_stop(route_id: int, location_id: int):
     if "replaced_part_flag" in changes and _tech_portal_patch_request():
         flag_val = changes.get("replaced_part_flag")
         if flag_val in (None, "", False, 0, "0", "false", "False"):
-            return (
+            return None, (
                 jsonify(
                     {
                         "error": "Technicians cannot clear the replaced-part flag.",
@@ -4203,7 +4424,7 @@ def patch_monthly_route_worksheet_stop(route_id: int, location_id: int):
         from app.monthly.portal_workflow import mlm_has_open_clock_event
 
         if not mlm_has_open_clock_event(mtsm):
-            return (
+            return None, (
                 jsonify(
                     {
                         "error": "Clock in to this stop before logging a replaced part.",
@@ -4231,11 +4452,11 @@ def patch_monthly_route_worksheet_stop(route_id: int, location_id: int):
     if "result_status" in changes_eff:
         rs = _normalize_ws_text(changes_eff.get("result_status"))
         if rs is not None and rs not in {"tested", "skipped"}:
-            return jsonify({"error": "result_status must be tested, skipped, or null"}), 400
+            return None, (jsonify({"error": "result_status must be tested, skipped, or null"}), 400)
     if _normalize_ws_text(changes_eff.get("result_status")) == "skipped":
         merged_skip = _normalize_ws_text(changes_eff.get("skip_reason"))
         if merged_skip is None and mtsm.skip_reason is None:
-            return jsonify({"error": "skip_reason is required when result_status is skipped"}), 400
+            return None, (jsonify({"error": "skip_reason is required when result_status is skipped"}), 400)
 
     if patch_will_start_open_clock_in(mtsm, changes_eff):
         conflict = find_open_clock_in_stop_on_route(
@@ -4244,24 +4465,27 @@ def patch_monthly_route_worksheet_stop(route_id: int, location_id: int):
             exclude_testing_site_id=location_id,
         )
         if conflict is not None:
-            return jsonify(
-                {
-                    "error": "Clock out of the current stop before clocking in elsewhere.",
-                    "code": "open_clock_in_conflict",
-                    "location_id": int(conflict.monthly_location_id),
-                    "testing_site_id": int(conflict.monthly_location_id),
-                }
-            ), 409
+            return None, (
+                jsonify(
+                    {
+                        "error": "Clock out of the current stop before clocking in elsewhere.",
+                        "code": "open_clock_in_conflict",
+                        "location_id": int(conflict.monthly_location_id),
+                        "testing_site_id": int(conflict.monthly_location_id),
+                    }
+                ),
+                409,
+            )
 
     actor_username = _session_username_clean()
     actor_name = actor_username
     source = _normalize_ws_text(payload.get("source")) or "technician_app"
-    from app.monthly.run_workflow import run_in_office_prep_phase
 
     if _office_staff_worksheet_patch() and run_in_office_prep_phase(run_for_month):
         source = "office_manual"
     client_mutated_at = _parse_iso_dt(payload.get("client_mutated_at"))
-    audit_ids = WorksheetAuditEventIdAllocator()
+    # The unique client id goes on the first event only so a replay finds it.
+    pending_mutation_id = client_mutation_id
 
     audit_old_values: dict[str, object] = {
         field_name: stop_patch_audit_old_value(mtsm, field_name)
@@ -4279,14 +4503,12 @@ def patch_monthly_route_worksheet_stop(route_id: int, location_id: int):
             changes_eff.get(field_name),
         )
         if field_error:
-            db.session.rollback()
-            return jsonify({"error": field_error}), 400
+            return None, (jsonify({"error": field_error}), 400)
         if field_changed:
             changed_any = True
 
     if (mtsm.result_status or "").strip().lower() == "skipped" and not _normalize_ws_text(mtsm.skip_reason):
-        db.session.rollback()
-        return jsonify({"error": "skip_reason is required when result_status is skipped"}), 400
+        return None, (jsonify({"error": "skip_reason is required when result_status is skipped"}), 400)
 
     if (mtsm.result_status or "").strip().lower() != "skipped":
         mtsm.skip_reason = None
@@ -4379,7 +4601,7 @@ def patch_monthly_route_worksheet_stop(route_id: int, location_id: int):
                 audit_name = "facp" if field_name == "facp" else field_name
             if old_val == new_val:
                 continue
-            db.session.add(
+            audit_events.append(
                 MonthlyRouteWorksheetAuditEvent(
                     **audit_ids.id_kwargs(),
                     monthly_route_id=route_id,
@@ -4392,10 +4614,11 @@ def patch_monthly_route_worksheet_stop(route_id: int, location_id: int):
                     source=source,
                     changed_by_username=actor_username,
                     changed_by_name=actor_name,
-                    client_mutation_id=client_mutation_id if len(changes_eff) == 1 else None,
+                    client_mutation_id=pending_mutation_id,
                     changed_at_client=client_mutated_at,
                 )
             )
+            pending_mutation_id = None
 
     snapshot_patch_keys = set(STOP_PATCH_FIELD_MAP.keys()) - {
         "result_status",
@@ -4441,37 +4664,298 @@ def patch_monthly_route_worksheet_stop(route_id: int, location_id: int):
             if field_name == "panel" and loc.facp_detail != new_val:
                 loc.facp_detail = new_val
 
-    if changed_any:
-        db.session.commit()
-    else:
-        db.session.rollback()
+    return (
+        _WorksheetPatchApplied(row=mtsm, loc=loc, run=run_for_month, testing_site=ts, changed=changed_any),
+        None,
+    )
+
+
+def _worksheet_stop_patch_payload(
+    route_id: int,
+    month_first: date,
+    location_id: int,
+    applied: _WorksheetPatchApplied,
+    *,
+    stop_number_hint: int | None,
+) -> dict:
+    """Serialized stop after a PATCH (office prep shape while the run is still in prep)."""
+    from app.monthly.run_workflow import run_in_office_prep_phase
+    from app.monthly.worksheet_locations import (
+        resolve_worksheet_stop_number,
+        serialize_worksheet_stop,
+        serialize_worksheet_stop_office_prep_patch,
+    )
 
-    db.session.refresh(mtsm)
-    db.session.refresh(ts)
     office_prep = _office_staff_worksheet_patch()
     stop_num = resolve_worksheet_stop_number(
         route_id,
         month_first,
         location_id,
-        hint=_patch_stop_number_hint(payload),
+        hint=stop_number_hint,
     )
-    if office_prep and run_in_office_prep_phase(run_for_month):
-        stop_payload = serialize_worksheet_stop_office_prep_patch(
-            loc, mtsm, month_first=month_first, stop_number=stop_num
+    if office_prep and run_in_office_prep_phase(applied.run):
+        return serialize_worksheet_stop_office_prep_patch(
+            applied.loc, applied.row, month_first=month_first, stop_number=stop_num
         )
-    else:
-        stop_payload = serialize_worksheet_stop(
-            loc,
-            mtsm,
-            route_id=route_id,
-            month_first=month_first,
-            stop_number=stop_num,
-            run=run_for_month,
-            include_portal_extras=not office_prep,
+    return serialize_worksheet_stop(
+        applied.loc,
+        applied.row,
+        route_id=route_id,
+        month_first=month_first,
+        stop_number=stop_num,
+        run=None if applied.deduped else applied.run,
+        include_portal_extras=not office_prep,
+    )
+
+
+@monthly_routes_bp.patch(
+    "/api/monthly_routes/routes/<int:route_id>/worksheet/stops/<int:location_id>"
+)
+@monthly_routes_bp.patch(
+    "/api/monthly_routes/routes/<int:route_id>/worksheet/locations/<int:location_id>"
+)
+def patch_monthly_route_worksheet_stop(route_id: int, location_id: int):
+    """PATCH route-month worksheet location (``MonthlyLocationMonth``)."""
+    from app.monthly.worksheet_locations import WorksheetAuditEventIdAllocator
+
+    month_raw = (request.args.get("month") or "").strip()
+    month_dt = _parse_month(month_raw)
+    if month_dt is None:
+        return jsonify({"error": "Invalid or missing month query param (use YYYY-MM-DD, first of month)"}), 400
+    month_first = date(month_dt.year, month_dt.month, 1)
+    payload = request.get_json(silent=True) or {}
+    if not isinstance(payload, dict):
+        return jsonify({"error": "JSON object payload required"}), 400
+    changes = payload.get("changes")
+    if not isinstance(changes, dict) or not changes:
+        return jsonify({"error": "changes object is required"}), 400
+
+    run_for_month = MonthlyRouteRun.query.filter_by(
+        monthly_route_id=route_id,
+        month_date=month_first,
+    ).one_or_none()
+    audit_events: list[MonthlyRouteWorksheetAuditEvent] = []
+    applied, error = _apply_worksheet_stop_patch(
+        route_id,
+        location_id,
+        month_first,
+        payload,
+        run_for_month=run_for_month,
+        audit_ids=WorksheetAuditEventIdAllocator(),
+        audit_events=audit_events,
+        applied_mutation_ids=_applied_client_mutation_ids(
+            [_normalize_ws_text(payload.get("client_mutation_id"))]
+        ),
+    )
+    if error is not None:
+        db.session.rollback()
+        return error
+    hint = _patch_stop_number_hint(payload)
+    if applied.deduped:
+        stop_payload = _worksheet_stop_patch_payload(
+            route_id, month_first, location_id, applied, stop_number_hint=hint
         )
+        return jsonify({"ok": True, "deduped": True, "stop": stop_payload})
+
+    if applied.changed:
+        db.session.add_all(audit_events)
+        db.session.commit()
+    else:
+        db.session.rollback()
+
+    db.session.refresh(applied.row)
+    db.session.refresh(applied.testing_site)
+    stop_payload = _worksheet_stop_patch_payload(
+        route_id, month_first, location_id, applied, stop_number_hint=hint
+    )
     return jsonify({"ok": True, "stop": stop_payload})
 
 
+#: Most mutations one ``worksheet/mutations`` request may replay.
+WORKSHEET_MUTATION_BATCH_LIMIT = 200
+
+
+def _worksheet_mutation_kind(entry) -> str | None:
+    """``stop`` (default) or ``row`` for a batch entry; ``None`` when unsupported."""
+    if not isinstance(entry, dict):
+        return None
+    kind = entry.get("kind") or "stop"
+    if not isinstance(kind, str) or kind.strip().lower() not in ("stop", "row"):
+        return None
+    return kind.strip().lower()
+
+
+def _worksheet_mutation_error(kind, location_id, client_mutation_id, error) -> dict:
+    response, status = error
+    body = response.get_json(silent=True) or {}
+    return {
+        "client_mutation_id": client_mutation_id,
+        "kind": kind,
+        "location_id": location_id,
+        "ok": False,
+        "status": int(status),
+        **body,
+    }
+
+
+@monthly_routes_bp.post("/api/monthly_routes/routes/<int:route_id>/worksheet/mutations")
+def post_monthly_route_worksheet_mutations(route_id: int):
+    """Replay an ordered batch of queued worksheet row/stop PATCHes in one transaction.
+
+    Body: ``{"mutations": [{"kind": "stop" | "row", "location_id", "changes", "client_mutation_id",
+    "client_mutated_at", "source", "stop_number"}, ...]}`` — each entry is the single PATCH body
+    plus its target. Run locks are checked once for the route/month (the stop-only locks reject
+    just the stop mutations unless the batch is all stops), each mutation runs in a savepoint so a
+    rejected edit does not undo the others, and audit events are inserted together at the end. Ids
+    already in the audit log (or earlier in the batch) come back ``deduped``. Results are per
+    mutation, in request order, followed by the final ``stops`` / ``rows`` payloads for every
+    location touched.
+    """
+    from app.monthly.worksheet_locations import WorksheetAuditEventIdAllocator
+    from sqlalchemy.exc import IntegrityError
+
+    month_raw = (request.args.get("month") or "").strip()
+    month_dt = _parse_month(month_raw)
+    if month_dt is None:
+        return jsonify({"error": "Invalid or missing month query param (use YYYY-MM-DD, first of month)"}), 400
+    month_first = date(month_dt.year, month_dt.month, 1)
+    body = request.get_json(silent=True) or {}
+    mutations = body.get("mutations") if isinstance(body, dict) else None
+    if not isinstance(mutations, list) or not mutations:
+        return jsonify({"error": "mutations list is required"}), 400
+    if len(mutations) > WORKSHEET_MUTATION_BATCH_LIMIT:
+        return jsonify(
+            {"error": f"At most {WORKSHEET_MUTATION_BATCH_LIMIT} mutations per request", "code": "batch_too_large"}
+        ), 400
+
+    run_for_month = MonthlyRouteRun.query.filter_by(
+        monthly_route_id=route_id,
+        month_date=month_first,
+    ).one_or_none()
+    run_lock = _worksheet_patch_run_lock(route_id, month_first, run_for_month, stop_patch=False)
+    if run_lock is not None:
+        return run_lock
+    kinds = {_worksheet_mutation_kind(entry) for entry in mutations if isinstance(entry, dict)}
+    # Stop-only locks (portal read-only, future-month prep) reject just the stop mutations.
+    stop_lock = (
+        _worksheet_patch_run_lock(route_id, month_first, run_for_month, stop_patch=True)
+        if "stop" in kinds
+        else None
+    )
+    if stop_lock is not None and kinds == {"stop"}:
+        return stop_lock
+
+    applied_ids = _applied_client_mutation_ids(
+        _normalize_ws_text(entry.get("client_mutation_id")) for entry in mutations if isinstance(entry, dict)
+    )
+    audit_ids = WorksheetAuditEventIdAllocator()
+    audit_events: list[MonthlyRouteWorksheetAuditEvent] = []
+    touched: dict[tuple[str, int], tuple[_WorksheetPatchApplied, int | None]] = {}
+    results: list[dict] = []
+    changed_any = False
+
+    for entry in mutations:
+        if not isinstance(entry, dict):
+            results.append({"ok": False, "status": 400, "error": "Each mutation must be a JSON object"})
+            continue
+        kind = _worksheet_mutation_kind(entry)
+        client_mutation_id = _normalize_ws_text(entry.get("client_mutation_id"))
+        location_id = entry.get("location_id")
+        if kind is None:
+            results.append(
+                _worksheet_mutation_error(
+                    entry.get("kind"),
+                    location_id,
+                    client_mutation_id,
+                    (jsonify({"error": "kind must be stop or row"}), 400),
+                )
+            )
+            continue
+        if isinstance(location_id, bool) or not isinstance(location_id, int):
+            results.append(
+                _worksheet_mutation_error(
+                    kind, location_id, client_mutation_id, (jsonify({"error": "location_id is required"}), 400)
+                )
+            )
+            continue
+
+        if kind == "stop" and stop_lock is not None:
+            results.append(_worksheet_mutation_error(kind, location_id, client_mutation_id, stop_lock))
+            continue
+
+        apply_patch = _apply_worksheet_stop_patch if kind == "stop" else _apply_worksheet_row_patch
+        mutation_events: list[MonthlyRouteWorksheetAuditEvent] = []
+        savepoint = db.session.begin_nested()
+        applied, error = apply_patch(
+            route_id,
+            location_id,
+            month_first,
+            entry,
+            run_for_month=run_for_month,
+            audit_ids=audit_ids,
+            audit_events=mutation_events,
+            applied_mutation_ids=applied_ids,
+            check_run_locks=False,
+        )
+        if error is not None:
+            savepoint.rollback()
+            results.append(_worksheet_mutation_error(kind, location_id, client_mutation_id, error))
+            continue
+        savepoint.commit()
+
+        audit_events.extend(mutation_events)
+        run_for_month = applied.run
+        changed_any = changed_any or applied.changed
+        if client_mutation_id and mutation_events:
+            applied_ids.add(client_mutation_id)
+        touched[(kind, location_id)] = (applied, _patch_stop_number_hint(entry))
+        results.append(
+            {
+                "client_mutation_id": client_mutation_id,
+                "kind": kind,
+                "location_id": location_id,
+                "ok": True,
+                "status": 200,
+                "deduped": applied.deduped,
+                "changed": applied.changed,
+            }
+        )
+
+    if changed_any:
+        db.session.add_all(audit_events)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another replay of the same queue committed first; the client retries and dedupes.
+            db.session.rollback()
+            return jsonify(
+                {
+                    "error": "These mutations were applied by a concurrent request; retry to sync.",
+                    "code": "mutation_replay_conflict",
+                }
+            ), 409
+    else:
+        db.session.rollback()
+
+    stops: list[dict] = []
+    rows: list[dict] = []
+    for (kind, location_id), (applied, hint) in touched.items():
+        if kind == "stop":
+            stops.append(
+                _worksheet_stop_patch_payload(route_id, month_first, location_id, applied, stop_number_hint=hint)
+            )
+        else:
+            rows.append(_worksheet_row_from_history(applied.row, applied.loc, route_id=route_id))
+    return jsonify(
+        {
+            "ok": all(result["ok"] for result in results),
+            "results": results,
+            "stops": stops,
+            "rows": rows,
+        }
+    )
+
+
 def _parse_portal_workflow_month() -> tuple[date | None, object]:
     month_raw = (request.args.get("month") or "").strip()
     month_dt = _parse_month(month_raw)
@@ -6432,7 +6916,7 @@ def create_monthly_route_location():
     if loc.latitude is None or loc.longitude is None:
         access_token = os.getenv("MAPBOX_ACCESS_TOKEN")
         if access_token:
-            coords = _geocode_with_mapbox(_build_geocode_query(loc), access_token)
+            coords = geocode_address(build_geocode_query(loc), access_token)
             if coords:
                 loc.latitude, loc.longitude = coords
 
@@ -6499,7 +6983,7 @@ def update_monthly_route_location(location_id: int):
                     raise ValueError("latitude and longitude must be numbers") from exc
                 if not (-90 <= lat <= 90 and -180 <= lng <= 180):
                     raise ValueError("Invalid coordinate range")
-                if not _is_victoria_area(lat, lng):
+                if not is_victoria_area(lat, lng):
                     raise ValueError("Coordinates must be within Greater Victoria bounds")
                 loc.latitude = lat
                 loc.longitude = lng
@@ -6733,34 +7217,7 @@ def monthly_routes_geocode_candidates():
     access_token = os.getenv("MAPBOX_ACCESS_TOKEN")
     if not access_token:
         return jsonify({"error": "MAPBOX_ACCESS_TOKEN is not configured"}), 503
-
-    endpoint = "https://api.mapbox.com/geocoding/v5/mapbox.places/"
-    url = (
-        f"{endpoint}{url_parse.quote(q)}.json"
-        f"?access_token={url_parse.quote(access_token)}"
-        f"&limit=6&autocomplete=true&country=ca&types=address"
-        f"&proximity={VICTORIA_PROXIMITY_LNG},{VICTORIA_PROXIMITY_LAT}"
-        f"&bbox={VICTORIA_BBOX[0]},{VICTORIA_BBOX[1]},{VICTORIA_BBOX[2]},{VICTORIA_BBOX[3]}"
-    )
-    req = url_request.Request(url, headers={"User-Agent": "schedule-assist-monthly-routes/1.0"})
-    try:
-        with url_request.urlopen(req, timeout=8) as response:
-            payload = json.loads(response.read().decode("utf-8"))
-    except (url_error.URLError, TimeoutError, json.JSONDecodeError):
-        return jsonify({"candidates": []})
-
-    features = payload.get("features") if isinstance(payload, dict) else None
-    if not isinstance(features, list):
-        return jsonify({"candidates": []})
-
-    candidates = []
-    for feature in features:
-        if not isinstance(feature, dict):
-            continue
-        candidate = _serialize_geocode_candidate(feature)
-        if candidate:
-            candidates.append(candidate)
-    return jsonify({"candidates": candidates})
+    return jsonify({"candidates": geocode_candidates(q, access_token)})
 
 
 @monthly_routes_bp.patch("/api/monthly_routes/library/<int:location_id>/placement")
@@ -6784,7 +7241,7 @@ def update_monthly_route_placement(location_id: int):
 
     if not (-90 <= lat <= 90 and -180 <= lng <= 180):
         return jsonify({"error": "Invalid coordinate range"}), 400
-    if not _is_victoria_area(lat, lng):
+    if not is_victoria_area(lat, lng):
         return jsonify({"error": "Coordinates must be within Greater Victoria bounds"}), 400
 
     loc.display_address = display_address
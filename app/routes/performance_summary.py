@@ -1,19 +1,23 @@
 from flask import Blueprint, session, jsonify, request
-from app.db_models import db, Job, ClockEvent, Deficiency, Location, Quote, QuoteItem, InvoiceItem, JobItemTechnician, QuoteDeficiencyLink, DeficiencyServiceEligibility
+from app.db_models import db, Job, ClockEvent, Deficiency, Location, Quote, QuoteItem, InvoiceItem, JobItemTechnician, QuoteDeficiencyLink, DeficiencyServiceEligibility, ServiceTradeSyncWatermark
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from sqlalchemy.exc import IntegrityError
 from tqdm import tqdm
 import requests
 import json
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
-from sqlalchemy import func, distinct, case, and_, or_
+from sqlalchemy import func, distinct, case, and_, or_, inspect, update
 from sqlalchemy.orm import joinedload
 from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from flask import redirect, url_for
 
 from app.spa import send_spa_index
 from app.response_cache import cached_json_response
+from app.services.servicetrade import iter_paginated_items, propagate_credentials, service_trade_client
+from app.services.servicetrade.pagination import default_page_workers
 
 HOURLY_RATE = {
     'fa':        125.0,
@@ -55,7 +59,7 @@ EXCLUDED_ITEM_NAMES = [
 PACIFIC_TZ = ZoneInfo("America/Vancouver")
 
 performance_summary_bp = Blueprint('performance_summary', __name__)
-api_session = requests.Session()
+api_session = service_trade_client()
 
 SERVICE_TRADE_API_BASE = "https://api.servicetrade.com/api"
 
@@ -1157,20 +1161,86 @@ def upsert_job_schedule_from_servicetrade(
     return db_job
 
 
+def _job_fields_from_payload(job):
+    """Job columns that jobs_summary writes from a ServiceTrade job payload."""
+    scheduled_raw = job.get("scheduledDate")
+    completed_on_raw = job.get("completedOn")
+    created_raw = job.get("created")
+    return {
+        "job_type": job.get("type"),
+        "address": job.get("location", {}).get("address", {}).get("street", "Unknown"),
+        "customer_name": job.get("customer", {}).get("name", "Unknown"),
+        "job_status": job.get("displayStatus", "Unknown"),
+        "scheduled_date": datetime.fromtimestamp(scheduled_raw) if scheduled_raw else None,
+        "completed_on": datetime.fromtimestamp(completed_on_raw) if completed_on_raw else None,
+        "created_on_st": datetime.fromtimestamp(created_raw, timezone.utc) if created_raw else None,
+        "location_id": job.get("location", {}).get("id"),
+    }
+
+
+def _apply_job_fields(db_job, fields):
+    db_job.job_type = fields["job_type"]
+    db_job.address = fields["address"]
+    db_job.customer_name = fields["customer_name"]
+    db_job.job_status = fields["job_status"]
+    db_job.scheduled_date = fields["scheduled_date"]
+    db_job.completed_on = fields["completed_on"]
+    db_job.created_on_st = fields["created_on_st"]
+    if fields["location_id"]:
+        db_job.location_id = fields["location_id"]
+
+
+def _new_job_from_fields(job_id, fields):
+    return Job(
+        job_id=job_id,
+        total_on_site_hours=0,
+        revenue=0,
+        **fields,
+    )
+
+
+def _fetch_invoice_total(job_id):
+    invoice_response = call_service_trade_api(f"{SERVICE_TRADE_API_BASE}/invoice", {"jobId": job_id})
+    if not invoice_response:
+        return 0
+    try:
+        invoices = invoice_response.json().get("data", {}).get("invoices", [])
+        return sum(inv.get("totalPrice", 0) for inv in invoices)
+    except Exception as e:
+        tqdm.write(f"⚠️ Failed parsing invoice data for job {job_id}: {e}")
+        return 0
+
+
+def _fetch_onsite_clock_pairs(job_id):
+    """``[(tech_name, hours), ...]`` for the job's paired on-site clock events."""
+    clock_endpoint = f"{SERVICE_TRADE_API_BASE}/job/{job_id}/clockevent"
+    clock_response = call_service_trade_api(clock_endpoint, {"activity": "onsite"})
+    pairs = []
+    if not clock_response:
+        return pairs
+    try:
+        clock_event_pairs = clock_response.json().get("data", {}).get("pairedEvents", [])
+        for pair in clock_event_pairs:
+            clock_in_raw = pair.get("start", {}).get("eventTime", 0)
+            clock_out_raw = pair.get("end", {}).get("eventTime", 0)
+            if not clock_in_raw or not clock_out_raw:
+                continue
+            clock_in = datetime.fromtimestamp(clock_in_raw)
+            clock_out = datetime.fromtimestamp(clock_out_raw)
+            hours = (clock_out - clock_in).total_seconds() / 3600
+            tech = pair.get("start", {}).get("user", {}).get("name")
+            if not tech:
+                continue
+            pairs.append((tech, hours))
+    except Exception as e:
+        tqdm.write(f"⚠️ Error processing clock events for job {job_id}: {e}")
+    return pairs
+
+
 def fetch_invoice_and_clock(job, overwrite=False):
     job_id = job.get("id")
     existing_job = Job.query.filter_by(job_id=job_id).first()
-
-    job_type = job.get("type")
-    address = job.get("location", {}).get("address", {}).get("street", "Unknown")
-    customer_name = job.get("customer", {}).get("name", "Unknown")
-    job_status = job.get("displayStatus", "Unknown")
-    scheduled_date = datetime.fromtimestamp(job.get("scheduledDate")) if job.get("scheduledDate") else None
-    completed_on_raw = job.get("completedOn")
-    completed_on = datetime.fromtimestamp(completed_on_raw) if completed_on_raw else None
-    created_raw = job.get("created")
-    created_on_st = datetime.fromtimestamp(created_raw, timezone.utc) if created_raw else None
-    location_id = job.get("location", {}).get("id")
+    fields = _job_fields_from_payload(job)
 
     if existing_job:
         if not overwrite:
@@ -1182,30 +1252,10 @@ def fetch_invoice_and_clock(job, overwrite=False):
             }
 
         # ✏️ Overwrite fields instead of creating new Job
-        existing_job.job_type = job_type
-        existing_job.address = address
-        existing_job.customer_name = customer_name
-        existing_job.job_status = job_status
-        existing_job.scheduled_date = scheduled_date
-        existing_job.completed_on = completed_on
-        existing_job.created_on_st = created_on_st
-        if location_id:
-            existing_job.location_id = location_id
+        _apply_job_fields(existing_job, fields)
         db_job = existing_job
     else:
-        db_job = Job(
-            job_id=job_id,
-            location_id=location_id,
-            job_type=job_type,
-            address=address,
-            customer_name=customer_name,
-            job_status=job_status,
-            scheduled_date=scheduled_date,
-            completed_on=completed_on,
-            total_on_site_hours=0,
-            revenue=0,
-            created_on_st=created_on_st
-        )
+        db_job = _new_job_from_fields(job_id, fields)
         db.session.add(db_job)
 
     # Fetch invoice and clock events only for completed jobs
@@ -1213,52 +1263,24 @@ def fetch_invoice_and_clock(job, overwrite=False):
     total_on_site_hours = 0
     clock_events = {}
 
-    if completed_on:
-        invoice_endpoint = f"{SERVICE_TRADE_API_BASE}/invoice"
-        invoice_params = {"jobId": job_id}
-        invoice_response = call_service_trade_api(invoice_endpoint, invoice_params)
-        if invoice_response:
-            try:
-                invoices = invoice_response.json().get("data", {}).get("invoices", [])
-                invoice_total = sum(inv.get("totalPrice", 0) for inv in invoices)
-            except Exception as e:
-                tqdm.write(f"⚠️ Failed parsing invoice data for job {job_id}: {e}")
+    if fields["completed_on"]:
+        invoice_total = _fetch_invoice_total(job_id)
         db_job.revenue = invoice_total
 
-        clock_endpoint = f"{SERVICE_TRADE_API_BASE}/job/{job_id}/clockevent"
-        clock_params = {"activity": "onsite"}
-        clock_response = call_service_trade_api(clock_endpoint, clock_params)
-        if clock_response:
-            try:
-                clock_event_pairs = clock_response.json().get("data", {}).get("pairedEvents", [])
-                for pair in clock_event_pairs:
-                    clock_in_raw = pair.get("start", {}).get("eventTime", 0)
-                    clock_out_raw = pair.get("end", {}).get("eventTime", 0)
-                    if not clock_in_raw or not clock_out_raw:
-                        continue
-                    clock_in = datetime.fromtimestamp(clock_in_raw)
-                    clock_out = datetime.fromtimestamp(clock_out_raw)
-                    delta = clock_out - clock_in
-                    hours = delta.total_seconds() / 3600
-                    tech = pair.get("start", {}).get("user", {}).get("name")
-                    if not tech:
-                        continue
-
-                    existing_evt = ClockEvent.query.filter_by(job_id=job_id, tech_name=tech, hours=hours).first()
-                    if existing_evt:
-                        existing_evt.created_at = datetime.now(timezone.utc)
-                    else:
-                        db.session.add(ClockEvent(
-                            job_id=job_id,
-                            tech_name=tech,
-                            hours=hours,
-                            created_at=datetime.now(timezone.utc)
-                        ))
+        for tech, hours in _fetch_onsite_clock_pairs(job_id):
+            existing_evt = ClockEvent.query.filter_by(job_id=job_id, tech_name=tech, hours=hours).first()
+            if existing_evt:
+                existing_evt.created_at = datetime.now(timezone.utc)
+            else:
+                db.session.add(ClockEvent(
+                    job_id=job_id,
+                    tech_name=tech,
+                    hours=hours,
+                    created_at=datetime.now(timezone.utc)
+                ))
 
-                    clock_events[tech] = clock_events.get(tech, 0) + hours
-                    total_on_site_hours += hours
-            except Exception as e:
-                tqdm.write(f"⚠️ Error processing clock events for job {job_id}: {e}")
+            clock_events[tech] = clock_events.get(tech, 0) + hours
+            total_on_site_hours += hours
 
     db_job.total_on_site_hours = total_on_site_hours
     db_job.revenue = invoice_total
@@ -1277,37 +1299,260 @@ def fetch_invoice_and_clock(job, overwrite=False):
     }
 
 
+JOBS_SUMMARY_WORKERS = 8
+JOBS_SUMMARY_BATCH_SIZE = 200
+_ID_CHUNK_SIZE = 500
 
-def get_jobs_with_params(params, desc="Fetching Jobs"):
+
+def _chunks(values, size):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _fetch_job_enrichment(job_id):
+    """Worker side of the pipelined jobs_summary: HTTP only, no DB session access."""
+    return _fetch_invoice_total(job_id), _fetch_onsite_clock_pairs(job_id)
+
+
+# Marks a ClockEvent queued for insert in the current run (duplicate pairs only touch it).
+_PENDING_CLOCK_EVENT = object()
+
+
+def _upsert_job_rows(rows):
+    """``INSERT ... ON CONFLICT (job_id) DO UPDATE`` for jobs_summary rows (Postgres, or SQLite in tests)."""
+    upsert = sqlite_insert if db.engine.dialect.name == "sqlite" else insert
+    stmt = upsert(Job.__table__).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["job_id"],
+        set_={
+            **{column: stmt.excluded[column] for column in rows[0] if column not in ("job_id", "location_id")},
+            # Like _apply_job_fields: a payload without a location keeps the stored one.
+            "location_id": func.coalesce(stmt.excluded.location_id, Job.__table__.c.location_id),
+        },
+    )
+    db.session.execute(stmt)
+
+
+def enrich_jobs_pipelined(jobs, overwrite=False, workers=JOBS_SUMMARY_WORKERS,
+                          batch_size=JOBS_SUMMARY_BATCH_SIZE, desc="Processing Jobs"):
     """
-    Generalized job fetcher based on params.
-    Returns a full list of jobs across paginated responses.
+    Pipelined equivalent of calling fetch_invoice_and_clock for each job.
+
+    A worker pool fetches invoice totals and on-site clock events concurrently while the
+    calling thread is the single writer: existing Job and ClockEvent rows are loaded once
+    up front, and rows are bulk-upserted and committed in batches of ``batch_size`` jobs.
+    A batch that fails to commit is retried one job at a time; jobs that still fail are
+    logged and left out of the returned mapping instead of aborting the run.
+    Overwrite/skip semantics and the returned mapping match the sequential path.
     """
-    jobs = []
+    db_job_entry = {}
+    jobs_by_id = {}
+    repeated_ids = set()
+    for job in jobs:
+        job_id = job.get("id")
+        if job_id is None:
+            continue
+        if job_id in jobs_by_id:
+            repeated_ids.add(job_id)
+        jobs_by_id[job_id] = job
+    if not jobs_by_id:
+        return db_job_entry
+
+    existing_jobs = {}
+    for chunk in _chunks(jobs_by_id, _ID_CHUNK_SIZE):
+        for row in Job.query.filter(Job.job_id.in_(chunk)).all():
+            existing_jobs[row.job_id] = row
+
+    to_write = []
+    for job_id in jobs_by_id:
+        existing_job = existing_jobs.get(job_id)
+        if existing_job is not None and not overwrite:
+            tqdm.write(f"Skipping job {job_id} (already exists in DB)")
+            db_job_entry[job_id] = {
+                "job": existing_job,
+                "clockEvents": {},
+                "onSiteHours": existing_job.total_on_site_hours
+            }
+            continue
+        to_write.append(job_id)
+
+    fields_by_id = {job_id: _job_fields_from_payload(jobs_by_id[job_id]) for job_id in to_write}
+    completed_ids = [job_id for job_id in to_write if fields_by_id[job_id]["completed_on"]]
+
+    # One lookup of existing clock events: (job_id, tech, hours) -> first matching row.
+    clock_lookup = {}
+    for chunk in _chunks(completed_ids, _ID_CHUNK_SIZE):
+        rows = ClockEvent.query.filter(ClockEvent.job_id.in_(chunk)).order_by(ClockEvent.id).all()
+        for evt in rows:
+            clock_lookup.setdefault((evt.job_id, evt.tech_name, evt.hours), evt)
+
+    # (job_id, job row, existing ClockEvent ids to touch, new ClockEvent rows) awaiting a flush.
+    batch = []
+
+    def write_job(job_id, enrichment):
+        fields = fields_by_id[job_id]
+        invoice_total = 0
+        total_on_site_hours = 0
+        clock_events = {}
+        touched_ids = []
+        new_events = []
+        if enrichment is not None:
+            invoice_total, pairs = enrichment
+            for tech, hours in pairs:
+                key = (job_id, tech, hours)
+                existing_evt = clock_lookup.get(key)
+                if existing_evt is None:
+                    new_events.append({"job_id": job_id, "tech_name": tech, "hours": hours})
+                    clock_lookup[key] = _PENDING_CLOCK_EVENT
+                elif existing_evt is not _PENDING_CLOCK_EVENT:
+                    touched_ids.append(existing_evt.id)
+                clock_events[tech] = clock_events.get(tech, 0) + hours
+                total_on_site_hours += hours
+
+        row = {"job_id": job_id, **fields, "total_on_site_hours": total_on_site_hours, "revenue": invoice_total}
+        db_job_entry[job_id] = {
+            "job": existing_jobs.get(job_id),
+            "clockEvents": clock_events,
+            "onSiteHours": total_on_site_hours
+        }
+        batch.append((job_id, row, touched_ids, new_events))
+        if len(batch) >= batch_size:
+            flush_batch()
+
+    def save(items):
+        now = datetime.now(timezone.utc)
+        _upsert_job_rows([row for _job_id, row, _touched, _new in items])
+        touched = [evt_id for _job_id, _row, ids, _new in items for evt_id in ids]
+        for chunk in _chunks(touched, _ID_CHUNK_SIZE):
+            db.session.execute(
+                update(ClockEvent.__table__)
+                .where(ClockEvent.__table__.c.id.in_(chunk))
+                .values(created_at=now)
+            )
+        new_events = [{**evt, "created_at": now} for _job_id, _row, _ids, events in items for evt in events]
+        if new_events:
+            db.session.execute(ClockEvent.__table__.insert(), new_events)
+        db.session.commit()
 
-    response = call_service_trade_api(f"{SERVICE_TRADE_API_BASE}/job", params)
-    if not response:
-        print("Failed to fetch jobs.")
-        return jobs
+    def flush_batch():
+        if not batch:
+            return
+        saved = [job_id for job_id, _row, _touched, _new in batch]
+        try:
+            save(batch)
+        except Exception as e:
+            db.session.rollback()
+            tqdm.write(f"[ERROR] Failed to save batch of {len(batch)} jobs: {e}; retrying one at a time")
+            saved = []
+            for item in batch:
+                try:
+                    save([item])
+                    saved.append(item[0])
+                except Exception as exc:
+                    db.session.rollback()
+                    db_job_entry.pop(item[0], None)
+                    tqdm.write(f"[ERROR] Failed to save job {item[0]}: {exc}")
+        batch.clear()
+        for chunk in _chunks(saved, _ID_CHUNK_SIZE):
+            for db_job in Job.query.filter(Job.job_id.in_(chunk)).all():
+                existing_jobs[db_job.job_id] = db_job
+                db_job_entry[db_job.job_id]["job"] = db_job
+
+    with tqdm(total=len(to_write), desc=desc) as pbar:
+        # Jobs that are not completed need no HTTP calls.
+        for job_id in to_write:
+            if not fields_by_id[job_id]["completed_on"]:
+                write_job(job_id, None)
+                pbar.update(1)
 
-    data = response.json().get("data", {})
-    total_pages = data.get("totalPages", 1)
-    jobs.extend(data.get("jobs", []))
+        with ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix="jobs-summary") as pool:
+            fetch = propagate_credentials(_fetch_job_enrichment)
+            futures = {pool.submit(fetch, job_id): job_id for job_id in completed_ids}
+            for future in as_completed(futures):
+                job_id = futures[future]
+                try:
+                    enrichment = future.result()
+                except Exception as exc:
+                    tqdm.write(f"A job failed with exception: {exc}")
+                    pbar.update(1)
+                    continue
+                write_job(job_id, enrichment)
+                pbar.update(1)
+        flush_batch()
+
+    if not overwrite:
+        # The per-job path sees a repeated id as already existing on its second pass.
+        for job_id in repeated_ids.intersection(to_write):
+            if job_id in db_job_entry:
+                tqdm.write(f"Skipping job {job_id} (already exists in DB)")
+                db_job_entry[job_id] = {
+                    "job": db_job_entry[job_id]["job"],
+                    "clockEvents": {},
+                    "onSiteHours": db_job_entry[job_id]["onSiteHours"]
+                }
 
-    if total_pages > 1:
-        for page_num in tqdm(range(2, total_pages + 1), desc=desc):
-            params["page"] = page_num
-            response = call_service_trade_api(f"{SERVICE_TRADE_API_BASE}/job", params)
-            if not response:
-                printe(f"Failed to fetch page {page_num}")
-                continue
-            page_data = response.json().get("data", {})
-            jobs.extend(page_data.get("jobs", []))
+    return db_job_entry
+
+
+def iter_service_trade_listing(endpoint, params, items_key, desc=None, failed_pages=None):
+    """
+    Stream ``items_key`` records from a paginated ServiceTrade listing in page order.
+    Pages 2..N are fetched concurrently once page 1 reports ``totalPages``.
+
+    Failed pages are skipped; pass a list as ``failed_pages`` to collect their numbers.
+    """
+    base_params = dict(params or {})
+    url = f"{SERVICE_TRADE_API_BASE}/{endpoint}"
+
+    def fetch_page(page_num):
+        try:
+            response = call_service_trade_api(url, {**base_params, "page": page_num})
+        except Exception:
+            if failed_pages is not None:
+                failed_pages.append(page_num)
+            raise
+        if not response:
+            if failed_pages is not None:
+                failed_pages.append(page_num)
+            if page_num == 1:
+                tqdm.write(f"Failed to fetch {items_key}.")
+            return None
+        return response.json().get("data", {})
+
+    pbar = None
+
+    def on_page(result):
+        nonlocal pbar
+        if desc and result.total_pages > 1:
+            if pbar is None:
+                pbar = tqdm(total=result.total_pages - 1, desc=desc)
+            elif result.page > 1:
+                pbar.update(1)
+
+    try:
+        yield from iter_paginated_items(fetch_page, items_key, on_page=on_page)
+    finally:
+        if pbar is not None:
+            pbar.close()
+
+
+def get_jobs_with_params(params, desc="Fetching Jobs"):
+    """
+    Generalized job fetcher based on params.
+    Returns a full list of jobs across paginated responses.
+    """
+    jobs = list(iter_service_trade_listing("job", params, "jobs", desc=desc))
     print(f"Number of jobs with params: {len(jobs)}")
 
     return jobs
 
-def jobs_summary(overwrite=False, start_date=None, end_date=None):
+def jobs_summary(overwrite=False, start_date=None, end_date=None, pipelined=False, workers=JOBS_SUMMARY_WORKERS):
+    """
+    Sync completed and scheduled fiscal-window jobs into Job/ClockEvent.
+    ``pipelined=True`` fetches invoice/clock data concurrently and writes in batches
+    (see enrich_jobs_pipelined); the default path processes one job per commit.
+    """
     authenticate()
 
     db_job_entry = {}
@@ -1333,14 +1578,19 @@ def jobs_summary(overwrite=False, start_date=None, end_date=None):
     tqdm.write(f"Jobs completed in {start_date} - {end_date}: {len(jobs)}")
 
     # Process completed jobs
-    with tqdm(total=len(jobs), desc="Processing Completed Jobs") as pbar:
-        for job in jobs:
-            try:
-                job_id, job_data = fetch_invoice_and_clock(job, overwrite=overwrite)
-                db_job_entry[job_id] = job_data
-            except Exception as exc:
-                tqdm.write(f"A job failed with exception: {exc}")
-            pbar.update(1)
+    if pipelined:
+        db_job_entry.update(
+            enrich_jobs_pipelined(jobs, overwrite=overwrite, workers=workers, desc="Processing Completed Jobs")
+        )
+    else:
+        with tqdm(total=len(jobs), desc="Processing Completed Jobs") as pbar:
+            for job in jobs:
+                try:
+                    job_id, job_data = fetch_invoice_and_clock(job, overwrite=overwrite)
+                    db_job_entry[job_id] = job_data
+                except Exception as exc:
+                    tqdm.write(f"A job failed with exception: {exc}")
+                pbar.update(1)
 
     # --- Scheduled jobs that are not complete from fiscal year ---
     scheduled_job_params = {
@@ -1355,7 +1605,12 @@ def jobs_summary(overwrite=False, start_date=None, end_date=None):
         desc="Fetching Additional Jobs"
     )
 
-    if scheduled_jobs:
+    if scheduled_jobs and pipelined:
+        tqdm.write(f"Processing {len(scheduled_jobs)} additional jobs with alternate criteria.")
+        db_job_entry.update(
+            enrich_jobs_pipelined(scheduled_jobs, overwrite=overwrite, workers=workers, desc="Processing Additional Jobs")
+        )
+    elif scheduled_jobs:
         tqdm.write(f"Processing {len(scheduled_jobs)} additional jobs with alternate criteria.")
         with tqdm(total=len(scheduled_jobs), desc="Processing Additional Jobs") as pbar:
             for job in scheduled_jobs:
@@ -1376,103 +1631,207 @@ def get_deficiencies_with_params(params, desc="Fetching deficiencies"):
     Generalized job fetcher based on params.
     Returns a full list of deficiencies across paginated responses.
     """
-    deficiencies = []
+    deficiencies = list(iter_service_trade_listing("deficiency", params, "deficiencies", desc=desc))
+    tqdm.write(f"Number of deficiencies with params: {len(deficiencies)}")
 
-    response = call_service_trade_api(f"{SERVICE_TRADE_API_BASE}/deficiency", params)
-    if not response:
-        tqdm.write("Failed to fetch deficiencies.")
-        return deficiencies
+    return deficiencies
 
-    data = response.json().get("data", {})
-    total_pages = data.get("totalPages", 1)
-    deficiencies.extend(data.get("deficiencies", []))
 
-    if total_pages > 1:
-        for page_num in tqdm(range(2, total_pages + 1), desc=desc):
-            params["page"] = page_num
-            response = call_service_trade_api(f"{SERVICE_TRADE_API_BASE}/deficiency", params)
-            if not response:
-                tqdm.write(f"Failed to fetch page {page_num}")
-                continue
-            page_data = response.json().get("data", {})
-            deficiencies.extend(page_data.get("deficiencies", []))
-    tqdm.write(f"Number of deficiencies with params: {len(deficiencies)}")
+# ---------------------------------------------------------------------------
+# Incremental (watermark) sync for deficiencies and quotes
+# ---------------------------------------------------------------------------
+DEFAULT_SYNC_WINDOW = (datetime(2024, 5, 1, 0, 0), datetime(2025, 4, 30, 23, 59))
+# Re-list a few minutes before the stored watermark to absorb ServiceTrade clock skew.
+SYNC_WATERMARK_OVERLAP_SECONDS = 300
+SYNC_UPSERT_CHUNK_SIZE = 500
 
-    return deficiencies
 
-def update_deficiencies(start_date=None, end_date=None):
-    authenticate()
-    if not start_date or not end_date:
-        start_date = datetime(2024, 5, 1, 0, 0)
-        end_date   = datetime(2025, 4, 30, 23, 59)
+def load_sync_watermark(entity: str) -> int | None:
+    """Epoch seconds of the last successful ``entity`` sync; ``None`` before the first one."""
+    if not inspect(db.engine).has_table(ServiceTradeSyncWatermark.__tablename__):
+        return None
+    row = db.session.get(ServiceTradeSyncWatermark, entity)
+    return int(row.synced_through) if row is not None else None
+
+
+def store_sync_watermark(entity: str, synced_through: int, rows_synced: int) -> None:
+    if not inspect(db.engine).has_table(ServiceTradeSyncWatermark.__tablename__):
+        tqdm.write("[WARNING] servicetrade_sync_watermark table missing; next sync will not be incremental.")
+        return
+    _bulk_upsert(
+        ServiceTradeSyncWatermark.__table__,
+        [{
+            "entity": entity,
+            "synced_through": int(synced_through),
+            "rows_synced": rows_synced,
+            "completed_at": datetime.now(timezone.utc),
+        }],
+        "entity",
+    )
+    db.session.commit()
+
+
+def _bulk_upsert(table, rows: list[dict], key: str) -> None:
+    """``INSERT ... ON CONFLICT (key) DO UPDATE`` in chunks (Postgres, or SQLite in tests)."""
+    upsert = sqlite_insert if db.engine.dialect.name == "sqlite" else insert
+    # ON CONFLICT cannot touch the same row twice in one statement; the last copy wins.
+    rows = list({row[key]: row for row in rows}.values())
+    for chunk in _chunks(rows, SYNC_UPSERT_CHUNK_SIZE):
+        stmt = upsert(table).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[key],
+            set_={column: stmt.excluded[column] for column in chunk[0] if column != key},
+        )
+        db.session.execute(stmt)
+
+
+def _sync_plan(entity: str, start_date, end_date, incremental):
+    """
+    ``(params, window, next_watermark)`` for a deficiency or quote sync.
 
-    window_start = start_date
-    window_end   = end_date
+    An explicit window is a backfill: records created in it are listed and the watermark is
+    left alone. Otherwise (or with ``incremental=True``) records updated since the stored
+    watermark are listed and ``window`` is ``None``; the first run, with no watermark yet,
+    lists the window (default: ``DEFAULT_SYNC_WINDOW``) instead. ``next_watermark`` is what
+    to store once the sync succeeds, or ``None`` for a backfill.
+    """
+    if incremental is None:
+        incremental = not (start_date and end_date)
+    run_started = int(datetime.now(timezone.utc).timestamp())
+    if incremental:
+        watermark = load_sync_watermark(entity)
+        if watermark is not None:
+            since = max(0, watermark - SYNC_WATERMARK_OVERLAP_SECONDS)
+            tqdm.write(f"🔁 Incremental {entity} sync: updated since {datetime.fromtimestamp(since)}")
+            return {"updatedAfter": since}, None, run_started
 
-    deficiency_params = {
-        "createdAfter": datetime.timestamp(window_start),
-        "createdBefore": datetime.timestamp(window_end),
-        "limit": 500
+    if not start_date or not end_date:
+        start_date, end_date = DEFAULT_SYNC_WINDOW
+    params = {
+        "createdAfter": int(start_date.timestamp()),
+        "createdBefore": int(end_date.timestamp()),
     }
+    return params, (start_date, end_date), run_started if incremental else None
 
-    deficiencies = get_deficiencies_with_params(params=deficiency_params)
 
-    tqdm.write(f"Number of deficiencies fetched: {len(deficiencies)}")
+def _watermark_before_failures(next_watermark: int, failed: list[dict]) -> int | None:
+    """
+    Watermark to store when ``failed`` records were listed but not saved: just below the
+    oldest ``updated`` among them, so the next run lists them again. ``None`` (keep the old
+    watermark) when a failed record carries no ``updated`` stamp.
+    """
+    if not failed:
+        return next_watermark
+    try:
+        oldest = min(int(payload["updated"]) for payload in failed)
+    except (KeyError, TypeError, ValueError):
+        return None
+    return min(next_watermark, oldest - 1)
+
 
-    with tqdm(total=len(deficiencies), desc="Saving Deficiencies to DB") as pbar:
-        for d in deficiencies:
+def _fetch_deficiency_attachment(deficiency_id):
+    """``(has_attachment, uploaded_by)`` for one deficiency. Worker side: HTTP only."""
+    response = call_service_trade_api(
+        f"{SERVICE_TRADE_API_BASE}/attachment",
+        {"entityId": deficiency_id, "entityType": 10},  # 10 is deficiency
+    )
+    if not response:
+        return False, None
+    attachments = response.json().get("data").get("attachments")
+    if len(attachments) > 0:
+        return True, attachments[0]["creator"]["name"]
+    return False, None
+
+
+def _fetch_deficiency_attachments(deficiency_ids) -> dict:
+    """Attachment info per deficiency id, fetched concurrently; failed lookups are left out."""
+    deficiency_ids = list(deficiency_ids)
+    if not deficiency_ids:
+        return {}
+    results = {}
+    with ThreadPoolExecutor(
+        max_workers=min(default_page_workers(), len(deficiency_ids)),
+        thread_name_prefix="deficiency-attachments",
+    ) as pool:
+        fetch = propagate_credentials(_fetch_deficiency_attachment)
+        futures = {pool.submit(fetch, def_id): def_id for def_id in deficiency_ids}
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Fetching deficiency attachments"):
+            def_id = futures[future]
             try:
-                reporter = d.get("reporter")
-                service_line = d.get("serviceLine")
-                job = d.get("job")
-                location = d.get("location")
+                results[def_id] = future.result()
+            except Exception as e:
+                tqdm.write(f"[WARNING] Skipped deficiency {def_id} | Error: {type(e).__name__}: {e}")
+    return results
 
-                job_id = job["id"] if job else -1
-                location_id = location["id"] if location else -1
 
-                deficiency = Deficiency.query.filter_by(deficiency_id=d["id"]).first()
-                if not deficiency:
-                    deficiency = Deficiency(deficiency_id=d["id"])
+def _deficiency_row(d: dict, attachment: tuple) -> dict:
+    reporter = d.get("reporter")
+    service_line = d.get("serviceLine")
+    job = d.get("job")
+    location = d.get("location")
 
-                has_attachment = False
-                attachment_uploaded_by = None
-                attachment_endpoint = f"{SERVICE_TRADE_API_BASE}/attachment"
-                attachment_params = {
-                    "entityId": d["id"],
-                    "entityType": 10     # 10 is deficiency
-                }
-                response = call_service_trade_api(attachment_endpoint, attachment_params)
-                if response:
-                    data = response.json().get("data")
-                    attachments = data.get("attachments")
-                    if len(attachments) > 0:
-                        attachment_uploaded_by = attachments[0]["creator"]["name"]
-                        has_attachment = True
-
-                deficiency.attachment_uploaded_by = attachment_uploaded_by
-                deficiency.has_attachment = has_attachment
-                deficiency.description = d["description"]
-                deficiency.status = d["status"]
-                deficiency.reported_by = reporter["name"] if reporter else "Unknown"
-                deficiency.service_line = service_line["name"] if service_line else "Unknown"
-                deficiency.job_id = job_id
-                deficiency.location_id = location_id
-                deficiency.deficiency_created_on = datetime.fromtimestamp(d["created"])
-                deficiency.orphaned = job_id == -1
+    job_id = job["id"] if job else -1
+    location_id = location["id"] if location else -1
+    has_attachment, attachment_uploaded_by = attachment
 
-                db.session.add(deficiency)
+    return {
+        "deficiency_id": d["id"],
+        "description": d["description"],
+        "status": d["status"],
+        "reported_by": reporter["name"] if reporter else "Unknown",
+        "service_line": service_line["name"] if service_line else "Unknown",
+        "job_id": job_id,
+        "location_id": location_id,
+        "deficiency_created_on": datetime.fromtimestamp(d["created"]),
+        "orphaned": job_id == -1,
+        "has_attachment": has_attachment,
+        "attachment_uploaded_by": attachment_uploaded_by,
+    }
 
-            except Exception as e:
-                tqdm.write(f"[WARNING] Skipped deficiency {d.get('id')} | Error: {type(e).__name__}: {e}")
-            pbar.update(1)
 
+def update_deficiencies(start_date=None, end_date=None, *, incremental=None):
+    """
+    Sync deficiencies from ServiceTrade and reclassify the ones written.
+
+    Without a window (or with ``incremental=True``) only deficiencies updated since the
+    last successful sync are listed; see ``_sync_plan``.
+    """
+    authenticate()
+    params, _window, next_watermark = _sync_plan("deficiency", start_date, end_date, incremental)
+
+    failed_pages = []
+    deficiencies = list(iter_service_trade_listing(
+        "deficiency",
+        {**params, "limit": 500},
+        "deficiencies",
+        desc="Fetching deficiencies",
+        failed_pages=failed_pages,
+    ))
+    tqdm.write(f"Number of deficiencies fetched: {len(deficiencies)}")
+
+    attachments = _fetch_deficiency_attachments(d["id"] for d in deficiencies)
+    rows = []
+    failed = []
+    for d in deficiencies:
+        if d["id"] not in attachments:
+            failed.append(d)
+            continue
+        try:
+            rows.append(_deficiency_row(d, attachments[d["id"]]))
+        except Exception as e:
+            failed.append(d)
+            tqdm.write(f"[WARNING] Skipped deficiency {d.get('id')} | Error: {type(e).__name__}: {e}")
+
+    _bulk_upsert(Deficiency.__table__, rows, "deficiency_id")
     db.session.commit()
-    tqdm.write("✅ All deficiencies processed and saved.")
+    tqdm.write(f"✅ {len(rows)} deficiencies saved.")
 
+    classified = False
     try:
         from app.deficiency.service_eligibility import classify_all_deficiencies
 
-        summary = classify_all_deficiencies()
+        summary = classify_all_deficiencies(deficiency_ids=[row["deficiency_id"] for row in rows])
+        classified = True
         tqdm.write(
             "📋 Service eligibility: "
             f"{summary['eligible']} eligible, "
@@ -1481,6 +1840,17 @@ def update_deficiencies(start_date=None, end_date=None):
     except Exception as e:
         tqdm.write(f"[WARNING] Service eligibility classification failed: {e}")
 
+    if next_watermark is None:
+        return
+    watermark = _watermark_before_failures(next_watermark, failed)
+    if failed_pages or not classified or watermark is None:
+        # Keep the old watermark so the next run lists (and reclassifies) these again.
+        tqdm.write("[WARNING] Deficiency sync incomplete; watermark not advanced.")
+        return
+    if failed:
+        tqdm.write(f"[WARNING] {len(failed)} deficiencies not saved; they will be listed again next run.")
+    store_sync_watermark("deficiency", watermark, len(rows))
+
 
 def update_deficiencies_attachments(start_date=None, end_date=None):
     authenticate()
@@ -1543,28 +1913,10 @@ def get_locations_with_params(params, desc="Fetching locations"):
     Generalized job fetcher based on params.
     Returns a full list of deficiencies across paginated responses.
     """
-    locations = []
-
-    response = call_service_trade_api(f"{SERVICE_TRADE_API_BASE}/location", params)
-    if not response:
-        tqdm.write("Failed to fetch locations.")
-        return locations
+    locations = list(iter_service_trade_listing("location", params, "locations", desc=desc))
 
-    data = response.json().get("data", {})
-    total_pages = data.get("totalPages", 1)
-    locations.extend(data.get("locations", []))
-
-    if total_pages > 1:
-        for page_num in tqdm(range(2, total_pages + 1), desc=desc):
-            params["page"] = page_num
-            response = call_service_trade_api(f"{SERVICE_TRADE_API_BASE}/location", params)
-            if not response:
-                tqdm.write(f"Failed to fetch page {page_num}")
-                continue
-            page_data = response.json().get("data", {})
-            locations.extend(page_data.get("locations", []))
+    return locations
 
-    return locations 
 
 def update_locations(commit_every: int = 500) -> None:
     authenticate()
@@ -1668,29 +2020,10 @@ def get_quotes_with_params(params, desc="Fetching quotes"):
     Generalized job fetcher based on params.
     Returns a full list of quotes across paginated responses.
     """
-    quotes = []
-
-    response = call_service_trade_api(f"{SERVICE_TRADE_API_BASE}/quote", params)
-    if not response:
-        tqdm.write("Failed to fetch quotes.")
-        return quotes
+    quotes = list(iter_service_trade_listing("quote", params, "quotes", desc=desc))
 
-    data = response.json().get("data", {})
-    total_pages = data.get("totalPages", 1)
-    quotes.extend(data.get("quotes", []))
-
-    if total_pages > 1:
-        for page_num in tqdm(range(2, total_pages + 1), desc=desc):
-            params["page"] = page_num
-            response = call_service_trade_api(f"{SERVICE_TRADE_API_BASE}/quote", params)
-            if not response:
-                tqdm.write(f"Failed to fetch page {page_num}")
-                continue
-            page_data = response.json().get("data", {})
-            quotes.extend(page_data.get("quotes", []))
-        
+    return quotes
 
-    return quotes 
 
 QUOTE_DEFICIENCY_LINK_LOOKBACK_DAYS = 730
 
@@ -1866,21 +2199,32 @@ def _quotes_missing_deficiency_links(
     *,
     accepted_only: bool = False,
     date_on: str = "quote_created_on",
+    quote_ids: set[int] | None = None,
 ) -> list[tuple[int, int]]:
-    """Return (quote_id, location_id) for quotes in window with no deficiency link."""
+    """
+    Return (quote_id, location_id) for quotes in window with no deficiency link.
+
+    ``quote_ids`` limits the check to those quotes; the window may then be ``None``.
+    """
     date_column = Quote.quote_accepted_on if date_on == "quote_accepted_on" else Quote.quote_created_on
-    linked_quote_ids = {
-        int(row[0])
-        for row in db.session.query(QuoteDeficiencyLink.quote_id).distinct().all()
-    }
+    links_query = db.session.query(QuoteDeficiencyLink.quote_id).distinct()
     query = db.session.query(Quote.quote_id, Quote.location_id).filter(
-        date_column.isnot(None),
-        date_column >= window_start,
-        date_column <= window_end,
         Quote.location_id.isnot(None),
     )
+    if quote_ids is not None:
+        if not quote_ids:
+            return []
+        links_query = links_query.filter(QuoteDeficiencyLink.quote_id.in_(quote_ids))
+        query = query.filter(Quote.quote_id.in_(quote_ids))
+    if window_start is not None and window_end is not None:
+        query = query.filter(
+            date_column.isnot(None),
+            date_column >= window_start,
+            date_column <= window_end,
+        )
     if accepted_only:
         query = query.filter(Quote.status == "accepted")
+    linked_quote_ids = {int(row[0]) for row in links_query.all()}
 
     rows = query.all()
     return [
@@ -1897,6 +2241,7 @@ def sync_unlinked_quote_deficiency_links(
     accepted_only: bool = False,
     date_on: str = "quote_created_on",
     quote_payloads: list[dict] | None = None,
+    quote_ids: set[int] | None = None,
 ) -> dict:
     """
     Backfill quote-deficiency links starting from quotes, not deficiencies.
@@ -1904,6 +2249,8 @@ def sync_unlinked_quote_deficiency_links(
     Order of attempts for each unlinked quote:
     1. Deficiency IDs embedded in the quote payload (including quote detail fetch)
     2. Deficiencies at the quote location, matched via ServiceTrade deficiency→quote API
+
+    ``quote_ids`` limits the backfill to those quotes (see ``_quotes_missing_deficiency_links``).
     """
     authenticate()
     missing_rows = _quotes_missing_deficiency_links(
@@ -1911,6 +2258,7 @@ def sync_unlinked_quote_deficiency_links(
         window_end,
         accepted_only=accepted_only,
         date_on=date_on,
+        quote_ids=quote_ids,
     )
     quotes_by_location: dict[int, set[int]] = {}
     for quote_id, location_id in missing_rows:
@@ -2052,133 +2400,119 @@ def query_quote_by_id(quote_id):
     print(json.dumps(data, indent=4))
 
 
-def update_quotes(start_date=None, end_date=None):
-    authenticate()
-
-    if not start_date or not end_date:
-        start_date = datetime(2024, 5, 1, 0, 0)
-        end_date   = datetime(2025, 4, 30, 23, 59)
+def _quote_row(q: dict) -> dict:
+    total_price_raw = q["totalPrice"]
+    job_created = len(q.get("jobs", [])) > 0
+    return {
+        "quote_id": q["id"],
+        "customer_name": q["customer"]["name"],
+        "location_id": q["location"]["id"],
+        "location_address": q["location"]["address"]["street"],
+        "status": q["status"],
+        "quote_created_on": datetime.fromtimestamp(q["created"]),
+        "total_price": (
+            float(total_price_raw.replace(",", ""))
+            if isinstance(total_price_raw, str)
+            else total_price_raw
+        ),
+        "quote_request": q["quoteRequest"]["status"],
+        "owner_id": q["owner"]["id"],
+        "owner_email": q["owner"]["email"],
+        "job_created": job_created,
+        "job_id": q["jobs"][0]["id"] if job_created else None,
+        "quote_accepted_on": extract_quote_accepted_on(q),
+    }
 
-    start_ts = int(start_date.timestamp())
-    end_ts   = int(end_date.timestamp())
 
-    base_params = {
-        "createdAfter": start_ts,
-        "createdBefore": end_ts,
-    }
+def update_quotes(start_date=None, end_date=None, *, incremental=None):
+    """
+    Sync quotes from ServiceTrade, their jobs' schedules and their deficiency links.
 
-    # -----------------------------------------------
-    # 1. Fetch all quotes in date window
-    # -----------------------------------------------
-    all_quotes = get_quotes_with_params(params=base_params)
-    tqdm.write(f"✅ Found {len(all_quotes)} quotes in range.")
+    Without a window (or with ``incremental=True``) only quotes updated since the last
+    successful sync are listed and re-linked; see ``_sync_plan``.
+    """
+    authenticate()
+    params, window, next_watermark = _sync_plan("quote", start_date, end_date, incremental)
 
     # -----------------------------------------------
-    # 2. Build quote→deficiency map from deficiencies
-    #    that may still have quotes (not only defs created in quote window)
+    # 1. Fetch quotes (created in window, or updated since watermark)
     # -----------------------------------------------
-    st_def_ids = _deficiency_ids_for_quote_linking(end_date, start_date)
-    tqdm.write(f"🔗 Scanning {len(st_def_ids)} deficiencies for quote links")
+    failed_pages = []
+    all_quotes = list(iter_service_trade_listing(
+        "quote", params, "quotes", desc="Fetching quotes", failed_pages=failed_pages,
+    ))
+    tqdm.write(f"✅ Found {len(all_quotes)} quotes to sync.")
 
     # -----------------------------------------------
-    # 3. Build mapping: quote_id → {deficiency_ids}
+    # 2. Build mapping: quote_id → {deficiency_ids}
+    #    A window backfill scans deficiencies that may still have quotes (not only
+    #    defs created in quote window); an incremental run only re-links its own quotes.
     # -----------------------------------------------
-    quote_to_def_ids = build_quote_to_deficiency_id_map(
-        st_def_ids,
-        desc="Fetching linked quotes",
-    )
+    quote_to_def_ids: dict[int, set[int]] = {}
+    if window is not None:
+        st_def_ids = _deficiency_ids_for_quote_linking(window[1], window[0])
+        tqdm.write(f"🔗 Scanning {len(st_def_ids)} deficiencies for quote links")
+        quote_to_def_ids = build_quote_to_deficiency_id_map(
+            st_def_ids,
+            desc="Fetching linked quotes",
+        )
 
     # -----------------------------------------------
-    # 4. Save all quotes & link rows (batch commits)
+    # 3. Bulk upsert quotes, then job schedules and links
     # -----------------------------------------------
-    BATCH_SIZE = 250
-    processed = 0
-
-    with tqdm(total=len(all_quotes), desc="Saving quotes to DB") as pbar:
-        for q in all_quotes:
-            try:
-                quote_id = q["id"]
-
-                # Load or create
-                quote = Quote.query.filter_by(quote_id=quote_id).first()
-                if not quote:
-                    quote = Quote(quote_id=quote_id)
-
-                # ---- Standard quote fields ----
-                quote.customer_name = q["customer"]["name"]
-                quote.location_id = q["location"]["id"]
-                quote.location_address = q["location"]["address"]["street"]
-                quote.status = q["status"]
-                quote.quote_created_on = datetime.fromtimestamp(q["created"])
-
-                total_price_raw = q["totalPrice"]
-                quote.total_price = (
-                    float(total_price_raw.replace(",", ""))
-                    if isinstance(total_price_raw, str)
-                    else total_price_raw
-                )
-
-                quote.quote_request = q["quoteRequest"]["status"]
-                quote.owner_id = q["owner"]["id"]
-                quote.owner_email = q["owner"]["email"]
-
-                quote.job_created = len(q.get("jobs", [])) > 0
-                quote.job_id = q["jobs"][0]["id"] if quote.job_created else None
-                quote.quote_accepted_on = extract_quote_accepted_on(q)
-
-                if quote.job_id:
-                    job_resp = call_service_trade_api(
-                        f"{SERVICE_TRADE_API_BASE}/job/{quote.job_id}",
-                        params={},
-                    )
-                    if job_resp:
-                        job_payload = job_resp.json().get("data", {})
-                        if job_payload:
-                            upsert_job_schedule_from_servicetrade(job_payload)
-
-                db.session.add(quote)
-                db.session.flush()  # ensures quote.quote_id exists (DB PK)
-
-                # ---- Insert deficiency links ----
-                linked_def_ids = set(quote_to_def_ids.get(quote_id, set()))
-                linked_def_ids.update(extract_deficiency_ids_from_quote_payload(q))
-
-                for st_def_id in linked_def_ids:
-                    ensure_deficiency_from_st(st_def_id)
-                    exists = QuoteDeficiencyLink.query.filter_by(
-                        quote_id=quote.quote_id,
-                        deficiency_id=st_def_id
-                    ).first()
-
-                    if not exists:
-                        db.session.add(
-                            QuoteDeficiencyLink(
-                                quote_id=quote.quote_id,
-                                deficiency_id=st_def_id  # <-- ST deficiency ID
-                            )
-                        )
-
-            except Exception as e:
-                tqdm.write(f"[WARNING] Skipped quote {q.get('id')} | Error: {e}")
-
-            processed += 1
-            pbar.update(1)
-
-            # ---- Batch commit every N rows ----
-            if processed % BATCH_SIZE == 0:
-                db.session.commit()
-                tqdm.write(f"💾 Batch commit completed at {processed} quotes.")
+    rows = []
+    failed = []
+    for q in all_quotes:
+        try:
+            rows.append(_quote_row(q))
+        except Exception as e:
+            failed.append(q)
+            tqdm.write(f"[WARNING] Skipped quote {q.get('id')} | Error: {e}")
+        else:
+            quote_id = int(q["id"])
+            linked = quote_to_def_ids.setdefault(quote_id, set())
+            linked.update(extract_deficiency_ids_from_quote_payload(q))
+            if not linked:
+                del quote_to_def_ids[quote_id]
 
-    # Final commit for leftover rows
+    _bulk_upsert(Quote.__table__, rows, "quote_id")
     db.session.commit()
-    tqdm.write("🎉 All quotes processed and saved.")
+    tqdm.write(f"💾 {len(rows)} quotes saved.")
+
+    quotes_by_job: dict[int, list[dict]] = {}
+    saved_payloads = {int(q["id"]): q for q in all_quotes}
+    for row in rows:
+        if row["job_id"]:
+            quotes_by_job.setdefault(row["job_id"], []).append(saved_payloads[int(row["quote_id"])])
+    for job_id in tqdm(quotes_by_job, desc="Updating quote job schedules"):
+        try:
+            job_resp = call_service_trade_api(
+                f"{SERVICE_TRADE_API_BASE}/job/{job_id}",
+                params={},
+            )
+            if not job_resp:
+                raise RuntimeError("ServiceTrade job lookup failed")
+            job_payload = job_resp.json().get("data", {})
+            if job_payload:
+                upsert_job_schedule_from_servicetrade(job_payload)
+        except Exception as e:
+            failed.extend(quotes_by_job[job_id])
+            tqdm.write(f"[WARNING] Skipped job schedule {job_id} | Error: {e}")
+    db.session.commit()
+
+    saved_quote_ids = {int(row["quote_id"]) for row in rows}
+    links_added = ensure_quote_deficiency_links(
+        {quote_id: def_ids for quote_id, def_ids in quote_to_def_ids.items() if quote_id in saved_quote_ids}
+    )
+    tqdm.write(f"🎉 All quotes processed and saved ({links_added} deficiency links added).")
 
     quote_first_links = sync_unlinked_quote_deficiency_links(
-        start_date,
-        end_date,
+        window[0] if window else None,
+        window[1] if window else None,
         accepted_only=False,
         date_on="quote_created_on",
         quote_payloads=all_quotes,
+        quote_ids=None if window else saved_quote_ids,
     )
     tqdm.write(
         "🔗 Quote-first deficiency link sync: "
@@ -2187,6 +2521,16 @@ def update_quotes(start_date=None, end_date=None):
         f"{quote_first_links['locations_scanned']} locations scanned"
     )
 
+    if next_watermark is None:
+        return
+    watermark = _watermark_before_failures(next_watermark, failed)
+    if failed_pages or watermark is None:
+        tqdm.write("[WARNING] Quote sync incomplete; watermark not advanced.")
+        return
+    if failed:
+        tqdm.write(f"[WARNING] {len(failed)} quotes not fully synced; they will be listed again next run.")
+    store_sync_watermark("quote", watermark, len(rows))
+
 
 
 
@@ -2673,9 +3017,11 @@ def update_all_data(start_date=None, end_date=None):
 
     tqdm.write(f"\n🗓 Updating all data from {start_date.date()} to {end_date.date()}")
 
-    jobs_summary(overwrite=True, start_date=start_date, end_date=end_date)
-    update_deficiencies(start_date=start_date, end_date=end_date)
-    update_quotes(start_date=start_date, end_date=end_date)
+    jobs_summary(overwrite=True, start_date=start_date, end_date=end_date, pipelined=True)
+    # Deficiencies and quotes sync everything updated since their last run; the window is
+    # only used before the first successful sync.
+    update_deficiencies(start_date=start_date, end_date=end_date, incremental=True)
+    update_quotes(start_date=start_date, end_date=end_date, incremental=True)
     quoteItemInvoiceItem(start_date=start_date, end_date=end_date)
     # update_job_items_added(start_date=start_date, end_date=end_date)
     update_locations()
@@ -7,9 +7,10 @@ import pprint
 from flask import redirect, url_for
 
 from app.spa import send_spa_index
+from app.services.servicetrade import service_trade_client
 
 pink_folder_bp = Blueprint('pink_folder', __name__)
-api_session = requests.Session()
+api_session = service_trade_client()
 
 SERVICE_TRADE_API_BASE = "https://api.servicetrade.com/api"
 SERVICE_TRADE_JOB_BASE = "https://app.servicetrade.com/jobs"
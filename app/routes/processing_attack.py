@@ -6,6 +6,7 @@ from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 from dateutil import parser  # Use dateutil for flexible datetime parsing
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from sqlalchemy import inspect
 from app.db_models import (
     db,
@@ -15,6 +16,9 @@ from app.db_models import (
     ProcessingStatusDaily,
     ProcessingStatusIntraday,
 )
+from app.services.servicetrade import propagate_credentials, service_trade_client
+from app.services.servicetrade.pagination import default_page_workers
+from app.services.processing_snapshot import processing_snapshot, processing_status_fields
 import sys
 from flask import redirect, url_for
 
@@ -23,7 +27,7 @@ from app.routes.pink_folder import get_pink_folder_data as get_pink_folder_page_
 from app.response_cache import cached_json_response
 
 processing_attack_bp = Blueprint('processing_attack', __name__)
-api_session = requests.Session()
+api_session = service_trade_client()
 
 SERVICE_TRADE_API_BASE = "https://api.servicetrade.com/api"
 VANCOUVER_TZ = ZoneInfo("America/Vancouver")
@@ -134,50 +138,7 @@ def _processing_kpi_history_entry(record, ref_date, *, period_key: str, period_v
 
 def _collect_processing_status_payload():
     """Fetch the shared KPI snapshot fields used by daily processing history."""
-    jobs_to_be_marked_complete, oldest_job_ids, _ = get_jobs_to_be_marked_complete()
-    if jobs_to_be_marked_complete and oldest_job_ids:
-        oldest_job_date, oldest_job_address, oldest_job_type = get_oldest_job_data(oldest_job_ids[0])
-    else:
-        oldest_job_date = oldest_job_address = oldest_job_type = None
-
-    jobs_to_be_invoiced = get_jobs_to_be_invoiced()
-
-    _num_locations_to_be_converted, jobs_to_be_converted = find_report_conversion_jobs()
-    earliest_conversion_job = jobs_to_be_converted[0] if jobs_to_be_converted else None
-
-    if earliest_conversion_job and earliest_conversion_job.get("scheduledDate"):
-        earliest_conversion_date = datetime.fromtimestamp(
-            earliest_conversion_job.get("scheduledDate"),
-            tz=timezone.utc,
-        ).date()
-        earliest_conversion_address = (
-            earliest_conversion_job.get("location", {})
-            .get("address", {})
-            .get("street")
-        )
-        earliest_conversion_job_id = earliest_conversion_job.get("id")
-    else:
-        earliest_conversion_date = None
-        earliest_conversion_address = None
-        earliest_conversion_job_id = None
-
-    jobs_by_job_type = organize_jobs_by_job_type(jobs_to_be_marked_complete)
-    number_of_pink_folder_jobs, _, _ = get_pink_folder_data()
-
-    return {
-        "jobs_processed_today": get_jobs_processed_today(),
-        "jobs_to_be_marked_complete": len(jobs_to_be_marked_complete),
-        "jobs_to_be_invoiced": jobs_to_be_invoiced,
-        "jobs_to_be_converted": len(jobs_to_be_converted),
-        "earliest_job_to_be_converted_date": earliest_conversion_date,
-        "earliest_job_to_be_converted_address": earliest_conversion_address,
-        "earliest_job_to_be_converted_job_id": earliest_conversion_job_id,
-        "oldest_job_date": oldest_job_date,
-        "oldest_job_address": oldest_job_address,
-        "oldest_job_type": oldest_job_type,
-        "job_type_count": jobs_by_job_type,
-        "number_of_pink_folder_jobs": number_of_pink_folder_jobs,
-    }
+    return processing_status_fields(processing_snapshot())
 
 
 def _vancouver_now() -> datetime:
@@ -238,7 +199,7 @@ def capture_processing_status_intraday_if_due() -> dict[str, object]:
         .first()
     )
 
-    current_value = get_num_jobs_to_be_marked_complete()
+    current_value = processing_snapshot()["status"]["jobs_to_be_marked_complete"]
     now_utc = datetime.now(timezone.utc)
 
     if latest:
@@ -383,47 +344,16 @@ def call_service_trade_api(endpoint: str, params=None):
 def processing_attack_complete_jobs():
     """
     Returns:
-      - Number of jobs to be marked complete.
-      - Oldest job's scheduled date, address, and type.
+      - Job counts by type and the oldest jobs to be marked complete.
+      - Locations and jobs awaiting report conversion.
     """
-    authenticate()
-    oldest_jobs_to_be_marked_complete = []
-    jobs_to_be_marked_complete, oldest_job_ids, job_date = get_jobs_to_be_marked_complete()
-    if jobs_to_be_marked_complete:
-        
-        for job_id in oldest_job_ids:
-            timestamp = job_date.get(job_id)
-
-            if timestamp is None:
-                continue  # skip if timestamp is missing
-
-            job_datetime = datetime.fromtimestamp(timestamp)
-
-            _, address, job_type = get_oldest_job_data(job_id)
-
-            oldest_jobs_to_be_marked_complete.append({
-                "job_id": job_id,
-                "oldest_job_date": job_datetime.isoformat(),
-                "oldest_job_address": address or "Unknown",
-                "oldest_job_type": job_type or "Unknown"
-            })
-
-
-    jobs_by_job_type = organize_jobs_by_job_type(jobs_to_be_marked_complete)
-
-    
-
-
-    num_locations_to_be_converted, jobs_to_be_converted = find_report_conversion_jobs()
-
-    response_data = {
-        "job_type_count": jobs_by_job_type,
-        "oldest_jobs_to_be_marked_complete" : oldest_jobs_to_be_marked_complete,
-        
-        "num_locations_to_be_converted": num_locations_to_be_converted,
-        "jobs_to_be_converted": jobs_to_be_converted
-    }
-    return jsonify(response_data)
+    snapshot = processing_snapshot()
+    return jsonify({
+        "job_type_count": snapshot["job_type_count"],
+        "oldest_jobs_to_be_marked_complete": snapshot["oldest_jobs_to_be_marked_complete"],
+        "num_locations_to_be_converted": snapshot["num_locations_to_be_converted"],
+        "jobs_to_be_converted": snapshot["jobs_to_be_converted"],
+    })
 
 
 def proper_format(s):
@@ -444,7 +374,7 @@ def organize_jobs_by_job_type(jobs_to_be_marked_complete):
 @processing_attack_bp.route('/processing_attack/jobs_today', methods=['GET'])
 @cached_json_response(prefix="processing_attack:jobs_today", ttl_seconds=45)
 def jobs_today():
-    jobs_processed_today = get_jobs_processed_today()
+    jobs_processed_today = processing_snapshot()["status"]["jobs_processed_today"]
 
     incoming_jobs_today = get_incoming_jobs_today()
 
@@ -506,7 +436,7 @@ def history_jobs_to_be_marked_complete_intraday():
 @processing_attack_bp.route('/processing_attack/jobs_to_be_invoiced', methods=['GET'])
 @cached_json_response(prefix="processing_attack:jobs_to_be_invoiced", ttl_seconds=45)
 def jobs_to_be_invoiced():
-    num_jobs = get_jobs_to_be_invoiced()
+    num_jobs = processing_snapshot()["status"]["jobs_to_be_invoiced"]
 
     return jsonify({"jobs_to_be_invoiced": num_jobs}), 200
 
@@ -820,7 +750,7 @@ def get_jobs_processed_today():
 @processing_attack_bp.route('/processing_attack/num_jobs_to_be_marked_complete', methods=['GET'])
 @cached_json_response(prefix="processing_attack:num_jobs_to_be_marked_complete", ttl_seconds=45)
 def num_jobs_to_be_marked_complete():
-    num_jobs = get_num_jobs_to_be_marked_complete()
+    num_jobs = processing_snapshot()["status"]["jobs_to_be_marked_complete"]
 
     return jsonify({"jobs_to_be_marked_complete": num_jobs}), 200
 
@@ -975,7 +905,26 @@ def get_num_jobs_to_be_marked_complete():
     return len(jobs_to_be_marked_complete)
 
 
-def get_jobs_to_be_marked_complete():
+def _latest_appointment_start(job_id):
+    """Latest appointment ``windowStart`` for a job (``None`` when it has none)."""
+    resp = call_service_trade_api("appointment", params={"jobId": job_id})
+    starts = [
+        appt.get("windowStart")
+        for appt in resp.get("data", {}).get("appointments", [])
+        if appt.get("windowStart")
+    ]
+    return max(starts) if starts else None
+
+
+def get_jobs_to_be_marked_complete(appointment_max=None):
+    """
+    Jobs with every appointment complete but not invoiced, the 5 oldest by latest appointment,
+    and each job's latest appointment start.
+
+    ``appointment_max`` (``{str(job_id): [job.updated, latest windowStart]}``) is read and
+    refreshed in place: jobs whose ServiceTrade ``updated`` stamp is unchanged reuse their
+    memoized maximum; the rest are fetched concurrently.
+    """
     authenticate()
     
     job_date = {}
@@ -999,22 +948,31 @@ def get_jobs_to_be_marked_complete():
             if job_id not in jobs_to_be_marked_complete:
                 jobs_to_be_marked_complete[job_id] = j
 
-            ep = "appointment"
-            params = {
-                "jobId": job_id
-            }
-            resp = call_service_trade_api(ep, params=params)
-            appts = resp.get("data", {}).get("appointments", [])
-        
-            for appt in appts:
-                appt_start = appt.get("windowStart")
-                if not appt_start:
-                    continue 
-
-                # If this is the first time we're seeing this job_id, or the new date is later
-                if job_id not in job_date or (appt_start and appt_start > job_date[job_id]):
-                    job_date[job_id] = appt_start
-
+    memo = appointment_max if appointment_max is not None else {}
+    to_fetch = []
+    for job_id, job in jobs_to_be_marked_complete.items():
+        cached = memo.get(str(job_id))
+        updated = job.get("updated")
+        if cached is not None and updated is not None and cached[0] == updated:
+            if cached[1] is not None:
+                job_date[job_id] = cached[1]
+        else:
+            to_fetch.append(job_id)
+
+    if to_fetch:
+        with ThreadPoolExecutor(
+            max_workers=min(default_page_workers(), len(to_fetch)),
+            thread_name_prefix="processing-appts",
+        ) as pool:
+            latest_starts = list(pool.map(propagate_credentials(_latest_appointment_start), to_fetch))
+        for job_id, latest in zip(to_fetch, latest_starts):
+            memo[str(job_id)] = [jobs_to_be_marked_complete[job_id].get("updated"), latest]
+            if latest is not None:
+                job_date[job_id] = latest
+
+    current_keys = {str(job_id) for job_id in jobs_to_be_marked_complete}
+    for key in [key for key in memo if key not in current_keys]:
+        del memo[key]
     
     # Filter and validate timestamps
     valid_jobs_with_dates = [
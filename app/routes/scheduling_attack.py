@@ -20,6 +20,7 @@ from app.db_models import (
     JobsSchedulingDayMetricCache,
     SchedulingJobsLeftMonth,
 )
+from app.services.servicetrade import iter_paginated_items, service_trade_client
 from tqdm import tqdm 
 from collections import Counter
 from collections import defaultdict
@@ -34,8 +35,7 @@ log = logging.getLogger("month-conflicts")
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
 scheduling_attack_bp = Blueprint('scheduling_attack', __name__)
-api_session = requests.Session()
-api_session.headers.update({"Accept": "application/json"})
+api_session = service_trade_client()
 
 SERVICE_TRADE_API_BASE = "https://api.servicetrade.com/api"
 
@@ -201,30 +201,16 @@ def get_all_locations_with_tag(tag):
 
 
 def get_all_jobs_with_params(params=None):
-    all_jobs = []
-    endpoint = "job"
-    page = 1
-    while True:
-        paged_params = params.copy() if params else {}
-        paged_params['page'] = page
-    
-        response = call_service_trade_api(endpoint, params=paged_params)
-        if not response or 'data' not in response:
-            break
-    
-        data = response.get("data", {})
-        jobs = data.get('jobs', [])
+    base_params = params.copy() if params else {}
 
-        if not jobs:
-            break
-
-        all_jobs.extend(jobs)
+    def fetch_page(page):
+        response = call_service_trade_api("job", params={**base_params, "page": page})
+        if not response or 'data' not in response:
+            return None
+        return response.get("data", {})
 
-        if len(jobs) < params.get("limit", 2000):
-            break
-        page += 1
-    
-    return all_jobs
+    # Pages 2..totalPages are fetched concurrently and returned in page order.
+    return list(iter_paginated_items(fetch_page, "jobs"))
 
 
 def parse_dt(v):
@@ -2847,7 +2833,7 @@ def get_percent_confirmed_next_two_weeks():
     return percent_confirmed
 
 @scheduling_attack_bp.get("/scheduling_attack/v2/kpis")
-@cached_json_response(prefix="scheduling_attack:v2_kpis", ttl_seconds=90)
+@cached_json_response(prefix="scheduling_attack:v2_kpis", ttl_seconds=90, stale_ttl_seconds=90)
 def scheduling_attack_v2_kpis():
     # ------------------------------------------------------------
     # Payload
@@ -5,6 +5,7 @@ import msal
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 from app import create_app
+from app.services.servicetrade import service_trade_client
 from app.scripts.backflow_asset_resolution import (
     BackflowSerialIndexCache,
     asset_location_id,
@@ -28,8 +29,7 @@ USER_EMAIL = "service@cantec.ca"
 PORTAL_LINK = "https://crims.crd.bc.ca/ccc-portal/device-testers/"
 
 SERVICE_TRADE_API_BASE = "https://api.servicetrade.com/api"
-api_session = requests.Session()
-api_session.headers.update({"Accept": "application/json"})
+api_session = service_trade_client()
 
 
 # ---------------------------------------------------------------------------
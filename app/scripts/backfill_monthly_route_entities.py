@@ -17,6 +17,10 @@ that previously had a stale FK):
     python -m app.scripts.backfill_monthly_route_entities --execute --clear-unassigned
 
 Run ``python -m app.scripts.dry_run_monthly_route_backfill`` first until it passes.
+
+The location updates are bulk statements, which bypass the flush listeners that maintain
+``monthly_route_month_rollup``; ``--execute`` therefore refreshes the rollup for the old and
+new routes of every moved location in the same transaction.
 """
 
 from __future__ import annotations
@@ -24,16 +28,19 @@ from __future__ import annotations
 import argparse
 import sys
 
-from sqlalchemy import update
+from sqlalchemy import distinct, select, update
 
 from app import create_app
-from app.db_models import MonthlyLocation, MonthlyRoute, db
+from app.db_models import MonthlyLocation, MonthlyLocationMonth, MonthlyRoute, db
 from app.monthly.route_backfill import (
     assigned_location_ids,
     classify_monthly_locations,
     validate_existing_location_fks,
     validate_existing_monthly_route_rows,
 )
+from app.monthly.route_month_rollup import refresh_route_month_rollup
+
+_ID_CHUNK_SIZE = 1000
 
 
 def _gather_blocking(classification, existing_block: list[str], fk_block: list[str]) -> list[str]:
@@ -46,6 +53,29 @@ def _gather_blocking(classification, existing_block: list[str], fk_block: list[s
     return blocking
 
 
+def refresh_moved_route_months(moved: dict[int, tuple[int | None, int | None]]) -> int:
+    """Refresh rollup rows for ``{location_id: (old_route_id, new_route_id)}`` moves.
+
+    Only unstamped (legacy) history follows a site's current route, so the months to
+    recompute are those with unstamped ``monthly_location_month`` rows for the moved sites.
+    """
+    route_ids = {route_id for pair in moved.values() for route_id in pair if route_id is not None}
+    if not route_ids:
+        return 0
+    location_ids = sorted(moved)
+    months: set = set()
+    for start in range(0, len(location_ids), _ID_CHUNK_SIZE):
+        months.update(
+            db.session.execute(
+                select(distinct(MonthlyLocationMonth.month_date)).where(
+                    MonthlyLocationMonth.monthly_location_id.in_(location_ids[start : start + _ID_CHUNK_SIZE]),
+                    MonthlyLocationMonth.test_monthly_route_id.is_(None),
+                )
+            ).scalars()
+        )
+    return refresh_route_month_rollup((route_id, month) for route_id in route_ids for month in months)
+
+
 def main(argv: list[str] | None = None) -> int:
     parser = argparse.ArgumentParser(description="Backfill MonthlyRoute from TEST DAY.")
     parser.add_argument(
@@ -63,6 +93,7 @@ def main(argv: list[str] | None = None) -> int:
     app = create_app()
     with app.app_context():
         locations = MonthlyLocation.query.order_by(MonthlyLocation.id.asc()).all()
+        previous_route = {loc.id: loc.monthly_route_id for loc in locations}
         existing_routes = MonthlyRoute.query.order_by(MonthlyRoute.route_number.asc()).all()
         route_by_id = {r.id: r for r in existing_routes}
         existing_by_rn = {r.route_number: r for r in existing_routes}
@@ -138,6 +169,7 @@ def main(argv: list[str] | None = None) -> int:
             print(f"Flush OK ({inserted} new routes). Bulk-updating locations...", flush=True)
 
             route_by_rn = {r.route_number: r for r in MonthlyRoute.query.all()}
+            moved: dict[int, tuple[int | None, int | None]] = {}
             updated = 0
             n_buckets = len(classification.buckets)
             for idx, rn in enumerate(sorted(classification.buckets.keys()), start=1):
@@ -146,6 +178,9 @@ def main(argv: list[str] | None = None) -> int:
                 ids = b.location_ids
                 if not ids:
                     continue
+                for lid in ids:
+                    if previous_route.get(lid) != mr.id:
+                        moved[lid] = (previous_route.get(lid), mr.id)
                 result = db.session.execute(
                     update(MonthlyLocation)
                     .where(MonthlyLocation.id.in_(ids))
@@ -163,6 +198,9 @@ def main(argv: list[str] | None = None) -> int:
                 assigned = assigned_location_ids(classification.buckets)
                 if assigned:
                     print("Clearing monthly_route_id on unassigned locations...", flush=True)
+                    for lid, route_id in previous_route.items():
+                        if route_id is not None and lid not in assigned:
+                            moved[lid] = (route_id, None)
                     res = db.session.execute(
                         update(MonthlyLocation)
                         .where(
@@ -173,6 +211,12 @@ def main(argv: list[str] | None = None) -> int:
                     )
                     cleared = res.rowcount or 0
 
+            refreshed = refresh_moved_route_months(moved)
+            print(
+                f"Refreshed monthly_route_month_rollup: {refreshed} route-month row(s) for {len(moved)} moved location(s)",
+                flush=True,
+            )
+
             print("Committing transaction...", flush=True)
             db.session.commit()
             print(
@@ -8,6 +8,7 @@ from tqdm import tqdm  # <-- progress bar
 import json
 
 from app import create_app
+from app.services.servicetrade import service_trade_client
 from app.db_models import db, Location, ServiceRecurrence
 from app.routes.scheduling_attack import ingest_service_recurrence  # adjust if needed
 
@@ -15,8 +16,7 @@ logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 log = logging.getLogger("backfill")
 
 SERVICE_TRADE_API_BASE = "https://api.servicetrade.com/api"
-api_session = requests.Session()
-api_session.headers.update({"Accept": "application/json"})
+api_session = service_trade_client()
 
 # -------------------- ServiceTrade helpers --------------------
 
@@ -64,6 +64,7 @@ import requests
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 from app import create_app
+from app.services.servicetrade import service_trade_client
 from app.db_models import db, BackflowAutomationMetric
 from app.scripts.backflow_asset_resolution import (
     BackflowSerialIndexCache,
@@ -105,8 +106,7 @@ USER_EMAIL = "service@cantec.ca"
 PORTAL_LINK = "https://crims.crd.bc.ca/ccc-portal/device-testers/"
 
 SERVICE_TRADE_API_BASE = "https://api.servicetrade.com/api"
-api_session = requests.Session()
-api_session.headers.update({"Accept": "application/json"})
+api_session = service_trade_client()
 
 # ---------------------------------------------------------------------------
 #  🔐 GRAPH AUTHENTICATION
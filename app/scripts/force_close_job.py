@@ -1,13 +1,13 @@
 import os
 import requests
 from app import create_app
+from app.services.servicetrade import service_trade_client
 from dotenv import load_dotenv
 
 load_dotenv()
 
 SERVICE_TRADE_API_BASE = "https://api.servicetrade.com/api"
-api_session = requests.Session()
-api_session.headers.update({"Accept": "application/json"})
+api_session = service_trade_client()
 
 # ---------------------------------------------------------------------------
 #  🔐 SERVICE TRADE AUTHENTICATION
@@ -1,6 +1,5 @@
 # app/scripts/scheduling_attack_update_v2.py
 import os
-import requests
 from tqdm import tqdm
 import logging
 import argparse
@@ -9,11 +8,11 @@ from datetime import datetime, timedelta, timezone
 from dateutil.relativedelta import relativedelta
 
 from app import create_app
+from app.services.servicetrade import service_trade_client
 from app.db_models import db, Location, SchedulingAttackV2
 
 SERVICE_TRADE_API_BASE = "https://api.servicetrade.com/api"
-api_session = requests.Session()
-api_session.headers.update({"Accept": "application/json"})
+api_session = service_trade_client()
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 log = logging.getLogger("backfill")
@@ -3,17 +3,15 @@ import logging
 from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
 
-import requests
-
 from app import create_app
+from app.services.servicetrade import service_trade_client
 from app.db_models import db, JobsSchedulingDayBaseline
 
 SERVICE_TRADE_API_BASE = "https://api.servicetrade.com/api"
 LOCAL_TZ = ZoneInfo("America/Vancouver")
 JOB_TYPE = "inspection,reinspection,planned_maintenance"
 
-api_session = requests.Session()
-api_session.headers.update({"Accept": "application/json"})
+api_session = service_trade_client()
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 log = logging.getLogger("sched-intraday-baseline")
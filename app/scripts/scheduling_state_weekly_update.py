@@ -1,6 +1,5 @@
 import os
 # app/scripts/scheduling_attack_update_v2.py
-import requests
 import logging
 import argparse
 import json
@@ -9,14 +8,14 @@ from zoneinfo import ZoneInfo
 from collections import defaultdict
 from sqlalchemy import inspect
 from app.services.scheduling_diff import BaselineState, compute_scheduling_diffs
+from app.services.servicetrade import service_trade_client
 
 
 from app import create_app
 from app.db_models import db, JobsSchedulingState, WeeklySchedulingStats
 
 SERVICE_TRADE_API_BASE = "https://api.servicetrade.com/api"
-api_session = requests.Session()
-api_session.headers.update({"Accept": "application/json"})
+api_session = service_trade_client()
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 log = logging.getLogger("backfill")
@@ -7,6 +7,7 @@ import json
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from app import create_app
+from app.services.servicetrade import service_trade_client
 from collections import defaultdict
 
 MAX_WORKERS = 12  # You can tune this based on performance
@@ -17,7 +18,7 @@ SERVICE_TRADE_API_BASE = "https://api.servicetrade.com/api"
 from dotenv import load_dotenv
 load_dotenv()
 
-api_session = requests.Session()
+api_session = service_trade_client()
 
 app = create_app()
 
@@ -1,37 +1,45 @@
 """
 Persist ServiceTrade annual schedule cache on monthly_location_month for all routes.
 
+Nightly precompute: routes are refreshed on a worker pool and each result is stamped in
+monthly_route_annual_schedule_sync, so paperwork views serve the DB cache instead of calling
+ServiceTrade while it is fresh (MONTHLY_ANNUAL_SCHEDULE_TTL_SECONDS).
+
 Requires PROCESSING_USERNAME / PROCESSING_PASSWORD.
 
 Env:
   MONTHLY_ANNUAL_SCHEDULE_LOOKBACK — Pacific months through current (default 1 = current only).
   MONTHLY_ANNUAL_SCHEDULE_LOOKAHEAD — Pacific months after current (default 1 = next month).
+  MONTHLY_ANNUAL_SCHEDULE_WORKERS — routes refreshed concurrently (default 4).
 
 CLI:
   python -m app.scripts.sync_monthly_route_annual_schedules
   python -m app.scripts.sync_monthly_route_annual_schedules --route-number 5
   python -m app.scripts.sync_monthly_route_annual_schedules --month 2026-06-01
   python -m app.scripts.sync_monthly_route_annual_schedules --lookahead 0
+  python -m app.scripts.sync_monthly_route_annual_schedules --workers 8 --skip-fresh
 """
 from __future__ import annotations
 
 import argparse
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date, datetime
 from zoneinfo import ZoneInfo
 
 import requests
 from dotenv import load_dotenv
+from flask import Flask
 from sqlalchemy import func
 
 from app import create_app, db
 from app.db_models import MonthlyLocation, MonthlyRoute
 from app.monthly.service_trade_annual_schedule import (
-    build_route_annual_schedule_snapshot,
-    persist_route_annual_schedule_snapshot,
+    route_annual_schedule_cache_fresh,
+    sync_route_annual_schedule,
 )
-from app.monthly.service_trade_site_match import SERVICE_TRADE_API_BASE
+from app.services.servicetrade import authenticate_service_trade_session, service_trade_client
 
 load_dotenv()
 
@@ -93,12 +101,95 @@ def _active_routes(*, route_number: int | None = None) -> list[MonthlyRoute]:
     return query.order_by(MonthlyRoute.route_number.asc()).all()
 
 
-def _authenticate(http: requests.Session, *, username: str, password: str) -> None:
-    resp = http.post(
-        f"{SERVICE_TRADE_API_BASE}/auth",
-        json={"username": username, "password": password},
+def _default_workers() -> int:
+    try:
+        return max(1, int(os.getenv("MONTHLY_ANNUAL_SCHEDULE_WORKERS") or "4"))
+    except ValueError:
+        return 4
+
+
+def _refresh_route_month(
+    http: requests.Session | None,
+    route_id: int,
+    month_first: date,
+    *,
+    skip_fresh: bool = False,
+) -> tuple[str, str]:
+    """Sync one route-month; returns ``(status, detail)`` with status ``ok``, ``fresh`` or ``fail``."""
+    if skip_fresh and route_annual_schedule_cache_fresh(route_id, month_first):
+        return "fresh", "cache within TTL"
+    try:
+        payload = sync_route_annual_schedule(route_id, month_first, session=http)
+    except Exception as exc:
+        return "fail", str(exc).strip() or exc.__class__.__name__
+    locations = payload.get("locations") or {}
+    skip_count = sum(
+        1
+        for row in locations.values()
+        if isinstance(row, dict) and row.get("annual_skip_recommended")
     )
-    resp.raise_for_status()
+    warning_count = int(payload.get("warning_count") or 0)
+    return "ok", f"{len(locations)} site(s), {skip_count} annual skip, {warning_count} warning(s)"
+
+
+def _refresh_route(
+    app: Flask,
+    http: requests.Session | None,
+    route_id: int,
+    month_first_list: list[date],
+    *,
+    skip_fresh: bool = False,
+) -> list[tuple[date, str, str]]:
+    """Worker: one route's months in order, in its own app context / DB session.
+
+    Months of a route share its worksheet stops and ServiceTrade sites, so they stay on one
+    worker; the pool parallelizes across routes.
+    """
+    with app.app_context():
+        try:
+            return [
+                (month_first, *_refresh_route_month(http, route_id, month_first, skip_fresh=skip_fresh))
+                for month_first in month_first_list
+            ]
+        finally:
+            db.session.remove()
+
+
+def refresh_route_annual_schedules(
+    app: Flask,
+    http: requests.Session | None,
+    *,
+    routes: list[MonthlyRoute],
+    month_first_list: list[date],
+    workers: int = 4,
+    skip_fresh: bool = False,
+) -> int:
+    """Refresh every route × month with ``workers`` routes in flight; return the failure count."""
+    failures = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="annual-sync") as pool:
+        futures = {
+            pool.submit(
+                _refresh_route,
+                app,
+                http,
+                int(route.id),
+                month_first_list,
+                skip_fresh=skip_fresh,
+            ): route.route_number
+            for route in routes
+        }
+        for future in as_completed(futures):
+            route_number = futures[future]
+            for month_first, status, detail in future.result():
+                label = f"R{route_number} {month_first.isoformat()}"
+                if status == "fail":
+                    failures += 1
+                    print(f"  FAIL {label}: {detail}", file=sys.stderr)
+                elif status == "fresh":
+                    print(f"  SKIP {label}: {detail}")
+                else:
+                    print(f"  OK   {label}: {detail}")
+    return failures
 
 
 def sync_all_route_annual_schedules(
@@ -106,6 +197,8 @@ def sync_all_route_annual_schedules(
     month_first_list: list[date],
     route_number: int | None = None,
     max_routes: int | None = None,
+    workers: int | None = None,
+    skip_fresh: bool = False,
 ) -> int:
     username = os.getenv("PROCESSING_USERNAME")
     password = os.getenv("PROCESSING_PASSWORD")
@@ -113,53 +206,30 @@ def sync_all_route_annual_schedules(
         raise SystemExit("Missing PROCESSING_USERNAME/PROCESSING_PASSWORD environment vars.")
 
     app = create_app()
-    failures = 0
     with app.app_context():
         routes = _active_routes(route_number=route_number)
         if route_number is not None and not routes:
             raise SystemExit(f"No active MonthlyRoute with route_number={route_number}.")
-
-        http = requests.Session()
-        http.headers.setdefault("Accept", "application/json")
-        _authenticate(http, username=username, password=password)
-        print(f"Authenticated with ServiceTrade ({len(routes)} route(s), {len(month_first_list)} month(s))")
-
-        processed_routes = 0
-        for route in routes:
-            if max_routes is not None and processed_routes >= max_routes:
-                break
-            processed_routes += 1
-            route_id = int(route.id)
-
-            for month_first in month_first_list:
-                label = f"R{route.route_number} {month_first.isoformat()}"
-                try:
-                    snapshot = build_route_annual_schedule_snapshot(
-                        route_id,
-                        month_first,
-                        username=username,
-                        password=password,
-                        session=http,
-                    )
-                    persist_route_annual_schedule_snapshot(route_id, month_first, snapshot)
-                except Exception as exc:
-                    failures += 1
-                    print(f"  FAIL {label}: {exc}", file=sys.stderr)
-                    continue
-
-                locations = snapshot.get("locations") or {}
-                skip_count = sum(
-                    1
-                    for row in locations.values()
-                    if isinstance(row, dict) and row.get("annual_skip_recommended")
-                )
-                warning_count = int(snapshot.get("warning_count") or 0)
-                print(
-                    f"  OK   {label}: {len(locations)} site(s), "
-                    f"{skip_count} annual skip, {warning_count} warning(s)"
-                )
-
-    return failures
+        if max_routes is not None:
+            routes = routes[: max(0, max_routes)]
+        db.session.remove()
+
+    # Thread-safe shared client: one login, reused by every worker.
+    http = service_trade_client()
+    authenticate_service_trade_session(http, username, password)
+    workers = max(1, int(workers or _default_workers()))
+    print(
+        f"Authenticated with ServiceTrade ({len(routes)} route(s), "
+        f"{len(month_first_list)} month(s), {workers} worker(s))"
+    )
+    return refresh_route_annual_schedules(
+        app,
+        http,
+        routes=routes,
+        month_first_list=month_first_list,
+        workers=workers,
+        skip_fresh=skip_fresh,
+    )
 
 
 def _parse_month(value: str) -> date:
@@ -218,6 +288,18 @@ def main(argv: list[str] | None = None) -> int:
         metavar="N",
         help="Process at most N routes (debug; order follows route_number).",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Routes refreshed concurrently (default: env or 4).",
+    )
+    parser.add_argument(
+        "--skip-fresh",
+        action="store_true",
+        help="Leave route-months whose cache is still within MONTHLY_ANNUAL_SCHEDULE_TTL_SECONDS.",
+    )
     args = parser.parse_args(argv)
 
     if args.month is not None:
@@ -236,6 +318,8 @@ def main(argv: list[str] | None = None) -> int:
         month_first_list=month_first_list,
         route_number=args.route_number,
         max_routes=args.max_routes,
+        workers=args.workers,
+        skip_fresh=args.skip_fresh,
     )
     if failures:
         print(f"Finished with {failures} failure(s).", file=sys.stderr)
@@ -1,14 +1,13 @@
 
 from datetime import datetime, timezone
-import requests
 import os
 from app import create_app
+from app.services.servicetrade import service_trade_client
 from app.db_models import db, Technician
 
 
 SERVICE_TRADE_API_BASE = "https://api.servicetrade.com/api"
-api_session = requests.Session()
-api_session.headers.update({"Accept": "application/json"})
+api_session = service_trade_client()
 
 non_tech_names = ['Jordan Zwicker', 'Shop Tech', 'Sub Contractors']
 
@@ -1,17 +1,16 @@
 from datetime import datetime, timedelta
-import requests
 import os
 import json
 from datetime import datetime, timedelta, timezone
 from dateutil.relativedelta import relativedelta
 
 from app import create_app
+from app.services.servicetrade import service_trade_client
 from dotenv import load_dotenv
 from app.scripts.backflow_automation import get_graph_token, get_recent_messages, get_full_message, normalize, extract_street_search, handle_test_result, handle_device_assignment
 
 SERVICE_TRADE_API_BASE = "https://api.servicetrade.com/api"
-api_session = requests.Session()
-api_session.headers.update({"Accept": "application/json"})
+api_session = service_trade_client()
 
 load_dotenv()
 
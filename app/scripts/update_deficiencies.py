@@ -2,7 +2,13 @@ import os
 import sys
 from app import create_app, db
 from flask import current_app as app
-from app.routes.deficiency_tracker import fetch_deficiencies, authenticate, call_service_trade_api, SERVICE_TRADE_API_BASE
+from app.routes.deficiency_tracker import (
+    iter_deficiencies,
+    serialize_deficiency,
+    authenticate,
+    call_service_trade_api,
+    SERVICE_TRADE_API_BASE,
+)
 from app.db_models import DeficiencyRecord
 from datetime import datetime, timezone
 from sqlalchemy.exc import IntegrityError
@@ -34,15 +40,12 @@ def update_deficiency_records(start_date: datetime, end_date: datetime):
         session['password'] = os.environ.get("PROCESSING_PASSWORD")
 
         print("Fetching deficiencies...")
-        response = fetch_deficiencies(start_date, end_date)
-        deficiencies_data = response.get_json()["data"]
-
-        print(f"Processing {len(deficiencies_data)} deficiencies...")
         added = 0
         skipped = 0
         updated = 0
 
-        for item in deficiencies_data:
+        # Enriched page by page, so upserts start while later pages are still being fetched.
+        for item in (serialize_deficiency(d) for d in iter_deficiencies(start_date, end_date)):
             incoming_reported_on = datetime.fromisoformat(item["reported_on"]) if item["reported_on"] else None
             try:
                 with db.session.no_autoflush:
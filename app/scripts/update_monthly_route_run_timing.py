@@ -18,12 +18,12 @@ import os
 from datetime import date, datetime, timezone
 from zoneinfo import ZoneInfo
 
-import requests
 from dotenv import load_dotenv
 from sqlalchemy import func
 from sqlalchemy.dialects.postgresql import insert
 
 from app import create_app, db
+from app.services.servicetrade import service_trade_client
 from app.db_models import MonthlyLocation, MonthlyRoute, MonthlyRouteRunTimingMonth
 from app.monthly.service_trade_route_run_timing import (
     SERVICE_TRADE_API_BASE,
@@ -34,8 +34,7 @@ load_dotenv()
 
 PACIFIC = ZoneInfo("America/Vancouver")
 
-api_session = requests.Session()
-api_session.headers.update({"Accept": "application/json"})
+api_session = service_trade_client()
 
 
 def authenticate(username: str, password: str) -> None:
@@ -20,11 +20,11 @@ from datetime import date, datetime, timezone
 from typing import Any
 from zoneinfo import ZoneInfo
 
-import requests
 from dotenv import load_dotenv
 from sqlalchemy.dialects.postgresql import insert
 
 from app import create_app, db
+from app.services.servicetrade import service_trade_client
 from app.db_models import MonthlyRoute, MonthlyRouteSnapshot, MonthlyRouteSpecialistMonth
 from app.routes.scheduling_attack import parse_dt
 
@@ -34,8 +34,7 @@ SERVICE_TRADE_API_BASE = "https://api.servicetrade.com/api"
 PACIFIC = ZoneInfo("America/Vancouver")
 JOB_PAGE_LIMIT = 100
 
-api_session = requests.Session()
-api_session.headers.update({"Accept": "application/json"})
+api_session = service_trade_client()
 
 
 def authenticate(username: str, password: str) -> None:
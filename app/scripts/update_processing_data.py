@@ -14,15 +14,9 @@ from app import create_app
 from app.db_models import db, JobSummary, ProcessorMetrics, ProcessingStatus, ProcessingStatusDaily
 from app.routes.processing_attack import (
     get_jobs_processed,
-    get_jobs_processed_today,
     get_jobs_processed_by_processor,
-    get_jobs_to_be_marked_complete,
-    get_jobs_to_be_invoiced,
-    get_oldest_job_data,
-    organize_jobs_by_job_type,
-    find_report_conversion_jobs,
-    get_pink_folder_data,
 )
+from app.services.processing_snapshot import processing_snapshot, processing_status_fields
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -30,51 +24,8 @@ app = create_app()
 
 
 def collect_processing_status_payload():
-    """Fetch current KPI snapshot fields from ServiceTrade (shared by weekly + daily rows)."""
-    jobs_to_be_marked_complete, oldest_job_ids, _ = get_jobs_to_be_marked_complete()
-    if jobs_to_be_marked_complete and oldest_job_ids:
-        oldest_job_date, oldest_job_address, oldest_job_type = get_oldest_job_data(oldest_job_ids[0])
-    else:
-        oldest_job_date = oldest_job_address = oldest_job_type = None
-
-    jobs_to_be_invoiced = get_jobs_to_be_invoiced()
-
-    _num_locations_to_be_converted, jobs_to_be_converted = find_report_conversion_jobs()
-    earliest_conversion_job = jobs_to_be_converted[0] if jobs_to_be_converted else None
-
-    if earliest_conversion_job and earliest_conversion_job.get("scheduledDate"):
-        earliest_conversion_date = datetime.fromtimestamp(
-            earliest_conversion_job.get("scheduledDate"),
-            tz=timezone.utc,
-        ).date()
-        earliest_conversion_address = (
-            earliest_conversion_job.get("location", {})
-            .get("address", {})
-            .get("street")
-        )
-        earliest_conversion_job_id = earliest_conversion_job.get("id")
-    else:
-        earliest_conversion_date = None
-        earliest_conversion_address = None
-        earliest_conversion_job_id = None
-
-    jobs_by_job_type = organize_jobs_by_job_type(jobs_to_be_marked_complete)
-    number_of_pink_folder_jobs, _, _ = get_pink_folder_data()
-
-    return {
-        "jobs_processed_today": get_jobs_processed_today(),
-        "jobs_to_be_marked_complete": len(jobs_to_be_marked_complete),
-        "jobs_to_be_invoiced": jobs_to_be_invoiced,
-        "jobs_to_be_converted": len(jobs_to_be_converted),
-        "earliest_job_to_be_converted_date": earliest_conversion_date,
-        "earliest_job_to_be_converted_address": earliest_conversion_address,
-        "earliest_job_to_be_converted_job_id": earliest_conversion_job_id,
-        "oldest_job_date": oldest_job_date,
-        "oldest_job_address": oldest_job_address,
-        "oldest_job_type": oldest_job_type,
-        "job_type_count": jobs_by_job_type,
-        "number_of_pink_folder_jobs": number_of_pink_folder_jobs,
-    }
+    """Current KPI snapshot fields (shared by weekly + daily rows and the web dashboard)."""
+    return processing_status_fields(processing_snapshot())
 
 
 def upsert_weekly_processing_status(status_data):
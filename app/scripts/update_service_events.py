@@ -4,11 +4,16 @@ import argparse
 import logging
 import time
 import re
+import threading
 import requests
 from tqdm import tqdm
 from datetime import datetime, timezone, timedelta, date
 from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass, field
+from sqlalchemy import inspect
 from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from zoneinfo import ZoneInfo
 import json
 import csv
@@ -16,15 +21,15 @@ import csv
 NULL_JOB_CSV_PATH = "logs/missing_job_ids.csv"
 
 from app import create_app
-from app.db_models import db, Location, ServiceOccurrence
+from app.services.servicetrade import service_trade_client
+from app.db_models import db, Location, ServiceEventSyncCheckpoint, ServiceOccurrence
 
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 log = logging.getLogger("backfill")
 
 SERVICE_TRADE_API_BASE = "https://api.servicetrade.com/api"
-api_session = requests.Session()
-api_session.headers.update({"Accept": "application/json"})
+api_session = service_trade_client()
 
 SPRINKLER_TECHS_NAMES = ["Colin Peterson", "Justin Walker"]
 
@@ -164,19 +169,52 @@ def stream_clockevents_for_job(job_id: int, limit: int = 500):
         page += 1
 
 
+class LocationMetadataCache:
+    """
+    Per-run memo of ``GET /location/{id}`` payloads.
+
+    ``main()`` reads each location once; the tag parsers below (travel time, FA techs,
+    FA timing, SPR) are called per job and per location and all read the cached payload.
+    ``api_calls`` counts real requests and ``calls_saved`` the lookups served from memory.
+    Safe to share between ``--workers`` threads (each location is handled by one worker).
+    """
+
+    def __init__(self):
+        self._payloads: dict[int, dict] = {}
+        self._lock = threading.Lock()
+        self.api_calls = 0
+        self.calls_saved = 0
+
+    def payload(self, location_id: int) -> dict:
+        key = int(location_id)
+        with self._lock:
+            cached = self._payloads.get(key)
+            if cached is not None:
+                self.calls_saved += 1
+                return cached
+        payload = call_service_trade_api(f"location/{key}")
+        with self._lock:
+            self.api_calls += 1
+            self._payloads[key] = payload
+        return payload
+
+    def tags(self, location_id: int) -> list:
+        payload = self.payload(location_id)
+        tags = (payload.get("data") or {}).get("tags") or payload.get("tags") or []
+        return tags if isinstance(tags, list) else []
+
+
+location_metadata = LocationMetadataCache()
+
+
 def _travel_time_for_location(location_id: int) -> int | None:
     """
-    GET /location/{locationId}
+    Read from the location's tags (``location_metadata``; one GET /location/{locationId} per run).
     Tags are dicts with a 'name' field.
     Pattern: ... 't' <hours>, where hours may use underscore as decimal (e.g., t1_5 = 1.5h).
     Returns one-way travel time in MINUTES (int), not roundtrip.
     """
-    r = api_session.get(f"{SERVICE_TRADE_API_BASE}/location/{location_id}")
-    r.raise_for_status()
-    payload = r.json()
-    tags = payload.get("data", {}).get("tags") or payload.get("tags") or []
-    if not isinstance(tags, list):
-        return None
+    tags = location_metadata.tags(location_id)
 
     candidates_min = []
 
@@ -214,7 +252,7 @@ import re
 
 def parse_fa_techs_tag(location_id: int) -> int:
     """
-    Query ServiceTrade for a location's tags and extract number of Fire Alarm techs.
+    Read a location's tags (``location_metadata``) and extract number of Fire Alarm techs.
 
     Tag patterns supported (case-insensitive, underscores or hyphens allowed):
       - "1_Tech", "2_Tech", "3_Tech"
@@ -223,12 +261,7 @@ def parse_fa_techs_tag(location_id: int) -> int:
     Returns the number of techs (int). If multiple matches exist, returns the max.
     If no valid FA tech tag is found, returns 0.
     """
-    r = api_session.get(f"{SERVICE_TRADE_API_BASE}/location/{location_id}")
-    r.raise_for_status()
-    payload = r.json()
-    tags = payload.get("data", {}).get("tags") or payload.get("tags") or []
-    if not isinstance(tags, list):
-        return 0
+    tags = location_metadata.tags(location_id)
 
     candidates: list[int] = []
     tech_pat = re.compile(r"(\d+)[_-]?tech", re.IGNORECASE)
@@ -297,7 +330,7 @@ def _month_floor_utc(ts):
 
 def parse_fa_timing_tag(location_id: int) -> tuple[float, float]:
     """
-    Query ServiceTrade for a location's tags and extract Fire Alarm timing.
+    Read a location's tags (``location_metadata``) and extract Fire Alarm timing.
 
     Tag patterns supported (case-insensitive, underscores as decimals):
       - DAY-based: "<N>d|day|days" with optional "+/-<H>h|hour|hours" and optional "t<F>"
@@ -312,12 +345,7 @@ def parse_fa_timing_tag(location_id: int) -> tuple[float, float]:
         (days, hours) as a tuple of floats.
         If no valid FA timing is found, returns (0.0, 0.0).
     """
-    r = api_session.get(f"{SERVICE_TRADE_API_BASE}/location/{location_id}")
-    r.raise_for_status()
-    payload = r.json()
-    tags = payload.get("data", {}).get("tags") or payload.get("tags") or []
-    if not isinstance(tags, list):
-        return (0.0, 0.0)
+    tags = location_metadata.tags(location_id)
 
     candidates: list[tuple[float, float]] = []
 
@@ -403,7 +431,7 @@ def parse_fa_timing_tag(location_id: int) -> tuple[float, float]:
 
 def parse_spr_tag(location_id: int) -> tuple[int, float]:
     """
-    Query ServiceTrade for a location's tags and extract Sprinkler staffing.
+    Read a location's tags (``location_metadata``) and extract Sprinkler staffing.
 
     Pattern (case-insensitive, underscores as decimals), found *anywhere*:
       - "spr_<techs>x<hours>"
@@ -412,12 +440,7 @@ def parse_spr_tag(location_id: int) -> tuple[int, float]:
     Returns (num_techs, hours). If no valid SPR tag is found, returns (0, 0.0).
     If multiple matches exist, returns the one with the largest hours (tie-breaker: larger techs).
     """
-    r = api_session.get(f"{SERVICE_TRADE_API_BASE}/location/{location_id}")
-    r.raise_for_status()
-    payload = r.json()
-    tags = payload.get("data", {}).get("tags") or payload.get("tags") or []
-    if not isinstance(tags, list):
-        return (0, 0.0)
+    tags = location_metadata.tags(location_id)
 
     best_techs, best_hours = 0, 0.0
     spr_pat = re.compile(r"spr[_-]?(\d+)x(\d+(?:_\d{1,2})?)", re.IGNORECASE)
@@ -647,15 +670,833 @@ def _flush_occurrence_rows(buffer: list[dict], *, test_mode: bool) -> int:
         raise
 
 
+@dataclass
+class LocationResult:
+    """Outcome of one location: occurrence rows plus counters for the run summary."""
+
+    location_id: int
+    rows: list[dict] = field(default_factory=list)
+    jobs: int = 0
+    skipped: int = 0
+    errors: int = 0
+    unchanged: bool = False
+    watermark: int | None = None
+    # Earliest upcoming scheduled inspection: once it passes, the location must be revisited.
+    revisit_after: int | None = None
+
+
+def process_location(loc_id: int) -> LocationResult:
+    """Build ServiceOccurrence rows for one location. ServiceTrade calls only; no DB access."""
+    result = LocationResult(location_id=loc_id)
+    # Step 3's stub row reuses the last job's fields; start them empty for locations without past jobs.
+    job_type = created_at = scheduled_on = completed_on = status = None
+    is_recurring = confirmed = False
+
+    resp = location_metadata.payload(loc_id)
+    location_name = resp.get("data").get("address").get("street")
+    inspection_job_found = False
+    is_location_on_hold = False
+
+    tags = resp.get("data").get("tags")
+    for tag in tags:
+        if tag.get("name") == "On_Hold":
+            is_location_on_hold = True
+
+    try:
+        for jobs in stream_jobs_for_location(loc_id):
+            appointments_data = {}
+            job_type = jobs.get("type")
+            scheduled_on = jobs.get("scheduledDate")
+            job_id = jobs.get("id")
+            created_at = jobs.get("created")
+            completed_on = jobs.get("completedOn")
+            if completed_on is not None:
+                confirmed = True
+            travel_time = _travel_time_for_location(loc_id)
+            num_unique_tech_appt = 0
+            status = jobs.get("status")
+            location_name = jobs.get("location").get("address").get("street")
+
+            if job_type == "inspection":
+                inspection_job_found = True
+
+            is_recurring = False
+            if job_type in ["inspection", "planned_maintenance", "preventive_maintenance"]:
+                is_recurring = True
+
+            num_appts = 0
+            appointments_iter = iter(stream_appointments_for_job(job_id)) # Only streams jobs scheduled from 1 year ago to today.
+            first_appt = next(appointments_iter, None)
+            if first_appt is None:
+                log.info("Job %s has no appointments; writing stub occurrence.", job_id)
+                # this almost never happens. Jobs usually have appointments
+                insert_vals = {
+                    "location_name": location_name,
+                    "job_id": job_id,
+                    "location_id": loc_id,
+                    "job_type": job_type,
+                    "job_created_at": created_at,
+                    "scheduled_for": scheduled_on,          # use job scheduledDate
+                    "completed_at": completed_on,
+                    "observed_month": scheduled_on,         # or completed_on if you prefer
+                    "is_recurring": is_recurring,
+                    "spr_hours_actual": 0,
+                    "fa_hours_actual": 0,
+                    "number_of_fa_days": 0,
+                    "number_of_spr_days": 0,
+                    "number_of_fa_techs": 0,
+                    "number_of_spr_techs": 0,
+                    "travel_minutes_per_appt": travel_time,
+                    "travel_minutes_total": 0,
+                    "status": status,
+                    "is_confirmed": confirmed,
+                    "meta": "no appointments",
+                    "location_on_hold": is_location_on_hold,
+                }
+                result.rows.append(insert_vals)
+                result.jobs += 1
+                result.skipped += 1
+                continue
+            else:
+                appts_source = [first_appt]
+                appts_source.extend(appointments_iter)
+
+            earliest_appt_ts = None
+            for appts in appts_source:
+                # capture appointments 
+                is_spr_appt = False
+                services_on_appt = appts.get("serviceRequests", []) or []
+                techs_on_appt = appts.get("techs", []) or []
+
+                released = appts.get("released", False)
+                if not techs_on_appt:
+                    # No techs yet → keep FA/SPR sets empty; still record appointment so day aggregation works
+                    log.debug("Job %s appt %s has no techs assigned yet.", job_id, appts.get("id"))
+
+                # classify appointment type and collect techs by role
+                for service in services_on_appt:
+                    if service.get("serviceLine", {}).get("id") == 6:  # Backflows - (sprinkler)
+                        is_spr_appt = True
+
+                fa_techs = set()
+                spr_techs = set()
+                for tech in techs_on_appt:
+                    name = (tech.get("name") or "").strip()
+                    num_unique_tech_appt += 1
+                    if not name:
+                        continue
+                    if name in SPRINKLER_TECHS_NAMES:
+                        spr_techs.add(name)
+                    else:
+                        fa_techs.add(name)
+
+                appt_scheduled_on = appts.get("windowStart")
+                if appt_scheduled_on is not None:
+                    earliest_appt_ts = appt_scheduled_on if earliest_appt_ts is None else min(earliest_appt_ts, appt_scheduled_on)
+
+                appointments_data[appts.get("id")] = {
+                    "scheduled_on": scheduled_on,
+                    "is_spr_appt": is_spr_appt,
+                    "elapsed_time": 0,
+                    "only_spr_techs_on_appt": (len(fa_techs) == 0 and len(spr_techs) > 0),
+                    "fa_techs": fa_techs,
+                    "spr_techs": spr_techs,
+                    "is_released": released,
+                    # event_time filled in later from clockevents
+                }
+
+                num_appts += 1
+
+            # If multiple appts and one has only spr techs on it → that appt is sprinkler
+            if num_appts > 1:
+                for appt_id in appointments_data.keys():
+                    if appointments_data[appt_id]["only_spr_techs_on_appt"]:
+                        appointments_data[appt_id]["is_spr_appt"] = True
+
+            if earliest_appt_ts is not None:
+                scheduled_on = earliest_appt_ts
+
+            # Accumulate time + stamp event_time
+            had_clockevents = False
+            if num_appts > 0:
+                for ce in stream_clockevents_for_job(job_id):
+                    if not ce:
+                        continue
+                    start = ce.get("start") or {}
+                    if start.get("activity") != "onsite":
+                        continue
+
+                    appt_info = start.get("appointment") or {}
+                    appt_id = appt_info.get("id")
+                    if appt_id not in appointments_data:
+                        # Defensive: clockevent references appt we didn't collect (rare but possible)
+                        log.debug("Job %s clockevent refers to unknown appt id %s", job_id, appt_id)
+                        continue
+
+
+                    appointments_data[appt_id]["elapsed_time"] += ce.get("elapsedTime", 0) or 0
+                    appointments_data[appt_id]["event_time"] = start.get("eventTime")
+                    had_clockevents = True
+
+            if not had_clockevents:
+                log.debug("Job %s has no onsite clock events.", job_id)
+                # Ensure each appt has a fallback event_time so sorting and day logic works
+                for appt in appointments_data.values():
+                    if appt.get("event_time") is None:
+                        appt["event_time"] = appt.get("scheduled_on")  # fallback to scheduled timestamp (unix)
+
+
+            # ---------- compute required FA/SPR tech counts ----------
+            fa_techs_by_day = defaultdict(set)
+            spr_techs_by_day = defaultdict(set)
+
+            for appt_id, appt in appointments_data.items():
+                # prefer event_time; fallback to scheduled_on if missing
+                ts = appt.get("event_time")
+                if ts is not None:
+                    day = datetime.fromtimestamp(ts).date()
+                else:
+                    day = datetime.fromtimestamp(appt["scheduled_on"]).date()
+
+                # Aggregate unique tech names per day
+                if appt.get("fa_techs"):
+                    fa_techs_by_day[day].update(appt["fa_techs"])
+                if appt.get("spr_techs"):
+                    spr_techs_by_day[day].update(appt["spr_techs"])
+
+            fa_techs_required = max((len(s) for s in fa_techs_by_day.values()), default=0)
+
+
+            # SPR: take max unique sprinkler techs seen on any single day (no cap; add min(2, ...) if you want symmetry)
+            spr_techs_required = max((len(s) for s in spr_techs_by_day.values()), default=0)
+
+            num_fa_minutes = 0.0
+            num_spr_minutes = 0.0
+
+            num_consecutive_fa_days = 0   # longest FA streak in days
+            num_consecutive_spr_days = 0  # longest SPR streak in days
+            cur_fa_streak = 0
+            cur_spr_streak = 0
+            prev_fa_day = None
+            prev_spr_day = None
+
+            # iterate in chronological order
+            for appt_id in sorted(appointments_data, key=lambda k: _safe_ts(appointments_data[k])):
+                appt = appointments_data[appt_id]
+                ts = _safe_ts(appt)
+                confirmed = confirmed or appt.get("released", False)
+                if not ts:
+                    # nothing to work with; skip safely
+                    log.debug("Job %s appt %s has no usable timestamp.", job_id, appt_id)
+                    continue
+                day = datetime.fromtimestamp(ts).date()
+
+                if appt["is_spr_appt"]:
+                    num_spr_minutes += appt["elapsed_time"]
+
+                    if prev_spr_day is None:
+                        cur_spr_streak = 1
+                    else:
+                        if day == prev_spr_day:                      # same calendar day → don't change streak
+                            pass
+                        elif day == prev_spr_day + timedelta(days=1):# consecutive next day
+                            cur_spr_streak += 1
+                        else:                                        # gap → reset
+                            cur_spr_streak = 1
+
+                    prev_spr_day = day
+                    num_consecutive_spr_days = max(num_consecutive_spr_days, cur_spr_streak)
+
+                else:
+                    num_fa_minutes += appt["elapsed_time"]
+
+                    if prev_fa_day is None:
+                        cur_fa_streak = 1
+                    else:
+                        if day == prev_fa_day:
+                            pass
+                        elif day == prev_fa_day + timedelta(days=1):
+                            cur_fa_streak += 1
+                        else:
+                            cur_fa_streak = 1
+
+                    prev_fa_day = day
+                    num_consecutive_fa_days = max(num_consecutive_fa_days, cur_fa_streak)
+
+
+
+
+            insert_vals = {
+                "location_name": location_name,
+                "job_id": job_id,
+                "location_id": loc_id,
+                "job_type": job_type,
+                "job_created_at": created_at,
+                "scheduled_for": scheduled_on,
+                "completed_at": completed_on,
+                "observed_month": scheduled_on, # convert to first of month
+                "is_recurring": is_recurring,
+                "spr_hours_actual": num_spr_minutes/3600,
+                "fa_hours_actual": num_fa_minutes/3600,
+                "number_of_fa_days": num_consecutive_fa_days,
+                "number_of_spr_days": num_consecutive_spr_days,
+                "number_of_fa_techs": fa_techs_required,
+                "number_of_spr_techs": spr_techs_required,
+                "travel_minutes_per_appt": travel_time,
+                "travel_minutes_total": travel_time * num_unique_tech_appt,
+                "status": status,
+                "is_confirmed": confirmed,
+                "meta": "timing from past job",
+                "location_on_hold": is_location_on_hold
+            }
+            result.rows.append(insert_vals)
+            result.jobs += 1
+
+    except requests.HTTPError as http_err:
+        result.errors += 1
+        log.error("HTTP error on location %s: %s", loc_id, http_err)
+
+    except Exception as e:
+        result.errors += 1
+        log.exception("Error processing location %s: %s", loc_id, e)
+
+    # Logic branch for checking if there are no past annual inspections jobs for the location
+    # Step 1 - Check if the last annual inspection was cancelled - we will want to flag this location
+    if not inspection_job_found:
+        try:
+            for jobs in stream_canceled_inspection_jobs_for_location(loc_id):
+                if jobs is not None:
+                    print(f"found a cancelled annual!: loc id [{loc_id}]")
+                    is_location_on_hold = True
+
+        except requests.HTTPError as http_err:
+            result.errors += 1
+            log.error("HTTP error on location %s: %s", loc_id, http_err)
+
+        except Exception as e:
+            result.errors += 1
+            log.exception("Error processing location %s: %s", loc_id, e)
+
+    # Step 2 - Expand search to 2 years just for inspection jobs
+    if not inspection_job_found:
+        try:
+            for jobs in stream_old_inspection_jobs_for_location(loc_id):
+                appointments_data = {}
+                job_type = jobs.get("type")
+                scheduled_on = jobs.get("scheduledDate")
+                job_id = jobs.get("id")
+                created_at = jobs.get("created")
+                completed_on = jobs.get("completedOn")
+                if completed_on:
+                    confirmed = True
+                travel_time = _travel_time_for_location(loc_id)
+                num_unique_tech_appt = 0
+                status = jobs.get("status")
+
+
+                if job_type == "inspection":
+                    inspection_job_found = True
+
+
+                is_recurring = False
+                if job_type in ["inspection", "planned_maintenance", "preventive_maintenance"]:
+                    is_recurring = True
+
+                num_appts = 0
+                appointments_iter = iter(stream_appointments_for_job(job_id))
+                first_appt = next(appointments_iter, None)
+                if first_appt is None:
+                    log.info("Job %s has no appointments; writing stub occurrence.", job_id)
+
+                    insert_vals = {
+                        "location_name": location_name,
+                        "job_id": job_id,
+                        "location_id": loc_id,
+                        "job_type": job_type,
+                        "job_created_at": created_at,
+                        "scheduled_for": scheduled_on,          # use job scheduledDate
+                        "completed_at": completed_on,
+                        "observed_month": scheduled_on,         # or completed_on if you prefer
+                        "is_recurring": is_recurring,
+                        "spr_hours_actual": 0,
+                        "fa_hours_actual": 0,
+                        "number_of_fa_days": 0,
+                        "number_of_spr_days": 0,
+                        "number_of_fa_techs": 0,
+                        "number_of_spr_techs": 0,
+                        "travel_minutes_per_appt": travel_time,
+                        "travel_minutes_total": 0,
+                        "status": status,
+                        "is_confirmed": confirmed,
+                        "meta": "no appointments",
+                        "location_on_hold": is_location_on_hold,
+                    }
+                    result.rows.append(insert_vals)
+                    result.jobs += 1
+                    result.skipped += 1
+                    continue
+                else:
+                    appts_source = [first_appt]
+                    appts_source.extend(appointments_iter)
+
+                earliest_appt_ts = None
+                for appts in appts_source:
+                    is_spr_appt = False
+                    services_on_appt = appts.get("serviceRequests", []) or []
+                    techs_on_appt = appts.get("techs", []) or []
+                    if not techs_on_appt:
+                        # No techs yet → keep FA/SPR sets empty; still record appointment so day aggregation works
+                        log.debug("Job %s appt %s has no techs assigned yet.", job_id, appts.get("id"))
+
+                    # classify appointment type and collect techs by role
+                    for service in services_on_appt:
+                        if service.get("serviceLine", {}).get("id") == 6:  # Backflows - (sprinkler)
+                            is_spr_appt = True
+
+                    fa_techs = set()
+                    spr_techs = set()
+                    for tech in techs_on_appt:
+                        name = (tech.get("name") or "").strip()
+                        num_unique_tech_appt += 1
+                        if not name:
+                            continue
+                        if name in SPRINKLER_TECHS_NAMES:
+                            spr_techs.add(name)
+                        else:
+                            fa_techs.add(name)
+
+                    appt_scheduled_on = appts.get("windowStart")
+                    if appt_scheduled_on is not None:
+                        earliest_appt_ts = appt_scheduled_on if earliest_appt_ts is None else min(earliest_appt_ts, appt_scheduled_on)
+
+                    appointments_data[appts.get("id")] = {
+                        "scheduled_on": scheduled_on,
+                        "is_spr_appt": is_spr_appt,
+                        "elapsed_time": 0,
+                        "only_spr_techs_on_appt": (len(fa_techs) == 0 and len(spr_techs) > 0),
+                        "fa_techs": fa_techs,
+                        "spr_techs": spr_techs,
+                        "is_released": appts.get("released", False),
+                        # event_time filled in later from clockevents
+                    }
+
+                    num_appts += 1
+
+                # If multiple appts and one has only spr techs on it → that appt is sprinkler
+                if num_appts > 1:
+                    for appt_id in appointments_data.keys():
+                        if appointments_data[appt_id]["only_spr_techs_on_appt"]:
+                            appointments_data[appt_id]["is_spr_appt"] = True
+
+                if earliest_appt_ts is not None:
+                    scheduled_on = earliest_appt_ts
+
+                # Accumulate time + stamp event_time
+                had_clockevents = False
+                if num_appts > 0:
+                    for ce in stream_clockevents_for_job(job_id):
+                        if not ce:
+                            continue
+                        start = ce.get("start") or {}
+                        if start.get("activity") != "onsite":
+                            continue
+
+                        appt_info = start.get("appointment") or {}
+                        appt_id = appt_info.get("id")
+                        if appt_id not in appointments_data:
+                            # Defensive: clockevent references appt we didn't collect (rare but possible)
+                            log.debug("Job %s clockevent refers to unknown appt id %s", job_id, appt_id)
+                            continue
+
+
+                        appointments_data[appt_id]["elapsed_time"] += ce.get("elapsedTime", 0) or 0
+                        appointments_data[appt_id]["event_time"] = start.get("eventTime")
+                        had_clockevents = True
+
+                if not had_clockevents:
+                    log.debug("Job %s has no onsite clock events.", job_id)
+                    # Ensure each appt has a fallback event_time so sorting and day logic works
+                    for appt in appointments_data.values():
+                        if appt.get("event_time") is None:
+                            appt["event_time"] = appt.get("scheduled_on")  # fallback to scheduled timestamp (unix)
+
+
+                # ---------- NEW: compute required FA/SPR tech counts ----------
+                fa_techs_by_day = defaultdict(set)
+                spr_techs_by_day = defaultdict(set)
+
+                for appt_id, appt in appointments_data.items():
+                    # prefer event_time; fallback to scheduled_on if missing
+                    ts = appt.get("event_time")
+                    if ts is not None:
+                        day = datetime.fromtimestamp(ts).date()
+                    else:
+                        day = datetime.fromtimestamp(appt["scheduled_on"]).date()
+
+                    # Aggregate unique tech names per day
+                    if appt.get("fa_techs"):
+                        fa_techs_by_day[day].update(appt["fa_techs"])
+                    if appt.get("spr_techs"):
+                        spr_techs_by_day[day].update(appt["spr_techs"])
+
+                fa_techs_required = max((len(s) for s in fa_techs_by_day.values()), default=0)
+
+
+                # SPR: take max unique sprinkler techs seen on any single day (no cap; add min(2, ...) if you want symmetry)
+                spr_techs_required = max((len(s) for s in spr_techs_by_day.values()), default=0)
+
+                num_fa_minutes = 0.0
+                num_spr_minutes = 0.0
+
+                num_consecutive_fa_days = 0   # longest FA streak in days
+                num_consecutive_spr_days = 0  # longest SPR streak in days
+                cur_fa_streak = 0
+                cur_spr_streak = 0
+                prev_fa_day = None
+                prev_spr_day = None
+
+                # iterate in chronological order
+                for appt_id in sorted(appointments_data, key=lambda k: _safe_ts(appointments_data[k])):
+                    appt = appointments_data[appt_id]
+                    ts = _safe_ts(appt)
+                    confirmed = confirmed or appt.get("released", False)
+                    if not ts:
+                        # nothing to work with; skip safely
+                        log.debug("Job %s appt %s has no usable timestamp.", job_id, appt_id)
+                        continue
+                    day = datetime.fromtimestamp(ts).date()
+
+                    if appt["is_spr_appt"]:
+                        num_spr_minutes += appt["elapsed_time"]
+
+                        if prev_spr_day is None:
+                            cur_spr_streak = 1
+                        else:
+                            if day == prev_spr_day:                      # same calendar day → don't change streak
+                                pass
+                            elif day == prev_spr_day + timedelta(days=1):# consecutive next day
+                                cur_spr_streak += 1
+                            else:                                        # gap → reset
+                                cur_spr_streak = 1
+
+                        prev_spr_day = day
+                        num_consecutive_spr_days = max(num_consecutive_spr_days, cur_spr_streak)
+
+                    else:
+                        num_fa_minutes += appt["elapsed_time"]
+
+                        if prev_fa_day is None:
+                            cur_fa_streak = 1
+                        else:
+                            if day == prev_fa_day:
+                                pass
+                            elif day == prev_fa_day + timedelta(days=1):
+                                cur_fa_streak += 1
+                            else:
+                                cur_fa_streak = 1
+
+                        prev_fa_day = day
+                        num_consecutive_fa_days = max(num_consecutive_fa_days, cur_fa_streak)
+
+
+
+                insert_vals = {
+                    "location_name": location_name,
+                    "job_id": job_id,
+                    "location_id": loc_id,
+                    "job_type": job_type,
+                    "job_created_at": created_at,
+                    "scheduled_for": scheduled_on,
+                    "completed_at": completed_on,
+                    "observed_month": scheduled_on, # convert to first of month
+                    "is_recurring": is_recurring,
+                    "spr_hours_actual": num_spr_minutes/3600,
+                    "fa_hours_actual": num_fa_minutes/3600,
+                    "number_of_fa_days": num_consecutive_fa_days,
+                    "number_of_spr_days": num_consecutive_spr_days,
+                    "number_of_fa_techs": fa_techs_required,
+                    "number_of_spr_techs": spr_techs_required,
+                    "travel_minutes_per_appt": travel_time,
+                    "travel_minutes_total": travel_time * num_unique_tech_appt,
+                    "status": status,
+                    "is_confirmed": confirmed,
+                    "meta": "timing from past job",
+                    "location_on_hold": is_location_on_hold
+                }
+                result.rows.append(insert_vals)
+                result.jobs += 1
+
+        except requests.HTTPError as http_err:
+            result.errors += 1
+            log.error("HTTP error on location %s: %s", loc_id, http_err)
+
+        except Exception as e:
+            result.errors += 1
+            log.exception("Error processing location %s: %s", loc_id, e)
+
+    # Step 3 - look for scheduled jobs in the future
+    # and then finally service recurrences for a month
+    service_found = False
+    scheduled_job_found = False
+    month = None
+    meta = ""
+
+    # parse tags
+    prev_insp = next(
+        (
+            iv for iv in result.rows
+            if iv.get("location_id") == loc_id
+            and iv.get("job_type") == "inspection"
+        ),
+        None,  # default if not found
+    )
+
+    if prev_insp:
+        meta = "timing from previous job"
+        num_spr_days = prev_insp["number_of_spr_days"]
+        num_days = prev_insp["number_of_fa_days"]
+        num_fa_hours = prev_insp["fa_hours_actual"]
+        num_spr_techs = prev_insp["number_of_spr_techs"]
+        num_spr_hours = prev_insp["spr_hours_actual"]
+        num_fa_techs = prev_insp["number_of_fa_techs"]
+        if num_spr_hours > 0:
+            num_spr_days = prev_insp["number_of_spr_days"]
+        travel_time = prev_insp["travel_minutes_total"]
+    else:
+        meta = "timing from tags. Month from scheduled job"
+        num_spr_days = 0
+        num_days, num_fa_hours = parse_fa_timing_tag(loc_id)
+        num_spr_techs, num_spr_hours = parse_spr_tag(loc_id)
+        num_fa_techs = parse_fa_techs_tag(loc_id)
+        if num_spr_hours > 0:
+            num_spr_days = 1
+        travel_time = _travel_time_for_location(location_id=loc_id)
+
+    # Scheduled job in future?
+    params = {"locationId": str(loc_id), "page": 1, "limit": 500, 
+            "scheduleDateFrom": datetime.now(timezone.utc).timestamp(), "scheduleDateTo": (datetime.now(timezone.utc) + timedelta(days=365)).timestamp(),
+            "status": "scheduled",
+            "type": "inspection"
+    }
+
+    resp = call_service_trade_api("job", params=params)
+    data = resp.get("data")
+    jobs = data.get("jobs")
+    upcoming = [int(job["scheduledDate"]) for job in jobs or [] if job.get("scheduledDate")]
+    result.revisit_after = min(upcoming) if upcoming else None
+    job_id = None
+    scheduled_for = None
+    job_created_at = None
+    confirmed = False
+    if jobs is not None:
+        scheduled_job_found = True
+
+        for job in jobs:
+            job_id = job.get("id")
+            scheduled_for = job.get("scheduledDate")
+            job_created_at = job.get("created")
+            month = scheduled_for
+
+            appointments_iter = iter(stream_appointments_for_job(job_id))
+            first_appt = next(appointments_iter, None)
+            if first_appt is None:
+                log.info("Job %s has no appointments; writing stub occurrence.", job_id)
+
+                insert_vals = {
+                    "location_name": location_name,
+                    "job_id": job_id,
+                    "location_id": loc_id,
+                    "job_type": job_type,
+                    "job_created_at": created_at,
+                    "scheduled_for": scheduled_on,          # use job scheduledDate
+                    "completed_at": completed_on,
+                    "observed_month": scheduled_on,         # or completed_on if you prefer
+                    "is_recurring": is_recurring,
+                    "spr_hours_actual": 0,
+                    "fa_hours_actual": 0,
+                    "number_of_fa_days": 0,
+                    "number_of_spr_days": 0,
+                    "number_of_fa_techs": 0,
+                    "number_of_spr_techs": 0,
+                    "travel_minutes_per_appt": travel_time,
+                    "travel_minutes_total": 0,
+                    "status": status,
+                    "is_confirmed": confirmed,
+                    "meta": "no appointments",
+                    "location_on_hold": is_location_on_hold,
+                }
+                result.rows.append(insert_vals)
+                result.jobs += 1
+                result.skipped += 1
+                continue
+            else:
+                appts_source = [first_appt]
+                appts_source.extend(appointments_iter)
+
+                for appt in appts_source:
+                    confirmed = confirmed or appt.get("released", False)
+
+            earliest_appt_ts = None
+
+
+
+    if not scheduled_job_found:
+        # Recurrences
+        unique_rec = {}
+        for rec in stream_recurrences_for_location(loc_id):
+            if rec.get("endsOn") is None:
+                unique_rec[rec["id"]] = rec
+
+        for rec in unique_rec.values():
+            if not is_relevant_annual_recurrence(rec):
+                continue
+
+            fs = rec.get("firstStart")
+
+            if fs is not None:
+                month = fs
+            service_found = True
+            meta = "timing from tags. Month from serviceRecurrence"
+
+    return result
+
+
+# ``updatedAfter`` probes beyond the location itself: (endpoint, location filter, items key).
+# Clock events are only listed per job; ``--max-checkpoint-age-days`` bounds their staleness.
+_CHANGE_PROBES = (
+    ("job", "locationId", "jobs"),
+    ("appointment", "locationIds", "appointments"),
+    ("servicerecurrence", "locationIds", "serviceRecurrences"),
+)
+
+
+def _location_changed_since(loc_id: int, watermark: int) -> bool:
+    """
+    True when the location, or any of its jobs, appointments or recurrences, has a
+    ServiceTrade ``updated`` after ``watermark``. A failed probe counts as changed.
+    """
+    payload = location_metadata.payload(loc_id)
+    if int((payload.get("data") or {}).get("updated") or 0) > watermark:
+        return True
+    for endpoint, location_param, items_key in _CHANGE_PROBES:
+        try:
+            data = call_service_trade_api(
+                endpoint,
+                params={location_param: str(loc_id), "updatedAfter": watermark, "limit": 1},
+            )
+        except Exception:
+            log.warning("Change probe %s failed for location %s; revisiting it.", endpoint, loc_id)
+            return True
+        if (data.get("data") or {}).get(items_key):
+            return True
+    return False
+
+
+def sync_location(loc_id: int, watermark: int | None, *, sleep: float = 0.0) -> LocationResult:
+    """
+    Process one location on a worker thread, or skip it when unchanged since its checkpoint.
+
+    The new watermark is taken before any fetch, so edits made while the location is being
+    processed are picked up by the next run.
+    """
+    started = int(time.time())
+    try:
+        if watermark is not None and not _location_changed_since(loc_id, watermark):
+            return LocationResult(location_id=loc_id, unchanged=True, watermark=watermark)
+        result = process_location(loc_id)
+    except Exception:
+        log.exception("Error processing location %s", loc_id)
+        return LocationResult(location_id=loc_id, errors=1)
+    finally:
+        if sleep:
+            time.sleep(sleep)
+    result.watermark = started
+    return result
+
+
+def _iter_location_results(executor, loc_ids, watermarks, *, sleep: float, window: int):
+    """Yield ``LocationResult`` in completion order with at most ``window`` locations in flight."""
+    in_flight = set()
+    for loc_id in loc_ids:
+        if len(in_flight) >= window:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+        watermark = watermarks.get(int(loc_id)) if watermarks is not None else None
+        in_flight.add(executor.submit(sync_location, loc_id, watermark, sleep=sleep))
+    for future in as_completed(in_flight):
+        yield future.result()
+
+
+# -------------------- Checkpoints --------------------
+
+def load_checkpoints(max_age_days: float | None = None) -> dict[int, int] | None:
+    """
+    ``{location_id: watermark}`` of checkpoints still trusted to skip unchanged locations;
+    ``None`` when the table is not migrated.
+
+    Checkpoints older than ``max_age_days``, or whose next scheduled inspection has since
+    come due, are left out so those locations are processed again.
+    """
+    if not inspect(db.engine).has_table(ServiceEventSyncCheckpoint.__tablename__):
+        log.warning("service_event_sync_checkpoint table missing; running without checkpoints.")
+        return None
+    now = int(time.time())
+    oldest = now - int(max_age_days * 86400) if max_age_days else None
+    rows = db.session.query(
+        ServiceEventSyncCheckpoint.location_id,
+        ServiceEventSyncCheckpoint.watermark,
+        ServiceEventSyncCheckpoint.revisit_after,
+    ).all()
+    return {
+        int(location_id): int(watermark)
+        for location_id, watermark, revisit_after in rows
+        if (oldest is None or watermark >= oldest) and (revisit_after is None or revisit_after > now)
+    }
+
+
+def save_checkpoints(entries: list[tuple[int, int, int, int | None]]) -> None:
+    """Upsert ``(location_id, watermark, rows_written, revisit_after)`` after their rows have been committed."""
+    if not entries:
+        return
+    now = datetime.now(timezone.utc)
+    values = [
+        {
+            "location_id": loc_id,
+            "watermark": watermark,
+            "rows_written": rows_written,
+            "revisit_after": revisit_after,
+            "completed_at": now,
+        }
+        for loc_id, watermark, rows_written, revisit_after in entries
+    ]
+    insert = sqlite_insert if db.engine.dialect.name == "sqlite" else pg_insert
+    stmt = insert(ServiceEventSyncCheckpoint.__table__).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["location_id"],
+        set_={
+            "watermark": stmt.excluded.watermark,
+            "rows_written": stmt.excluded.rows_written,
+            "revisit_after": stmt.excluded.revisit_after,
+            "completed_at": stmt.excluded.completed_at,
+        },
+    )
+    db.session.execute(stmt)
+    db.session.commit()
+
+
 def main():
     parser = argparse.ArgumentParser(description="Update service events for all locations or a specific location from ServiceTrade.")
     parser.add_argument("--location-id", type=int, help="Single ServiceTrade locationId to backfill")
-    parser.add_argument("--force", action="store_true", help="Force fetch even if a row already exists for the location")
+    parser.add_argument("--force", action="store_true", help="Ignore checkpoints and re-fetch every location")
+    parser.add_argument("--max-checkpoint-age-days", type=float, default=7.0,
+                        help="Re-fetch locations whose checkpoint is older than this, changed or not (0: no limit)")
+    parser.add_argument("--workers", type=int, default=1, help="Locations processed concurrently (shared ServiceTrade rate limit)")
     parser.add_argument("--include-inactive", action="store_true", help="Include inactive locations")
     parser.add_argument("--max-locations", type=int, help="Process at most N locations")
     parser.add_argument("--commit-every", type=int, default=200, help="Commit after this many locations")
     parser.add_argument("--no-progress", action="store_true", help="Disable progress bar (useful for CI)")
-    parser.add_argument("--sleep", type=float, default=0.0, help="Seconds to sleep between locations (rate limit)")
+    parser.add_argument("--sleep", type=float, default=0.0, help="Seconds each worker sleeps between locations (rate limit)")
     parser.add_argument("--test", action="store_true", help="Test mode: fetch but do not write to DB")
     args = parser.parse_args()
 
@@ -680,711 +1521,61 @@ def main():
         log.info("Locations to process: %s", total)
 
 
+        checkpoints = load_checkpoints(max_age_days=args.max_checkpoint_age_days)
+        # --force / --location-id re-fetch regardless of watermarks but still record new ones.
+        watermarks = None if (checkpoints is None or args.force or args.location_id) else checkpoints
+        workers = max(1, args.workers)
+        log.info("Workers: %s | checkpointed locations: %s", workers, "n/a" if checkpoints is None else len(checkpoints))
+
         loc_processed = 0
         job_processed = 0
         skipped = 0
+        unchanged = 0
         errors = 0
         insert_vals_list = []
-        # Main progress bar
-        with tqdm(loc_ids, total=total, disable=args.no_progress, desc="Backfilling locations", mininterval=0.5) as pbar:
-            for loc_id in pbar:
-                resp = call_service_trade_api(f"location/{loc_id}")
-                location_name = resp.get("data").get("address").get("street")
-                inspection_job_found = False
-                is_location_on_hold = False
-
-                tags = resp.get("data").get("tags")
-                for tag in tags:
-                    if tag.get("name") == "On_Hold":
-                        is_location_on_hold = True
-
-                try:
-                    for jobs in stream_jobs_for_location(loc_id):
-                        appointments_data = {}
-                        job_type = jobs.get("type")
-                        scheduled_on = jobs.get("scheduledDate")
-                        job_id = jobs.get("id")
-                        created_at = jobs.get("created")
-                        completed_on = jobs.get("completedOn")
-                        if completed_on is not None:
-                            confirmed = True
-                        travel_time = _travel_time_for_location(loc_id)
-                        num_unique_tech_appt = 0
-                        status = jobs.get("status")
-                        location_name = jobs.get("location").get("address").get("street")
-
-                        if job_type == "inspection":
-                            inspection_job_found = True
-
-                        is_recurring = False
-                        if job_type in ["inspection", "planned_maintenance", "preventive_maintenance"]:
-                            is_recurring = True
-
-                        num_appts = 0
-                        appointments_iter = iter(stream_appointments_for_job(job_id)) # Only streams jobs scheduled from 1 year ago to today.
-                        first_appt = next(appointments_iter, None)
-                        if first_appt is None:
-                            log.info("Job %s has no appointments; writing stub occurrence.", job_id)
-                            # this almost never happens. Jobs usually have appointments
-                            insert_vals = {
-                                "location_name": location_name,
-                                "job_id": job_id,
-                                "location_id": loc_id,
-                                "job_type": job_type,
-                                "job_created_at": created_at,
-                                "scheduled_for": scheduled_on,          # use job scheduledDate
-                                "completed_at": completed_on,
-                                "observed_month": scheduled_on,         # or completed_on if you prefer
-                                "is_recurring": is_recurring,
-                                "spr_hours_actual": 0,
-                                "fa_hours_actual": 0,
-                                "number_of_fa_days": 0,
-                                "number_of_spr_days": 0,
-                                "number_of_fa_techs": 0,
-                                "number_of_spr_techs": 0,
-                                "travel_minutes_per_appt": travel_time,
-                                "travel_minutes_total": 0,
-                                "status": status,
-                                "is_confirmed": confirmed,
-                                "meta": "no appointments",
-                                "location_on_hold": is_location_on_hold,
-                            }
-                            insert_vals_list.append(insert_vals)
-                            job_processed += 1
-                            skipped += 1
-                            continue
-                        else:
-                            appts_source = [first_appt]
-                            appts_source.extend(appointments_iter)
-
-                        earliest_appt_ts = None
-                        for appts in appts_source:
-                            # capture appointments 
-                            is_spr_appt = False
-                            services_on_appt = appts.get("serviceRequests", []) or []
-                            techs_on_appt = appts.get("techs", []) or []
-                            
-                            released = appts.get("released", False)
-                            if not techs_on_appt:
-                                # No techs yet → keep FA/SPR sets empty; still record appointment so day aggregation works
-                                log.debug("Job %s appt %s has no techs assigned yet.", job_id, appts.get("id"))
-
-                            # classify appointment type and collect techs by role
-                            for service in services_on_appt:
-                                if service.get("serviceLine", {}).get("id") == 6:  # Backflows - (sprinkler)
-                                    is_spr_appt = True
-
-                            fa_techs = set()
-                            spr_techs = set()
-                            for tech in techs_on_appt:
-                                name = (tech.get("name") or "").strip()
-                                num_unique_tech_appt += 1
-                                if not name:
-                                    continue
-                                if name in SPRINKLER_TECHS_NAMES:
-                                    spr_techs.add(name)
-                                else:
-                                    fa_techs.add(name)
-                            
-                            appt_scheduled_on = appts.get("windowStart")
-                            if appt_scheduled_on is not None:
-                                earliest_appt_ts = appt_scheduled_on if earliest_appt_ts is None else min(earliest_appt_ts, appt_scheduled_on)
-
-                            appointments_data[appts.get("id")] = {
-                                "scheduled_on": scheduled_on,
-                                "is_spr_appt": is_spr_appt,
-                                "elapsed_time": 0,
-                                "only_spr_techs_on_appt": (len(fa_techs) == 0 and len(spr_techs) > 0),
-                                "fa_techs": fa_techs,
-                                "spr_techs": spr_techs,
-                                "is_released": released,
-                                # event_time filled in later from clockevents
-                            }
-
-                            num_appts += 1
-
-                        # If multiple appts and one has only spr techs on it → that appt is sprinkler
-                        if num_appts > 1:
-                            for appt_id in appointments_data.keys():
-                                if appointments_data[appt_id]["only_spr_techs_on_appt"]:
-                                    appointments_data[appt_id]["is_spr_appt"] = True
-                        
-                        if earliest_appt_ts is not None:
-                            scheduled_on = earliest_appt_ts
-
-                        # Accumulate time + stamp event_time
-                        had_clockevents = False
-                        if num_appts > 0:
-                            for ce in stream_clockevents_for_job(job_id):
-                                if not ce:
-                                    continue
-                                start = ce.get("start") or {}
-                                if start.get("activity") != "onsite":
-                                    continue
-
-                                appt_info = start.get("appointment") or {}
-                                appt_id = appt_info.get("id")
-                                if appt_id not in appointments_data:
-                                    # Defensive: clockevent references appt we didn't collect (rare but possible)
-                                    log.debug("Job %s clockevent refers to unknown appt id %s", job_id, appt_id)
-                                    continue
-
-                                
-                                appointments_data[appt_id]["elapsed_time"] += ce.get("elapsedTime", 0) or 0
-                                appointments_data[appt_id]["event_time"] = start.get("eventTime")
-                                had_clockevents = True
-                        
-                        if not had_clockevents:
-                            log.debug("Job %s has no onsite clock events.", job_id)
-                            # Ensure each appt has a fallback event_time so sorting and day logic works
-                            for appt in appointments_data.values():
-                                if appt.get("event_time") is None:
-                                    appt["event_time"] = appt.get("scheduled_on")  # fallback to scheduled timestamp (unix)
-
-
-                        # ---------- compute required FA/SPR tech counts ----------
-                        fa_techs_by_day = defaultdict(set)
-                        spr_techs_by_day = defaultdict(set)
-
-                        for appt_id, appt in appointments_data.items():
-                            # prefer event_time; fallback to scheduled_on if missing
-                            ts = appt.get("event_time")
-                            if ts is not None:
-                                day = datetime.fromtimestamp(ts).date()
-                            else:
-                                day = datetime.fromtimestamp(appt["scheduled_on"]).date()
-
-                            # Aggregate unique tech names per day
-                            if appt.get("fa_techs"):
-                                fa_techs_by_day[day].update(appt["fa_techs"])
-                            if appt.get("spr_techs"):
-                                spr_techs_by_day[day].update(appt["spr_techs"])
-                        
-                        fa_techs_required = max((len(s) for s in fa_techs_by_day.values()), default=0)
-                        
-
-                        # SPR: take max unique sprinkler techs seen on any single day (no cap; add min(2, ...) if you want symmetry)
-                        spr_techs_required = max((len(s) for s in spr_techs_by_day.values()), default=0)
-                        
-                        num_fa_minutes = 0.0
-                        num_spr_minutes = 0.0
-
-                        num_consecutive_fa_days = 0   # longest FA streak in days
-                        num_consecutive_spr_days = 0  # longest SPR streak in days
-                        cur_fa_streak = 0
-                        cur_spr_streak = 0
-                        prev_fa_day = None
-                        prev_spr_day = None
-
-                        # iterate in chronological order
-                        for appt_id in sorted(appointments_data, key=lambda k: _safe_ts(appointments_data[k])):
-                            appt = appointments_data[appt_id]
-                            ts = _safe_ts(appt)
-                            confirmed = confirmed or appt.get("released", False)
-                            if not ts:
-                                # nothing to work with; skip safely
-                                log.debug("Job %s appt %s has no usable timestamp.", job_id, appt_id)
-                                continue
-                            day = datetime.fromtimestamp(ts).date()
-
-                            if appt["is_spr_appt"]:
-                                num_spr_minutes += appt["elapsed_time"]
-
-                                if prev_spr_day is None:
-                                    cur_spr_streak = 1
-                                else:
-                                    if day == prev_spr_day:                      # same calendar day → don't change streak
-                                        pass
-                                    elif day == prev_spr_day + timedelta(days=1):# consecutive next day
-                                        cur_spr_streak += 1
-                                    else:                                        # gap → reset
-                                        cur_spr_streak = 1
-
-                                prev_spr_day = day
-                                num_consecutive_spr_days = max(num_consecutive_spr_days, cur_spr_streak)
+        # Locations whose rows are in ``insert_vals_list``; checkpointed once those rows are written.
+        pending_checkpoints: list[tuple[int, int, int, int | None]] = []
 
-                            else:
-                                num_fa_minutes += appt["elapsed_time"]
-
-                                if prev_fa_day is None:
-                                    cur_fa_streak = 1
-                                else:
-                                    if day == prev_fa_day:
-                                        pass
-                                    elif day == prev_fa_day + timedelta(days=1):
-                                        cur_fa_streak += 1
-                                    else:
-                                        cur_fa_streak = 1
-
-                                prev_fa_day = day
-                                num_consecutive_fa_days = max(num_consecutive_fa_days, cur_fa_streak)
-                        
-
-                        
-                        
-                        insert_vals = {
-                            "location_name": location_name,
-                            "job_id": job_id,
-                            "location_id": loc_id,
-                            "job_type": job_type,
-                            "job_created_at": created_at,
-                            "scheduled_for": scheduled_on,
-                            "completed_at": completed_on,
-                            "observed_month": scheduled_on, # convert to first of month
-                            "is_recurring": is_recurring,
-                            "spr_hours_actual": num_spr_minutes/3600,
-                            "fa_hours_actual": num_fa_minutes/3600,
-                            "number_of_fa_days": num_consecutive_fa_days,
-                            "number_of_spr_days": num_consecutive_spr_days,
-                            "number_of_fa_techs": fa_techs_required,
-                            "number_of_spr_techs": spr_techs_required,
-                            "travel_minutes_per_appt": travel_time,
-                            "travel_minutes_total": travel_time * num_unique_tech_appt,
-                            "status": status,
-                            "is_confirmed": confirmed,
-                            "meta": "timing from past job",
-                            "location_on_hold": is_location_on_hold
-                        }
-                        insert_vals_list.append(insert_vals)
-                        job_processed += 1
-                        pbar.set_postfix(last_loc=loc_id, jobs=job_processed, skipped=skipped, errors=errors)
-
-                except requests.HTTPError as http_err:
-                    db.session.rollback()
-                    errors += 1
-                    log.error("HTTP error on location %s: %s", loc_id, http_err)
-                    pbar.set_postfix(last_loc=loc_id, jobs=job_processed, skipped=skipped, errors=errors)
-
-                except Exception as e:
-                    db.session.rollback()
-                    errors += 1
-                    log.exception("Error processing location %s: %s", loc_id, e)
-                    pbar.set_postfix(last_loc=loc_id, jobs=job_processed, skipped=skipped, errors=errors)
-                
-                # Logic branch for checking if there are no past annual inspections jobs for the location
-                # Step 1 - Check if the last annual inspection was cancelled - we will want to flag this location
-                if not inspection_job_found:
-                    try:
-                        for jobs in stream_canceled_inspection_jobs_for_location(loc_id):
-                            if jobs is not None:
-                                print(f"found a cancelled annual!: loc id [{loc_id}]")
-                                is_location_on_hold = True
-
-                    except requests.HTTPError as http_err:
-                        db.session.rollback()
-                        errors += 1
-                        log.error("HTTP error on location %s: %s", loc_id, http_err)
-                        pbar.set_postfix(last_loc=loc_id, jobs=job_processed, skipped=skipped, errors=errors)
-
-                    except Exception as e:
-                        db.session.rollback()
-                        errors += 1
-                        log.exception("Error processing location %s: %s", loc_id, e)
-                        pbar.set_postfix(last_loc=loc_id, jobs=job_processed, skipped=skipped, errors=errors)
-
-                # Step 2 - Expand search to 2 years just for inspection jobs
-                if not inspection_job_found:
-                    try:
-                        for jobs in stream_old_inspection_jobs_for_location(loc_id):
-                            appointments_data = {}
-                            job_type = jobs.get("type")
-                            scheduled_on = jobs.get("scheduledDate")
-                            job_id = jobs.get("id")
-                            created_at = jobs.get("created")
-                            completed_on = jobs.get("completedOn")
-                            if completed_on:
-                                confirmed = True
-                            travel_time = _travel_time_for_location(loc_id)
-                            num_unique_tech_appt = 0
-                            status = jobs.get("status")
-                            
-
-                            if job_type == "inspection":
-                                inspection_job_found = True
-
-
-                            is_recurring = False
-                            if job_type in ["inspection", "planned_maintenance", "preventive_maintenance"]:
-                                is_recurring = True
-
-                            num_appts = 0
-                            appointments_iter = iter(stream_appointments_for_job(job_id))
-                            first_appt = next(appointments_iter, None)
-                            if first_appt is None:
-                                log.info("Job %s has no appointments; writing stub occurrence.", job_id)
-
-                                insert_vals = {
-                                    "location_name": location_name,
-                                    "job_id": job_id,
-                                    "location_id": loc_id,
-                                    "job_type": job_type,
-                                    "job_created_at": created_at,
-                                    "scheduled_for": scheduled_on,          # use job scheduledDate
-                                    "completed_at": completed_on,
-                                    "observed_month": scheduled_on,         # or completed_on if you prefer
-                                    "is_recurring": is_recurring,
-                                    "spr_hours_actual": 0,
-                                    "fa_hours_actual": 0,
-                                    "number_of_fa_days": 0,
-                                    "number_of_spr_days": 0,
-                                    "number_of_fa_techs": 0,
-                                    "number_of_spr_techs": 0,
-                                    "travel_minutes_per_appt": travel_time,
-                                    "travel_minutes_total": 0,
-                                    "status": status,
-                                    "is_confirmed": confirmed,
-                                    "meta": "no appointments",
-                                    "location_on_hold": is_location_on_hold,
-                                }
-                                insert_vals_list.append(insert_vals)
-                                job_processed += 1
-                                skipped += 1
-                                continue
-                            else:
-                                appts_source = [first_appt]
-                                appts_source.extend(appointments_iter)
-
-                            earliest_appt_ts = None
-                            for appts in appts_source:
-                                is_spr_appt = False
-                                services_on_appt = appts.get("serviceRequests", []) or []
-                                techs_on_appt = appts.get("techs", []) or []
-                                if not techs_on_appt:
-                                    # No techs yet → keep FA/SPR sets empty; still record appointment so day aggregation works
-                                    log.debug("Job %s appt %s has no techs assigned yet.", job_id, appts.get("id"))
-
-                                # classify appointment type and collect techs by role
-                                for service in services_on_appt:
-                                    if service.get("serviceLine", {}).get("id") == 6:  # Backflows - (sprinkler)
-                                        is_spr_appt = True
-
-                                fa_techs = set()
-                                spr_techs = set()
-                                for tech in techs_on_appt:
-                                    name = (tech.get("name") or "").strip()
-                                    num_unique_tech_appt += 1
-                                    if not name:
-                                        continue
-                                    if name in SPRINKLER_TECHS_NAMES:
-                                        spr_techs.add(name)
-                                    else:
-                                        fa_techs.add(name)
-                                
-                                appt_scheduled_on = appts.get("windowStart")
-                                if appt_scheduled_on is not None:
-                                    earliest_appt_ts = appt_scheduled_on if earliest_appt_ts is None else min(earliest_appt_ts, appt_scheduled_on)
-
-                                appointments_data[appts.get("id")] = {
-                                    "scheduled_on": scheduled_on,
-                                    "is_spr_appt": is_spr_appt,
-                                    "elapsed_time": 0,
-                                    "only_spr_techs_on_appt": (len(fa_techs) == 0 and len(spr_techs) > 0),
-                                    "fa_techs": fa_techs,
-                                    "spr_techs": spr_techs,
-                                    "is_released": appts.get("released", False),
-                                    # event_time filled in later from clockevents
-                                }
-
-                                num_appts += 1
-
-                            # If multiple appts and one has only spr techs on it → that appt is sprinkler
-                            if num_appts > 1:
-                                for appt_id in appointments_data.keys():
-                                    if appointments_data[appt_id]["only_spr_techs_on_appt"]:
-                                        appointments_data[appt_id]["is_spr_appt"] = True
-                            
-                            if earliest_appt_ts is not None:
-                                scheduled_on = earliest_appt_ts
-
-                            # Accumulate time + stamp event_time
-                            had_clockevents = False
-                            if num_appts > 0:
-                                for ce in stream_clockevents_for_job(job_id):
-                                    if not ce:
-                                        continue
-                                    start = ce.get("start") or {}
-                                    if start.get("activity") != "onsite":
-                                        continue
-
-                                    appt_info = start.get("appointment") or {}
-                                    appt_id = appt_info.get("id")
-                                    if appt_id not in appointments_data:
-                                        # Defensive: clockevent references appt we didn't collect (rare but possible)
-                                        log.debug("Job %s clockevent refers to unknown appt id %s", job_id, appt_id)
-                                        continue
-
-                                    
-                                    appointments_data[appt_id]["elapsed_time"] += ce.get("elapsedTime", 0) or 0
-                                    appointments_data[appt_id]["event_time"] = start.get("eventTime")
-                                    had_clockevents = True
-                            
-                            if not had_clockevents:
-                                log.debug("Job %s has no onsite clock events.", job_id)
-                                # Ensure each appt has a fallback event_time so sorting and day logic works
-                                for appt in appointments_data.values():
-                                    if appt.get("event_time") is None:
-                                        appt["event_time"] = appt.get("scheduled_on")  # fallback to scheduled timestamp (unix)
-
-
-                            # ---------- NEW: compute required FA/SPR tech counts ----------
-                            fa_techs_by_day = defaultdict(set)
-                            spr_techs_by_day = defaultdict(set)
-
-                            for appt_id, appt in appointments_data.items():
-                                # prefer event_time; fallback to scheduled_on if missing
-                                ts = appt.get("event_time")
-                                if ts is not None:
-                                    day = datetime.fromtimestamp(ts).date()
-                                else:
-                                    day = datetime.fromtimestamp(appt["scheduled_on"]).date()
-
-                                # Aggregate unique tech names per day
-                                if appt.get("fa_techs"):
-                                    fa_techs_by_day[day].update(appt["fa_techs"])
-                                if appt.get("spr_techs"):
-                                    spr_techs_by_day[day].update(appt["spr_techs"])
-                            
-                            fa_techs_required = max((len(s) for s in fa_techs_by_day.values()), default=0)
-                            
-
-                            # SPR: take max unique sprinkler techs seen on any single day (no cap; add min(2, ...) if you want symmetry)
-                            spr_techs_required = max((len(s) for s in spr_techs_by_day.values()), default=0)
-                            
-                            num_fa_minutes = 0.0
-                            num_spr_minutes = 0.0
-
-                            num_consecutive_fa_days = 0   # longest FA streak in days
-                            num_consecutive_spr_days = 0  # longest SPR streak in days
-                            cur_fa_streak = 0
-                            cur_spr_streak = 0
-                            prev_fa_day = None
-                            prev_spr_day = None
-
-                            # iterate in chronological order
-                            for appt_id in sorted(appointments_data, key=lambda k: _safe_ts(appointments_data[k])):
-                                appt = appointments_data[appt_id]
-                                ts = _safe_ts(appt)
-                                confirmed = confirmed or appt.get("released", False)
-                                if not ts:
-                                    # nothing to work with; skip safely
-                                    log.debug("Job %s appt %s has no usable timestamp.", job_id, appt_id)
-                                    continue
-                                day = datetime.fromtimestamp(ts).date()
-
-                                if appt["is_spr_appt"]:
-                                    num_spr_minutes += appt["elapsed_time"]
-
-                                    if prev_spr_day is None:
-                                        cur_spr_streak = 1
-                                    else:
-                                        if day == prev_spr_day:                      # same calendar day → don't change streak
-                                            pass
-                                        elif day == prev_spr_day + timedelta(days=1):# consecutive next day
-                                            cur_spr_streak += 1
-                                        else:                                        # gap → reset
-                                            cur_spr_streak = 1
-
-                                    prev_spr_day = day
-                                    num_consecutive_spr_days = max(num_consecutive_spr_days, cur_spr_streak)
-
-                                else:
-                                    num_fa_minutes += appt["elapsed_time"]
-
-                                    if prev_fa_day is None:
-                                        cur_fa_streak = 1
-                                    else:
-                                        if day == prev_fa_day:
-                                            pass
-                                        elif day == prev_fa_day + timedelta(days=1):
-                                            cur_fa_streak += 1
-                                        else:
-                                            cur_fa_streak = 1
-
-                                    prev_fa_day = day
-                                    num_consecutive_fa_days = max(num_consecutive_fa_days, cur_fa_streak)
-                            
-
-                            
-                            insert_vals = {
-                                "location_name": location_name,
-                                "job_id": job_id,
-                                "location_id": loc_id,
-                                "job_type": job_type,
-                                "job_created_at": created_at,
-                                "scheduled_for": scheduled_on,
-                                "completed_at": completed_on,
-                                "observed_month": scheduled_on, # convert to first of month
-                                "is_recurring": is_recurring,
-                                "spr_hours_actual": num_spr_minutes/3600,
-                                "fa_hours_actual": num_fa_minutes/3600,
-                                "number_of_fa_days": num_consecutive_fa_days,
-                                "number_of_spr_days": num_consecutive_spr_days,
-                                "number_of_fa_techs": fa_techs_required,
-                                "number_of_spr_techs": spr_techs_required,
-                                "travel_minutes_per_appt": travel_time,
-                                "travel_minutes_total": travel_time * num_unique_tech_appt,
-                                "status": status,
-                                "is_confirmed": confirmed,
-                                "meta": "timing from past job",
-                                "location_on_hold": is_location_on_hold
-                            }
-                            insert_vals_list.append(insert_vals)
-                            job_processed += 1
-                            pbar.set_postfix(last_loc=loc_id, jobs=job_processed, skipped=skipped, errors=errors)
-
-                    except requests.HTTPError as http_err:
-                        db.session.rollback()
-                        errors += 1
-                        log.error("HTTP error on location %s: %s", loc_id, http_err)
-                        pbar.set_postfix(last_loc=loc_id, jobs=job_processed, skipped=skipped, errors=errors)
-
-                    except Exception as e:
-                        db.session.rollback()
-                        errors += 1
-                        log.exception("Error processing location %s: %s", loc_id, e)
-                        pbar.set_postfix(last_loc=loc_id, jobs=job_processed, skipped=skipped, errors=errors)
-
-                # Step 3 - look for scheduled jobs in the future
-                # and then finally service recurrences for a month
-                service_found = False
-                scheduled_job_found = False
-                month = None
-                meta = ""
-                
-                # parse tags
-                prev_insp = next(
-                    (
-                        iv for iv in insert_vals_list
-                        if iv.get("location_id") == loc_id
-                        and iv.get("job_type") == "inspection"
-                    ),
-                    None,  # default if not found
-                )
-
-                if prev_insp:
-                    meta = "timing from previous job"
-                    num_spr_days = prev_insp["number_of_spr_days"]
-                    num_days = prev_insp["number_of_fa_days"]
-                    num_fa_hours = prev_insp["fa_hours_actual"]
-                    num_spr_techs = prev_insp["number_of_spr_techs"]
-                    num_spr_hours = prev_insp["spr_hours_actual"]
-                    num_fa_techs = prev_insp["number_of_fa_techs"]
-                    if num_spr_hours > 0:
-                        num_spr_days = prev_insp["number_of_spr_days"]
-                    travel_time = prev_insp["travel_minutes_total"]
-                else:
-                    meta = "timing from tags. Month from scheduled job"
-                    num_spr_days = 0
-                    num_days, num_fa_hours = parse_fa_timing_tag(loc_id)
-                    num_spr_techs, num_spr_hours = parse_spr_tag(loc_id)
-                    num_fa_techs = parse_fa_techs_tag(loc_id)
-                    if num_spr_hours > 0:
-                        num_spr_days = 1
-                    travel_time = _travel_time_for_location(location_id=loc_id)
-
-                # Scheduled job in future?
-                params = {"locationId": str(loc_id), "page": 1, "limit": 500, 
-                        "scheduleDateFrom": datetime.now(timezone.utc).timestamp(), "scheduleDateTo": (datetime.now(timezone.utc) + timedelta(days=365)).timestamp(),
-                        "status": "scheduled",
-                        "type": "inspection"
-                }
+        def flush(last_loc_id) -> None:
+            nonlocal errors
+            try:
+                flushed = _flush_occurrence_rows(insert_vals_list, test_mode=args.test)
+                log.info("Upserted %s rows at location %s (buffer now %s).",
+                        flushed, last_loc_id, len(insert_vals_list))
+            except Exception:
+                errors += 1
+                pending_checkpoints.clear()
+                log.exception("Upsert flush failed after location %s; rolled back.", last_loc_id)
+                return
+            if checkpoints is not None and not args.test:
+                save_checkpoints(pending_checkpoints)
+            pending_checkpoints.clear()
+
+        # Main progress bar. Workers only call ServiceTrade (sharing the client's rate limiter);
+        # this thread is the single writer for occurrences and checkpoints.
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="service-events") as executor, \
+                tqdm(total=total, disable=args.no_progress, desc="Backfilling locations", mininterval=0.5) as pbar:
+            for result in _iter_location_results(executor, loc_ids, watermarks, sleep=args.sleep, window=workers * 2):
+                loc_id = result.location_id
+                pbar.update(1)
+                insert_vals_list.extend(result.rows)
+                job_processed += result.jobs
+                skipped += result.skipped
+                errors += result.errors
+                if result.unchanged:
+                    unchanged += 1
+                elif not result.errors:
+                    pending_checkpoints.append((loc_id, result.watermark, len(result.rows), result.revisit_after))
 
-                resp = call_service_trade_api("job", params=params)
-                data = resp.get("data")
-                jobs = data.get("jobs")
-                job_id = None
-                scheduled_for = None
-                job_created_at = None
-                confirmed = False
-                if jobs is not None:
-                    scheduled_job_found = True
-                    
-                    for job in jobs:
-                        job_id = job.get("id")
-                        scheduled_for = job.get("scheduledDate")
-                        job_created_at = job.get("created")
-                        month = scheduled_for
-
-                        appointments_iter = iter(stream_appointments_for_job(job_id))
-                        first_appt = next(appointments_iter, None)
-                        if first_appt is None:
-                            log.info("Job %s has no appointments; writing stub occurrence.", job_id)
-
-                            insert_vals = {
-                                "location_name": location_name,
-                                "job_id": job_id,
-                                "location_id": loc_id,
-                                "job_type": job_type,
-                                "job_created_at": created_at,
-                                "scheduled_for": scheduled_on,          # use job scheduledDate
-                                "completed_at": completed_on,
-                                "observed_month": scheduled_on,         # or completed_on if you prefer
-                                "is_recurring": is_recurring,
-                                "spr_hours_actual": 0,
-                                "fa_hours_actual": 0,
-                                "number_of_fa_days": 0,
-                                "number_of_spr_days": 0,
-                                "number_of_fa_techs": 0,
-                                "number_of_spr_techs": 0,
-                                "travel_minutes_per_appt": travel_time,
-                                "travel_minutes_total": 0,
-                                "status": status,
-                                "is_confirmed": confirmed,
-                                "meta": "no appointments",
-                                "location_on_hold": is_location_on_hold,
-                            }
-                            insert_vals_list.append(insert_vals)
-                            job_processed += 1
-                            skipped += 1
-                            continue
-                        else:
-                            appts_source = [first_appt]
-                            appts_source.extend(appointments_iter)
-                            
-                            for appt in appts_source:
-                                confirmed = confirmed or appt.get("released", False)
-
-                        earliest_appt_ts = None
-                        
-                            
-
-                if not scheduled_job_found:
-                    # Recurrences
-                    unique_rec = {}
-                    for rec in stream_recurrences_for_location(loc_id):
-                        if rec.get("endsOn") is None:
-                            unique_rec[rec["id"]] = rec
-                
-                    for rec in unique_rec.values():
-                        if not is_relevant_annual_recurrence(rec):
-                            continue
-                        
-                        fs = rec.get("firstStart")
-                        
-                        if fs is not None:
-                            month = fs
-                        service_found = True
-                        meta = "timing from tags. Month from serviceRecurrence"
-                    
-            
-                
-                if args.sleep:
-                    time.sleep(args.sleep)
                 # per Location scope
                 loc_processed += 1
                 do_flush = (args.commit_every and args.commit_every > 0
                             and (loc_processed % args.commit_every == 0))
 
                 if do_flush:
-                    try:
-                        flushed = _flush_occurrence_rows(insert_vals_list, test_mode=args.test)
-                        log.info("Upserted %s rows at location %s (buffer now %s).",
-                                flushed, loc_id, len(insert_vals_list))
-                    except Exception:
-                        errors += 1
-                        log.exception("Upsert flush failed after location %s; rolled back.", loc_id)
-                    
-                pbar.set_postfix(last_loc=loc_id, jobs=job_processed, skipped=skipped, errors=errors)
+                    flush(loc_id)
+
+                pbar.set_postfix(last_loc=loc_id, jobs=job_processed, skipped=skipped, unchanged=unchanged, errors=errors)
     
         if args.location_id:
             for insert_vals in insert_vals_list:
@@ -1414,15 +1605,12 @@ def main():
                     """)
 
         # Final flush of any remaining rows
-        try:
-            flushed = _flush_occurrence_rows(insert_vals_list, test_mode=args.test)
-            log.info("Final upsert flush wrote %s rows.", flushed)
-        except Exception:
-            errors += 1
-            log.exception("Final upsert flush failed; rolled back.")
+        flush("(final)")
 
-    log.info("Done. Locations processed: %s | skipped: %s | jobs processed: %s | errors: %s",
-                 loc_processed, skipped, job_processed, errors)
+    log.info("Done. Locations processed: %s | unchanged since checkpoint: %s | skipped: %s | jobs processed: %s | errors: %s",
+                 loc_processed, unchanged, skipped, job_processed, errors)
+    log.info("Location lookups: %s API calls | %s served from the run cache (API calls saved).",
+             location_metadata.api_calls, location_metadata.calls_saved)
         
 
 
@@ -26,7 +26,9 @@ from app.monthly.history_source import (
     HISTORY_SOURCE_MASTER_SHEET,
     is_history_protected_from_master_sheet,
 )
+from app.monthly.route_month_rollup import refresh_route_month_rollup_for_locations
 from app.monthly.route_sync import sync_monthly_route_fk_for_location
+from app.search_index import monthly_location_search_document
 
 LOG = logging.getLogger("upload_monthly_sheet")
 
@@ -329,6 +331,7 @@ def _upsert_location(
         "key_id": key_id,
         "updated_at": now,
     }
+    payload["search_document"] = monthly_location_search_document(payload)
 
     stmt = insert(MonthlyLocation).values(**payload)
     stmt = stmt.on_conflict_do_update(
@@ -351,6 +354,7 @@ def _upsert_location(
             "test_day": stmt.excluded.test_day,
             "annual_month": stmt.excluded.annual_month,
             "key_id": stmt.excluded.key_id,
+            "search_document": stmt.excluded.search_document,
             "updated_at": stmt.excluded.updated_at,
         },
     ).returning(MonthlyLocation.id)
@@ -865,6 +869,8 @@ def run_upload(
     history_ambiguous_locations: list[dict[str, Any]] = []
     status_routes_rows: list[dict[str, Any]] = []
     location_upserts = 0
+    # The Core upsert bypasses the rollup flush listeners; repriced sites are refreshed before commit.
+    repriced_location_ids: set[int] = set()
     history_upserts = 0
     history_skipped_protected = 0
     status_routes_updated = 0
@@ -893,7 +899,9 @@ def run_upload(
         )
 
     keycode_cf_index: dict[str, int] = {}
+    prices_before: dict[int, Decimal | None] = {}
     if not history_only and not status_and_routes_only:
+        prices_before = dict(db.session.execute(select(MonthlyLocation.id, MonthlyLocation.price_per_month)).all())
         keycode_cf_index = keycode_cf_to_key_id_map()
         print(
             f"[monthly-sheet] Loaded {len(keycode_cf_index)} keycode index entr(y/ies) for key_id resolution.",
@@ -1004,6 +1012,8 @@ def run_upload(
         else:
             location_id = _upsert_location(row, keycode_cf_index=keycode_cf_index)
             location_upserts += 1
+            if location_id in prices_before and prices_before[location_id] != _parse_price(row.get("Price/month")):
+                repriced_location_ids.add(location_id)
 
         if status_and_routes_only:
             if idx == 1 or idx == total_locations or idx % PROGRESS_EVERY_N_LOCATIONS == 0:
@@ -1175,6 +1185,15 @@ def run_upload(
         LOG.info("Preserved skip reasons remapped: %s", remap_applied)
         LOG.info("Preserved skip reasons unmatched: %s", remap_unmatched)
 
+    if repriced_location_ids:
+        db.session.flush()
+        refreshed = refresh_route_month_rollup_for_locations(repriced_location_ids)
+        LOG.info(
+            "Route-month rollup refreshed for %s repriced location(s): %s row(s)",
+            len(repriced_location_ids),
+            refreshed,
+        )
+
     if dry_run:
         db.session.rollback()
         LOG.info("Dry run complete. No database changes committed.")
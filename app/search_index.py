@@ -0,0 +1,315 @@
+"""Denormalized search documents for the monthly library and keys search.
+
+``MonthlyLocation.search_document`` and ``Key.search_document`` hold one casefolded,
+newline-separated copy of every searchable field (keys also carry their addresses and
+space-stripped keycode/address variants). A ``before_flush`` listener keeps them current
+on ORM writes; bulk upserts set the column themselves and ``flask rebuild-search-index``
+recomputes everything.
+
+Matching is a substring test on that single column:
+
+- Postgres: ``search_document LIKE '%q%'`` served by a ``pg_trgm`` GIN index
+  (``ix_monthly_location_search_document_trgm`` / ``ix_keys_search_document_trgm``).
+- Other dialects (SQLite dev/tests): an in-process trigram index per engine and table,
+  loaded on first search and updated from committed flushes; it resolves ``q`` to a
+  candidate id list so the SQL side is an ``id IN (...)`` lookup.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import weakref
+from typing import Any, Iterable, Mapping
+
+from sqlalchemy import String, bindparam, case, cast, event, func, or_, select
+
+from app.db_models import Key, KeyAddress, MonthlyLocation, db
+
+log = logging.getLogger("search-index")
+
+_SEPARATOR = "\n"
+
+#: ``MonthlyLocation`` columns matched by the library ``q`` filter.
+MONTHLY_LOCATION_SEARCH_FIELDS = (
+    "address",
+    "label",
+    "label_normalized",
+    "building_name",
+    "test_day",
+    "property_management_company",
+    "keys",
+)
+KEY_SEARCH_FIELDS = ("keycode", "barcode", "route", "area", "home_location", "annual_month", "site_status")
+
+_PENDING_KEY = "search_index_pending"
+
+
+def _fold(value: Any) -> str:
+    return str(value).strip().casefold() if value is not None else ""
+
+
+def _compact(text: str) -> str:
+    return "".join(text.split())
+
+
+def _join(parts: Iterable[str]) -> str:
+    seen: list[str] = []
+    for part in parts:
+        if part and part not in seen:
+            seen.append(part)
+    return _SEPARATOR.join(seen)
+
+
+def monthly_location_search_document(fields: Mapping[str, Any] | MonthlyLocation) -> str:
+    get = fields.get if isinstance(fields, Mapping) else (lambda name: getattr(fields, name, None))
+    return _join(_fold(get(name)) for name in MONTHLY_LOCATION_SEARCH_FIELDS)
+
+
+def key_search_document(key: Key, addresses: Iterable[str] | None = None) -> str:
+    if addresses is None:
+        addresses = [a.address for a in (key.addresses or [])]
+    folded_addresses = [_fold(a) for a in addresses]
+    keycode = _fold(key.keycode)
+    parts = [_fold(getattr(key, name, None)) for name in KEY_SEARCH_FIELDS]
+    parts += folded_addresses
+    # Space-insensitive variants so "ab 12" finds "AB12" and vice versa.
+    parts.append(_compact(keycode))
+    parts += [_compact(a) for a in folded_addresses]
+    return _join(parts)
+
+
+def normalize_search_query(q: str) -> tuple[str, str]:
+    """``(casefolded query, same with whitespace removed)``."""
+    folded = (q or "").strip().casefold()
+    return folded, _compact(folded)
+
+
+# --- in-process trigram index (non-Postgres) -------------------------------------------------
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """Substring lookup over ``{row_id: document}`` using a trigram posting list."""
+
+    def __init__(self, docs: Mapping[int, str] | None = None) -> None:
+        self._lock = threading.Lock()
+        self._docs: dict[int, str] = {}
+        self._postings: dict[str, set[int]] = {}
+        for row_id, doc in (docs or {}).items():
+            self._put(row_id, doc)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _put(self, row_id: int, doc: str | None) -> None:
+        self._drop(row_id)
+        doc = doc or ""
+        self._docs[row_id] = doc
+        for gram in _trigrams(doc):
+            self._postings.setdefault(gram, set()).add(row_id)
+
+    def _drop(self, row_id: int) -> None:
+        old = self._docs.pop(row_id, None)
+        if old is None:
+            return
+        for gram in _trigrams(old):
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(row_id)
+                if not ids:
+                    del self._postings[gram]
+
+    def apply(self, upserts: Mapping[int, str | None], deletes: Iterable[int]) -> None:
+        with self._lock:
+            for row_id in deletes:
+                self._drop(row_id)
+            for row_id, doc in upserts.items():
+                self._put(row_id, doc)
+
+    def search(self, *needles: str) -> set[int]:
+        """Ids whose document contains any of ``needles``."""
+        out: set[int] = set()
+        with self._lock:
+            for needle in {n for n in needles if n}:
+                grams = _trigrams(needle)
+                if grams:
+                    postings = sorted((self._postings.get(g, set()) for g in grams), key=len)
+                    candidates = set.intersection(*postings) if postings[0] else set()
+                else:
+                    candidates = self._docs.keys()
+                out.update(row_id for row_id in candidates if needle in self._docs[row_id])
+        return out
+
+
+_indexes: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_indexes_lock = threading.Lock()
+
+
+def _use_trigram_gin(session=None) -> bool:
+    bind = (session or db.session).get_bind()
+    return bind.dialect.name == "postgresql"
+
+
+def _process_index(model) -> TrigramIndex:
+    engine = db.session.get_bind()
+    with _indexes_lock:
+        per_engine = _indexes.setdefault(engine, {})
+        index = per_engine.get(model.__tablename__)
+    if index is not None:
+        return index
+    rows = db.session.execute(select(model.id, model.search_document)).all()
+    index = TrigramIndex({int(row_id): doc for row_id, doc in rows})
+    with _indexes_lock:
+        per_engine.setdefault(model.__tablename__, index)
+    log.info("search index loaded table=%s rows=%d", model.__tablename__, len(index))
+    return index
+
+
+def search_document_filter(model, q: str, *, ignore_spaces: bool = False):
+    """SQL predicate matching ``model.search_document`` against ``q``.
+
+    ``ignore_spaces`` also matches the whitespace-stripped query (keys search).
+    """
+    folded, compact = normalize_search_query(q)
+    needles = [folded, compact] if ignore_spaces and compact != folded else [folded]
+    if _use_trigram_gin():
+        return or_(*(model.search_document.contains(n, autoescape=True) for n in needles))
+    return model.id.in_(sorted(_process_index(model).search(*needles)))
+
+
+def key_search_rank(q: str):
+    """0 = exact keycode/barcode, 1 = keycode prefix, 2 = anything else."""
+    folded, compact = normalize_search_query(q)
+    keycode = func.lower(func.coalesce(Key.keycode, ""))
+    return case(
+        (or_(keycode == folded, func.replace(keycode, " ", "") == compact), 0),
+        (cast(Key.barcode, String) == compact, 0),
+        (keycode.startswith(folded, autoescape=True), 1),
+        else_=2,
+    )
+
+
+# --- write-path maintenance ------------------------------------------------------------------
+
+
+def _before_flush(session, _flush_context, _instances) -> None:
+    touched_keys: set[Key] = set()
+    with session.no_autoflush:
+        for obj in list(session.new) + list(session.dirty):
+            if isinstance(obj, MonthlyLocation):
+                doc = monthly_location_search_document(obj)
+                if obj.search_document != doc:
+                    obj.search_document = doc
+            elif isinstance(obj, Key):
+                touched_keys.add(obj)
+            elif isinstance(obj, KeyAddress):
+                key = obj.key if obj.key is not None else session.get(Key, obj.key_id)
+                if key is not None:
+                    touched_keys.add(key)
+        for obj in session.deleted:
+            if isinstance(obj, KeyAddress):
+                key = session.get(Key, obj.key_id) if obj.key_id is not None else None
+                if key is not None and key not in session.deleted:
+                    touched_keys.add(key)
+        if touched_keys:
+            removed = {id(obj) for obj in session.deleted if isinstance(obj, KeyAddress)}
+            for key in touched_keys:
+                addresses = [a.address for a in (key.addresses or []) if id(a) not in removed]
+                doc = key_search_document(key, addresses)
+                if key.search_document != doc:
+                    key.search_document = doc
+
+
+def _after_flush(session, _flush_context) -> None:
+    pending = session.info.setdefault(_PENDING_KEY, {})
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, (MonthlyLocation, Key)) and obj.id is not None:
+            pending.setdefault(obj.__tablename__, {})[int(obj.id)] = obj.search_document
+    for obj in session.deleted:
+        if isinstance(obj, (MonthlyLocation, Key)) and obj.id is not None:
+            pending.setdefault(obj.__tablename__, {})[int(obj.id)] = None
+
+
+def _after_commit(session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None) or {}
+    engine = session.get_bind()
+    with _indexes_lock:
+        per_engine = _indexes.get(engine) or {}
+    for table_name, changes in pending.items():
+        index = per_engine.get(table_name)
+        if index is None:
+            continue
+        index.apply(
+            {row_id: doc for row_id, doc in changes.items() if doc is not None},
+            [row_id for row_id, doc in changes.items() if doc is None],
+        )
+
+
+def _after_rollback(session, _previous_transaction) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+def invalidate_process_search_index(engine=None) -> None:
+    """Drop the in-process index so the next search reloads it (after bulk/raw writes)."""
+    with _indexes_lock:
+        if engine is None:
+            _indexes.clear()
+        else:
+            _indexes.pop(engine, None)
+
+
+def rebuild_search_documents(*, connection=None, batch_size: int = 1000) -> dict[str, int]:
+    """Recompute every ``search_document``; returns per-table counts of rows rewritten.
+
+    Core-only so the migration can run it on its own bind.
+    """
+    conn = connection if connection is not None else db.session.connection()
+    loc_t, key_t, addr_t = MonthlyLocation.__table__, Key.__table__, KeyAddress.__table__
+    counts = {loc_t.name: 0, key_t.name: 0}
+
+    def _write(table, updates: list[dict]) -> None:
+        for start in range(0, len(updates), batch_size):
+            conn.execute(
+                table.update().where(table.c.id == bindparam("row_id")),
+                updates[start : start + batch_size],
+            )
+        counts[table.name] += len(updates)
+
+    loc_cols = [loc_t.c.id, loc_t.c.search_document, *(loc_t.c[name] for name in MONTHLY_LOCATION_SEARCH_FIELDS)]
+    updates = []
+    for row in conn.execute(select(*loc_cols)):
+        doc = monthly_location_search_document(row._mapping)
+        if row.search_document != doc:
+            updates.append({"row_id": row.id, "search_document": doc})
+    _write(loc_t, updates)
+
+    addresses: dict[int, list[str]] = {}
+    for key_id, address in conn.execute(select(addr_t.c.key_id, addr_t.c.address).order_by(addr_t.c.id)):
+        addresses.setdefault(int(key_id), []).append(address)
+    key_cols = [key_t.c.id, key_t.c.search_document, *(key_t.c[name] for name in KEY_SEARCH_FIELDS)]
+    updates = []
+    for row in conn.execute(select(*key_cols)):
+        doc = key_search_document(row, addresses.get(int(row.id), []))
+        if row.search_document != doc:
+            updates.append({"row_id": row.id, "search_document": doc})
+    _write(key_t, updates)
+
+    invalidate_process_search_index(conn.engine)
+    return counts
+
+
+def init_search_index(app) -> None:
+    """Register flush listeners that keep ``search_document`` columns current."""
+    listeners = (
+        ("before_flush", _before_flush),
+        ("after_flush", _after_flush),
+        ("after_commit", _after_commit),
+        ("after_soft_rollback", _after_rollback),
+    )
+    for name, fn in listeners:
+        if not event.contains(db.session, name, fn):
+            event.listen(db.session, name, fn)
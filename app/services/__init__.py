@@ -1,4 +1,5 @@
 from .scheduling_service import (
+    AvailabilityIndex,
     find_candidate_dates,
     get_working_hours_for_day,
     subtract_busy_intervals,
@@ -6,6 +7,7 @@ from .scheduling_service import (
 )
 
 __all__ = [
+    "AvailabilityIndex",
     "find_candidate_dates",
     "get_working_hours_for_day",
     "subtract_busy_intervals",
@@ -0,0 +1,246 @@
+"""Shared Processing Attack KPI snapshot.
+
+Rebuilding the processing KPIs means listing jobs to be marked complete (plus one appointment
+lookup per job), jobs to be invoiced, report-conversion jobs, pink-folder jobs and today's
+completions. Before this module existed, every ``/processing_attack/*`` endpoint, the intraday
+capture and the daily script repeated those calls themselves.
+
+``processing_snapshot()`` serves the persisted ``processing_snapshot`` row while it is younger
+than ``PROCESSING_SNAPSHOT_MAX_AGE_SECONDS`` (default 45). Otherwise it rebuilds the row once:
+freshness is checked before and again after taking an in-process lock, so concurrent callers
+wait for that rebuild instead of starting their own. After a failed rebuild, callers serve the
+stale row (or fail fast) for ``_REBUILD_FAILURE_BACKOFF_SECONDS`` instead of each retrying in
+turn. The row is read and written on its own connection, never the caller's session. A rebuild
+reuses the persisted per-job appointment maxima for jobs whose ServiceTrade ``updated`` stamp is
+unchanged. Appointments for the other jobs, and the oldest-job details, are fetched
+concurrently.
+
+Until the table exists the snapshot lives in process memory only.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.db_models import ProcessingSnapshot, db, table_available
+from app.services.servicetrade import propagate_credentials
+from app.services.servicetrade.pagination import default_page_workers
+
+log = logging.getLogger("processing-snapshot")
+
+PROCESSING_SNAPSHOT_KEY = "current"
+DEFAULT_PROCESSING_SNAPSHOT_MAX_AGE_SECONDS = 45
+
+#: ``ProcessingStatus`` / ``ProcessingStatusDaily`` columns carried in ``payload["status"]``.
+_STATUS_DATE_FIELDS = ("earliest_job_to_be_converted_date", "oldest_job_date")
+
+_REBUILD_FAILURE_BACKOFF_SECONDS = 10
+
+_build_lock = threading.Lock()
+# ``{"at": time.monotonic(), "error": exc}`` of the last failed rebuild.
+_last_failure: dict[str, object] = {}
+# ``{"at": time.monotonic()}`` of the last successful rebuild in this process.
+_last_built: dict[str, float] = {}
+# Fallback when ``processing_snapshot`` has not been migrated yet.
+_memory: dict[str, object] = {}
+
+
+def processing_snapshot_max_age() -> int:
+    try:
+        return max(
+            0,
+            int(
+                os.getenv("PROCESSING_SNAPSHOT_MAX_AGE_SECONDS")
+                or DEFAULT_PROCESSING_SNAPSHOT_MAX_AGE_SECONDS
+            ),
+        )
+    except ValueError:
+        return DEFAULT_PROCESSING_SNAPSHOT_MAX_AGE_SECONDS
+
+
+def _snapshot_table_available() -> bool:
+    return table_available(ProcessingSnapshot.__tablename__)
+
+
+def _isoformat(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+def _load() -> tuple[dict, dict, datetime] | None:
+    """``(payload, appointment_max, built_at)`` of the stored snapshot, if any."""
+    if not _snapshot_table_available():
+        if not _memory:
+            return None
+        return _memory["payload"], dict(_memory["appointment_max"]), _memory["built_at"]
+    table = ProcessingSnapshot.__table__
+    with db.engine.connect() as conn:
+        row = conn.execute(select(table).where(table.c.snapshot_key == PROCESSING_SNAPSHOT_KEY)).first()
+    if row is None:
+        return None
+    built_at = row.built_at
+    if built_at.tzinfo is None:
+        built_at = built_at.replace(tzinfo=timezone.utc)
+    return row.payload, dict(row.appointment_max or {}), built_at
+
+
+def _store(payload: dict, appointment_max: dict, built_at: datetime, build_ms: int) -> None:
+    if not _snapshot_table_available():
+        _memory.update(payload=payload, appointment_max=appointment_max, built_at=built_at)
+        return
+    table = ProcessingSnapshot.__table__
+    values = {
+        "payload": payload,
+        "appointment_max": appointment_max,
+        "built_at": built_at,
+        "build_ms": build_ms,
+    }
+    with db.engine.begin() as conn:
+        insert = pg_insert if conn.dialect.name == "postgresql" else sqlite_insert
+        stmt = insert(table).values(snapshot_key=PROCESSING_SNAPSHOT_KEY, **values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.snapshot_key],
+            set_={column: stmt.excluded[column] for column in values},
+        )
+        conn.execute(stmt)
+
+
+def build_processing_snapshot(appointment_max: dict) -> dict:
+    """Fetch every KPI from ServiceTrade; ``appointment_max`` is refreshed in place."""
+    from app.routes import processing_attack as pa
+
+    jobs, oldest_job_ids, job_date = pa.get_jobs_to_be_marked_complete(appointment_max=appointment_max)
+    oldest_details: list[tuple] = []
+    if oldest_job_ids:
+        with ThreadPoolExecutor(
+            max_workers=min(default_page_workers(), len(oldest_job_ids)),
+            thread_name_prefix="processing-oldest",
+        ) as pool:
+            oldest_details = list(pool.map(propagate_credentials(pa.get_oldest_job_data), oldest_job_ids))
+
+    oldest_jobs = []
+    for job_id, (_earliest, address, job_type) in zip(oldest_job_ids, oldest_details):
+        timestamp = job_date.get(job_id)
+        if timestamp is None:
+            continue
+        oldest_jobs.append(
+            {
+                "job_id": job_id,
+                "oldest_job_date": datetime.fromtimestamp(timestamp).isoformat(),
+                "oldest_job_address": address or "Unknown",
+                "oldest_job_type": job_type or "Unknown",
+            }
+        )
+    if jobs and oldest_details:
+        oldest_job_date, oldest_job_address, oldest_job_type = oldest_details[0]
+    else:
+        oldest_job_date = oldest_job_address = oldest_job_type = None
+
+    jobs_to_be_invoiced = pa.get_jobs_to_be_invoiced()
+    num_locations_to_be_converted, jobs_to_be_converted = pa.find_report_conversion_jobs()
+    earliest_conversion_job = jobs_to_be_converted[0] if jobs_to_be_converted else None
+    if earliest_conversion_job and earliest_conversion_job.get("scheduledDate"):
+        earliest_conversion_date = datetime.fromtimestamp(
+            earliest_conversion_job.get("scheduledDate"),
+            tz=timezone.utc,
+        ).date()
+        earliest_conversion_address = (
+            earliest_conversion_job.get("location", {}).get("address", {}).get("street")
+        )
+        earliest_conversion_job_id = earliest_conversion_job.get("id")
+    else:
+        earliest_conversion_date = earliest_conversion_address = earliest_conversion_job_id = None
+
+    job_type_count = pa.organize_jobs_by_job_type(jobs)
+    number_of_pink_folder_jobs, _, _ = pa.get_pink_folder_data()
+    jobs_processed_today = pa.get_jobs_processed_today()
+
+    status = {
+        "jobs_processed_today": jobs_processed_today,
+        "jobs_to_be_marked_complete": len(jobs),
+        "jobs_to_be_invoiced": jobs_to_be_invoiced,
+        "jobs_to_be_converted": len(jobs_to_be_converted),
+        "earliest_job_to_be_converted_date": earliest_conversion_date,
+        "earliest_job_to_be_converted_address": earliest_conversion_address,
+        "earliest_job_to_be_converted_job_id": earliest_conversion_job_id,
+        "oldest_job_date": oldest_job_date.date() if isinstance(oldest_job_date, datetime) else oldest_job_date,
+        "oldest_job_address": oldest_job_address,
+        "oldest_job_type": oldest_job_type,
+        "job_type_count": job_type_count,
+        "number_of_pink_folder_jobs": number_of_pink_folder_jobs,
+    }
+    return {
+        "status": {key: _isoformat(value) for key, value in status.items()},
+        "job_type_count": job_type_count,
+        "oldest_jobs_to_be_marked_complete": oldest_jobs,
+        "num_locations_to_be_converted": num_locations_to_be_converted,
+        "jobs_to_be_converted": jobs_to_be_converted,
+    }
+
+
+def _is_fresh(stored, max_age: int) -> bool:
+    return stored is not None and (datetime.now(timezone.utc) - stored[2]).total_seconds() < max_age
+
+
+def _serve(stored) -> dict:
+    return {**stored[0], "built_at": stored[2].isoformat()}
+
+
+def processing_snapshot(*, max_age_seconds: int | None = None, force: bool = False) -> dict:
+    """The shared snapshot payload, rebuilt when older than ``max_age_seconds`` (or ``force``)."""
+    max_age = processing_snapshot_max_age() if max_age_seconds is None else max_age_seconds
+    if not force:
+        stored = _load()
+        if _is_fresh(stored, max_age):
+            return _serve(stored)
+
+    requested = time.monotonic()
+    with _build_lock:
+        stored = _load()
+        # Whoever held the lock may have just rebuilt it; a forced caller only needs one newer than its request.
+        if not force and _is_fresh(stored, max_age):
+            return _serve(stored)
+        failed_at = _last_failure.get("at")
+        if failed_at is not None and time.monotonic() - failed_at < _REBUILD_FAILURE_BACKOFF_SECONDS:
+            if stored is not None:
+                log.warning("Serving stale processing snapshot; last rebuild failed %.1fs ago", time.monotonic() - failed_at)
+                return _serve(stored)
+            raise RuntimeError("Processing snapshot rebuild failed recently") from _last_failure["error"]
+        if force and stored is not None and _last_built.get("at", -1.0) >= requested:
+            return _serve(stored)
+
+        now = datetime.now(timezone.utc)
+        appointment_max = stored[1] if stored is not None else {}
+        started = time.monotonic()
+        try:
+            payload = build_processing_snapshot(appointment_max)
+        except Exception as exc:
+            _last_failure.update(at=time.monotonic(), error=exc)
+            raise
+        _last_failure.clear()
+        build_ms = int((time.monotonic() - started) * 1000)
+        _store(payload, appointment_max, now, build_ms)
+        _last_built["at"] = time.monotonic()
+        log.info(
+            "Processing snapshot rebuilt in %d ms (%d jobs to be marked complete)",
+            build_ms,
+            payload["status"]["jobs_to_be_marked_complete"],
+        )
+        return {**payload, "built_at": now.isoformat()}
+
+
+def processing_status_fields(snapshot: dict) -> dict:
+    """``ProcessingStatus`` / ``ProcessingStatusDaily`` column values from a snapshot."""
+    fields = dict(snapshot["status"])
+    for key in _STATUS_DATE_FIELDS:
+        if isinstance(fields.get(key), str):
+            fields[key] = date.fromisoformat(fields[key])
+    return fields
@@ -45,6 +45,83 @@ def max_free_interval(busy_intervals, working_start, working_end):
             max_free = duration
     return max_free
 
+def _normalize_tech_name(name):
+    return (name or "").strip().lower()
+
+
+class AvailabilityIndex:
+    """
+    Appointments and absences bucketed once by normalized tech name and by calendar day.
+
+    Each (tech, day) bucket holds a sorted list of the raw (start, end) windows touching that
+    day, so per-day free time is computed from a handful of intervals instead of rescanning
+    every appointment and absence for every tech on every candidate day.
+    """
+
+    def __init__(self, first_day, last_day):
+        self.first_day = first_day
+        self.last_day = last_day
+        self._buckets = {}
+
+    @classmethod
+    def build(cls, appointments_data, absences_data, first_day, last_day,
+              include_rrsc=False, include_projects_blocking=False):
+        index = cls(first_day, last_day)
+        for appt in appointments_data:
+            job_info = appt.get("job") or {}
+            if include_rrsc and (job_info.get("name") or "").strip() == "RRSC AGENT":
+                continue
+            if include_projects_blocking and _normalize_tech_name((appt.get("location") or {}).get("name")) == "project blocking":
+                continue
+            if "windowStart" not in appt or "windowEnd" not in appt:
+                continue
+            tech_keys = {_normalize_tech_name(t.get("name")) for t in appt.get("techs") or []}
+            if not tech_keys:
+                continue
+            start = datetime.fromtimestamp(appt["windowStart"])
+            end = datetime.fromtimestamp(appt["windowEnd"])
+            for tech_key in tech_keys:
+                index.add(tech_key, start, end)
+        for absence in absences_data:
+            tech_key = _normalize_tech_name((absence.get("user") or {}).get("name"))
+            start = datetime.fromtimestamp(int(absence["windowStart"]))
+            end = datetime.fromtimestamp(int(absence["windowEnd"]))
+            index.add(tech_key, start, end)
+        for intervals in index._buckets.values():
+            intervals.sort()
+        return index
+
+    def add(self, tech_key, start, end):
+        """Record a busy window under every indexed day it touches."""
+        day = max(start.date(), self.first_day)
+        last = min(end.date(), self.last_day)
+        while day <= last:
+            self._buckets.setdefault((tech_key, day), []).append((start, end))
+            day += timedelta(days=1)
+
+    def busy_intervals(self, tech_name, date_obj, working_start, working_end):
+        """
+        Busy intervals for one tech on one day, using the same effective-window rules the
+        candidate search has always applied (start pulled back to the working start, end
+        capped at 5PM and the working end).
+        """
+        windows = self._buckets.get((_normalize_tech_name(tech_name), date_obj))
+        if not windows:
+            return []
+        day_end = datetime.combine(date_obj, time(17, 0))
+        busy = []
+        for start, end in windows:
+            effective_start = start if start < working_start else working_start
+            effective_end = min(end, day_end, working_end)
+            if effective_start < effective_end:
+                busy.append((effective_start, effective_end))
+        return busy
+
+    def free_hours(self, tech_name, date_obj, working_start, working_end):
+        busy = self.busy_intervals(tech_name, date_obj, working_start, working_end)
+        return max_free_interval(busy, working_start, working_end)
+
+
 def find_candidate_dates(appointments_data, absences_data, allowable_techs, include_rrsc, include_projects_blocking, 
                          selected_weekdays, custom_start_time, tech_rows):
     """
@@ -56,57 +133,26 @@ def find_candidate_dates(appointments_data, absences_data, allowable_techs, incl
     today = datetime.today().date()
     current_date = today + timedelta(days=1)
     end_date = today + timedelta(days=120)
-    
+
+    index = AvailabilityIndex.build(
+        appointments_data, absences_data, current_date, end_date,
+        include_rrsc=include_rrsc, include_projects_blocking=include_projects_blocking,
+    )
+    techs = [
+        ((tech.get("name", "") or "").strip(), (tech.get("type") or "").strip())
+        for tech in allowable_techs
+    ]
+
     while current_date <= end_date:
         if current_date.weekday() in selected_weekdays:
             working_start, working_end = get_working_hours_for_day(current_date, custom_start_time)
             available_info = {}
-            for tech in allowable_techs:
-                tech_name = tech.get("name", "").strip()
-                tech_type = (tech.get("type") or "").strip()
-                busy_intervals = []
-                # Process appointments.
-                for appt in appointments_data:
-                    job_info = appt.get("job", {})
-                    if include_rrsc and job_info.get("name", "").strip() == "RRSC AGENT":
-                        continue
-                    if include_projects_blocking and appt.get("location", "").get("name", "").strip().lower() == "project blocking":
-                        continue
-                    if "windowStart" in appt and "windowEnd" in appt:
-                        appt_window_start = datetime.fromtimestamp(appt["windowStart"])
-                        appt_window_end = datetime.fromtimestamp(appt["windowEnd"])
-                        if appt_window_start.date() <= current_date <= appt_window_end.date():
-                            day_start = datetime.combine(current_date, time(7, 0))
-                            day_end = datetime.combine(current_date, time(17, 0))
-                            effective_start = appt_window_start if appt_window_start < working_start else working_start
-                            effective_end = min(appt_window_end, day_end, working_end)
-                            if effective_start < effective_end:
-                                techs_in_appt = appt.get("techs", [])
-                                for tech_obj in techs_in_appt:
-                                    if tech_obj.get("name", "").strip().lower() == tech_name.lower():
-                                        busy_intervals.append((effective_start, effective_end))
-                                        break
-                # Process absences similarly.
-                for absence in absences_data:
-                    absence_user = absence.get("user", {})
-                    if absence_user.get("name", "").strip().lower() != tech_name.lower():
-                        continue
-                    absence_start = datetime.fromtimestamp(int(absence["windowStart"]))
-                    absence_end = datetime.fromtimestamp(int(absence["windowEnd"]))
-                    if absence_start.date() <= current_date <= absence_end.date():
-                        day_start = datetime.combine(current_date, time(7, 0))
-                        day_end = datetime.combine(current_date, time(17, 0))
-                        effective_start = absence_start if absence_start < working_start else working_start
-                        effective_end = min(absence_end, day_end, working_end)
-                        if effective_start < effective_end:
-                            busy_intervals.append((effective_start, effective_end))
-                free_hours = max_free_interval(busy_intervals, working_start, working_end)
+            for tech_name, tech_type in techs:
+                free_hours = index.free_hours(tech_name, current_date, working_start, working_end)
                 available_info[tech_name] = {"free_hours": round(free_hours, 2), "type": tech_type}
-            
             candidate_results.append((current_date, available_info))
-                
         current_date += timedelta(days=1)
-    
+
     return candidate_results
 
 def group_consecutive_days(daily_candidates):
@@ -212,15 +258,14 @@ def process_multi_day_block(block, tech_rows, allowable_techs, tech_rank):
 
         best_window_total = -1
         best_window_qualified = None
+        row_techs = [tech for tech in allowable_techs if _row_allows_tech(row, tech)]
 
         # New branch: if L == 1, iterate over all days in the block and pick the earliest qualifying day.
         if L == 1:
             for window_start in range(0, block_length):
                 window = [block[window_start]]  # Single-day window
                 qualified = []
-                for tech in allowable_techs:
-                    if not _row_allows_tech(row, tech):
-                        continue
+                for tech in row_techs:
                     date, avail_info = window[0]
                     tech_name = tech.get("name")
                     if tech_name in avail_info and avail_info[tech_name]["free_hours"] >= required_day_hours[0]:
@@ -240,9 +285,7 @@ def process_multi_day_block(block, tech_rows, allowable_techs, tech_rank):
             for window_start in range(0, block_length - L + 1):
                 window = block[window_start: window_start + L]  # List of L tuples (date, available_info)
                 qualified = []
-                for tech in allowable_techs:
-                    if not _row_allows_tech(row, tech):
-                        continue
+                for tech in row_techs:
                     qualifies = True
                     window_hours = []
                     for k in range(L):
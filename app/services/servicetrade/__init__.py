@@ -0,0 +1,33 @@
+from .client import (
+    SERVICE_TRADE_API_BASE,
+    RateLimiter,
+    ServiceTradeClient,
+    ServiceTradeMetrics,
+    authenticate_service_trade_session,
+    bound_credentials,
+    credentials_bound,
+    endpoint_key,
+    init_service_trade_client,
+    propagate_credentials,
+    service_trade_client,
+    service_trade_client_stats,
+)
+from .pagination import PageResult, iter_paginated_items, iter_paginated_pages
+
+__all__ = [
+    "PageResult",
+    "iter_paginated_items",
+    "iter_paginated_pages",
+    "SERVICE_TRADE_API_BASE",
+    "RateLimiter",
+    "ServiceTradeClient",
+    "ServiceTradeMetrics",
+    "authenticate_service_trade_session",
+    "bound_credentials",
+    "credentials_bound",
+    "endpoint_key",
+    "init_service_trade_client",
+    "propagate_credentials",
+    "service_trade_client",
+    "service_trade_client_stats",
+]
@@ -0,0 +1,478 @@
+"""Process-wide pooled ServiceTrade HTTP client.
+
+Every route module and script used to hold its own ``requests.Session()`` with an unsized
+connection pool, no timeout and no handling of ServiceTrade's 429s, so thread pools
+re-authenticated independently and hammered the API in bursts. ``ServiceTradeClient`` is a
+drop-in ``requests.Session`` subclass that adds, for every call:
+
+- a sized ``HTTPAdapter`` pool shared by all threads (``SERVICE_TRADE_POOL_MAXSIZE``),
+- auth cookie reuse: ``authenticate`` is a no-op when the same credentials already hold a
+  session, and a 401 triggers exactly one re-auth (shared across threads) and one retry,
+- one cookie jar per credential set: the shared session belongs to the service account
+  (``PROCESSING_USERNAME``); logging in as anyone else binds the calling thread to that
+  user's own session, so one office user's login never switches another's cookie,
+- a shared token-bucket rate limit (``SERVICE_TRADE_RATE_PER_SECOND`` / ``_RATE_BURST``) that
+  every thread pauses on when ServiceTrade answers 429 (``Retry-After`` honoured),
+- exponential backoff with full jitter for 429 / 5xx / connection errors (idempotent
+  methods only for the latter two),
+- a default ``(connect, read)`` timeout when the caller does not pass one,
+- per-endpoint latency, retry and timeout counters (``service_trade_client_stats``).
+
+Use ``service_trade_client()`` for the shared instance; construct ``ServiceTradeClient``
+directly only for tests or isolated tooling.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+log = logging.getLogger("servicetrade-client")
+
+SERVICE_TRADE_API_BASE = "https://api.servicetrade.com/api"
+
+_RETRY_STATUSES = frozenset({429, 502, 503, 504})
+_IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+_NUMERIC_SEGMENT = re.compile(r"^\d+$")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int((os.getenv(name) or "").strip() or default)
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float((os.getenv(name) or "").strip() or default)
+    except ValueError:
+        return default
+
+
+def endpoint_key(method: str, url: str) -> str:
+    """``GET /job/{id}/clockevent`` style key: numeric path segments collapse to ``{id}``."""
+    path = urlsplit(url).path or "/"
+    if path.startswith("/api/"):
+        path = path[4:]
+    parts = ["{id}" if _NUMERIC_SEGMENT.match(p) else p for p in path.split("/")]
+    return f"{method.upper()} {'/'.join(parts)}"
+
+
+def _is_auth_url(url: str) -> bool:
+    return urlsplit(url).path.rstrip("/").endswith("/auth")
+
+
+# -- per-thread credential binding ----------------------------------------------
+
+_bound = threading.local()
+
+
+def bound_credentials() -> tuple[str, str] | None:
+    """Credentials the current thread last logged in with, if any."""
+    return getattr(_bound, "credentials", None)
+
+
+def _bind_credentials(creds: tuple[str, str] | None) -> None:
+    _bound.credentials = creds
+
+
+def clear_bound_credentials() -> None:
+    _bound.credentials = None
+
+
+@contextmanager
+def credentials_bound(creds: tuple[str, str] | None) -> Iterator[None]:
+    """Run the block as ``creds`` (``None``: the service account), restoring the old binding."""
+    previous = bound_credentials()
+    _bind_credentials(creds)
+    try:
+        yield
+    finally:
+        _bind_credentials(previous)
+
+
+def propagate_credentials(fn: Callable) -> Callable:
+    """Wrap ``fn`` so worker threads call ServiceTrade as the submitting thread's user."""
+    creds = bound_credentials()
+
+    def run(*args: Any, **kwargs: Any):
+        with credentials_bound(creds):
+            return fn(*args, **kwargs)
+
+    return run
+
+
+class RateLimiter:
+    """Token bucket shared by every thread using one client; 429s pause the whole bucket."""
+
+    def __init__(self, rate_per_second: float, burst: int) -> None:
+        self.rate = float(rate_per_second)
+        self.capacity = max(1.0, float(burst))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a request may be sent; returns seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                delay = self._paused_until - now
+                if delay <= 0:
+                    if self._tokens >= 1.0:
+                        self._tokens -= 1.0
+                        return waited
+                    delay = (1.0 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller for ``seconds`` (server-side throttling) and drain the bucket."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + max(0.0, seconds))
+            self._tokens = 0.0
+
+
+class ServiceTradeMetrics:
+    """Per-endpoint call counters; cheap enough to update on every request."""
+
+    _FIELDS = ("calls", "errors", "timeouts", "retries", "throttled", "reauths")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._endpoints: dict[str, dict[str, float]] = {}
+
+    def _row(self, key: str) -> dict[str, float]:
+        row = self._endpoints.get(key)
+        if row is None:
+            row = {name: 0 for name in self._FIELDS}
+            row.update(total_ms=0.0, max_ms=0.0, rate_wait_ms=0.0)
+            self._endpoints[key] = row
+        return row
+
+    def record(self, key: str, *, elapsed_ms: float, status: int | None, rate_wait_ms: float = 0.0) -> None:
+        with self._lock:
+            row = self._row(key)
+            row["calls"] += 1
+            row["total_ms"] += elapsed_ms
+            row["max_ms"] = max(row["max_ms"], elapsed_ms)
+            row["rate_wait_ms"] += rate_wait_ms
+            if status is None or status >= 400:
+                row["errors"] += 1
+
+    def bump(self, key: str, field: str) -> None:
+        with self._lock:
+            self._row(key)[field] += 1
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            out: dict[str, dict[str, float]] = {}
+            for key, row in sorted(self._endpoints.items()):
+                calls = row["calls"] or 1
+                out[key] = {
+                    **{name: int(row[name]) for name in self._FIELDS},
+                    "avg_ms": round(row["total_ms"] / calls, 1),
+                    "max_ms": round(row["max_ms"], 1),
+                    "rate_wait_ms": round(row["rate_wait_ms"], 1),
+                }
+            return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._endpoints.clear()
+
+
+class ServiceTradeClient(requests.Session):
+    """``requests.Session`` with pooling, shared auth, rate limiting, retries and metrics."""
+
+    def __init__(
+        self,
+        *,
+        api_base: str = SERVICE_TRADE_API_BASE,
+        pool_maxsize: int = 32,
+        rate_per_second: float = 8.0,
+        burst: int = 16,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 20.0,
+        timeout: tuple[float, float] | float | None = (10.0, 60.0),
+        service_account: str | None = None,
+    ) -> None:
+        super().__init__()
+        self.api_base = api_base.rstrip("/")
+        self.headers.update({"Accept": "application/json"})
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(1, int(pool_maxsize)))
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+        self.rate_limiter = RateLimiter(rate_per_second, burst)
+        self.metrics = ServiceTradeMetrics()
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = float(backoff_base)
+        self.backoff_cap = float(backoff_cap)
+        self.default_timeout = timeout
+        self._auth_lock = threading.Lock()
+        self._credentials: tuple[str, str] | None = None
+        self._last_auth_response: requests.Response | None = None
+        self._auth_generation = 0
+        # Username that owns this session. ``None`` until the first login claims it
+        # when no service account was configured.
+        self._owner = service_account or None
+        self._parent: ServiceTradeClient | None = None
+        self._users_lock = threading.Lock()
+        self._user_clients: dict[str, ServiceTradeClient] = {}
+
+    # -- auth -----------------------------------------------------------------
+
+    @property
+    def is_authenticated(self) -> bool:
+        return self._credentials is not None
+
+    def _claims(self, creds: tuple[str, str]) -> bool:
+        """True when ``creds`` log in on this session rather than a per-user one."""
+        if self._parent is not None:
+            return True
+        with self._users_lock:
+            if self._owner is None:
+                self._owner = creds[0]
+            return self._owner == creds[0]
+
+    def _user_client(self, username: str) -> ServiceTradeClient:
+        """Per-user session sharing this client's pool, rate limit and metrics."""
+        with self._users_lock:
+            client = self._user_clients.get(username)
+            if client is None:
+                client = ServiceTradeClient(
+                    api_base=self.api_base,
+                    max_retries=self.max_retries,
+                    backoff_base=self.backoff_base,
+                    backoff_cap=self.backoff_cap,
+                    timeout=self.default_timeout,
+                )
+                client.adapters = self.adapters
+                client.rate_limiter = self.rate_limiter
+                client.metrics = self.metrics
+                client._owner = username
+                client._parent = self
+                self._user_clients[username] = client
+                log.info("ServiceTrade session opened for user %s", username)
+            return client
+
+    def _routed(self) -> ServiceTradeClient:
+        """The session serving the current thread: its bound user's, else this one."""
+        if self._parent is not None:
+            return self
+        creds = bound_credentials()
+        if creds is None or creds[0] == self._owner:
+            return self
+        with self._users_lock:
+            client = self._user_clients.get(creds[0])
+        return client if client is not None else self
+
+    def authenticate(self, username: str, password: str, *, force: bool = False) -> None:
+        """Log in once per credential pair; later callers reuse the session cookie."""
+        creds = (str(username), str(password))
+        _bind_credentials(creds)
+        if not self._claims(creds):
+            self._user_client(creds[0]).authenticate(*creds, force=force)
+            return
+        with self._auth_lock:
+            if not force and self._credentials == creds:
+                return
+            self._login(creds)
+
+    def _login(self, creds: tuple[str, str]) -> None:
+        # Caller holds ``_auth_lock``.
+        resp = self._send_with_retries(
+            "POST",
+            f"{self.api_base}/auth",
+            {"json": {"username": creds[0], "password": creds[1]}},
+        )
+        if resp.status_code >= 400:
+            self._credentials = None
+            self._last_auth_response = None
+        resp.raise_for_status()
+        self._credentials = creds
+        self._last_auth_response = resp
+        self._auth_generation += 1
+
+    def _reauthenticate(self, seen_generation: int) -> bool:
+        """Re-login after a 401; threads that raced on the same expiry share one login."""
+        with self._auth_lock:
+            if self._credentials is None:
+                return False
+            if self._auth_generation != seen_generation:
+                return True
+            try:
+                self._login(self._credentials)
+            except requests.RequestException:
+                log.warning("ServiceTrade re-authentication failed")
+                return False
+            return True
+
+    # -- requests.Session hook ------------------------------------------------
+
+    def request(self, method: str, url: str, *args: Any, **kwargs: Any) -> requests.Response:
+        method = method.upper()
+        if kwargs.get("timeout") is None and self.default_timeout is not None:
+            kwargs["timeout"] = self.default_timeout
+        if _is_auth_url(url) and method == "POST":
+            return self._record_auth_post(url, args, kwargs)
+        routed = self._routed()
+        if routed is not self:
+            return routed.request(method, url, *args, **kwargs)
+
+        generation = self._auth_generation
+        resp = self._send_with_retries(method, url, kwargs, args)
+        if resp.status_code == 401 and self._reauthenticate(generation):
+            self.metrics.bump(endpoint_key(method, url), "reauths")
+            resp = self._send_with_retries(method, url, kwargs, args)
+        return resp
+
+    def _record_auth_post(self, url: str, args: tuple, kwargs: dict[str, Any]) -> requests.Response:
+        """Legacy ``session.post(.../auth, json=...)`` callers keep working and arm re-auth.
+
+        A repeat login with the credentials that already hold the session returns the
+        previous successful response instead of hitting ``/auth`` again.
+        """
+        payload = kwargs.get("json") or {}
+        creds = None
+        if payload.get("username") and payload.get("password"):
+            creds = (str(payload["username"]), str(payload["password"]))
+            _bind_credentials(creds)
+            if not self._claims(creds):
+                return self._user_client(creds[0])._record_auth_post(url, args, kwargs)
+        with self._auth_lock:
+            if creds is not None and creds == self._credentials and self._last_auth_response is not None:
+                return self._last_auth_response
+            resp = self._send_with_retries("POST", url, kwargs, args)
+            if resp.ok and creds is not None:
+                self._credentials = creds
+                self._last_auth_response = resp
+                self._auth_generation += 1
+        return resp
+
+    def _backoff_seconds(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def _send_with_retries(
+        self,
+        method: str,
+        url: str,
+        kwargs: dict[str, Any],
+        args: tuple = (),
+    ) -> requests.Response:
+        key = endpoint_key(method, url)
+        if "timeout" not in kwargs and self.default_timeout is not None:
+            kwargs = {**kwargs, "timeout": self.default_timeout}
+        retry_errors = method in _IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            waited = self.rate_limiter.acquire()
+            started = time.perf_counter()
+            try:
+                resp = super().request(method, url, *args, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                self.metrics.record(key, elapsed_ms=elapsed_ms, status=None, rate_wait_ms=waited * 1000)
+                if isinstance(exc, requests.Timeout):
+                    self.metrics.bump(key, "timeouts")
+                if not retry_errors or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff_seconds(attempt)
+                log.warning("ServiceTrade %s failed (%s); retry %d in %.1fs", key, exc.__class__.__name__, attempt + 1, delay)
+            else:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                self.metrics.record(key, elapsed_ms=elapsed_ms, status=resp.status_code, rate_wait_ms=waited * 1000)
+                status = resp.status_code
+                if status not in _RETRY_STATUSES or attempt >= self.max_retries:
+                    return resp
+                if status != 429 and not retry_errors:
+                    return resp
+                delay = self._backoff_seconds(attempt)
+                if status == 429:
+                    self.metrics.bump(key, "throttled")
+                    retry_after = _retry_after_seconds(resp)
+                    if retry_after is not None:
+                        delay = max(delay, retry_after)
+                    self.rate_limiter.pause(delay)
+                log.warning("ServiceTrade %s returned %s; retry %d in %.1fs", key, status, attempt + 1, delay)
+                resp.close()
+            self.metrics.bump(key, "retries")
+            attempt += 1
+            time.sleep(delay)
+
+
+def _retry_after_seconds(resp: requests.Response) -> float | None:
+    raw = (resp.headers.get("Retry-After") or "").strip()
+    if not raw:
+        return None
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        return None
+
+
+_CLIENT: ServiceTradeClient | None = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def service_trade_client() -> ServiceTradeClient:
+    """Shared client for this process (Waitress threads, executors and scripts alike)."""
+    global _CLIENT
+    if _CLIENT is None:
+        with _CLIENT_LOCK:
+            if _CLIENT is None:
+                _CLIENT = ServiceTradeClient(
+                    service_account=os.getenv("PROCESSING_USERNAME"),
+                    pool_maxsize=_env_int("SERVICE_TRADE_POOL_MAXSIZE", 32),
+                    rate_per_second=_env_float("SERVICE_TRADE_RATE_PER_SECOND", 8.0),
+                    burst=_env_int("SERVICE_TRADE_RATE_BURST", 16),
+                    max_retries=_env_int("SERVICE_TRADE_MAX_RETRIES", 4),
+                    timeout=(
+                        _env_float("SERVICE_TRADE_CONNECT_TIMEOUT_SECONDS", 10.0),
+                        _env_float("SERVICE_TRADE_READ_TIMEOUT_SECONDS", 60.0),
+                    ),
+                )
+    return _CLIENT
+
+
+def authenticate_service_trade_session(http: requests.Session, username: str, password: str) -> None:
+    """Authenticate ``http``; shared clients skip the login when these credentials already hold it."""
+    if isinstance(http, ServiceTradeClient):
+        http.authenticate(username, password)
+        return
+    http.headers.setdefault("Accept", "application/json")
+    resp = http.post(f"{SERVICE_TRADE_API_BASE}/auth", json={"username": username, "password": password})
+    resp.raise_for_status()
+
+
+def init_service_trade_client(app) -> None:
+    """Drop each request's ServiceTrade user binding so a reused worker thread starts clean."""
+
+    @app.teardown_request
+    def _clear_service_trade_user(_exc=None):
+        clear_bound_credentials()
+
+
+def service_trade_client_stats() -> dict[str, Any]:
+    client = _CLIENT
+    if client is None:
+        return {"authenticated": False, "endpoints": {}}
+    return {"authenticated": client.is_authenticated, "endpoints": client.metrics.snapshot()}
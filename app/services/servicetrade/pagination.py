@@ -0,0 +1,115 @@
+"""Concurrent, order-preserving walk over ServiceTrade ``page``/``totalPages`` listings.
+
+Page 1 is fetched on the caller's thread to learn ``totalPages``; pages 2..N are then fetched
+by a small worker pool with at most ``max_workers * 2`` pages in flight, and handed back
+strictly in page order as they complete. Callers iterate the generator and can start
+processing (or upserting) page 1 while later pages are still on the wire. Closing the
+generator early cancels pages that have not started.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator
+
+from flask import current_app, has_app_context
+
+from .client import propagate_credentials
+
+log = logging.getLogger("servicetrade-pagination")
+
+FetchPage = Callable[[int], "dict[str, Any] | None"]
+
+
+@dataclass(frozen=True)
+class PageResult:
+    page: int
+    total_pages: int
+    data: dict[str, Any]
+
+
+def default_page_workers() -> int:
+    try:
+        return max(1, int((os.getenv("SERVICE_TRADE_PAGE_WORKERS") or "").strip() or 4))
+    except ValueError:
+        return 4
+
+
+def _in_app_context(fetch_page: FetchPage) -> FetchPage:
+    """Worker threads get the caller's app context (fetchers may log via ``current_app``)
+    and call ServiceTrade as the caller's user."""
+    fetch_page = propagate_credentials(fetch_page)
+    if not has_app_context():
+        return fetch_page
+    app = current_app._get_current_object()
+
+    def run(page: int):
+        with app.app_context():
+            return fetch_page(page)
+
+    return run
+
+
+def iter_paginated_pages(
+    fetch_page: FetchPage,
+    *,
+    max_workers: int | None = None,
+    total_pages_key: str = "totalPages",
+) -> Iterator[PageResult]:
+    """Yield every page's ``data`` payload in page order.
+
+    ``fetch_page(n)`` returns the response's ``data`` dict, or ``None`` when the page
+    failed; failed pages are logged and skipped (page 1 failing ends the walk).
+    """
+    first = fetch_page(1)
+    if not first:
+        return
+    try:
+        total_pages = max(1, int(first.get(total_pages_key) or 1))
+    except (TypeError, ValueError):
+        total_pages = 1
+    yield PageResult(page=1, total_pages=total_pages, data=first)
+    if total_pages <= 1:
+        return
+
+    workers = max(1, int(max_workers or default_page_workers()))
+    window = workers * 2
+    fetch = _in_app_context(fetch_page)
+    pending: deque[tuple[int, Future]] = deque()
+    next_page = 2
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="st-pages")
+    try:
+        while pending or next_page <= total_pages:
+            while next_page <= total_pages and len(pending) < window:
+                pending.append((next_page, executor.submit(fetch, next_page)))
+                next_page += 1
+            page, future = pending.popleft()
+            try:
+                data = future.result()
+            except Exception:
+                log.exception("ServiceTrade page %d/%d failed", page, total_pages)
+                data = None
+            if not data:
+                log.warning("ServiceTrade page %d/%d returned no data; skipping", page, total_pages)
+                continue
+            yield PageResult(page=page, total_pages=total_pages, data=data)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_paginated_items(
+    fetch_page: FetchPage,
+    items_key: str,
+    *,
+    max_workers: int | None = None,
+    on_page: Callable[[PageResult], None] | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Flatten ``data[items_key]`` across pages, preserving ServiceTrade's order."""
+    for result in iter_paginated_pages(fetch_page, max_workers=max_workers):
+        if on_page is not None:
+            on_page(result)
+        yield from result.data.get(items_key) or []
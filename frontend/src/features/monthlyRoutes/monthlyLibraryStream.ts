@@ -0,0 +1,67 @@
+import { apiFetch, formatApiErrorMessage, readApiErrorBody } from '../../lib/apiClient'
+import type { LibraryLocation, LibraryPayload } from './monthlyRoutesShared'
+
+type LibraryStreamEvent =
+  | { type: 'meta'; meta: LibraryPayload['meta'] }
+  | { type: 'locations'; locations: LibraryLocation[] }
+  | { type: 'end'; month_columns: string[]; total: number }
+
+/**
+ * ``GET /api/monthly_routes/library?format=ndjson``: the server serializes locations in
+ * batches as they are fetched, so large unpaginated pulls (map view) never build one
+ * giant JSON body. ``onBatch`` sees each batch as it arrives; resolves to the full payload.
+ */
+export async function streamLibraryPayload(
+  params: URLSearchParams,
+  options: { signal?: AbortSignal; onBatch?: (locations: LibraryLocation[]) => void } = {},
+): Promise<LibraryPayload> {
+  const qs = new URLSearchParams(params)
+  qs.set('format', 'ndjson')
+  const res = await apiFetch(`/api/monthly_routes/library?${qs.toString()}`, { signal: options.signal })
+  if (!res.ok) {
+    const body = await readApiErrorBody(res)
+    throw new Error(formatApiErrorMessage(res.status, body, 'Unable to load monthly library.'))
+  }
+  if (!res.body) {
+    throw new Error('No response body from monthly library stream.')
+  }
+
+  const payload: LibraryPayload = {
+    locations: [],
+    month_columns: [],
+    meta: { routes: [], min_month: null, max_month: null },
+  }
+  const apply = (event: LibraryStreamEvent) => {
+    if (event.type === 'meta') {
+      payload.meta = event.meta
+    } else if (event.type === 'locations') {
+      payload.locations.push(...event.locations)
+      options.onBatch?.(event.locations)
+    } else if (event.type === 'end') {
+      payload.month_columns = event.month_columns
+    }
+  }
+
+  const reader = res.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+
+  while (true) {
+    const { done, value } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+    const lines = buffer.split('\n')
+    buffer = lines.pop() ?? ''
+    for (const line of lines) {
+      const trimmed = line.trim()
+      if (!trimmed) continue
+      apply(JSON.parse(trimmed) as LibraryStreamEvent)
+    }
+  }
+
+  const tail = buffer.trim()
+  if (tail) {
+    apply(JSON.parse(tail) as LibraryStreamEvent)
+  }
+  return payload
+}
@@ -854,6 +854,17 @@ export type TechnicianWorksheetPayload = {
   locations?: TechnicianWorksheetLocation[]
   /** Legacy API alias; normalized to ``locations`` on load. */
   stops?: TechnicianWorksheetLocation[]
+  /** Stop revision token; send back as ``since_revision`` to fetch only changed stops. */
+  revision?: string | null
+  /** Present on ``since_revision`` reads: ``locations``/``rows`` hold only the changed stops. */
+  delta?: TechnicianWorksheetDelta
+}
+
+export type TechnicianWorksheetDelta = {
+  since_revision: string
+  /** Full stop order after the change. */
+  location_ids: number[]
+  removed_location_ids: number[]
 }
 
 /** Normalize worksheet payload from API (``stops`` alias, legacy field names). */
@@ -879,6 +890,36 @@ export function worksheetPayloadLocations(
   return payload?.locations ?? payload?.stops ?? []
 }
 
+/**
+ * Expand a ``since_revision`` delta against the payload it was requested from.
+ * Returns ``null`` when ``base`` is missing a stop the delta expects the client to hold.
+ */
+export function applyWorksheetDelta(
+  base: TechnicianWorksheetPayload,
+  delta: TechnicianWorksheetPayload,
+): TechnicianWorksheetPayload | null {
+  const info = delta.delta
+  if (!info) return delta
+  const changed = new Map(worksheetPayloadLocations(delta).map((s) => [s.location_id, s]))
+  const held = new Map(worksheetPayloadLocations(base).map((s) => [s.location_id, s]))
+  const locations: TechnicianWorksheetLocation[] = []
+  for (const id of info.location_ids) {
+    const stop = changed.get(id) ?? held.get(id)
+    if (!stop) return null
+    locations.push(stop)
+  }
+  const changedRows = new Map(delta.rows.map((r) => [r.location_id, r]))
+  const keep = new Set(info.location_ids)
+  const rows = base.rows
+    .filter((r) => keep.has(r.location_id))
+    .map((r) => changedRows.get(r.location_id) ?? r)
+  const baseRowIds = new Set(base.rows.map((r) => r.location_id))
+  for (const r of delta.rows) {
+    if (!baseRowIds.has(r.location_id)) rows.push(r)
+  }
+  return { ...delta, rows, locations, stops: undefined, delta: undefined }
+}
+
 export function withWorksheetLocations(
   payload: TechnicianWorksheetPayload,
   locations: TechnicianWorksheetLocation[],
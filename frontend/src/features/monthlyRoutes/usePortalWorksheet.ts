@@ -1,6 +1,7 @@
 import { useCallback, useEffect, useMemo, useRef, useState } from 'react'
 import { useLocation } from 'react-router-dom'
 import {
+  applyWorksheetDelta,
   monthFirstIsoPacificToday,
   normalizeWorksheetPayload,
   parseYearMonth,
@@ -90,6 +91,23 @@ function formatMonthHeading(monthFirstIso: string): string {
   }).format(new Date(Date.UTC(ym.year, ym.month - 1, 1)))
 }
 
+/** Matches the server's ``WORKSHEET_MUTATION_BATCH_LIMIT``; the rest replay on the next pass. */
+const WORKSHEET_MUTATION_BATCH_LIMIT = 200
+
+type WorksheetMutationBatchResponse = {
+  ok: boolean
+  results: Array<{
+    client_mutation_id: string | null
+    location_id: number | null
+    ok: boolean
+    status: number
+    deduped?: boolean
+    code?: string
+    error?: string
+  }>
+  stops: TechnicianWorksheetLocation[]
+}
+
 export function usePortalWorksheet(routeId: number, monthIso: string) {
   const monthOk = MONTH_FIRST_RE.test(monthIso) && parseYearMonth(monthIso) != null
 
@@ -193,12 +211,24 @@ export function usePortalWorksheet(routeId: number, monthIso: string) {
           qs.set('refresh_paperwork', '1')
           markPortalPaperworkRefreshRequested(routeId, monthIso)
         }
-        const data = normalizeWorksheetPayload(
-          await apiJson<TechnicianWorksheetPayload>(
-            `/api/monthly_routes/routes/${routeId}/worksheet?${qs.toString()}`,
-            { signal },
-          ),
-        )
+        const fetchPayload = async (params: URLSearchParams) =>
+          normalizeWorksheetPayload(
+            await apiJson<TechnicianWorksheetPayload>(
+              `/api/monthly_routes/routes/${routeId}/worksheet?${params.toString()}`,
+              { signal },
+            ),
+          )
+        // Background refreshes only pull stops changed since the cached revision.
+        const deltaBase = fetchMode === 'background' && cached?.revision ? cached : null
+        let data: TechnicianWorksheetPayload
+        if (deltaBase) {
+          const deltaQs = new URLSearchParams(qs)
+          deltaQs.set('since_revision', deltaBase.revision ?? '')
+          const delta = await fetchPayload(deltaQs)
+          data = applyWorksheetDelta(deltaBase, delta) ?? (await fetchPayload(qs))
+        } else {
+          data = await fetchPayload(qs)
+        }
         if (signal?.aborted) return
         const localBaseline = loadWorksheetCache(routeId, monthIso) ?? cached
         const externallyReset = serverRunWasExternallyReset(
@@ -308,56 +338,85 @@ export function usePortalWorksheet(routeId: number, monthIso: string) {
     syncingRef.current = true
     setSyncState('syncing')
     let nextQueue = [...queue]
-    for (const item of queue) {
-      if (item.nextAttemptAt > Date.now()) continue
-      if (item.routeId !== routeId || item.monthIso !== monthIso) continue
-      const locationId = item.locationId
-      if (locationId == null) continue
+    const due = queue
+      .filter(
+        (item) =>
+          item.nextAttemptAt <= Date.now() &&
+          item.routeId === routeId &&
+          item.monthIso === monthIso &&
+          item.locationId != null,
+      )
+      .slice(0, WORKSHEET_MUTATION_BATCH_LIMIT)
+    const retryLater = (ids: Set<string>) => {
+      nextQueue = nextQueue.map((q) =>
+        !ids.has(q.id)
+          ? q
+          : {
+              ...q,
+              attempts: q.attempts + 1,
+              nextAttemptAt: Date.now() + backoffMs(q.attempts + 1),
+            },
+      )
+    }
+    if (due.length > 0) {
       try {
-        const qs = new URLSearchParams({ month: item.monthIso, tech_portal: '1' })
-        const res = await apiJson<{ stop: TechnicianWorksheetLocation }>(
-          `/api/monthly_routes/routes/${item.routeId}/worksheet/locations/${locationId}?${qs.toString()}`,
+        // One request replays every queued edit in order; the server reports each mutation.
+        const qs = new URLSearchParams({ month: monthIso, tech_portal: '1' })
+        const res = await apiJson<WorksheetMutationBatchResponse>(
+          `/api/monthly_routes/routes/${routeId}/worksheet/mutations?${qs.toString()}`,
           {
-            method: 'PATCH',
+            method: 'POST',
             body: JSON.stringify({
-              expected_updated_at: item.expectedUpdatedAt,
-              client_mutation_id: item.id,
-              client_mutated_at: item.clientMutatedAt,
-              source: 'technician_app',
-              changes: worksheetStopChangesForSync(item.changes),
+              mutations: due.map((item) => ({
+                kind: 'stop',
+                location_id: item.locationId,
+                expected_updated_at: item.expectedUpdatedAt,
+                client_mutation_id: item.id,
+                client_mutated_at: item.clientMutatedAt,
+                source: 'technician_app',
+                changes: worksheetStopChangesForSync(item.changes),
+              })),
             }),
           },
         )
-        let mergedStopForQueue: TechnicianWorksheetLocation = res.stop
+        const doneIds = new Set<string>()
+        const failedIds = new Set<string>()
+        res.results.forEach((result, index) => {
+          const itemId = due[index]?.id
+          if (!itemId) return
+          if (result.ok) {
+            doneIds.add(itemId)
+          } else {
+            failedIds.add(itemId)
+            if (result.code === 'open_clock_in_conflict') {
+              window.alert(WORKSHEET_CLOCK_IN_BLOCKED_MESSAGE)
+            }
+          }
+        })
+        nextQueue = nextQueue.filter((q) => !doneIds.has(q.id))
+        // Persist first so only still-pending edits are layered over the server stops.
+        saveSyncQueue(nextQueue)
+        const serverStops = new Map(res.stops.map((stop) => [stop.location_id, stop] as const))
         setPayload((prev) => {
           const base = worksheetPayloadLocations(prev)
-          if (!base.length) return prev
-          const prevStop = base.find((s) => s.location_id === locationId)
-          const mergedStop = applyServerStopWithPending(
-            res.stop,
-            item.routeId,
-            item.monthIso,
-            item.id,
-            prevStop,
-          )
-          mergedStopForQueue = mergedStop
-          const nextStops = base.map((s) =>
-            s.location_id === locationId ? mergedStop : s,
-          )
+          if (!base.length || serverStops.size === 0) return prev
+          const nextStops = base.map((s) => {
+            const serverStop = serverStops.get(s.location_id)
+            if (!serverStop) return s
+            return applyServerStopWithPending(serverStop, routeId, monthIso, '', s)
+          })
           const next = withWorksheetLocations(prev!, nextStops)
           saveWorksheetCache(next)
           return next
         })
         suppressRemoteRefreshUntilRef.current = Date.now() + 2500
-        nextQueue = nextQueue
-          .filter((q) => q.id !== item.id)
-          .map((q) =>
-            q.routeId === item.routeId &&
-            q.monthIso === item.monthIso &&
-            q.locationId === locationId
-              ? { ...q, expectedUpdatedAt: mergedStopForQueue.version_updated_at }
-              : q,
-          )
+        nextQueue = nextQueue.map((q) => {
+          const mergedStop = q.locationId != null ? serverStops.get(q.locationId) : undefined
+          return mergedStop && q.routeId === routeId && q.monthIso === monthIso
+            ? { ...q, expectedUpdatedAt: mergedStop.version_updated_at }
+            : q
+        })
+        retryLater(failedIds)
       } catch (e) {
         const maybeErr = e as { error?: unknown; conflict?: { message?: string } }
         if (maybeErr?.error === 'conflict' || maybeErr?.conflict) {
@@ -366,23 +425,7 @@ export function usePortalWorksheet(routeId: number, monthIso: string) {
           syncingRef.current = false
           return
         }
-        if (
-          typeof maybeErr === 'object' &&
-          maybeErr != null &&
-          'code' in (maybeErr as Record<string, unknown>) &&
-          (maybeErr as { code?: string }).code === 'open_clock_in_conflict'
-        ) {
-          window.alert(WORKSHEET_CLOCK_IN_BLOCKED_MESSAGE)
-        }
-        nextQueue = nextQueue.map((q) =>
-          q.id !== item.id
-            ? q
-            : {
-                ...q,
-                attempts: q.attempts + 1,
-                nextAttemptAt: Date.now() + backoffMs(q.attempts + 1),
-              },
-        )
+        retryLater(new Set(due.map((item) => item.id)))
       }
     }
     saveSyncQueue(nextQueue)
@@ -851,6 +894,7 @@ export function usePortalWorksheet(routeId: number, monthIso: string) {
             revision?: string
             route_id?: number
             month_date?: string
+            location_ids?: number[]
           }
           if (msg.route_id !== routeId || msg.month_date !== monthIso) return
         } catch {
@@ -5,6 +5,7 @@ import { Link } from 'react-router-dom'
 import mapboxgl from 'mapbox-gl'
 import 'mapbox-gl/dist/mapbox-gl.css'
 import AddMonthlyLocationWizardModal from '../features/monthlyRoutes/AddMonthlyLocationWizardModal'
+import { streamLibraryPayload } from '../features/monthlyRoutes/monthlyLibraryStream'
 import { isTechnicianDemoLibraryLocation } from '../features/monthlyRoutes/technicianDemoRoute'
 import {
   MAP_ROUTE_UNASSIGNED,
@@ -131,12 +132,9 @@ export default function MonthlyRoutesMapPage() {
     const finish = { year: fallback.year, month: 12 }
     params.set('from_month', toMonthKey(start.year, start.month))
     params.set('to_month', toMonthKey(finish.year, finish.month))
-    params.set('unpaginated', 'true')
     params.set('include_coordinates', 'true')
 
-    apiJson<LibraryPayload>(`/api/monthly_routes/library?${params.toString()}`, {
-      signal: controller.signal,
-    })
+    streamLibraryPayload(params, { signal: controller.signal })
       .then((data) => {
         if (active) setMapPayload(data)
       })
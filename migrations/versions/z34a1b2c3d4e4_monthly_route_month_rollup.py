@@ -0,0 +1,56 @@
+"""Per-route, per-month testing rollup for dashboard reads.
+
+Creates ``monthly_route_month_rollup`` and backfills it from ``monthly_location_month``
+(same computation as ``flask rebuild-route-month-rollup``).
+
+Revision ID: z34a1b2c3d4e4
+Revises: z33a1b2c3d4e3
+Create Date: 2026-07-02
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "z34a1b2c3d4e4"
+down_revision = "z33a1b2c3d4e3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "monthly_route_month_rollup",
+        sa.Column(
+            "monthly_route_id",
+            sa.BigInteger(),
+            sa.ForeignKey("monthly_route.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("month_date", sa.Date(), primary_key=True),
+        sa.Column("sites_tested_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("skipped_annual_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("skipped_non_annual_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("tested_revenue_total", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        sa.Column(
+            "tested_sites_missing_price_count",
+            sa.Integer(),
+            nullable=False,
+            server_default="0",
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+    )
+
+    from app.monthly.route_month_rollup import rebuild_route_month_rollup
+
+    rebuild_route_month_rollup(connection=op.get_bind())
+
+
+def downgrade() -> None:
+    op.drop_table("monthly_route_month_rollup")
@@ -0,0 +1,57 @@
+"""Search documents + pg_trgm GIN indexes for library and keys search.
+
+Adds ``search_document`` to ``monthly_location`` and ``keys``, backfills it
+(same computation as ``flask rebuild-search-index``), and on Postgres indexes it with
+``gin_trgm_ops`` so ``LIKE '%q%'`` stops scanning the tables.
+
+Revision ID: z35a1b2c3d4e5
+Revises: z34a1b2c3d4e4
+Create Date: 2026-07-06
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "z35a1b2c3d4e5"
+down_revision = "z34a1b2c3d4e4"
+branch_labels = None
+depends_on = None
+
+
+_INDEXES = (
+    ("ix_monthly_location_search_document_trgm", "monthly_location"),
+    ("ix_keys_search_document_trgm", "keys"),
+)
+
+
+def upgrade() -> None:
+    op.add_column("monthly_location", sa.Column("search_document", sa.Text(), nullable=True))
+    op.add_column("keys", sa.Column("search_document", sa.Text(), nullable=True))
+
+    from app.search_index import rebuild_search_documents
+
+    bind = op.get_bind()
+    rebuild_search_documents(connection=bind)
+
+    if bind.dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for name, table in _INDEXES:
+            op.create_index(
+                name,
+                table,
+                ["search_document"],
+                postgresql_using="gin",
+                postgresql_ops={"search_document": "gin_trgm_ops"},
+            )
+    else:
+        for name, table in _INDEXES:
+            op.create_index(name, table, ["search_document"])
+
+
+def downgrade() -> None:
+    for name, table in _INDEXES:
+        op.drop_index(name, table_name=table)
+    op.drop_column("keys", "search_document")
+    op.drop_column("monthly_location", "search_document")
@@ -0,0 +1,41 @@
+"""Per-route-month freshness of the cached ServiceTrade annual schedule flags.
+
+Creates ``monthly_route_annual_schedule_sync``; rows are written by the nightly
+``sync_monthly_route_annual_schedules`` precompute and by live paperwork refreshes.
+
+Revision ID: z36a1b2c3d4e6
+Revises: z35a1b2c3d4e5
+Create Date: 2026-07-09
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "z36a1b2c3d4e6"
+down_revision = "z35a1b2c3d4e5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "monthly_route_annual_schedule_sync",
+        sa.Column(
+            "monthly_route_id",
+            sa.BigInteger(),
+            sa.ForeignKey("monthly_route.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("month_date", sa.Date(), primary_key=True),
+        sa.Column("synced_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_attempt_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("location_count", sa.Integer(), nullable=True),
+        sa.Column("duration_ms", sa.Integer(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("monthly_route_annual_schedule_sync")
@@ -0,0 +1,42 @@
+"""Coordinate-keyed Mapbox Directions leg cache.
+
+Creates ``mapbox_directions_leg`` so route path recalculation after a stop reorder only
+requests the chunks containing legs that are not cached yet.
+
+Revision ID: z37a1b2c3d4e7
+Revises: z36a1b2c3d4e6
+Create Date: 2026-07-13
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "z37a1b2c3d4e7"
+down_revision = "z36a1b2c3d4e6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "mapbox_directions_leg",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("profile", sa.String(length=32), nullable=False),
+        sa.Column("leg_key", sa.String(length=64), nullable=False),
+        sa.Column("coordinates", sa.JSON(), nullable=False),
+        sa.Column("distance_meters", sa.Float(), nullable=False),
+        sa.Column("duration_seconds", sa.Float(), nullable=False),
+        sa.Column(
+            "fetched_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.UniqueConstraint("profile", "leg_key", name="uq_mapbox_directions_leg_profile_key"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("mapbox_directions_leg")
@@ -0,0 +1,43 @@
+"""Persistent Mapbox geocoding cache.
+
+Creates ``mapbox_geocode_cache`` so library listings, address pickers and route geocoding
+read cached coordinates instead of calling Mapbox on every request.
+
+Revision ID: z38a1b2c3d4e8
+Revises: z37a1b2c3d4e7
+Create Date: 2026-07-20
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "z38a1b2c3d4e8"
+down_revision = "z37a1b2c3d4e7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "mapbox_geocode_cache",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("kind", sa.String(length=16), nullable=False),
+        sa.Column("query_key", sa.String(length=64), nullable=False),
+        sa.Column("query_text", sa.Text(), nullable=False),
+        sa.Column("latitude", sa.Float(), nullable=True),
+        sa.Column("longitude", sa.Float(), nullable=True),
+        sa.Column("candidates", sa.JSON(), nullable=True),
+        sa.Column(
+            "fetched_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.UniqueConstraint("kind", "query_key", name="uq_mapbox_geocode_cache_kind_key"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("mapbox_geocode_cache")
@@ -0,0 +1,30 @@
+"""Denylist version on ``deficiency_service_eligibility``.
+
+Lets the full reclassification pass skip deficiencies whose description hash and
+non-quoteable phrase set are both unchanged since they were last classified.
+
+Revision ID: z39a1b2c3d4e9
+Revises: z38a1b2c3d4e8
+Create Date: 2026-07-27
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "z39a1b2c3d4e9"
+down_revision = "z38a1b2c3d4e8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "deficiency_service_eligibility",
+        sa.Column("phrase_set_version", sa.String(length=64), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("deficiency_service_eligibility", "phrase_set_version")
@@ -0,0 +1,34 @@
+"""Shared Processing Attack KPI snapshot.
+
+Creates ``processing_snapshot`` so the processing endpoints, the intraday capture and the
+daily script read one persisted ServiceTrade snapshot instead of each refetching it.
+
+Revision ID: z40a1b2c3d4f0
+Revises: z39a1b2c3d4e9
+Create Date: 2026-08-03
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "z40a1b2c3d4f0"
+down_revision = "z39a1b2c3d4e9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "processing_snapshot",
+        sa.Column("snapshot_key", sa.String(length=32), primary_key=True),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("appointment_max", sa.JSON(), nullable=True),
+        sa.Column("built_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("build_ms", sa.Integer(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("processing_snapshot")
@@ -0,0 +1,33 @@
+"""Service-event sync checkpoints.
+
+Creates ``service_event_sync_checkpoint`` so ``update_service_events.py`` can resume after a
+crash and only revisit locations changed since their last completed sync.
+
+Revision ID: z41a1b2c3d4f1
+Revises: z40a1b2c3d4f0
+Create Date: 2026-08-10
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "z41a1b2c3d4f1"
+down_revision = "z40a1b2c3d4f0"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "service_event_sync_checkpoint",
+        sa.Column("location_id", sa.BigInteger(), primary_key=True),
+        sa.Column("watermark", sa.BigInteger(), nullable=False),
+        sa.Column("rows_written", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("service_event_sync_checkpoint")
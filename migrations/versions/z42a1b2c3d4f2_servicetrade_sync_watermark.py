@@ -0,0 +1,33 @@
+"""ServiceTrade sync watermarks.
+
+Creates ``servicetrade_sync_watermark`` so ``update_deficiencies`` and ``update_quotes`` can
+list only the records ServiceTrade reports updated since their last successful sync.
+
+Revision ID: z42a1b2c3d4f2
+Revises: z41a1b2c3d4f1
+Create Date: 2026-10-17
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "z42a1b2c3d4f2"
+down_revision = "z41a1b2c3d4f1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "servicetrade_sync_watermark",
+        sa.Column("entity", sa.String(length=32), primary_key=True),
+        sa.Column("synced_through", sa.BigInteger(), nullable=False),
+        sa.Column("rows_synced", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("servicetrade_sync_watermark")
@@ -0,0 +1,31 @@
+"""Service-event checkpoint revisit time.
+
+Adds ``service_event_sync_checkpoint.revisit_after`` (the earliest upcoming scheduled
+inspection seen) so ``update_service_events.py`` revisits a checkpointed location once that
+job moves from future to past, even if nothing in ServiceTrade was edited.
+
+Revision ID: z43a1b2c3d4f3
+Revises: z42a1b2c3d4f2
+Create Date: 2026-10-17
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "z43a1b2c3d4f3"
+down_revision = "z42a1b2c3d4f2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "service_event_sync_checkpoint",
+        sa.Column("revisit_after", sa.BigInteger(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("service_event_sync_checkpoint", "revisit_after")
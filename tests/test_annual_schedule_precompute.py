@@ -0,0 +1,131 @@
+"""Nightly annual-schedule precompute and the paperwork-view freshness gate."""
+
+from __future__ import annotations
+
+import threading
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from app import create_app
+from app.db_models import MonthlyLocationMonth, MonthlyRoute, MonthlyRouteAnnualScheduleSync, db
+from app.monthly import service_trade_annual_schedule as sas
+from app.scripts.sync_monthly_route_annual_schedules import refresh_route_annual_schedules
+from tests.monthly_location_helpers import WORKSHEET_TABLES, seed_route_with_two_stops
+
+PACIFIC_TZ = ZoneInfo("America/Vancouver")
+MONTH = date(2026, 6, 1)
+TABLES = [*WORKSHEET_TABLES, MonthlyRouteAnnualScheduleSync.__table__]
+
+
+def _snapshot(route_id: int, month_first: date) -> dict[str, object]:
+    row = {
+        "has_service_trade_link": True,
+        "service_trade_site_location_url": None,
+        "has_scheduled_annual_in_month": True,
+        "has_unreleased_annual_in_month": False,
+        "annual_spans_months": False,
+        "annual_skip_recommended": False,
+        "annual_test_recommended": True,
+        "spanning_job_id": None,
+        "prep_warning": None,
+    }
+    return {
+        "route_id": route_id,
+        "month_date": month_first.isoformat(),
+        "checked_at": datetime.now(PACIFIC_TZ).isoformat(),
+        "warning_count": 0,
+        "locations": {"101": {**row, "location_id": 101}, "9002": {**row, "location_id": 9002}},
+    }
+
+
+@pytest.fixture
+def annual_app(monkeypatch, tmp_path):
+    from app.monthly import worksheet_locations
+
+    monkeypatch.setattr(worksheet_locations, "_worksheet_month_is_prior_history_snapshot", lambda _month: False)
+    # File-backed so the precompute's worker threads each get their own connection.
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'annual.db'}")
+    monkeypatch.delenv("MONTHLY_ANNUAL_SCHEDULE_TTL_SECONDS", raising=False)
+    sas._paperwork_st_sync_recent.clear()
+    calls: list[tuple[int, date]] = []
+    lock = threading.Lock()
+
+    def build(route_id, month_first, **_kwargs):
+        with lock:
+            calls.append((int(route_id), month_first))
+        if int(route_id) == 2:
+            raise RuntimeError("ServiceTrade 503")
+        return _snapshot(int(route_id), month_first)
+
+    monkeypatch.setattr(sas, "build_route_annual_schedule_snapshot", build)
+    app = create_app()
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=TABLES)
+        seed_route_with_two_stops()
+        db.session.add(MonthlyRoute(id=2, route_number=7, weekday_iso=1, week_occurrence=1))
+        db.session.commit()
+        yield app, calls
+        db.session.remove()
+        db.metadata.drop_all(db.engine, tables=list(reversed(TABLES)))
+
+
+def test_paperwork_view_serves_fresh_cache_until_ttl(annual_app, monkeypatch):
+    _app, calls = annual_app
+    assert sas.route_annual_schedule_cache_fresh(1, MONTH) is False
+
+    sas.sync_route_annual_schedule(1, MONTH)
+    state = db.session.get(MonthlyRouteAnnualScheduleSync, (1, MONTH))
+    assert state.synced_at is not None and state.location_count == 2 and state.last_error is None
+    assert sas.route_annual_schedule_cache_fresh(1, MONTH) is True
+
+    assert sas.sync_route_annual_schedule_for_paperwork_view(1, MONTH) is False
+    assert calls == [(1, MONTH)]
+
+    later = datetime.now(PACIFIC_TZ) + timedelta(hours=27)
+    assert sas.route_annual_schedule_cache_fresh(1, MONTH, now=later) is False
+    monkeypatch.setenv("MONTHLY_ANNUAL_SCHEDULE_TTL_SECONDS", "0")
+    assert sas.sync_route_annual_schedule_for_paperwork_view(1, MONTH) is True
+    assert calls == [(1, MONTH), (1, MONTH)]
+
+
+def test_stop_without_flags_is_not_fresh(annual_app):
+    sas.sync_route_annual_schedule(1, MONTH)
+    mlm = MonthlyLocationMonth.query.filter_by(monthly_location_id=9002, month_date=MONTH).one()
+    mlm.st_annual_synced_at = None
+    db.session.commit()
+    assert sas.route_annual_schedule_cache_fresh(1, MONTH) is False
+
+
+def test_precompute_refreshes_every_route_month_and_records_failures(annual_app):
+    app, calls = annual_app
+    routes = MonthlyRoute.query.order_by(MonthlyRoute.id).all()
+    next_month = date(2026, 7, 1)
+
+    failures = refresh_route_annual_schedules(
+        app,
+        None,
+        routes=routes,
+        month_first_list=[MONTH, next_month],
+        workers=2,
+    )
+
+    assert failures == 2
+    assert sorted(calls) == [(1, MONTH), (1, next_month), (2, MONTH), (2, next_month)]
+    db.session.expire_all()
+    ok = db.session.get(MonthlyRouteAnnualScheduleSync, (1, next_month))
+    failed = db.session.get(MonthlyRouteAnnualScheduleSync, (2, MONTH))
+    assert ok.synced_at is not None and ok.location_count == 2
+    assert failed.synced_at is None and failed.last_error == "ServiceTrade 503"
+
+    calls.clear()
+    assert refresh_route_annual_schedules(
+        app,
+        None,
+        routes=routes[:1],
+        month_first_list=[MONTH, next_month],
+        workers=2,
+        skip_fresh=True,
+    ) == 0
+    assert calls == []
@@ -0,0 +1,147 @@
+"""Conditional GET: revision-probe ETags answer ``If-None-Match`` with 304 before serializing."""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from app import create_app
+from app.db_models import (
+    MonthlyLocationComment,
+    MonthlyLocationMonth,
+    MonthlyRouteComment,
+    MonthlyRouteRun,
+    db,
+)
+from app.routes import monthly_routes as mr_mod
+from tests.monthly_location_helpers import WORKSHEET_TABLES, seed_route_with_two_stops
+
+PACIFIC_TZ = ZoneInfo("America/Vancouver")
+MONTH = date(2026, 5, 1)
+TABLES = [*WORKSHEET_TABLES, MonthlyRouteComment.__table__]
+WORKSHEET_URL = "/api/monthly_routes/routes/1/worksheet?month=2026-05-01&tech_portal=1"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(mr_mod, "_current_pacific_month_first", lambda: MONTH)
+    monkeypatch.setattr(mr_mod, "_sync_st_annual_on_paperwork_view", lambda *_args: None)
+    monkeypatch.setenv("DATABASE_URL", "sqlite:///:memory:")
+    app = create_app()
+    app.config["TESTING"] = True
+
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=TABLES)
+        _seed()
+        with app.test_client() as client:
+            with client.session_transaction() as sess:
+                sess["authenticated"] = True
+                sess["tech_portal_unlocked"] = True
+                sess["username"] = "office_tester"
+            yield client
+        db.session.remove()
+        db.metadata.drop_all(db.engine, tables=list(reversed(TABLES)))
+
+
+def _seed() -> None:
+    from app.monthly.worksheet_locations import ensure_worksheet_stops_for_route_month
+
+    seed_route_with_two_stops()
+    run = MonthlyRouteRun(
+        id=5001,
+        monthly_route_id=1,
+        month_date=MONTH,
+        started_at=datetime(2026, 5, 2, 8, 0, tzinfo=PACIFIC_TZ),
+        # Already opened: the first worksheet read would otherwise stamp it and move the tag.
+        opened_at=datetime(2026, 5, 2, 8, 0, tzinfo=PACIFIC_TZ),
+        status="open",
+        source="technician_app",
+    )
+    db.session.add(run)
+    db.session.commit()
+    ensure_worksheet_stops_for_route_month(1, MONTH, run)
+    db.session.commit()
+
+
+def _revalidate(client, url: str) -> tuple[str, object]:
+    first = client.get(url)
+    assert first.status_code == 200, first.get_json()
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "private, no-cache"
+    return etag, client.get(url, headers={"If-None-Match": etag})
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        WORKSHEET_URL,
+        "/api/monthly_routes/routes/1/run_details?month=2026-05-01",
+        "/api/monthly_routes/library/101",
+    ],
+)
+def test_unchanged_read_is_not_modified(client, url):
+    etag, again = _revalidate(client, url)
+    assert again.status_code == 304
+    assert again.get_data() == b""
+    assert again.headers["ETag"] == etag
+
+
+def test_not_modified_skips_serialization(client, monkeypatch):
+    etag = client.get(WORKSHEET_URL).headers["ETag"]
+
+    def _explode(*_args, **_kwargs):
+        raise AssertionError("payload built for a 304")
+
+    monkeypatch.setattr(mr_mod, "_serialize_technician_worksheet_payload", _explode)
+    assert client.get(WORKSHEET_URL, headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_worksheet_read_syncs_annual_schedule_once(client, monkeypatch):
+    calls = []
+    monkeypatch.setattr(mr_mod, "_sync_st_annual_on_paperwork_view", lambda *args: calls.append(args))
+
+    assert client.get(WORKSHEET_URL).status_code == 200
+    assert calls == [(1, MONTH)]
+
+
+def test_stop_edit_changes_worksheet_and_run_details_tags(client):
+    urls = [WORKSHEET_URL, "/api/monthly_routes/routes/1/run_details?month=2026-05-01"]
+    tags = [client.get(url).headers["ETag"] for url in urls]
+
+    mlm = MonthlyLocationMonth.query.filter_by(monthly_location_id=9002, month_date=MONTH).one()
+    mlm.run_comments = "Gate code changed"
+    # SQLite ``now()`` has one-second resolution; pin a later stamp so the edit is always visible.
+    mlm.updated_at = datetime(2030, 1, 1)
+    db.session.commit()
+
+    for url, etag in zip(urls, tags):
+        res = client.get(url, headers={"If-None-Match": etag})
+        assert res.status_code == 200
+        assert res.headers["ETag"] != etag
+
+
+def test_deleted_comment_changes_library_tag(client):
+    db.session.add(MonthlyLocationComment(id=1, location_id=101, body="Dog on site", author_username="office_tester"))
+    db.session.commit()
+    url = "/api/monthly_routes/library/101"
+    etag = client.get(url).headers["ETag"]
+
+    db.session.delete(db.session.get(MonthlyLocationComment, 1))
+    db.session.commit()
+
+    res = client.get(url, headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.get_json()["comments"] == []
+
+
+def test_tag_varies_by_session_and_errors_are_untagged(client):
+    etag = client.get(WORKSHEET_URL).headers["ETag"]
+    with client.session_transaction() as sess:
+        sess["username"] = "someone_else"
+    assert client.get(WORKSHEET_URL, headers={"If-None-Match": etag}).status_code == 200
+
+    missing = client.get("/api/monthly_routes/routes/99/worksheet?month=2026-05-01")
+    assert missing.status_code == 404
+    assert "ETag" not in missing.headers
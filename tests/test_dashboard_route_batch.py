@@ -0,0 +1,178 @@
+"""Set-based dashboard route metrics: same numbers as the per-route helpers, bounded query count."""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from app.db_models import MonthlyLocation, MonthlyRoute, MonthlyRouteRun, MonthlyRouteRunTimingMonth, db
+from app.monthly import dashboard_route_metrics as drm
+from app.monthly.route_run_timing import median_run_duration_from_rows, route_median_run_duration_minutes
+from app.monthly.service_trade_route_run_timing import SYNC_STATUS_OK
+from app.routes import monthly_routes as mr_mod
+from tests.monthly_location_helpers import WORKSHEET_TABLES, make_location, make_location_month
+
+CURRENT_MONTH = date(2026, 6, 1)
+PACIFIC = ZoneInfo("America/Vancouver")
+ROUTE_COUNT = 50
+MONTH_COUNT = 24
+STOPS_PER_ROUTE = 3
+
+
+def _months() -> list[date]:
+    months = [CURRENT_MONTH]
+    while len(months) < MONTH_COUNT:
+        months.append(drm._previous_month_first(months[-1]))
+    return sorted(months)
+
+
+@pytest.fixture
+def seeded_app(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "sqlite:///:memory:")
+    monkeypatch.setattr(mr_mod, "_current_pacific_month_first", lambda: CURRENT_MONTH)
+    app = create_app()
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=WORKSHEET_TABLES)
+        _seed()
+        yield app
+        db.session.remove()
+        db.metadata.drop_all(db.engine, tables=list(reversed(WORKSHEET_TABLES)))
+
+
+def _seed() -> None:
+    months = _months()
+    objects: list[object] = []
+    mlm_id = run_id = timing_id = 1
+    for r in range(1, ROUTE_COUNT + 1):
+        objects.append(MonthlyRoute(id=r, route_number=r + 1, weekday_iso=r % 5, week_occurrence=1, tech_count=1 + r % 2))
+        for s in range(STOPS_PER_ROUTE):
+            loc_id = r * 100 + s
+            objects.append(
+                make_location(
+                    id=loc_id,
+                    address=f"{loc_id} Test St",
+                    monthly_route_id=r,
+                    route_stop_order=s,
+                    price_per_month=Decimal(50 + 10 * s) if s != 2 or r % 4 else None,
+                )
+            )
+        for m_idx, month in enumerate(months):
+            office_skip = (r + m_idx) % 7 == 0
+            now = datetime(month.year, month.month, 10, 9, tzinfo=PACIFIC)
+            objects.append(
+                MonthlyRouteRun(
+                    id=run_id,
+                    monthly_route_id=r,
+                    month_date=month,
+                    source="office_skip" if office_skip else "technician_app",
+                    status="completed",
+                    started_at=now,
+                    completed_at=now,
+                )
+            )
+            for s in range(STOPS_PER_ROUTE):
+                fields = {"result_status": "skipped", "skip_reason": "other"} if office_skip else {
+                    "result_status": "tested" if (s + m_idx) % 5 else "skipped",
+                    "skip_reason": None if (s + m_idx) % 5 else "annual inspection",
+                }
+                if s == 1 and m_idx % 3 == 0:
+                    fields["billing_status"] = "do_not_bill"
+                row = make_location_month(
+                    id=mlm_id,
+                    location_id=r * 100 + s,
+                    month_date=month,
+                    route_id=r,
+                    run_id=run_id,
+                    **fields,
+                )
+                if s == 0 and m_idx % 2:
+                    row.test_monthly_route_id = None  # legacy unstamped history
+                objects.append(row)
+                mlm_id += 1
+            if not office_skip:
+                duration = 300 + (r * 7 + m_idx * 11) % 120
+                objects.append(
+                    MonthlyRouteRunTimingMonth(
+                        id=timing_id,
+                        monthly_route_id=r,
+                        month_first=month,
+                        service_trade_job_id=10_000 + timing_id,
+                        clock_in_at=datetime(month.year, month.month, 15, 8, tzinfo=PACIFIC),
+                        clock_out_at=datetime(month.year, month.month, 15, 13 + m_idx % 3, (r * 5) % 60, tzinfo=PACIFIC),
+                        duration_minutes=duration,
+                        sync_status=SYNC_STATUS_OK,
+                    )
+                )
+                timing_id += 1
+            run_id += 1
+    db.session.add_all(objects)
+    db.session.commit()
+    # A site that moved routes keeps its stamped history on the old route.
+    db.session.get(MonthlyLocation, 101).monthly_route_id = 2
+    db.session.commit()
+
+
+class _QueryCounter:
+    def __init__(self, engine) -> None:
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args, **kwargs) -> None:
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+def test_breakdown_query_count_is_bounded(seeded_app):
+    db.session.expire_all()
+    with _QueryCounter(db.engine) as counter:
+        payload = drm.build_dashboard_route_breakdown(trailing_months=MONTH_COUNT, range_key="custom")
+
+    assert len(payload["rows"]) == ROUTE_COUNT
+    assert len(payload["revenue_columns"]) == MONTH_COUNT
+    assert counter.count <= 8
+
+
+def test_earnings_query_count_is_bounded(seeded_app):
+    db.session.expire_all()
+    with _QueryCounter(db.engine) as counter:
+        payload = drm.build_dashboard_route_earnings(trailing_months=MONTH_COUNT)
+
+    assert len(payload["top_earners"]) == drm.TOP_BOTTOM_ROUTE_COUNT
+    assert counter.count <= 8
+
+
+def test_batch_matches_per_route_helpers(seeded_app):
+    month_keys = {m.isoformat() for m in _months()}
+    columns = drm.build_breakdown_revenue_columns(min(_months()), max(_months()))
+    batch = drm.load_dashboard_route_batch(month_keys)
+    route_ids = [int(route.id) for route in batch.routes]
+    skipped = drm._office_skipped_month_keys_by_route(route_ids, month_keys)
+
+    for route_id in route_ids:
+        testing = batch.testing_by_month(route_id)
+        assert drm._revenue_total_from_testing(testing, month_keys) == pytest.approx(
+            drm._route_revenue_total(route_id, month_keys)
+        )
+        assert drm._avg_monthly_revenue_from_testing(testing, month_keys) == pytest.approx(
+            drm._route_avg_monthly_revenue(route_id, month_keys)
+        )
+        assert drm._monthly_revenues_from_testing(testing, batch.runs_by_month(route_id), columns) == (
+            drm._route_monthly_revenues(route_id, columns)
+        )
+        assert batch.office_skipped_month_keys(route_id, month_keys) == skipped[route_id]
+        assert batch.building_counts[route_id] == drm._active_building_count(route_id)
+        assert median_run_duration_from_rows(batch.timing_rows(route_id)) == (
+            route_median_run_duration_minutes(route_id, month_keys)
+        )
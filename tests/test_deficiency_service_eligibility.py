@@ -2,8 +2,11 @@
 
 from datetime import datetime, timezone
 
+import pytest
+
 from app.deficiency.service_eligibility import (
     DeficiencyInput,
+    PhraseMatcher,
     compute_eligibility_records,
     description_hash,
     normalize_description,
@@ -35,6 +38,36 @@ def test_phrase_matches_substring_and_word_boundary():
     assert not phrase_matches("Workshop panel missing screw", "fsp")
 
 
+def test_compiled_matcher_agrees_with_phrase_matches():
+    phrases = ["fire safety plan", "safety plan", "fsp", "FSP ", "a.b", "no", "monitoring company", "  "]
+    descriptions = [
+        "Site missing fire safety plan on file",
+        "No FSP posted at panel",
+        "Workshop panel missing screw",
+        "a.b tested; nothing else",
+        "axb is not a.b-literal",
+        "knock knock",
+        None,
+        "",
+        "Missing   Monitoring\tCompany contact",
+    ]
+    matcher = PhraseMatcher(phrases)
+    for description in descriptions:
+        expected = [phrase for phrase in phrases if phrase_matches(description, phrase)]
+        assert matcher.matches(normalize_description(description)) == expected
+
+    tallies: dict[str, int] = {}
+    records = compute_eligibility_records(
+        [DeficiencyInput(i, description, None) for i, description in enumerate(descriptions)],
+        [(phrase, phrase) for phrase in phrases],
+        classified_at=datetime(2026, 6, 16, tzinfo=timezone.utc),
+        tallies=tallies,
+    )
+    assert tallies == {phrase: n for phrase, n in tally_phrase_matches(descriptions, phrases).items() if n}
+    # Overlapping phrases: the first in denylist order is reported.
+    assert _by_id(records)[0]["detail"] == "fire safety plan"
+
+
 def test_tally_phrase_matches_counts_per_phrase_in_window():
     descriptions = [
         "Building has no fire safety plan",
@@ -387,3 +420,51 @@ def test_classify_all_skips_included_override_rows(monkeypatch):
 
         assert rows_by_id[6001].eligible is True
         assert rows_by_id[6001].included_override is True
+
+
+@pytest.fixture
+def eligibility_db(monkeypatch):
+    from app import create_app
+    from app.db_models import Deficiency, DeficiencyNonQuoteablePhrase, DeficiencyServiceEligibility, db
+
+    tables = [
+        Deficiency.__table__,
+        DeficiencyNonQuoteablePhrase.__table__,
+        DeficiencyServiceEligibility.__table__,
+    ]
+    monkeypatch.setenv("DATABASE_URL", "sqlite:///:memory:")
+    app = create_app()
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=tables)
+        for def_id, description in ((1, "No fire safety plan"), (2, "Bell not ringing"), (3, "FSP missing")):
+            db.session.add(Deficiency(deficiency_id=def_id, description=description, job_id=1, location_id=1))
+        db.session.add(DeficiencyNonQuoteablePhrase(phrase="fire safety plan", active=True))
+        db.session.commit()
+        yield db
+        db.session.remove()
+        db.metadata.drop_all(db.engine, tables=list(reversed(tables)))
+
+
+def test_classify_all_skips_unchanged_rows_until_text_or_phrases_change(eligibility_db):
+    from app.db_models import Deficiency, DeficiencyNonQuoteablePhrase, DeficiencyServiceEligibility
+    from app.deficiency.service_eligibility import classify_all_deficiencies
+
+    db = eligibility_db
+    first = classify_all_deficiencies()
+    assert (first["reclassified"], first["skipped_unchanged"], first["excluded_keyword"]) == (3, 0, 1)
+
+    again = classify_all_deficiencies()
+    assert (again["reclassified"], again["skipped_unchanged"]) == (0, 3)
+    assert again["excluded_keyword"] == 1 and again["eligible"] == 2
+
+    Deficiency.query.filter_by(deficiency_id=2).one().description = "No fire safety plan posted"
+    db.session.commit()
+    edited = classify_all_deficiencies()
+    assert (edited["reclassified"], edited["excluded_keyword"]) == (1, 2)
+
+    db.session.add(DeficiencyNonQuoteablePhrase(phrase="fsp", active=True))
+    db.session.commit()
+    rephrased = classify_all_deficiencies()
+    assert rephrased["reclassified"] == 3
+    assert rephrased["phrase_set_version"] != edited["phrase_set_version"]
+    assert db.session.get(DeficiencyServiceEligibility, 3).detail == "fsp"
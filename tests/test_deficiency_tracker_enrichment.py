@@ -0,0 +1,119 @@
+"""Deficiency tracker enrichment: full pagination, shared job/location lookups, location TTL cache."""
+
+from __future__ import annotations
+
+import threading
+from datetime import datetime
+
+import pytest
+
+from app.routes import deficiency_tracker as dt
+
+PAGES = {
+    1: [
+        {"id": 1, "status": "verified", "location": {"name": "Fort"}, "job": {"id": 501}},
+        {"id": 2, "status": "verified", "location": {"name": "Fort"}, "job": {"id": 501}},
+        {"id": 3, "status": "verified", "location": {"name": "Gone"}, "job": {"id": 502}},
+    ],
+    2: [
+        {"id": 4, "status": "fixed", "location": {"name": "Cook"}, "job": {"id": 501}},
+        {"id": 5, "status": "verified", "location": {"name": "Fort"}, "job": {"id": 503}},
+    ],
+}
+LOCATIONS = {
+    "Fort": {"tags": [{"name": "Monthlies"}], "company": {"name": "Fort Co"}},
+    "Cook": {"tags": [], "company": {"name": "Cook Co"}},
+}
+
+
+class _Response:
+    def __init__(self, data):
+        self.data = data
+
+    def __bool__(self):
+        return True
+
+    def json(self):
+        return {"data": self.data}
+
+
+@pytest.fixture
+def st_calls(monkeypatch):
+    calls: list[tuple[str, dict]] = []
+    lock = threading.Lock()
+
+    def fake_api(endpoint, params):
+        resource = endpoint.rsplit("/", 1)[-1]
+        with lock:
+            calls.append((resource, dict(params)))
+        if resource == "deficiency":
+            return _Response({"deficiencies": PAGES[params["page"]], "totalPages": len(PAGES)})
+        if resource == "location":
+            location = LOCATIONS.get(params["name"])
+            return _Response({"locations": [location] if location else []})
+        if resource == "job":
+            ids = [int(job_id) for job_id in params["jobIds"].split(",")]
+            # 503 is missing from the listing and resolved by id.
+            return _Response({"jobs": [{"id": i, "status": "completed"} for i in ids if i == 501]})
+        if resource == "quote":
+            status = "approved" if params["deficiencyId"] == 2 else "waiting"
+            quote = {"quoteRequest": {"status": status}}
+            if params["deficiencyId"] == 4:
+                quote["expiresOn"] = 1_767_225_600
+            return _Response({"quotes": [quote]})
+        raise AssertionError(f"unexpected endpoint {endpoint}")
+
+    monkeypatch.setattr(dt, "authenticate", lambda: None)
+    monkeypatch.setattr(dt, "call_service_trade_api", fake_api)
+    monkeypatch.setattr(dt, "_fetch_job_status", lambda job_id: "scheduled")
+    monkeypatch.setattr(dt, "_location_metadata_cache", {})
+    return calls
+
+
+def _resources(calls, resource):
+    return [params for name, params in calls if name == resource]
+
+
+def test_pages_are_enriched_in_order_with_shared_lookups(st_calls):
+    results = list(dt.iter_deficiencies(datetime(2026, 1, 1), datetime(2026, 2, 1)))
+
+    assert [d.deficiency_id for d in results] == [1, 2, 4, 5]
+    by_id = {d.deficiency_id: d for d in results}
+    assert (by_id[1].is_monthly_access, by_id[1].company) == (True, "Fort Co")
+    assert by_id[4].company == "Cook Co"
+    assert [d.is_job_complete for d in results] == [True, True, True, False]
+    # The deficiency's own status is kept, not overwritten by its quote's status.
+    assert by_id[1].status == "verified" and by_id[1].is_quote_in_draft
+    assert by_id[2].is_quote_approved
+
+    assert sorted(p["page"] for p in _resources(st_calls, "deficiency")) == [1, 2]
+    assert sorted(p["name"] for p in _resources(st_calls, "location")) == ["Cook", "Fort", "Gone"]
+    # 502 only belongs to the dropped deficiency; 501 is listed once for both pages.
+    assert [p["jobIds"] for p in _resources(st_calls, "job")] == ["501", "503"]
+    assert len(_resources(st_calls, "quote")) == 4
+
+
+def test_location_metadata_is_cached_across_requests_until_ttl(st_calls, monkeypatch):
+    list(dt.iter_deficiencies(datetime(2026, 1, 1), datetime(2026, 2, 1)))
+    st_calls.clear()
+    list(dt.iter_deficiencies(datetime(2026, 1, 1), datetime(2026, 2, 1)))
+    assert _resources(st_calls, "location") == []
+
+    monkeypatch.setenv("DEFICIENCY_LOCATION_CACHE_TTL_SECONDS", "0")
+    list(dt.iter_deficiencies(datetime(2026, 1, 1), datetime(2026, 2, 1)))
+    assert len(_resources(st_calls, "location")) == 4
+
+
+def test_fetch_deficiencies_streams_ndjson(st_calls):
+    import json
+
+    from flask import Flask
+
+    with Flask(__name__).test_request_context():
+        response = dt.fetch_deficiencies(datetime(2026, 1, 1), datetime(2026, 2, 1))
+        assert response.mimetype == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.response]
+
+    assert [line["deficiency"]["deficiency_id"] for line in lines[:-1]] == [1, 2, 4, 5]
+    assert lines[2]["deficiency"]["quote_expiry"] == "Thu, 01 Jan 2026 00:00:00 GMT"
+    assert lines[-1] == {"type": "end", "total": 4}
@@ -0,0 +1,137 @@
+"""Pipelined jobs_summary enrichment writes the same Job/ClockEvent rows as the per-job path."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import pytest
+
+from app import create_app
+from app.db_models import ClockEvent, Job, db
+from app.routes import performance_summary as ps
+
+TABLES = [Job.__table__, ClockEvent.__table__]
+T0 = int(datetime(2025, 1, 6, 8, 0, tzinfo=timezone.utc).timestamp())
+
+
+class _Resp:
+    def __init__(self, data):
+        self._data = data
+
+    def json(self):
+        return {"data": self._data}
+
+
+def _fake_api(endpoint, params):
+    if endpoint.endswith("/invoice"):
+        job_id = params["jobId"]
+        return _Resp({"invoices": [{"totalPrice": job_id * 10.0}, {"totalPrice": 5.0}]})
+    if endpoint.endswith("/clockevent"):
+        job_id = int(endpoint.rstrip("/").split("/")[-2])
+        if job_id == 3:
+            return None  # API failure: no clock data
+        pairs = [
+            {"start": {"eventTime": T0, "user": {"name": "Tech A"}}, "end": {"eventTime": T0 + 7200}},
+            {"start": {"eventTime": T0, "user": {"name": "Tech B"}}, "end": {"eventTime": T0 + 3600 * job_id}},
+            {"start": {"eventTime": T0, "user": {}}, "end": {"eventTime": T0 + 60}},
+        ]
+        return _Resp({"pairedEvents": pairs})
+    raise AssertionError(endpoint)
+
+
+def _payload(job_id: int, *, completed: bool = True) -> dict:
+    return {
+        "id": job_id,
+        "type": "inspection",
+        "displayStatus": "Completed" if completed else "Scheduled",
+        "location": {"id": 900 + job_id, "address": {"street": f"{job_id} Main St"}},
+        "customer": {"name": f"Customer {job_id}"},
+        "scheduledDate": T0,
+        "completedOn": T0 + 86400 if completed else None,
+        "created": T0 - 86400,
+    }
+
+
+JOBS = [_payload(1), _payload(2), _payload(3), _payload(4, completed=False), _payload(2)]
+
+
+@pytest.fixture
+def app_ctx(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "sqlite:///:memory:")
+    app = create_app()
+    app.config["TESTING"] = True
+    monkeypatch.setattr(ps, "call_service_trade_api", _fake_api)
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=TABLES)
+        yield app
+        db.session.remove()
+        db.metadata.drop_all(db.engine, tables=list(reversed(TABLES)))
+
+
+def _seed_existing() -> None:
+    db.session.add(Job(job_id=1, job_type="old", address="old", customer_name="old", revenue=1, total_on_site_hours=1))
+    db.session.add(ClockEvent(job_id=1, tech_name="Tech A", hours=2.0, created_at=datetime(2020, 1, 1)))
+    db.session.commit()
+
+
+def _snapshot():
+    jobs = {
+        j.job_id: (j.job_type, j.address, j.customer_name, j.job_status, j.revenue, j.total_on_site_hours, j.location_id)
+        for j in Job.query.all()
+    }
+    events = sorted((e.job_id, e.tech_name, e.hours) for e in ClockEvent.query.all())
+    return jobs, events
+
+
+def _reset_tables() -> None:
+    db.session.remove()
+    db.metadata.drop_all(db.engine, tables=list(reversed(TABLES)))
+    db.metadata.create_all(db.engine, tables=TABLES)
+
+
+def _run_sequential(overwrite: bool) -> dict:
+    entries = {}
+    for job in JOBS:
+        job_id, data = ps.fetch_invoice_and_clock(job, overwrite=overwrite)
+        entries[job_id] = data
+    return entries
+
+
+@pytest.mark.parametrize("overwrite", [True, False])
+def test_pipelined_matches_sequential(app_ctx, overwrite):
+    _seed_existing()
+    seq_entries = _run_sequential(overwrite)
+    seq_rows = _snapshot()
+    seq_summary = {k: (v["onSiteHours"], v["clockEvents"]) for k, v in seq_entries.items()}
+
+    _reset_tables()
+    _seed_existing()
+    pipe_entries = ps.enrich_jobs_pipelined(JOBS, overwrite=overwrite, workers=4, batch_size=2)
+    pipe_rows = _snapshot()
+    pipe_summary = {k: (v["onSiteHours"], v["clockEvents"]) for k, v in pipe_entries.items()}
+
+    assert pipe_rows == seq_rows
+    assert pipe_summary == seq_summary
+
+
+def test_pipelined_updates_existing_clock_event_instead_of_duplicating(app_ctx):
+    _seed_existing()
+    ps.enrich_jobs_pipelined([_payload(1)], overwrite=True, workers=2)
+
+    tech_a = ClockEvent.query.filter_by(job_id=1, tech_name="Tech A").all()
+    assert len(tech_a) == 1
+    assert tech_a[0].created_at.year > 2020
+    job = db.session.get(Job, 1)
+    assert job.revenue == 15.0 and job.total_on_site_hours == 3.0
+
+
+def test_pipelined_skips_a_row_that_fails_to_save_and_keeps_the_rest(app_ctx):
+    bad = _payload(2)
+    bad["customer"] = {"name": {"unbindable": True}}
+
+    entries = ps.enrich_jobs_pipelined([_payload(1), bad, _payload(5)], overwrite=True, workers=2, batch_size=3)
+
+    assert sorted(entries) == [1, 5]
+    assert sorted(j.job_id for j in Job.query.all()) == [1, 5]
+    assert entries[5]["job"].revenue == 55.0
+    assert not ClockEvent.query.filter_by(job_id=2).count()
@@ -0,0 +1,156 @@
+"""Mapbox geocode cache, inline/background route geocoding, and cache-only library reads."""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from urllib import parse as url_parse
+
+import pytest
+
+from app import create_app
+from app.db_models import MapboxGeocodeCache, MonthlyLocation, MonthlyRoute, MonthlyRouteCalculatedPath, db
+from app.monthly import geocoding
+from tests.monthly_location_helpers import WORKSHEET_TABLES, make_location
+
+TABLES = [*WORKSHEET_TABLES, MonthlyRouteCalculatedPath.__table__, MapboxGeocodeCache.__table__]
+FORT_ST = [-123.36, 48.42]
+
+
+class _GeocodeResponse:
+    def __init__(self, features: list[dict]):
+        self.features = features
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_args):
+        return False
+
+    def read(self):
+        return json.dumps({"features": self.features}).encode("utf-8")
+
+
+@pytest.fixture
+def geocode_client(monkeypatch, tmp_path):
+    # File-backed so the background geocoder's thread gets its own connection.
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{(tmp_path / 'geocode.db').as_posix()}")
+    monkeypatch.setenv("MAPBOX_ACCESS_TOKEN", "test-token")
+    queries: list[str] = []
+    lock = threading.Lock()
+
+    def fake_urlopen(req, timeout):
+        path = url_parse.urlsplit(req.full_url).path
+        query = url_parse.unquote(path.rsplit("/", 1)[-1]).removesuffix(".json")
+        with lock:
+            queries.append(query)
+        if "fort st" not in query.casefold():
+            return _GeocodeResponse([])
+        return _GeocodeResponse([{"center": FORT_ST, "place_name": "10 Fort St, Victoria, BC"}])
+
+    monkeypatch.setattr(geocoding.url_request, "urlopen", fake_urlopen)
+    monkeypatch.setattr(geocoding, "_batches", {})
+    app = create_app()
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=TABLES)
+        db.session.add(MonthlyRoute(id=1, route_number=4, weekday_iso=0, week_occurrence=1))
+        db.session.add_all(
+            [
+                # 201 and 202 normalize to one geocode query; 203 is not in Greater Victoria.
+                make_location(id=201, address="10 Fort St", monthly_route_id=1, route_stop_order=0),
+                make_location(
+                    id=202, address="10  FORT st", label="10 Fort St", monthly_route_id=1, route_stop_order=1
+                ),
+                make_location(id=203, address="99 Nowhere Rd", monthly_route_id=1, route_stop_order=2),
+            ]
+        )
+        db.session.commit()
+        with app.test_client() as client:
+            with client.session_transaction() as sess:
+                sess["username"] = "staff"
+                sess["authenticated"] = True
+            yield client, queries
+        db.session.remove()
+        db.metadata.drop_all(db.engine, tables=list(reversed(TABLES)))
+
+
+def _clear_coordinates() -> None:
+    db.session.execute(MonthlyLocation.__table__.update().values(latitude=None, longitude=None))
+    db.session.commit()
+
+
+def test_route_geocode_dedupes_queries_and_reuses_cache(geocode_client):
+    client, queries = geocode_client
+    url = "/api/monthly_routes/routes/1/geocode_missing_coordinates"
+
+    first = client.post(url).get_json()
+    assert len(queries) == 2
+    assert first["attempted"] == 3
+    assert sorted(row["id"] for row in first["updated"]) == [201, 202]
+    assert [row["id"] for row in first["failed"]] == [203]
+    assert first["cache_hits"] == 0
+    assert db.session.get(MonthlyLocation, 202).latitude == FORT_ST[1]
+    assert MapboxGeocodeCache.query.count() == 2
+
+    _clear_coordinates()
+    again = client.post(url).get_json()
+    assert len(queries) == 2
+    assert again["cache_hits"] == 3
+    assert again["updated_count"] == 2
+
+
+def test_library_listing_reads_cache_and_queues_the_rest(geocode_client, monkeypatch):
+    client, queries = geocode_client
+    client.post("/api/monthly_routes/routes/1/geocode_missing_coordinates")
+    queries.clear()
+    _clear_coordinates()
+    db.session.add(make_location(id=204, address="5 Cook St"))
+    db.session.commit()
+    queued: list[tuple[str, list[int]]] = []
+    monkeypatch.setattr(
+        "app.routes.monthly_routes.start_background_geocode",
+        lambda _app, key, ids, _token: queued.append((key, list(ids))),
+    )
+
+    res = client.get("/api/monthly_routes/library", query_string={"unpaginated": "true", "include_coordinates": "true"})
+    assert res.status_code == 200
+    by_id = {row["id"]: row for row in res.get_json()["locations"]}
+
+    assert queries == []
+    assert by_id[201]["latitude"] == FORT_ST[1]
+    assert by_id[203]["latitude"] is None
+    # Known misses are not re-queued; only the never-seen address is.
+    assert queued == [("library", [204])]
+
+
+def test_background_route_geocode_reports_progress(geocode_client):
+    client, queries = geocode_client
+    url = "/api/monthly_routes/routes/1/geocode_missing_coordinates"
+    assert client.get(url).get_json()["progress"] is None
+
+    started = client.post(url, query_string={"background": "1"})
+    assert started.status_code == 202
+    assert started.get_json()["progress"]["total"] == 3
+
+    deadline = time.monotonic() + 10
+    progress = client.get(url).get_json()["progress"]
+    while progress["status"] == "running" and time.monotonic() < deadline:
+        time.sleep(0.05)
+        progress = client.get(url).get_json()["progress"]
+
+    assert progress["status"] == "done"
+    assert (progress["done"], progress["updated"], progress["requests"]) == (3, 2, 2)
+    assert progress["failed_location_ids"] == [203]
+    db.session.expire_all()
+    assert db.session.get(MonthlyLocation, 201).longitude == FORT_ST[0]
+
+
+def test_candidate_lookups_are_cached_by_normalized_query(geocode_client):
+    client, queries = geocode_client
+    first = client.get("/api/monthly_routes/geocode_candidates", query_string={"q": "10 Fort St"}).get_json()
+    second = client.get("/api/monthly_routes/geocode_candidates", query_string={"q": " 10  FORT st"}).get_json()
+    assert first == second
+    assert first["candidates"][0]["display_address"] == "10 Fort St, Victoria, BC"
+    assert queries == ["10 Fort St"]
@@ -0,0 +1,106 @@
+"""Monthly library keyset pagination and NDJSON streaming match the unpaginated listing."""
+
+from __future__ import annotations
+
+import json
+from datetime import date
+
+import pytest
+
+from app import create_app
+from app.db_models import db
+from app.monthly import library_listing
+from tests.monthly_location_helpers import WORKSHEET_TABLES, make_location, make_location_month
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    uri = f"sqlite:///{(tmp_path / 'library_listing.db').as_posix()}"
+    monkeypatch.setenv("DATABASE_URL", uri)
+    app = create_app()
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=WORKSHEET_TABLES)
+        _seed()
+        with app.test_client() as client:
+            with client.session_transaction() as sess:
+                sess["username"] = "staff"
+                sess["authenticated"] = True
+            yield client
+        db.session.remove()
+        db.metadata.drop_all(db.engine, tables=list(reversed(WORKSHEET_TABLES)))
+
+
+def _seed() -> None:
+    rows: list[object] = []
+    for i in range(1, 24):
+        # Duplicate addresses and NULL stop orders exercise every keyset tie-break.
+        rows.append(
+            make_location(
+                id=i,
+                address=f"{(i % 7) * 10} Fort St",
+                label=f"Site {i}",
+                test_day="Mon 1" if i % 2 else "Tue 2",
+                route_stop_order=None if i % 5 == 0 else i % 4,
+            )
+        )
+        rows.append(make_location_month(id=i, location_id=i, month_date=date(2026, 1 + i % 3, 1), route_id=None))
+    db.session.add_all(rows)
+    db.session.commit()
+
+
+def _get(client, **params) -> dict:
+    res = client.get("/api/monthly_routes/library", query_string=params)
+    assert res.status_code == 200, res.get_json()
+    return res.get_json()
+
+
+def _walk_keyset(client, **params) -> list[int]:
+    ids: list[int] = []
+    cursor = ""
+    while True:
+        payload = _get(client, cursor=cursor, page_size=4, **params)
+        ids.extend(loc["id"] for loc in payload["locations"])
+        cursor = payload["meta"]["pagination"]["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize("params", [{}, {"route": "Mon 1"}, {"route": "Tue 2", "q": "fort"}])
+def test_keyset_pages_cover_listing_in_order(client, params):
+    expected = [loc["id"] for loc in _get(client, unpaginated="true", **params)["locations"]]
+    assert _walk_keyset(client, **params) == expected
+
+
+def test_keyset_first_page_reports_total_only_once(client):
+    first = _get(client, cursor="", page_size=5)
+    assert first["meta"]["pagination"]["total"] == 23
+    second = _get(client, cursor=first["meta"]["pagination"]["next_cursor"], page_size=5)
+    assert second["meta"]["pagination"]["total"] is None
+    assert "page" not in second["meta"]["pagination"]
+
+
+def test_bad_or_mismatched_cursor_is_rejected(client):
+    res = client.get("/api/monthly_routes/library", query_string={"cursor": "not-a-cursor"})
+    assert res.status_code == 400
+    address_cursor = _get(client, cursor="", page_size=2)["meta"]["pagination"]["next_cursor"]
+    res = client.get("/api/monthly_routes/library", query_string={"cursor": address_cursor, "route": "Mon 1"})
+    assert res.get_json()["code"] == "invalid_cursor"
+
+
+def test_ndjson_stream_matches_unpaginated_payload(client, monkeypatch):
+    monkeypatch.setattr(library_listing, "LIBRARY_STREAM_BATCH_SIZE", 5)
+    params = {"from_month": "2026-01-01", "to_month": "2026-03-01", "include_coordinates": "true"}
+    expected = _get(client, unpaginated="true", **params)
+
+    res = client.get("/api/monthly_routes/library", query_string={"format": "ndjson", **params})
+    assert res.mimetype == "application/x-ndjson"
+    events = [json.loads(line) for line in res.get_data(as_text=True).splitlines() if line]
+
+    assert events[0]["type"] == "meta"
+    assert events[0]["meta"]["route_counts"] == expected["meta"]["route_counts"]
+    batches = [event["locations"] for event in events if event["type"] == "locations"]
+    assert [len(batch) for batch in batches] == [5, 5, 5, 5, 3]
+    streamed = [loc for batch in batches for loc in batch]
+    assert streamed == expected["locations"]
+    assert events[-1] == {"type": "end", "month_columns": expected["month_columns"], "total": 23}
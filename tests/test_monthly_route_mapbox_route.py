@@ -1,10 +1,13 @@
 import json
+import threading
+from urllib import parse as url_parse
 
 import pytest
 from sqlalchemy.exc import IntegrityError
 
 from app import create_app
 from app.db_models import (
+    MapboxDirectionsLeg,
     MonitoringCompany,
     MonthlyLocation,
     MonthlyLocationMonth,
@@ -232,3 +235,122 @@ def test_calculated_path_recovers_when_parallel_request_inserted_cache(route_map
         cache = MonthlyRouteCalculatedPath.query.one()
         assert cache.stop_signature == payload["stop_signature"]
         assert cache.distance_meters == 1234.5
+
+
+class _LegDirectionsResponse(_DirectionsResponse):
+    """Directions with per-leg step geometry for whatever waypoints were requested."""
+
+    def __init__(self, url: str):
+        path = url_parse.urlsplit(url).path
+        coord_text = url_parse.unquote(path.rsplit("/", 1)[-1])
+        self.points = [[float(part) for part in pair.split(",")] for pair in coord_text.split(";")]
+
+    def read(self):
+        legs = []
+        for a, b in zip(self.points, self.points[1:]):
+            mid = [(a[0] + b[0]) / 2, (a[1] + b[1]) / 2]
+            legs.append(
+                {
+                    "distance": 100.0,
+                    "duration": 10.0,
+                    "steps": [
+                        {"geometry": {"type": "LineString", "coordinates": [a, mid]}},
+                        {"geometry": {"type": "LineString", "coordinates": [mid, b]}},
+                    ],
+                }
+            )
+        return json.dumps(
+            {
+                "routes": [
+                    {
+                        "geometry": {"type": "LineString", "coordinates": self.points},
+                        "distance": 100.0 * len(legs),
+                        "duration": 10.0 * len(legs),
+                        "legs": legs,
+                    }
+                ]
+            }
+        ).encode("utf-8")
+
+
+@pytest.fixture
+def leg_cache_app(route_map_client, monkeypatch):
+    _client, app = route_map_client
+    requested: list[list[list[float]]] = []
+    lock = threading.Lock()
+
+    def fake_urlopen(req, timeout):
+        response = _LegDirectionsResponse(req.full_url)
+        with lock:
+            requested.append(response.points)
+        return response
+
+    monkeypatch.setenv("MAPBOX_ACCESS_TOKEN", "test-token")
+    monkeypatch.setattr("app.monthly.mapbox_routes.url_request.urlopen", fake_urlopen)
+    with app.app_context():
+        MapboxDirectionsLeg.__table__.create(db.engine)
+        route = MonthlyRoute(id=1, route_number=4, weekday_iso=0, week_occurrence=1)
+        db.session.add(route)
+        for index in range(5):
+            db.session.add(
+                make_location(
+                    id=201 + index,
+                    address=f"{index} Leg St",
+                    monthly_route_id=1,
+                    route_stop_order=index,
+                    latitude=48.40 + index / 100,
+                    longitude=-123.30 - index / 100,
+                )
+            )
+        db.session.commit()
+        yield requested
+        MapboxDirectionsLeg.__table__.drop(db.engine)
+
+
+def _reorder(location_ids: list[int]) -> None:
+    for order, location_id in enumerate(location_ids):
+        db.session.get(MonthlyLocation, location_id).route_stop_order = order
+    db.session.commit()
+
+
+def test_moving_one_stop_only_requests_uncached_legs(leg_cache_app):
+    requested = leg_cache_app
+    first = calculated_path_payload(1)
+    assert first["distance_meters"] == 400.0
+    assert first["provider_response_summary"]["leg_cache_hit_ratio"] == 0.0
+    assert len(requested) == 1
+    assert MapboxDirectionsLeg.query.count() == 4
+
+    # 201 202 203 204 205 → 201 202 203 205 204: only 203→205→204 is new.
+    requested.clear()
+    _reorder([201, 202, 203, 205, 204])
+    moved = calculated_path_payload(1)
+    assert moved["cache_status"] == "miss"
+    assert [len(points) for points in requested] == [3]
+    summary = moved["provider_response_summary"]
+    assert summary["chunks"] == 1
+    assert summary["leg_cache_hits"] == 2
+    assert summary["leg_cache_hit_ratio"] == 0.5
+
+    stops = {stop["id"]: [stop["longitude"], stop["latitude"]] for stop in moved["stops"]}
+    coordinates = moved["geometry"]["coordinates"]
+    # Legs join end to end: each stop appears once, in route order, with midpoints between.
+    assert coordinates[::2] == [stops[i] for i in (201, 202, 203, 205, 204)]
+    assert moved["distance_meters"] == 400.0
+
+    requested.clear()
+    refreshed = calculated_path_payload(1, refresh=True)
+    assert refreshed["provider_response_summary"]["leg_cache_hits"] == 0
+    assert len(requested) == 1
+
+
+def test_long_routes_request_chunks_concurrently_and_stitch_in_order(leg_cache_app, monkeypatch):
+    requested = leg_cache_app
+    monkeypatch.setattr("app.monthly.mapbox_routes.MAPBOX_DIRECTIONS_MAX_WAYPOINTS", 3)
+
+    payload = calculated_path_payload(1)
+
+    assert sorted(len(points) for points in requested) == [3, 3]
+    assert payload["provider_response_summary"]["chunks"] == 2
+    stops = [[stop["longitude"], stop["latitude"]] for stop in payload["stops"]]
+    assert payload["geometry"]["coordinates"][::2] == stops
@@ -0,0 +1,194 @@
+"""Deficiency/quote sync: updated-since watermarks, bulk upserts, touched-only reclassify and re-link."""
+
+from __future__ import annotations
+
+import pytest
+
+from app import create_app
+from app.db_models import (
+    Deficiency,
+    DeficiencyNonQuoteablePhrase,
+    DeficiencyServiceEligibility,
+    Quote,
+    QuoteDeficiencyLink,
+    ServiceTradeSyncWatermark,
+    db,
+)
+from app.deficiency import service_eligibility
+from app.routes import performance_summary as ps
+
+TABLES = [
+    Deficiency.__table__,
+    DeficiencyNonQuoteablePhrase.__table__,
+    DeficiencyServiceEligibility.__table__,
+    Quote.__table__,
+    QuoteDeficiencyLink.__table__,
+    ServiceTradeSyncWatermark.__table__,
+]
+
+
+def _deficiency(def_id, description):
+    return {
+        "id": def_id,
+        "description": description,
+        "status": "verified",
+        "reporter": {"name": "Tech"},
+        "serviceLine": {"name": "Fire Alarm"},
+        "job": {"id": 500 + def_id},
+        "location": {"id": 42},
+        "created": 1_720_000_000,
+    }
+
+
+def _quote(quote_id, total, def_id):
+    return {
+        "id": quote_id,
+        "customer": {"name": "Fort Co"},
+        "location": {"id": 42, "address": {"street": "10 Fort St"}},
+        "status": "new",
+        "created": 1_720_000_000,
+        "totalPrice": total,
+        "quoteRequest": {"status": "waiting"},
+        "owner": {"id": 7, "email": "owner@example.com"},
+        "jobs": [],
+        "serviceRequests": [{"deficiency": {"id": def_id}}],
+    }
+
+
+class _Response:
+    def __init__(self, data):
+        self.data = data
+
+    def __bool__(self):
+        return True
+
+    def json(self):
+        return {"data": self.data}
+
+
+@pytest.fixture
+def sync_app(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "sqlite:///:memory:")
+    state = {
+        "deficiencies": [],
+        "quotes": [],
+        "listings": [],
+        "fail_listing": False,
+        "failing_attachments": set(),
+        "classified": [],
+    }
+
+    def fake_api(endpoint, params):
+        resource = endpoint.rsplit("/", 1)[-1]
+        if resource in ("deficiency", "quote"):
+            state["listings"].append((resource, dict(params)))
+            if state["fail_listing"]:
+                return None
+            items = state["deficiencies"] if resource == "deficiency" else state["quotes"]
+            return _Response({"deficiencies" if resource == "deficiency" else "quotes": items, "totalPages": 1})
+        if resource == "attachment":
+            if params["entityId"] in state["failing_attachments"]:
+                raise RuntimeError("attachment lookup failed")
+            return _Response({"attachments": []})
+        raise AssertionError(f"unexpected endpoint {endpoint}")
+
+    real_classify = service_eligibility.classify_all_deficiencies
+
+    def spy_classify(**kwargs):
+        state["classified"].append(sorted(kwargs.get("deficiency_ids") or []))
+        return real_classify(**kwargs)
+
+    monkeypatch.setattr(ps, "authenticate", lambda: None)
+    monkeypatch.setattr(ps, "call_service_trade_api", fake_api)
+    monkeypatch.setattr(service_eligibility, "classify_all_deficiencies", spy_classify)
+    app = create_app()
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=TABLES)
+        db.session.add(DeficiencyNonQuoteablePhrase(phrase="fire safety plan", active=True))
+        db.session.commit()
+        yield state
+        db.session.remove()
+        db.metadata.drop_all(db.engine, tables=list(reversed(TABLES)))
+
+
+def _watermark(entity):
+    row = db.session.get(ServiceTradeSyncWatermark, entity)
+    return row.synced_through if row is not None else None
+
+
+def test_deficiencies_sync_since_watermark_and_reclassify_only_touched_rows(sync_app):
+    state = sync_app
+    state["deficiencies"] = [_deficiency(1, "Bell not ringing"), _deficiency(2, "No fire safety plan")]
+
+    ps.update_deficiencies()
+    assert "createdAfter" in state["listings"][-1][1]
+    first = _watermark("deficiency")
+    assert first is not None
+    assert {row.deficiency_id: row.eligible for row in DeficiencyServiceEligibility.query.all()} == {
+        1: True,
+        2: False,
+    }
+
+    state["deficiencies"] = [_deficiency(1, "No fire safety plan on site")]
+    ps.update_deficiencies()
+    params = state["listings"][-1][1]
+    assert params["updatedAfter"] == first - ps.SYNC_WATERMARK_OVERLAP_SECONDS
+    assert "createdAfter" not in params
+    assert state["classified"][-1] == [1]
+    assert Deficiency.query.count() == 2
+    assert db.session.get(DeficiencyServiceEligibility, 1).eligible is False
+
+    # A failed listing keeps the watermark so the next run covers the gap.
+    db.session.get(ServiceTradeSyncWatermark, "deficiency").synced_through = 1_000
+    db.session.commit()
+    state["fail_listing"] = True
+    ps.update_deficiencies()
+    assert _watermark("deficiency") == 1_000
+
+
+def test_quotes_sync_since_watermark_and_relink_only_touched_quotes(sync_app, monkeypatch):
+    state = sync_app
+    db.session.add_all([
+        Deficiency(deficiency_id=1, description="Bell", job_id=501, location_id=42),
+        Deficiency(deficiency_id=2, description="Horn", job_id=502, location_id=42),
+        Quote(quote_id=900, status="new", total_price=10.0),
+    ])
+    db.session.commit()
+    ps.store_sync_watermark("quote", 2_000, 0)
+
+    def full_scan(*_args, **_kwargs):
+        raise AssertionError("incremental sync must not scan every deficiency for quotes")
+
+    monkeypatch.setattr(ps, "build_quote_to_deficiency_id_map", full_scan)
+    state["quotes"] = [_quote(900, "1,250.50", 1), _quote(901, 75, 2)]
+
+    ps.update_quotes()
+
+    assert state["listings"] == [("quote", {"updatedAfter": 2_000 - ps.SYNC_WATERMARK_OVERLAP_SECONDS, "page": 1})]
+    assert {q.quote_id: q.total_price for q in Quote.query.all()} == {900: 1250.5, 901: 75}
+    assert sorted((link.quote_id, link.deficiency_id) for link in QuoteDeficiencyLink.query.all()) == [
+        (900, 1),
+        (901, 2),
+    ]
+    assert _watermark("quote") > 2_000
+
+
+def test_rows_that_fail_to_save_hold_the_watermark_back(sync_app):
+    state = sync_app
+    ps.store_sync_watermark("deficiency", 1_000, 0)
+    state["deficiencies"] = [
+        {**_deficiency(1, "Bell"), "updated": 5_000},
+        {**_deficiency(2, "Horn"), "updated": 4_000},
+    ]
+    state["failing_attachments"] = {2}
+
+    ps.update_deficiencies()
+
+    assert [row.deficiency_id for row in Deficiency.query.all()] == [1]
+    # The next run lists from just below the failed row's ``updated`` stamp.
+    assert _watermark("deficiency") == 3_999
+
+    state["deficiencies"] = [_deficiency(3, "Strobe")]  # no ``updated`` stamp
+    state["failing_attachments"] = {3}
+    ps.update_deficiencies()
+    assert _watermark("deficiency") == 3_999
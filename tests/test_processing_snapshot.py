@@ -0,0 +1,134 @@
+"""Shared Processing Attack snapshot: per-job appointment memo and persisted reads."""
+
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from app import create_app
+from app.db_models import ProcessingSnapshot, db
+from app.routes import processing_attack as pa
+from app.services import processing_snapshot as ps
+
+JOBS = [
+    {"id": 11, "type": "inspection", "updated": 100},
+    {"id": 12, "type": "repair", "updated": 200},
+    {"id": 13, "type": "administrative", "updated": 300},
+]
+LATEST_START = {11: 1_700_000_000, 12: 1_700_500_000}
+
+
+@pytest.fixture
+def snapshot_app(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "sqlite:///:memory:")
+    jobs = [dict(job) for job in JOBS]
+    calls: list[tuple[str, object]] = []
+    lock = threading.Lock()
+
+    def fake_api(endpoint, params=None):
+        with lock:
+            calls.append((endpoint, (params or {}).get("jobId")))
+        if endpoint == "job":
+            return {"data": {"jobs": jobs}}
+        start = LATEST_START.get(params["jobId"])
+        return {"data": {"appointments": [{"windowStart": start - 3600}, {"windowStart": start}]}}
+
+    monkeypatch.setattr(pa, "authenticate", lambda: None)
+    monkeypatch.setattr(pa, "call_service_trade_api", fake_api)
+    monkeypatch.setattr(pa, "get_oldest_job_data", lambda job_id: (None, f"{job_id} Fort St", "inspection"))
+    monkeypatch.setattr(pa, "get_jobs_to_be_invoiced", lambda: 4)
+    monkeypatch.setattr(pa, "find_report_conversion_jobs", lambda: (1, [{"id": 77, "scheduledDate": 1_700_000_000}]))
+    monkeypatch.setattr(pa, "get_pink_folder_data", lambda: (2, [], []))
+    monkeypatch.setattr(pa, "get_jobs_processed_today", lambda: 6)
+    monkeypatch.setattr(ps, "_last_failure", {})
+    monkeypatch.setattr(ps, "_last_built", {})
+    app = create_app()
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=[ProcessingSnapshot.__table__])
+        yield app, jobs, calls
+        db.session.remove()
+        db.metadata.drop_all(db.engine, tables=[ProcessingSnapshot.__table__])
+
+
+def _appointment_calls(calls) -> list[object]:
+    return sorted(job_id for endpoint, job_id in calls if endpoint == "appointment")
+
+
+def test_rebuild_only_refetches_appointments_for_changed_jobs(snapshot_app):
+    _app, jobs, calls = snapshot_app
+
+    first = ps.processing_snapshot(force=True)
+    assert _appointment_calls(calls) == [11, 12]
+    assert first["status"]["jobs_to_be_marked_complete"] == 2
+    assert [row["job_id"] for row in first["oldest_jobs_to_be_marked_complete"]] == [11, 12]
+    row = db.session.get(ProcessingSnapshot, ps.PROCESSING_SNAPSHOT_KEY)
+    assert row.appointment_max == {"11": [100, LATEST_START[11]], "12": [200, LATEST_START[12]]}
+
+    calls.clear()
+    ps.processing_snapshot(force=True)
+    assert _appointment_calls(calls) == []
+
+    jobs[1]["updated"] = 250
+    calls.clear()
+    again = ps.processing_snapshot(force=True)
+    assert _appointment_calls(calls) == [12]
+    assert again["oldest_jobs_to_be_marked_complete"] == first["oldest_jobs_to_be_marked_complete"]
+
+
+def test_endpoints_and_status_rows_share_the_persisted_snapshot(snapshot_app):
+    app, _jobs, calls = snapshot_app
+    fields = pa._collect_processing_status_payload()
+    assert fields["jobs_to_be_invoiced"] == 4
+    assert fields["earliest_job_to_be_converted_date"].isoformat() == "2023-11-14"
+
+    calls.clear()
+    with app.test_client() as client:
+        assert client.get("/processing_attack/num_jobs_to_be_marked_complete").get_json() == {
+            "jobs_to_be_marked_complete": 2
+        }
+        complete = client.post("/processing_attack/complete_jobs", json={}).get_json()
+    assert complete["job_type_count"] == {"Inspection": 1, "Repair": 1}
+    assert complete["num_locations_to_be_converted"] == 1
+    assert calls == []
+
+
+def test_rebuild_does_not_commit_the_callers_session(snapshot_app):
+    db.session.add(ProcessingSnapshot(snapshot_key="pending", payload={}, appointment_max={}))
+
+    ps.processing_snapshot(force=True)
+    db.session.rollback()
+
+    assert db.session.get(ProcessingSnapshot, "pending") is None
+    assert db.session.get(ProcessingSnapshot, ps.PROCESSING_SNAPSHOT_KEY) is not None
+
+
+def test_failed_rebuild_backs_off_instead_of_every_caller_retrying(snapshot_app, monkeypatch):
+    real_build = ps.build_processing_snapshot
+    attempts = []
+    failing = {"on": True}
+
+    def flaky_build(appointment_max):
+        attempts.append(1)
+        if failing["on"]:
+            raise RuntimeError("ServiceTrade down")
+        return real_build(appointment_max)
+
+    monkeypatch.setattr(ps, "build_processing_snapshot", flaky_build)
+    with pytest.raises(RuntimeError):
+        ps.processing_snapshot()
+    with pytest.raises(RuntimeError, match="failed recently"):
+        ps.processing_snapshot()
+    assert len(attempts) == 1
+
+    # With a stored snapshot, callers get the stale row during the back-off window.
+    ps._last_failure.clear()
+    failing["on"] = False
+    ps.processing_snapshot(force=True)
+    failing["on"] = True
+    with pytest.raises(RuntimeError):
+        ps.processing_snapshot(max_age_seconds=0)
+    stale = ps.processing_snapshot(max_age_seconds=0)
+    assert stale["status"]["jobs_to_be_marked_complete"] == 2
+    assert len(attempts) == 3
@@ -0,0 +1,226 @@
+"""Response cache backends: LRU bounds, prefix/tag invalidation, expiry sweep, shared SQLite."""
+
+from __future__ import annotations
+
+import threading
+import time
+from datetime import date, datetime
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask, jsonify
+
+from app import response_cache as rc
+from app.response_cache import (
+    MemoryLRUBackend,
+    SQLiteCacheBackend,
+    _CacheEntry,
+    cached_json_response,
+    invalidate_cache_prefix,
+    invalidate_cache_tags,
+    set_response_cache_backend,
+)
+
+
+def _entry(prefix: str, *, size: int = 10, ttl: float = 60, tags: tuple[str, ...] = ()) -> _CacheEntry:
+    return _CacheEntry(
+        data={"prefix": prefix},
+        status=200,
+        expires_at=time.time() + ttl,
+        prefix=prefix,
+        tags=tags,
+        size=size,
+    )
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        be = MemoryLRUBackend(max_entries=3, max_bytes=1000)
+    else:
+        be = SQLiteCacheBackend(str(tmp_path / "cache.sqlite3"), max_entries=3, max_bytes=1000)
+    previous = rc.get_response_cache_backend()
+    set_response_cache_backend(be)
+    yield be
+    set_response_cache_backend(previous)
+
+
+def test_lru_evicts_least_recently_used_entry(backend):
+    backend.set("a:1", _entry("a"))
+    backend.set("a:2", _entry("a"))
+    backend.set("a:3", _entry("a"))
+    time.sleep(0.01)
+    assert backend.get("a:1") is not None  # refresh recency
+    backend.set("a:4", _entry("a"))
+
+    assert len(backend) == 3
+    assert backend.get("a:2") is None
+    assert backend.get("a:1") is not None
+
+
+def test_memory_backend_bounded_by_bytes():
+    be = MemoryLRUBackend(max_entries=100, max_bytes=25)
+    be.set("p:1", _entry("p", size=10))
+    be.set("p:2", _entry("p", size=10))
+    be.set("p:3", _entry("p", size=10))
+    assert be.get("p:1") is None
+    assert be.total_bytes == 20
+
+
+def test_tag_invalidation_is_precise(backend):
+    backend.set("monthly:route_hero_summary:x", _entry("monthly:route_hero_summary", tags=("route:12",)))
+    backend.set("monthly:route_hero_summary:y", _entry("monthly:route_hero_summary", tags=("route:13",)))
+
+    assert invalidate_cache_tags("route:12") == 1
+    assert backend.get("monthly:route_hero_summary:x") is None
+    assert backend.get("monthly:route_hero_summary:y") is not None
+
+
+def test_prefix_invalidation_matches_family_only(backend):
+    backend.set("keys:search:1", _entry("keys:search"))
+    backend.set("keys:detail:2", _entry("keys:detail"))
+    backend.set("monthly:route_breakdown:3", _entry("monthly:route_breakdown"))
+
+    assert invalidate_cache_prefix("keys:") == 2
+    assert backend.get("monthly:route_breakdown:3") is not None
+
+
+def test_sweep_removes_expired_entries(backend):
+    backend.set("a:live", _entry("a", ttl=60))
+    backend.set("a:dead", _entry("a", ttl=-1))
+
+    assert rc.sweep_expired_entries() == 1
+    assert backend.get("a:dead") is None
+    assert backend.get("a:live") is not None
+
+
+def test_sqlite_backend_shared_between_instances(tmp_path):
+    path = str(tmp_path / "shared.sqlite3")
+    writer = SQLiteCacheBackend(path)
+    reader = SQLiteCacheBackend(path)
+    writer.set("k:1", _entry("k", tags=("month:2026-10",)))
+
+    hit = reader.get("k:1")
+    assert hit is not None and hit.data == {"prefix": "k"} and hit.tags == ("month:2026-10",)
+    assert reader.delete_tags(["month:2026-10"]) == 1
+    assert writer.get("k:1") is None
+
+
+def test_decorator_tags_from_view_args_and_invalidation(monkeypatch):
+    monkeypatch.setattr(rc, "_BACKEND", MemoryLRUBackend())
+    app = Flask(__name__)
+    app.secret_key = "test"
+    calls = {"n": 0}
+
+    @app.get("/routes/<int:route_id>/summary")
+    @cached_json_response(prefix="test:summary", ttl_seconds=60, tags=("route:{route_id}",))
+    def summary(route_id: int):
+        calls["n"] += 1
+        return jsonify({"route_id": route_id, "n": calls["n"]})
+
+    client = app.test_client()
+    assert client.get("/routes/5/summary").get_json()["n"] == 1
+    assert client.get("/routes/5/summary").get_json()["n"] == 1
+    assert client.get("/routes/6/summary").get_json()["n"] == 2
+
+    invalidate_cache_tags("route:5")
+    assert client.get("/routes/5/summary").get_json()["n"] == 3
+    assert client.get("/routes/6/summary").get_json()["n"] == 2
+
+
+class _InlineExecutor:
+    def submit(self, fn, *args, **kwargs):
+        fn(*args, **kwargs)
+
+
+def test_concurrent_misses_share_one_computation(monkeypatch):
+    monkeypatch.setattr(rc, "_BACKEND", MemoryLRUBackend())
+    monkeypatch.setattr(rc, "_INFLIGHT", {})
+    app = Flask(__name__)
+    app.secret_key = "test"
+    started = threading.Event()
+    release = threading.Event()
+    calls = {"n": 0}
+
+    @app.get("/kpis")
+    @cached_json_response(prefix="test:kpis", ttl_seconds=60)
+    def kpis():
+        calls["n"] += 1
+        started.set()
+        release.wait(5)
+        return jsonify({"n": calls["n"]})
+
+    coalesced_before = rc._STATS["coalesced"]
+    miss_before = rc._STATS["miss"]
+    results: list[dict] = []
+
+    def hit():
+        results.append(app.test_client().get("/kpis").get_json())
+
+    leader = threading.Thread(target=hit)
+    leader.start()
+    assert started.wait(5)
+    followers = [threading.Thread(target=hit) for _ in range(4)]
+    for t in followers:
+        t.start()
+    deadline = time.monotonic() + 5
+    while rc._STATS["miss"] - miss_before < 5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    release.set()
+    for t in [leader, *followers]:
+        t.join(5)
+
+    assert calls["n"] == 1
+    assert results == [{"n": 1}] * 5
+    assert rc._STATS["coalesced"] - coalesced_before == 4
+    assert rc._INFLIGHT == {}
+
+
+def test_stale_entry_served_while_one_refresh_runs(monkeypatch):
+    monkeypatch.setattr(rc, "_BACKEND", MemoryLRUBackend())
+    monkeypatch.setattr(rc, "_INFLIGHT", {})
+    monkeypatch.setattr(rc, "_REFRESH_EXECUTOR", _InlineExecutor())
+    clock = {"now": 1_000.0}
+    monkeypatch.setattr(rc, "time", SimpleNamespace(time=lambda: clock["now"]))
+    app = Flask(__name__)
+    app.secret_key = "test"
+    calls = {"n": 0}
+
+    @app.get("/breakdown")
+    @cached_json_response(prefix="test:breakdown", ttl_seconds=10, stale_ttl_seconds=30)
+    def breakdown():
+        calls["n"] += 1
+        return jsonify({"n": calls["n"]})
+
+    client = app.test_client()
+    assert client.get("/breakdown").get_json() == {"n": 1}
+
+    clock["now"] += 15  # expired, still inside the stale window
+    stale_before = rc._STATS["stale_served"]
+    assert client.get("/breakdown").get_json() == {"n": 1}
+    assert rc._STATS["stale_served"] == stale_before + 1
+    assert calls["n"] == 2  # inline refresh recomputed once
+    assert client.get("/breakdown").get_json() == {"n": 2}
+
+    clock["now"] += 100  # past the stale window: synchronous recompute
+    assert client.get("/breakdown").get_json() == {"n": 3}
+
+
+def test_cached_body_matches_jsonify_on_every_backend(backend):
+    app = Flask(__name__)
+    app.secret_key = "test"
+    calls = {"n": 0}
+
+    @app.get("/dated")
+    @cached_json_response(prefix="test:dated", ttl_seconds=60)
+    def dated():
+        calls["n"] += 1
+        return {"month": date(2026, 10, 1), "at": datetime(2026, 10, 17, 8, 30)}
+
+    client = app.test_client()
+    fresh = client.get("/dated").get_json()
+    cached = client.get("/dated").get_json()
+
+    assert calls["n"] == 1
+    assert cached == fresh == {"month": "Thu, 01 Oct 2026 00:00:00 GMT", "at": "Sat, 17 Oct 2026 08:30:00 GMT"}
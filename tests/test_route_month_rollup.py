@@ -0,0 +1,193 @@
+"""monthly_route_month_rollup: incremental flush maintenance matches the live per-route totals."""
+
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app import create_app, db_models
+from app.db_models import (
+    MonthlyLocation,
+    MonthlyLocationMonth,
+    MonthlyLocationQuarterBilled,
+    MonthlyLocationTicket,
+    MonthlyRoute,
+    MonthlyRouteMonthRollup,
+    db,
+)
+from app.monthly import route_month_rollup as rollup
+from app.monthly.worksheet_locations import prune_route_month_stops_not_on_active_library
+from app.routes import monthly_routes as mr_mod
+from tests.monthly_location_helpers import WORKSHEET_TABLES, make_location, make_location_month
+
+TABLES = [
+    *WORKSHEET_TABLES,
+    MonthlyLocationQuarterBilled.__table__,
+    MonthlyLocationTicket.__table__,
+    MonthlyRouteMonthRollup.__table__,
+]
+MONTHS = [date(2026, 3, 1), date(2026, 4, 1), date(2026, 5, 1)]
+ROUTE_IDS = [1, 2, 3]
+COUNT_KEYS = (*rollup.ROLLUP_COUNT_FIELDS, "tested_revenue_total")
+
+
+@pytest.fixture
+def app_ctx(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "sqlite:///:memory:")
+    app = create_app()
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=TABLES)
+        _seed()
+        yield app
+        db.session.remove()
+        db.metadata.drop_all(db.engine, tables=list(reversed(TABLES)))
+
+
+def _seed() -> None:
+    objects: list[object] = []
+    mlm_id = 1
+    for r in ROUTE_IDS:
+        objects.append(MonthlyRoute(id=r, route_number=r + 1, weekday_iso=r % 5, week_occurrence=1))
+        for s in range(3):
+            loc_id = r * 100 + s
+            price = None if s == 2 else Decimal(40 + 5 * s)
+            objects.append(
+                make_location(id=loc_id, address=f"{loc_id} Test St", monthly_route_id=r, price_per_month=price)
+            )
+            for m_idx, month in enumerate(MONTHS):
+                fields = {"result_status": "tested"} if (s + m_idx) % 3 else {
+                    "result_status": "skipped",
+                    "skip_reason": "annual inspection" if s else "no access",
+                }
+                row = make_location_month(id=mlm_id, location_id=loc_id, month_date=month, route_id=r, **fields)
+                if s == 1 and m_idx == 1:
+                    row.test_monthly_route_id = None  # legacy unstamped history
+                objects.append(row)
+                mlm_id += 1
+    db.session.add_all(objects)
+    db.session.commit()
+
+
+def _live() -> dict[int, dict[str, dict]]:
+    return {
+        route_id: {
+            month: {key: cell[key] for key in COUNT_KEYS}
+            for month, cell in mr_mod._route_testing_by_month(route_id).items()
+        }
+        for route_id in ROUTE_IDS
+    }
+
+
+def _stored() -> dict[int, dict[str, dict]]:
+    return rollup.route_month_rollup_by_route(ROUTE_IDS)
+
+
+def _assert_rollup_matches_live() -> None:
+    db.session.expire_all()
+    assert _stored() == _live()
+
+
+def test_seeded_inserts_populate_rollup(app_ctx):
+    _assert_rollup_matches_live()
+    assert MonthlyRouteMonthRollup.query.count() == len(ROUTE_IDS) * len(MONTHS)
+
+
+def test_outcome_billing_and_price_changes_update_rollup(app_ctx):
+    row = MonthlyLocationMonth.query.filter_by(monthly_location_id=100, month_date=MONTHS[0]).one()
+    row.result_status = "tested"
+    row.skip_reason = None
+    db.session.commit()
+    _assert_rollup_matches_live()
+
+    row.billing_status = "do_not_bill"
+    db.session.commit()
+    _assert_rollup_matches_live()
+
+    db.session.get(MonthlyLocation, 202).price_per_month = Decimal("99.50")
+    db.session.commit()
+    _assert_rollup_matches_live()
+
+
+def test_restamp_and_site_moves_update_old_and_new_routes(app_ctx):
+    stamped = MonthlyLocationMonth.query.filter_by(monthly_location_id=102, month_date=MONTHS[2]).one()
+    stamped.test_monthly_route_id = 3
+    db.session.commit()
+    _assert_rollup_matches_live()
+
+    # Unstamped legacy rows follow the site's current route.
+    db.session.get(MonthlyLocation, 201).monthly_route_id = 1
+    db.session.commit()
+    _assert_rollup_matches_live()
+
+
+def test_deletes_update_rollup(app_ctx):
+    db.session.delete(MonthlyLocationMonth.query.filter_by(monthly_location_id=301, month_date=MONTHS[0]).one())
+    db.session.commit()
+    _assert_rollup_matches_live()
+
+    db.session.delete(db.session.get(MonthlyLocation, 101))
+    db.session.commit()
+    _assert_rollup_matches_live()
+
+    active = MonthlyLocation.query.filter(MonthlyLocation.id.in_([200, 201])).all()
+    assert prune_route_month_stops_not_on_active_library(2, MONTHS[2], active) == 1
+    db.session.commit()
+    _assert_rollup_matches_live()
+
+
+def test_rollback_discards_rollup_changes(app_ctx):
+    before = _stored()
+    MonthlyLocationMonth.query.filter_by(monthly_location_id=100, month_date=MONTHS[0]).one().result_status = "tested"
+    db.session.flush()
+    db.session.rollback()
+    assert _stored() == before
+
+
+def test_rebuild_matches_incremental(app_ctx):
+    incremental = _stored()
+    db.session.execute(MonthlyRouteMonthRollup.__table__.delete())
+    db.session.commit()
+    assert rollup.rebuild_route_month_rollup() == len(ROUTE_IDS) * len(MONTHS)
+    db.session.commit()
+    assert _stored() == incremental
+
+
+def test_readers_fall_back_without_table(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "sqlite:///:memory:")
+    app = create_app()
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=WORKSHEET_TABLES)
+        assert rollup.route_month_rollup_by_route([1]) is None
+        db.session.add(MonthlyRoute(id=1, route_number=2, weekday_iso=0, week_occurrence=1))
+        db.session.commit()
+
+        # A table created after the first miss (``flask db upgrade``) is found on the next check.
+        db.metadata.create_all(db.engine, tables=[MonthlyRouteMonthRollup.__table__])
+        assert rollup.route_month_rollup_by_route([1]) is None
+        monkeypatch.setattr(db_models, "TABLE_ABSENT_RECHECK_SECONDS", 0)
+        assert rollup.route_month_rollup_by_route([1]) == {1: {}}
+        db.session.remove()
+        db.metadata.drop_all(db.engine, tables=[MonthlyRouteMonthRollup.__table__, *reversed(WORKSHEET_TABLES)])
+
+
+def test_backfill_bulk_moves_refresh_old_and_new_routes(app_ctx):
+    from sqlalchemy import update
+
+    from app.scripts.backfill_monthly_route_entities import refresh_moved_route_months
+
+    db.session.execute(update(MonthlyLocation).where(MonthlyLocation.id == 101).values(monthly_route_id=2))
+    assert refresh_moved_route_months({101: (1, 2)}) == 2
+    db.session.commit()
+    _assert_rollup_matches_live()
+
+
+def test_core_reprice_refreshes_every_month_of_the_site(app_ctx):
+    from sqlalchemy import update
+
+    db.session.execute(update(MonthlyLocation).where(MonthlyLocation.id == 101).values(price_per_month=Decimal("75")))
+    assert rollup.refresh_route_month_rollup_for_locations([101]) == len(MONTHS)
+    db.session.commit()
+    _assert_rollup_matches_live()
@@ -0,0 +1,181 @@
+"""Indexed candidate-date search returns the same availability as the per-day scan, with far fewer reads."""
+
+from __future__ import annotations
+
+import random
+import time as time_module
+from datetime import datetime, time, timedelta
+
+import pytest
+
+from app.services.scheduling_service import (
+    find_candidate_blocks,
+    find_candidate_dates,
+    get_working_hours_for_day,
+    max_free_interval,
+)
+
+WEEKDAYS = [0, 1, 2, 3, 4]
+
+
+def _legacy_find_candidate_dates(appointments_data, absences_data, allowable_techs, include_rrsc,
+                                 include_projects_blocking, selected_weekdays, custom_start_time):
+    """Reference copy of the pre-index scan (every day x tech x appointment/absence)."""
+    candidate_results = []
+    today = datetime.today().date()
+    current_date = today + timedelta(days=1)
+    end_date = today + timedelta(days=120)
+    while current_date <= end_date:
+        if current_date.weekday() in selected_weekdays:
+            working_start, working_end = get_working_hours_for_day(current_date, custom_start_time)
+            available_info = {}
+            for tech in allowable_techs:
+                tech_name = tech.get("name", "").strip()
+                tech_type = (tech.get("type") or "").strip()
+                busy_intervals = []
+                for appt in appointments_data:
+                    job_info = appt.get("job", {})
+                    if include_rrsc and job_info.get("name", "").strip() == "RRSC AGENT":
+                        continue
+                    if include_projects_blocking and appt.get("location", "").get("name", "").strip().lower() == "project blocking":
+                        continue
+                    if "windowStart" in appt and "windowEnd" in appt:
+                        appt_window_start = datetime.fromtimestamp(appt["windowStart"])
+                        appt_window_end = datetime.fromtimestamp(appt["windowEnd"])
+                        if appt_window_start.date() <= current_date <= appt_window_end.date():
+                            day_end = datetime.combine(current_date, time(17, 0))
+                            effective_start = appt_window_start if appt_window_start < working_start else working_start
+                            effective_end = min(appt_window_end, day_end, working_end)
+                            if effective_start < effective_end:
+                                for tech_obj in appt.get("techs", []):
+                                    if tech_obj.get("name", "").strip().lower() == tech_name.lower():
+                                        busy_intervals.append((effective_start, effective_end))
+                                        break
+                for absence in absences_data:
+                    if absence.get("user", {}).get("name", "").strip().lower() != tech_name.lower():
+                        continue
+                    absence_start = datetime.fromtimestamp(int(absence["windowStart"]))
+                    absence_end = datetime.fromtimestamp(int(absence["windowEnd"]))
+                    if absence_start.date() <= current_date <= absence_end.date():
+                        day_end = datetime.combine(current_date, time(17, 0))
+                        effective_start = absence_start if absence_start < working_start else working_start
+                        effective_end = min(absence_end, day_end, working_end)
+                        if effective_start < effective_end:
+                            busy_intervals.append((effective_start, effective_end))
+                free_hours = max_free_interval(busy_intervals, working_start, working_end)
+                available_info[tech_name] = {"free_hours": round(free_hours, 2), "type": tech_type}
+            candidate_results.append((current_date, available_info))
+        current_date += timedelta(days=1)
+    return candidate_results
+
+
+def _ts(day, hour, minute=0):
+    return int(datetime.combine(day, time(hour, minute)).timestamp())
+
+
+@pytest.fixture
+def busy_quarter():
+    """A seeded quarter of ServiceTrade data: multi-tech and multi-day jobs, RRSC agents,
+    project blocking, odd name casing/whitespace, and absences spanning days."""
+    rng = random.Random(20260706)
+    types = ["Trainee Tech", "Junior Tech", "Mid-Level Tech", "Senior Tech", "Sprinkler Tech"]
+    techs = [{"id": i, "name": f"Tech {i:02d}", "type": types[i % len(types)]} for i in range(1, 19)]
+    first = datetime.today().date() - timedelta(days=3)
+
+    def crew():
+        return [
+            {"name": rng.choice(["", " ", "  "]) + (t["name"].upper() if rng.random() < 0.2 else t["name"])}
+            for t in rng.sample(techs, rng.choice([1, 1, 2, 2, 3]))
+        ]
+
+    appointments = []
+    for _ in range(420):
+        day = first + timedelta(days=rng.randrange(0, 128))
+        start_hour = rng.choice([6, 7, 8, 9, 10, 12, 13, 14, 15, 16])
+        span_days = rng.choice([0, 0, 0, 0, 0, 1, 2])
+        end = datetime.combine(day + timedelta(days=span_days), time(min(start_hour + rng.choice([1, 2, 4, 8]), 23)))
+        appointments.append({
+            "windowStart": _ts(day, start_hour, rng.choice([0, 15, 30, 45])),
+            "windowEnd": int(end.timestamp()),
+            "techs": crew(),
+            "job": {"name": "RRSC AGENT" if rng.random() < 0.08 else "Annual Inspection"},
+            "location": {"name": "Project Blocking " if rng.random() < 0.05 else "Harbour Tower"},
+        })
+    appointments.append({"techs": crew(), "job": {"name": "Unscheduled"}, "location": {"name": "x"}})
+
+    absences = []
+    for _ in range(40):
+        day = first + timedelta(days=rng.randrange(0, 128))
+        absences.append({
+            "user": {"name": " " + rng.choice(techs)["name"].lower()},
+            "windowStart": str(_ts(day, rng.choice([0, 8, 12]))),
+            "windowEnd": str(_ts(day + timedelta(days=rng.choice([0, 0, 1, 4])), rng.choice([12, 17, 23]))),
+        })
+    return appointments, absences, techs
+
+
+@pytest.mark.parametrize(
+    "include_rrsc,include_projects_blocking,custom_start_time",
+    [(False, False, None), (True, True, time(7, 0)), (True, False, time(10, 30))],
+)
+def test_indexed_candidates_match_legacy_scan(busy_quarter, include_rrsc, include_projects_blocking, custom_start_time):
+    appointments, absences, techs = busy_quarter
+    args = (appointments, absences, techs, include_rrsc, include_projects_blocking, WEEKDAYS, custom_start_time)
+    expected = _legacy_find_candidate_dates(*args)
+    actual = find_candidate_dates(*args, [])
+    assert actual == expected
+    assert any(info["free_hours"] < 8 for _, day in actual for info in day.values())
+
+    tech_rows = [
+        {"tech_count": 2, "technician_types": ["Senior Tech", "Mid-Level Tech"], "day_hours": [6, 4]},
+        {"tech_count": 1, "technicians": [{"id": 3}], "day_hours": [2]},
+    ]
+    assert find_candidate_blocks(list(actual), tech_rows, techs) == find_candidate_blocks(list(expected), tech_rows, techs)
+
+
+class _CountingRecord(dict):
+    """Appointment/absence payload that counts ``windowStart`` reads (one per record per scan)."""
+
+    reads = 0
+
+    def __getitem__(self, key):
+        if key == "windowStart":
+            type(self).reads += 1
+        return super().__getitem__(key)
+
+
+def test_indexed_candidates_read_each_record_once(busy_quarter, monkeypatch):
+    appointments, absences, techs = busy_quarter
+    appointments = [_CountingRecord(appt) for appt in appointments]
+    absences = [_CountingRecord(absence) for absence in absences]
+    args = (appointments, absences, techs, True, True, WEEKDAYS, None)
+
+    monkeypatch.setattr(_CountingRecord, "reads", 0)
+    expected = _legacy_find_candidate_dates(*args)
+    legacy_reads = _CountingRecord.reads
+
+    monkeypatch.setattr(_CountingRecord, "reads", 0)
+    actual = find_candidate_dates(*args, [])
+    indexed_reads = _CountingRecord.reads
+
+    assert actual == expected
+    assert indexed_reads <= len(appointments) + len(absences)
+    assert legacy_reads > len(expected) * indexed_reads
+
+
+@pytest.mark.benchmark
+def test_indexed_candidates_benchmark(busy_quarter):
+    appointments, absences, techs = busy_quarter
+    args = (appointments, absences, techs, True, True, WEEKDAYS, None)
+
+    started = time_module.perf_counter()
+    expected = _legacy_find_candidate_dates(*args)
+    legacy_seconds = time_module.perf_counter() - started
+
+    started = time_module.perf_counter()
+    actual = find_candidate_dates(*args, [])
+    indexed_seconds = time_module.perf_counter() - started
+
+    assert actual == expected
+    # Typically 50-100x on this volume; wall-clock, so only run on demand (``-m benchmark``).
+    assert indexed_seconds * 5 < legacy_seconds, (legacy_seconds, indexed_seconds)
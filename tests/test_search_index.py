@@ -0,0 +1,124 @@
+"""Search documents: write-path maintenance, in-process trigram index, ranked keys search."""
+
+from __future__ import annotations
+
+import pytest
+
+from app import create_app
+from app.db_models import (
+    Key,
+    KeyAddress,
+    KeyStatus,
+    MonthlyLocation,
+    MonthlyLocationQuarterBilled,
+    MonthlyLocationTicket,
+    db,
+)
+from app.search_index import TrigramIndex, rebuild_search_documents
+from tests.monthly_location_helpers import WORKSHEET_TABLES, make_location
+
+TABLES = [
+    *WORKSHEET_TABLES,
+    MonthlyLocationQuarterBilled.__table__,
+    MonthlyLocationTicket.__table__,
+    KeyAddress.__table__,
+    KeyStatus.__table__,
+]
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    uri = f"sqlite:///{(tmp_path / 'search_index.db').as_posix()}"
+    monkeypatch.setenv("DATABASE_URL", uri)
+    app = create_app()
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=TABLES)
+        _seed()
+        with app.test_client() as client:
+            with client.session_transaction() as sess:
+                sess["username"] = "staff"
+                sess["authenticated"] = True
+            yield client
+        db.session.remove()
+        db.metadata.drop_all(db.engine, tables=list(reversed(TABLES)))
+
+
+def _seed() -> None:
+    db.session.add_all(
+        [
+            make_location(id=1, address="100 Harbour Rd", label="Tower A", keys="K-77"),
+            make_location(id=2, address="200 Fort St", label="Annex", property_management_company="Harbourview PM"),
+            make_location(id=3, address="300 Oak Bay Ave", label="Oak Bay Lodge", test_day="Tue 2"),
+            Key(id=1, keycode="AB12", barcode=5551234, route="R4"),
+            Key(id=2, keycode="XAB12", area="Downtown"),
+            Key(id=3, keycode="ZZ9", addresses=[KeyAddress(id=1, address="12 AB Street")]),
+        ]
+    )
+    db.session.commit()
+
+
+def _library_ids(client, q: str) -> list[int]:
+    res = client.get("/api/monthly_routes/library", query_string={"q": q, "include_history": "false"})
+    assert res.status_code == 200, res.get_json()
+    return sorted(loc["id"] for loc in res.get_json()["locations"])
+
+
+def _key_codes(client, q: str) -> list[str]:
+    res = client.get("/api/keys/search", query_string={"q": q})
+    assert res.status_code == 200
+    return [row["keycode"] for row in res.get_json()["data"]]
+
+
+def test_trigram_index_substring_lookup():
+    index = TrigramIndex({1: "100 harbour rd\ntower a", 2: "harbourview pm", 3: "oak bay"})
+    assert index.search("harbour") == {1, 2}
+    assert index.search("ak") == {3}
+    assert index.search("bour rd", "oak") == {1, 3}
+    index.apply({3: "harbour lodge"}, [1])
+    assert index.search("harbour") == {2, 3}
+
+
+def test_library_search_matches_any_field(client):
+    assert _library_ids(client, "Harbour") == [1, 2]
+    assert _library_ids(client, "k-77") == [1]
+    assert _library_ids(client, "tue 2") == [3]
+    assert _library_ids(client, "nowhere") == []
+
+
+def test_library_search_sees_committed_edits(client):
+    assert _library_ids(client, "oak bay") == [3]
+    db.session.get(MonthlyLocation, 2).label = "Oak Bay Annex"
+    db.session.delete(db.session.get(MonthlyLocation, 3))
+    db.session.commit()
+    assert _library_ids(client, "oak bay") == [2]
+
+
+def test_keys_search_ranks_exact_keycode_and_barcode_first(client):
+    assert _key_codes(client, "xab") == ["XAB12"]
+    assert _key_codes(client, "ab12") == ["AB12", "XAB12"]
+    assert _key_codes(client, "5551234") == ["AB12"]
+    assert _key_codes(client, "ab 12") == ["AB12", "XAB12"]
+    assert _key_codes(client, "12ab") == ["ZZ9"]
+
+
+def test_key_address_changes_update_key_document(client):
+    key = db.session.get(Key, 2)
+    key.addresses.append(KeyAddress(id=2, address="9 Quadra St"))
+    db.session.commit()
+    assert _key_codes(client, "quadra") == ["XAB12"]
+
+    db.session.delete(key.addresses[0])
+    db.session.commit()
+    assert "quadra" not in db.session.get(Key, 2).search_document
+    assert _key_codes(client, "9 quadra") == []
+
+
+def test_rebuild_restores_documents(client):
+    db.session.execute(MonthlyLocation.__table__.update().values(search_document=None))
+    db.session.execute(Key.__table__.update().values(search_document=None))
+    counts = rebuild_search_documents()
+    db.session.commit()
+    assert counts == {"monthly_location": 3, "keys": 3}
+    assert _library_ids(client, "harbour") == [1, 2]
+    assert _key_codes(client, "12 ab") == ["ZZ9"]
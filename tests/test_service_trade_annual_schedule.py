@@ -2,11 +2,15 @@
 
 from __future__ import annotations
 
+import threading
+from collections import Counter
 from datetime import date, datetime
 from zoneinfo import ZoneInfo
 
 import pytest
 
+from app import create_app
+from app.db_models import MonthlyLocation, MonthlyRoute, db
 from app.monthly.route_test_day import effective_route_test_day
 from app.monthly.service_trade_annual_schedule import (
     _annual_month_first_from_job_appointments,
@@ -14,11 +18,15 @@ from app.monthly.service_trade_annual_schedule import (
     _pick_saved_annual_month,
     _skip_month_for_spanning_job,
     appointment_qualifies,
+    build_location_annual_schedule_row,
+    build_route_annual_schedule_snapshot,
     derive_prep_warning,
     job_qualifies,
     month_window_pacific,
 )
 
+from tests.monthly_location_helpers import WORKSHEET_TABLES, make_location, seed_route_with_two_stops
+
 PACIFIC = ZoneInfo("America/Vancouver")
 
 
@@ -209,3 +217,112 @@ def test_pick_saved_annual_month_falls_back_to_recent_past():
         )
         == "May"
     )
+
+
+def _ts(year: int, month: int, day: int) -> int:
+    return int(datetime(year, month, day, 9, 0, tzinfo=PACIFIC).timestamp())
+
+
+class _FakeServiceTrade:
+    """Minimal ``/job`` + ``/appointment`` stand-in that counts calls per endpoint."""
+
+    def __init__(self, jobs: list[dict], appointments: dict[int, list[dict]]):
+        self.jobs = jobs
+        self.appointments = appointments
+        self.calls: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None):
+        endpoint = url.rsplit("/", 1)[-1]
+        with self._lock:
+            self.calls[endpoint] += 1
+        if endpoint == "job":
+            wanted = {int(part) for part in str(params["locationId"]).split(",")}
+            data = {"jobs": [job for job in self.jobs if job["location"]["id"] in wanted]}
+        else:
+            data = {"appointments": self.appointments.get(int(params["jobId"]), [])}
+        return _FakeResponse({"data": data})
+
+
+class _FakeResponse:
+    def __init__(self, payload):
+        self._payload = payload
+
+    def raise_for_status(self):
+        return None
+
+    def json(self):
+        return self._payload
+
+
+@pytest.fixture
+def annual_route(monkeypatch):
+    from app.monthly import worksheet_locations
+
+    # Build against the live roster whatever month the test runs in.
+    monkeypatch.setattr(worksheet_locations, "_worksheet_month_is_prior_history_snapshot", lambda _month: False)
+    monkeypatch.setenv("DATABASE_URL", "sqlite:///:memory:")
+    app = create_app()
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=WORKSHEET_TABLES)
+        seed_route_with_two_stops()
+        db.session.get(MonthlyLocation, 101).service_trade_site_location_id = 7001
+        db.session.get(MonthlyLocation, 9002).service_trade_site_location_id = 7002
+        # A second library location on the same ServiceTrade site, plus an unlinked stop.
+        db.session.add(
+            make_location(
+                id=9003,
+                address="12 Shared Site Rd",
+                monthly_route_id=1,
+                route_stop_order=3,
+                service_trade_site_location_id=7001,
+            )
+        )
+        db.session.add(make_location(id=9004, address="99 Unlinked Ave", monthly_route_id=1, route_stop_order=4))
+        db.session.commit()
+        yield
+        db.session.remove()
+        db.metadata.drop_all(db.engine, tables=list(reversed(WORKSHEET_TABLES)))
+
+
+def test_route_snapshot_matches_per_location_rows_with_one_fetch_per_job(annual_route):
+    june = date(2026, 6, 1)
+    jobs = [
+        {"id": 1, "type": "inspection", "status": "scheduled", "location": {"id": 7001}},
+        {"id": 2, "type": "replacement", "status": "scheduled", "location": {"id": 7001}},
+        {"id": 3, "type": "inspection", "status": "scheduled", "location": {"id": 7002}},
+        {"id": 4, "type": "repair", "status": "scheduled", "location": {"id": 7002}},
+    ]
+    appointments = {
+        # Spans June and July: drives the skip/test recommendation.
+        1: [
+            {"status": "scheduled", "windowStart": _ts(2026, 6, 29), "released": True},
+            {"status": "scheduled", "windowStart": _ts(2026, 7, 2), "released": True},
+        ],
+        2: [{"status": "scheduled", "windowStart": _ts(2026, 6, 10), "released": False}],
+        3: [{"status": "completed", "windowStart": _ts(2026, 6, 3), "released": True}],
+        4: [],
+    }
+    route = db.session.get(MonthlyRoute, 1)
+    serial_http = _FakeServiceTrade(jobs, appointments)
+    expected = {
+        str(location_id): build_location_annual_schedule_row(
+            db.session.get(MonthlyLocation, location_id),
+            june,
+            weekday_iso=int(route.weekday_iso),
+            week_occurrence=int(route.week_occurrence),
+            http=serial_http,
+        )
+        for location_id in (101, 9002, 9003, 9004)
+    }
+
+    http = _FakeServiceTrade(jobs, appointments)
+    snapshot = build_route_annual_schedule_snapshot(1, june, session=http)
+
+    assert snapshot["locations"] == expected
+    assert snapshot["warning_count"] == sum(1 for row in expected.values() if row["prep_warning"])
+    assert expected["101"]["annual_spans_months"] is True
+    assert expected["101"]["has_unreleased_annual_in_month"] is True
+    assert expected["9004"]["has_service_trade_link"] is False
+    # Both sites in one /job call; each job's appointments once, even for the shared site.
+    assert http.calls == Counter({"job": 1, "appointment": 4})
@@ -2,15 +2,25 @@
 
 from __future__ import annotations
 
+import threading
+import time
 from datetime import date
 from types import SimpleNamespace
 
+import pytest
+
+from app import create_app
+from app.db_models import db
+from app.monthly import service_trade_bulk_job_release as bulk_mod
 from app.monthly.service_trade_bulk_job_release import (
     eligible_routes_from_cache,
+    iter_bulk_st_job_release,
     month_allows_bulk_st_release,
     timing_row_eligible_for_bulk,
 )
-from app.monthly.service_trade_route_run_timing import SYNC_STATUS_SCHEDULED
+from app.monthly.service_trade_route_run_timing import SYNC_STATUS_SCHEDULED, RouteRunTimingSyncResult
+
+MONTH = date(2026, 6, 1)
 
 
 def test_month_not_allowed_for_past_month():
@@ -64,3 +74,113 @@ def test_bulk_status_action_release_vs_unrelease():
     }
     eligible_released = eligible_routes_from_cache(routes, timing_released)
     assert all(row.released is True for row in eligible_released)
+
+
+def _scheduled_routes(count: int):
+    routes = [
+        SimpleNamespace(id=n, route_number=n, service_trade_route_location_id=9000 + n)
+        for n in range(1, count + 1)
+    ]
+    timing = {
+        route.id: SimpleNamespace(
+            monthly_route_id=route.id,
+            service_trade_job_id=100 + route.id,
+            sync_status=SYNC_STATUS_SCHEDULED,
+            service_trade_job_status="scheduled",
+            service_trade_appointment_released=False,
+        )
+        for route in routes
+    }
+    return routes, timing
+
+
+@pytest.fixture
+def fake_st(monkeypatch):
+    """ServiceTrade stand-in: route N resolves after a delay so later routes finish first."""
+    monkeypatch.setenv("DATABASE_URL", "sqlite:///:memory:")
+    app = create_app()
+    state = SimpleNamespace(released=[], upserts=[], commits=[], lock=threading.Lock())
+
+    def resolve(_http, st_route_id, _month_first):
+        time.sleep(0.002 * (9010 - st_route_id))
+        if st_route_id == 9003:
+            raise RuntimeError("ServiceTrade 502")
+        return (st_route_id, st_route_id * 10, st_route_id == 9004)
+
+    def update(_http, appointment_id, *, released):
+        with state.lock:
+            state.released.append(appointment_id // 10)
+
+    def sync(_http, *, st_route_id, month_first):
+        return RouteRunTimingSyncResult(st_route_id, None, None, None, SYNC_STATUS_SCHEDULED)
+
+    def upsert(*, monthly_route_id, month_first, result):
+        state.upserts.append(monthly_route_id)
+
+    def commit():
+        state.commits.append(list(state.upserts))
+
+    monkeypatch.setattr(bulk_mod, "resolve_live_scheduled_testing_job", resolve)
+    monkeypatch.setattr(bulk_mod, "update_appointment_released", update)
+    monkeypatch.setattr(bulk_mod, "sync_route_month_timing", sync)
+    monkeypatch.setattr(bulk_mod, "upsert_route_month_timing_row", upsert)
+    with app.app_context():
+        monkeypatch.setattr(db.session, "commit", commit)
+        yield state
+
+
+def test_concurrent_release_streams_progress_in_route_order(fake_st):
+    routes, timing = _scheduled_routes(6)
+    events = list(
+        iter_bulk_st_job_release(
+            None,
+            month_first=MONTH,
+            action="release",
+            routes=routes,
+            timing_by_route_id=timing,
+            max_workers=3,
+            commit_batch_size=3,
+        )
+    )
+
+    progress = [event for event in events if event["type"] == "progress"]
+    assert [event["index"] for event in progress] == [1, 2, 3, 4, 5, 6]
+    assert [event["status"] for event in progress] == [
+        "success",
+        "success",
+        "failed",
+        "skipped",
+        "success",
+        "success",
+    ]
+    assert progress[3]["message"] == "Already released"
+    assert events[-1] == {
+        "type": "done",
+        "success_count": 4,
+        "skipped_count": 1,
+        "failed_count": 1,
+        "failures": [{"route_number": 3, "message": "ServiceTrade 502"}],
+    }
+    assert sorted(fake_st.released) == [9001, 9002, 9005, 9006]
+    # Three routes per commit, then the remainder when the stream ends.
+    assert fake_st.commits == [[1, 2, 5], [1, 2, 5, 6]]
+
+
+def test_closing_the_stream_cancels_queued_routes_and_saves_finished_ones(fake_st):
+    routes, timing = _scheduled_routes(9)
+    stream = iter_bulk_st_job_release(
+        None,
+        month_first=MONTH,
+        action="release",
+        routes=routes,
+        timing_by_route_id=timing,
+        max_workers=1,
+    )
+    assert next(stream)["type"] == "start"
+    assert next(stream)["route_number"] == 1
+    stream.close()
+
+    # One worker keeps two routes in flight; nothing past the window reaches ServiceTrade.
+    assert set(fake_st.released) <= {9001, 9002, 9003}
+    assert fake_st.commits[-1] == sorted(set(fake_st.upserts))
+    assert fake_st.upserts[0] == 1
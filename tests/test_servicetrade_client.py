@@ -0,0 +1,230 @@
+"""Shared ServiceTrade client against a local fake API: auth reuse, 401 re-auth, 429 backoff, metrics."""
+
+from __future__ import annotations
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from app.services.servicetrade import RateLimiter, ServiceTradeClient, endpoint_key
+
+
+class _FakeServiceTrade:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.auth_calls = 0
+        self.valid_tokens: set[str] = set()
+        self.throttle_next = 0
+        self.fail_next = 0
+        self.requests: list[str] = []
+        self.token_users: dict[str, str] = {}
+        self.request_users: list[tuple[str, str | None]] = []
+
+    def handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):  # keep pytest output quiet
+                pass
+
+            def _send(self, status: int, body: dict, headers: dict[str, str] | None = None) -> None:
+                raw = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                if self.path != "/api/auth" or payload.get("password") != "secret":
+                    self._send(403, {"error": "bad credentials"})
+                    return
+                with fake.lock:
+                    fake.auth_calls += 1
+                    token = f"tok{fake.auth_calls}"
+                    fake.valid_tokens.add(token)
+                    fake.token_users[token] = payload.get("username")
+                self._send(200, {"data": {}}, {"Set-Cookie": f"PHPSESSID={token}; Path=/"})
+
+            def do_GET(self):
+                cookie = self.headers.get("Cookie") or ""
+                token = cookie.split("PHPSESSID=")[-1].split(";")[0] if "PHPSESSID=" in cookie else ""
+                with fake.lock:
+                    fake.requests.append(self.path)
+                    fake.request_users.append((self.path, fake.token_users.get(token)))
+                    authed = token in fake.valid_tokens
+                    throttle = fake.throttle_next > 0
+                    if throttle:
+                        fake.throttle_next -= 1
+                    fail = not throttle and fake.fail_next > 0
+                    if fail:
+                        fake.fail_next -= 1
+                if not authed:
+                    self._send(401, {"error": "unauthorized"})
+                elif throttle:
+                    self._send(429, {"error": "slow down"}, {"Retry-After": "0"})
+                elif fail:
+                    self._send(503, {"error": "unavailable"})
+                else:
+                    self._send(200, {"data": {"path": self.path}})
+
+        return Handler
+
+
+@pytest.fixture
+def fake_st():
+    fake = _FakeServiceTrade()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), fake.handler())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}/api"
+    try:
+        yield fake, base
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _client(base: str, **kwargs) -> ServiceTradeClient:
+    kwargs.setdefault("rate_per_second", 0)
+    kwargs.setdefault("backoff_base", 0.001)
+    return ServiceTradeClient(api_base=base, pool_maxsize=8, **kwargs)
+
+
+def test_endpoint_key_collapses_ids():
+    assert endpoint_key("get", "https://api.servicetrade.com/api/job/123/clockevent?x=1") == "GET /job/{id}/clockevent"
+
+
+def test_authenticate_is_reused_across_threads(fake_st):
+    fake, base = fake_st
+    client = _client(base)
+
+    def work(i: int) -> int:
+        client.authenticate("office", "secret")
+        return client.get(f"{base}/job/{i}").status_code
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        statuses = list(pool.map(work, range(24)))
+
+    assert statuses == [200] * 24
+    assert fake.auth_calls == 1
+
+
+def test_legacy_auth_post_is_recorded_and_reused(fake_st):
+    fake, base = fake_st
+    client = _client(base)
+    for _ in range(3):
+        client.post(f"{base}/auth", json={"username": "office", "password": "secret"}).raise_for_status()
+
+    assert client.is_authenticated
+    assert fake.auth_calls == 1
+
+
+def test_each_user_keeps_their_own_session(fake_st):
+    from app.services.servicetrade import credentials_bound, propagate_credentials
+
+    fake, base = fake_st
+    client = _client(base, service_account="bot")
+    alice_logged_in = threading.Event()
+    bob_logged_in = threading.Event()
+
+    def alice():
+        with credentials_bound(None):
+            client.post(f"{base}/auth", json={"username": "alice", "password": "secret"})
+            alice_logged_in.set()
+            bob_logged_in.wait(5)
+            # Bob logging in meanwhile must not switch Alice's cookie, nor her workers'.
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                list(pool.map(propagate_credentials(lambda i: client.get(f"{base}/job/{i}")), (1, 2)))
+
+    def bob():
+        with credentials_bound(None):
+            alice_logged_in.wait(5)
+            client.authenticate("bob", "secret")
+            bob_logged_in.set()
+            client.get(f"{base}/job/3")
+
+    def service():
+        with credentials_bound(None):
+            client.authenticate("bot", "secret")
+            client.get(f"{base}/job/4")
+
+    threads = [threading.Thread(target=fn) for fn in (alice, bob, service)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert sorted(fake.request_users) == [
+        ("/api/job/1", "alice"),
+        ("/api/job/2", "alice"),
+        ("/api/job/3", "bob"),
+        ("/api/job/4", "bot"),
+    ]
+    assert fake.auth_calls == 3
+    # Unbound threads (scripts, un-propagated workers) use the service account.
+    with credentials_bound(None):
+        client.get(f"{base}/job/5")
+    assert fake.request_users[-1] == ("/api/job/5", "bot")
+
+
+def test_expired_session_reauthenticates_once(fake_st):
+    fake, base = fake_st
+    client = _client(base)
+    client.authenticate("office", "secret")
+    fake.valid_tokens.clear()  # server-side session expiry
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        statuses = list(pool.map(lambda i: client.get(f"{base}/location/{i}").status_code, range(6)))
+
+    assert statuses == [200] * 6
+    assert fake.auth_calls == 2
+    assert client.metrics.snapshot()["GET /location/{id}"]["reauths"] >= 1
+
+
+def test_throttled_and_unavailable_responses_are_retried(fake_st):
+    fake, base = fake_st
+    client = _client(base)
+    client.authenticate("office", "secret")
+    fake.throttle_next = 2
+    fake.fail_next = 1
+
+    resp = client.get(f"{base}/appointment", params={"jobId": 1})
+
+    assert resp.status_code == 200
+    row = client.metrics.snapshot()["GET /appointment"]
+    assert row["throttled"] == 2
+    assert row["retries"] == 3
+    assert row["calls"] == 4
+
+
+def test_retries_give_up_after_limit(fake_st):
+    fake, base = fake_st
+    client = _client(base, max_retries=1)
+    client.authenticate("office", "secret")
+    fake.throttle_next = 5
+
+    assert client.get(f"{base}/job").status_code == 429
+
+
+def test_connection_errors_retry_then_raise():
+    client = ServiceTradeClient(api_base="http://127.0.0.1:9/api", rate_per_second=0, max_retries=2, backoff_base=0.001)
+    with pytest.raises(requests.ConnectionError):
+        client.get("http://127.0.0.1:9/api/job", timeout=0.5)
+    assert client.metrics.snapshot()["GET /job"]["retries"] == 2
+
+
+def test_rate_limiter_spaces_requests():
+    limiter = RateLimiter(rate_per_second=50, burst=1)
+    waited = sum(limiter.acquire() for _ in range(5))
+    assert waited >= 0.06
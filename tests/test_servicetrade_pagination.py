@@ -0,0 +1,84 @@
+"""Concurrent ServiceTrade page walker: ordering, bounded concurrency, failures, early close."""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+
+from flask import Flask, current_app
+
+from app.services.servicetrade import iter_paginated_items, iter_paginated_pages
+
+
+class _Pages:
+    def __init__(self, total_pages: int, per_page: int = 3, fail: frozenset[int] = frozenset()) -> None:
+        self.total_pages = total_pages
+        self.per_page = per_page
+        self.fail = fail
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fetched: list[int] = []
+
+    def __call__(self, page: int):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.fetched.append(page)
+        try:
+            time.sleep(random.uniform(0, 0.01))  # complete out of order
+            if page in self.fail:
+                return None
+            items = [{"id": (page - 1) * self.per_page + i} for i in range(self.per_page)]
+            return {"totalPages": self.total_pages, "jobs": items}
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def test_items_arrive_in_page_order():
+    pages = _Pages(total_pages=12)
+    ids = [job["id"] for job in iter_paginated_items(pages, "jobs", max_workers=4)]
+
+    assert ids == list(range(36))
+    assert sorted(pages.fetched) == list(range(1, 13))
+    assert 1 < pages.max_in_flight <= 4
+
+
+def test_single_page_listing_makes_one_call():
+    pages = _Pages(total_pages=1)
+    assert len(list(iter_paginated_items(pages, "jobs"))) == 3
+    assert pages.fetched == [1]
+
+
+def test_failed_pages_are_skipped_and_first_page_failure_ends_walk():
+    pages = _Pages(total_pages=4, fail=frozenset({3}))
+    assert [r.page for r in iter_paginated_pages(pages, max_workers=2)] == [1, 2, 4]
+
+    first_fails = _Pages(total_pages=4, fail=frozenset({1}))
+    assert list(iter_paginated_pages(first_fails)) == []
+    assert first_fails.fetched == [1]
+
+
+def test_closing_early_stops_scheduling_pages():
+    pages = _Pages(total_pages=200)
+    stream = iter_paginated_items(pages, "jobs", max_workers=2)
+    assert [next(stream)["id"] for _ in range(3)] == [0, 1, 2]
+    stream.close()
+    time.sleep(0.05)
+
+    assert len(pages.fetched) <= 1 + 2 * 2
+
+
+def test_workers_inherit_app_context():
+    app = Flask(__name__)
+    seen: list[str] = []
+
+    def fetch(page: int):
+        seen.append(current_app.name)
+        return {"totalPages": 3, "jobs": [{"page": page}]}
+
+    with app.app_context():
+        assert [j["page"] for j in iter_paginated_items(fetch, "jobs")] == [1, 2, 3]
+    assert seen == [app.name] * 3
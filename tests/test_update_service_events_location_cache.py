@@ -0,0 +1,27 @@
+"""Service-event sync: location tags are fetched once per run and shared by every tag parser."""
+
+from __future__ import annotations
+
+from app.scripts import update_service_events as use
+
+
+def test_tag_parsers_share_one_location_fetch(monkeypatch):
+    calls: list[str] = []
+    tags = [{"name": "FA_1dayt0_5"}, {"name": "Spr_2x6"}, {"name": "3_Tech"}, {"name": "zone_t1_5"}]
+
+    def fake_api(endpoint, params=None):
+        calls.append(endpoint)
+        return {"data": {"address": {"street": "10 Fort St"}, "tags": tags}}
+
+    monkeypatch.setattr(use, "call_service_trade_api", fake_api)
+    monkeypatch.setattr(use, "location_metadata", use.LocationMetadataCache())
+
+    assert use.location_metadata.payload(42)["data"]["address"]["street"] == "10 Fort St"
+    assert use.parse_fa_timing_tag(42) == (1.5, 12.0)
+    assert use.parse_spr_tag(42) == (2, 6.0)
+    assert use.parse_fa_techs_tag(42) == 3
+    for _job in range(3):
+        assert use._travel_time_for_location(42) == 90
+
+    assert calls == ["location/42"]
+    assert (use.location_metadata.api_calls, use.location_metadata.calls_saved) == (1, 6)
@@ -0,0 +1,148 @@
+"""Service-event sync: worker pool, single bulk writer, and checkpoint/watermark resume."""
+
+from __future__ import annotations
+
+import sys
+import threading
+
+import pytest
+
+from app import create_app
+from app.db_models import Location, ServiceEventSyncCheckpoint, db
+from app.scripts import update_service_events as use
+
+TABLES = [Location.__table__, ServiceEventSyncCheckpoint.__table__]
+LOCATION_IDS = [101, 102, 103, 104, 105]
+
+
+@pytest.fixture
+def sync_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{(tmp_path / 'events.db').as_posix()}")
+    monkeypatch.setenv("PROCESSING_USERNAME", "bot")
+    monkeypatch.setenv("PROCESSING_PASSWORD", "secret")
+    lock = threading.Lock()
+    state = {
+        "processed": [],
+        "written": [],
+        "updated": {},
+        "changed_jobs": set(),
+        "changed_appointments": set(),
+        "revisit_after": {},
+        "writer_threads": set(),
+    }
+
+    def fake_api(endpoint, params=None):
+        if endpoint.startswith("location/"):
+            loc_id = int(endpoint.split("/", 1)[1])
+            return {"data": {"updated": state["updated"].get(loc_id, 0), "tags": []}}
+        if endpoint == "job" and "updatedAfter" in params:
+            changed = int(params["locationId"]) in state["changed_jobs"]
+            return {"data": {"jobs": [{"id": 1}] if changed else []}}
+        if endpoint == "appointment" and "updatedAfter" in params:
+            changed = int(params["locationIds"]) in state["changed_appointments"]
+            return {"data": {"appointments": [{"id": 1}] if changed else []}}
+        if endpoint == "servicerecurrence" and "updatedAfter" in params:
+            return {"data": {"serviceRecurrences": []}}
+        raise AssertionError(f"unexpected endpoint {endpoint}")
+
+    def fake_process(loc_id):
+        with lock:
+            state["processed"].append(loc_id)
+        if loc_id == 104 and state.get("fail_104"):
+            raise RuntimeError("ServiceTrade 500")
+        return use.LocationResult(
+            location_id=loc_id,
+            rows=[{"job_id": loc_id * 10, "location_id": loc_id}],
+            jobs=1,
+            revisit_after=state["revisit_after"].get(loc_id),
+        )
+
+    def fake_upsert(rows):
+        state["writer_threads"].add(threading.get_ident())
+        state["written"].extend(row["job_id"] for row in rows)
+        return len(rows)
+
+    monkeypatch.setattr(use, "authenticate", lambda *_args: None)
+    monkeypatch.setattr(use, "call_service_trade_api", fake_api)
+    monkeypatch.setattr(use, "process_location", fake_process)
+    monkeypatch.setattr(use, "upsert_service_occurrences", fake_upsert)
+
+    app = create_app()
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=TABLES)
+        db.session.add_all([Location(location_id=loc_id, status="active") for loc_id in LOCATION_IDS])
+        db.session.commit()
+
+    def run(*argv):
+        monkeypatch.setattr(use, "location_metadata", use.LocationMetadataCache())
+        monkeypatch.setattr(sys, "argv", ["update_service_events.py", "--no-progress", *argv])
+        state["processed"].clear()
+        state["written"].clear()
+        use.main()
+
+    yield app, state, run
+    with app.app_context():
+        db.metadata.drop_all(db.engine, tables=list(reversed(TABLES)))
+
+
+def _watermarks(app) -> dict[int, int]:
+    with app.app_context():
+        return {row.location_id: row.watermark for row in ServiceEventSyncCheckpoint.query.all()}
+
+
+def test_workers_feed_one_writer_and_checkpoint_completed_locations(sync_env):
+    app, state, run = sync_env
+    state["fail_104"] = True
+
+    run("--workers", "3", "--commit-every", "2")
+
+    assert sorted(state["processed"]) == LOCATION_IDS
+    assert sorted(state["written"]) == [1010, 1020, 1030, 1050]
+    assert state["writer_threads"] == {threading.get_ident()}
+    # The failed location has no checkpoint, so the next run retries it.
+    assert sorted(_watermarks(app)) == [101, 102, 103, 105]
+
+
+def test_rerun_only_revisits_failed_or_changed_locations(sync_env):
+    app, state, run = sync_env
+    state["fail_104"] = True
+    run("--workers", "2")
+    first = _watermarks(app)
+
+    state["fail_104"] = False
+    state["updated"][101] = first[101] + 60
+    state["changed_jobs"].add(103)
+    run("--workers", "2")
+
+    assert sorted(state["processed"]) == [101, 103, 104]
+    assert sorted(_watermarks(app)) == LOCATION_IDS
+    assert _watermarks(app)[102] == first[102]
+
+    run("--force")
+    assert sorted(state["processed"]) == LOCATION_IDS
+
+
+def test_stale_due_or_appointment_changed_checkpoints_are_revisited(sync_env, monkeypatch):
+    app, state, run = sync_env
+    now = use.time.time()
+    state["revisit_after"][102] = int(now) + 60
+    run()
+
+    state["changed_appointments"].add(101)
+    run()
+    assert state["processed"] == [101]
+
+    # 102's upcoming inspection has come due; 103's checkpoint is older than the age cap.
+    monkeypatch.setattr(use.time, "time", lambda: now + 120)
+    with app.app_context():
+        checkpoint = db.session.get(ServiceEventSyncCheckpoint, 103)
+        checkpoint.watermark -= 8 * 86400
+        db.session.commit()
+    run()
+    assert sorted(state["processed"]) == [101, 102, 103]
+
+    state["revisit_after"].clear()
+    run("--max-checkpoint-age-days", "0")
+    assert sorted(state["processed"]) == [101, 102]
+    run("--max-checkpoint-age-days", "0")
+    assert sorted(state["processed"]) == [101]
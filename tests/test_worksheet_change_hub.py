@@ -0,0 +1,212 @@
+"""Worksheet change hub: in-process fan-out and write-driven SSE notifications."""
+
+from __future__ import annotations
+
+import threading
+from datetime import date
+
+import pytest
+
+from app import create_app
+from app.db_models import db
+from app.monthly.worksheet_change_hub import (
+    WorksheetChangeEvent,
+    WorksheetChangeHub,
+    worksheet_change_hub,
+)
+from tests.monthly_location_helpers import (
+    WORKSHEET_TABLES,
+    make_location_month,
+    seed_route_with_one_stop,
+)
+
+MAY = date(2026, 5, 1)
+
+
+@pytest.fixture
+def hub_client(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "sqlite:///:memory:")
+    monkeypatch.delenv("WORKSHEET_CHANGE_BACKEND", raising=False)
+    app = create_app()
+    app.config["TESTING"] = True
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=WORKSHEET_TABLES)
+        with app.test_client() as client:
+            with client.session_transaction() as sess:
+                sess["username"] = "tech.one"
+                sess["authenticated"] = True
+            yield client, app
+        db.session.remove()
+        db.metadata.drop_all(db.engine, tables=list(reversed(WORKSHEET_TABLES)))
+
+
+def _seed_tested_stop() -> None:
+    seed_route_with_one_stop()
+    db.session.add(
+        make_location_month(id=5001, location_id=101, month_date=MAY, route_id=1, result_status="tested")
+    )
+    db.session.commit()
+
+
+def test_hub_fans_out_to_route_month_subscribers_only():
+    hub = WorksheetChangeHub()
+    a = hub.subscribe(1, MAY)
+    b = hub.subscribe(1, MAY)
+    other = hub.subscribe(2, MAY)
+
+    delivered = hub.dispatch(WorksheetChangeEvent(route_id=1, month_date=MAY, revision="r1"))
+
+    assert delivered == 2
+    assert a.wait(0).revision == "r1"
+    assert b.wait(0).revision == "r1"
+    assert other.wait(0) is None
+    for sub in (a, b, other):
+        sub.close()
+    assert hub.subscriber_count(1, MAY) == 0
+
+
+def test_subscription_coalesces_to_latest_revision():
+    hub = WorksheetChangeHub()
+    sub = hub.subscribe(1, MAY)
+    for rev in ("r1", "r2", "r3"):
+        hub.publish(WorksheetChangeEvent(route_id=1, month_date=MAY, revision=rev))
+
+    assert sub.wait(0).revision == "r3"
+    assert sub.wait(0) is None
+    sub.close()
+
+
+def test_subscription_wait_wakes_on_publish_from_other_thread():
+    hub = WorksheetChangeHub()
+    sub = hub.subscribe(7, MAY)
+    timer = threading.Timer(
+        0.05,
+        hub.publish,
+        args=(WorksheetChangeEvent(route_id=7, month_date=MAY, revision="x"),),
+    )
+    timer.start()
+    try:
+        event = sub.wait(5)
+    finally:
+        timer.join()
+        sub.close()
+    assert event is not None and event.revision == "x"
+
+
+def test_event_json_round_trip():
+    event = WorksheetChangeEvent(route_id=12, month_date=MAY, revision="mlm:2026-05-01T00:00:00:3")
+    assert WorksheetChangeEvent.from_json(event.to_json()) == event
+    assert WorksheetChangeEvent.from_json("not json") is None
+
+
+def test_worksheet_patch_publishes_revision(hub_client):
+    client, app = hub_client
+    with app.app_context():
+        _seed_tested_stop()
+        sub = worksheet_change_hub().subscribe(1, MAY)
+
+    try:
+        res = client.patch(
+            "/api/monthly_routes/routes/1/worksheet/rows/101?month=2026-05-01",
+            json={"changes": {"testing_procedures": "TURN OFF BREAKER"}},
+        )
+        assert res.status_code == 200
+        event = sub.wait(0)
+    finally:
+        sub.close()
+
+    assert event is not None
+    assert event.route_id == 1 and event.month_date == MAY
+    assert event.revision.startswith("ws:") and event.revision.endswith(":1")
+
+
+def test_failed_write_does_not_publish(hub_client):
+    client, app = hub_client
+    with app.app_context():
+        _seed_tested_stop()
+        sub = worksheet_change_hub().subscribe(1, MAY)
+
+    try:
+        res = client.patch(
+            "/api/monthly_routes/routes/1/worksheet/rows/101?month=2026-05-01",
+            json={"changes": {"not_a_field": "x"}},
+        )
+        assert res.status_code == 400
+        assert sub.wait(0) is None
+    finally:
+        sub.close()
+
+
+def test_stream_emits_initial_revision_then_pushed_event(hub_client, monkeypatch):
+    monkeypatch.setenv("WORKSHEET_SSE_RESYNC_SECONDS", "0")
+    client, app = hub_client
+    with app.app_context():
+        _seed_tested_stop()
+
+    from app.routes import monthly_routes as mr_mod
+
+    with app.test_request_context("/api/monthly_routes/routes/1/worksheet/stream?month=2026-05-01"):
+        response = mr_mod.stream_monthly_route_worksheet(1)
+        chunks = iter(response.response)
+        assert next(chunks).startswith("retry:")
+        initial = next(chunks)
+        assert '"route_id": 1' in initial
+
+        hub = worksheet_change_hub()
+        assert hub.subscriber_count(1, MAY) == 1
+        hub.publish(WorksheetChangeEvent(route_id=1, month_date=MAY, revision="pushed-rev"))
+        assert '"revision": "pushed-rev"' in next(chunks)
+        response.close()
+
+        assert hub.subscriber_count(1, MAY) == 0
+
+
+def test_resync_probe_matches_published_revision(hub_client):
+    client, app = hub_client
+    with app.app_context():
+        _seed_tested_stop()
+        sub = worksheet_change_hub().subscribe(1, MAY)
+
+    try:
+        res = client.patch(
+            "/api/monthly_routes/routes/1/worksheet/rows/101?month=2026-05-01",
+            json={"changes": {"testing_procedures": "TURN OFF BREAKER"}},
+        )
+        assert res.status_code == 200
+        event = sub.wait(0)
+    finally:
+        sub.close()
+
+    from app.routes import monthly_routes as mr_mod
+
+    # Office and portal streams resync against the token writes publish, so an unchanged
+    # worksheet does not re-emit on every resync.
+    for query in ("", "&tech_portal=1"):
+        with app.test_request_context(f"/api/monthly_routes/routes/1/worksheet/stream?month=2026-05-01{query}"):
+            assert mr_mod._worksheet_sse_revision_probe(1, MAY) == event.revision
+            assert mr_mod._worksheet_sse_revision_probe(99, MAY) is None
+
+
+def test_resync_probe_sees_legacy_unstamped_rows(hub_client):
+    from datetime import datetime, timezone
+
+    from app.db_models import MonthlyLocationMonth
+    from app.routes import monthly_routes as mr_mod
+
+    _client, app = hub_client
+    with app.app_context():
+        seed_route_with_one_stop()
+        db.session.add(make_location_month(id=5002, location_id=101, month_date=MAY, route_id=None))
+        db.session.commit()
+
+    with app.test_request_context("/api/monthly_routes/routes/1/worksheet/stream?month=2026-05-01"):
+        before = mr_mod._worksheet_sse_revision_probe(1, MAY)
+        assert before.endswith(":1")
+        row = db.session.get(MonthlyLocationMonth, 5002)
+        row.result_status = "tested"
+        row.updated_at = datetime(2026, 5, 9, 12, 0, tzinfo=timezone.utc)
+        db.session.commit()
+        assert mr_mod._worksheet_sse_revision_probe(1, MAY) != before
@@ -0,0 +1,176 @@
+"""Delta worksheet reads (``GET …/worksheet?since_revision=``) and touched-location change events."""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from app import create_app
+from app.db_models import MonthlyLocation, MonthlyLocationMonth, MonthlyRouteRun, MonthlyStopClockEvent, db
+from app.monthly.worksheet_change_hub import WorksheetChangeEvent, WorksheetChangeHub, worksheet_change_hub
+from app.monthly.worksheet_locations import parse_worksheet_stops_revision_token
+from tests.monthly_location_helpers import WORKSHEET_TABLES, seed_route_with_two_stops
+
+PACIFIC_TZ = ZoneInfo("America/Vancouver")
+MONTH = date(2026, 5, 1)
+WORKSHEET_URL = "/api/monthly_routes/routes/1/worksheet"
+LONG_AGO = datetime(2020, 1, 1, 8, 0)
+
+
+@pytest.fixture
+def portal_client(monkeypatch):
+    from app.monthly import worksheet_locations
+    from app.routes import monthly_routes as mr_mod
+
+    monkeypatch.setattr(mr_mod, "_current_pacific_month_first", lambda: MONTH)
+    # The ServiceTrade annual sync stamps every stop on view; keep reads side-effect free here.
+    monkeypatch.setattr(mr_mod, "_sync_st_annual_on_paperwork_view", lambda *_args: None)
+    # Seeded rows all sit exactly on the watermark; without this they would be re-sent as overlap.
+    monkeypatch.setattr(worksheet_locations, "WORKSHEET_DELTA_OVERLAP", timedelta(0))
+    monkeypatch.setenv("DATABASE_URL", "sqlite:///:memory:")
+    monkeypatch.delenv("WORKSHEET_CHANGE_BACKEND", raising=False)
+    app = create_app()
+    app.config["TESTING"] = True
+
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=WORKSHEET_TABLES)
+        with app.test_client() as client:
+            with client.session_transaction() as sess:
+                sess["tech_portal_unlocked"] = True
+                sess["username"] = "field_tech"
+            yield client
+        db.session.remove()
+        db.metadata.drop_all(db.engine, tables=list(reversed(WORKSHEET_TABLES)))
+
+
+def _seed_settled_run() -> tuple[int, int]:
+    """Open run with both stops materialized and every timestamp well behind the wall clock."""
+    from app.monthly.worksheet_locations import ensure_worksheet_stops_for_route_month
+
+    _, stop_a, stop_b = seed_route_with_two_stops()
+    run = MonthlyRouteRun(
+        id=5001,
+        monthly_route_id=1,
+        month_date=MONTH,
+        started_at=datetime(2026, 5, 2, 8, 0, tzinfo=PACIFIC_TZ),
+        status="open",
+        source="technician_app",
+    )
+    db.session.add(run)
+    db.session.commit()
+    ensure_worksheet_stops_for_route_month(1, MONTH, run)
+    db.session.commit()
+    for model in (MonthlyLocationMonth, MonthlyLocation):
+        db.session.execute(model.__table__.update().values(updated_at=LONG_AGO))
+    db.session.commit()
+    # Requests get a fresh session in production; drop the seed's touched-location bookkeeping.
+    db.session.remove()
+    return stop_a, stop_b
+
+
+def _worksheet(client, **params) -> dict:
+    res = client.get(WORKSHEET_URL, query_string={"month": "2026-05-01", "tech_portal": "1", **params})
+    assert res.status_code == 200, res.get_json()
+    return res.get_json()
+
+
+def _stop_ids(payload: dict) -> list[int]:
+    return [stop["location_id"] for stop in payload["stops"]]
+
+
+def test_revision_token_round_trips_to_watermark():
+    assert parse_worksheet_stops_revision_token("mlm:2026-05-02T08:00:00+00:00:14") == datetime.fromisoformat(
+        "2026-05-02T08:00:00+00:00"
+    )
+    for bad in ("", "mlm:none:0", "mlm:2026-05-02T08:00:00+00:00:", "rev-1", "mlm:garbage:3"):
+        assert parse_worksheet_stops_revision_token(bad) is None
+
+
+def test_delta_returns_only_the_edited_stop(portal_client):
+    stop_a, stop_b = _seed_settled_run()
+    full = _worksheet(portal_client)
+    assert _stop_ids(full) == [stop_a, stop_b]
+    assert "delta" not in full
+
+    res = portal_client.patch(
+        f"{WORKSHEET_URL}/rows/{stop_b}?month=2026-05-01&tech_portal=1",
+        json={"changes": {"testing_procedures": "Call monitoring first"}},
+    )
+    assert res.status_code == 200, res.get_json()
+
+    delta = _worksheet(portal_client, since_revision=full["revision"])
+    assert _stop_ids(delta) == [stop_b]
+    assert delta["stops"][0]["stop_number"] == 2
+    assert delta["stops"][0]["testing_procedures"] == "Call monitoring first"
+    assert [row["location_id"] for row in delta["rows"]] == [stop_b]
+    assert delta["delta"] == {
+        "since_revision": full["revision"],
+        "location_ids": [stop_a, stop_b],
+        "removed_location_ids": [],
+    }
+    assert delta["revision"] != full["revision"]
+
+
+def test_clock_event_without_stop_write_is_included(portal_client):
+    stop_a, stop_b = _seed_settled_run()
+    revision = _worksheet(portal_client)["revision"]
+
+    mlm = MonthlyLocationMonth.query.filter_by(monthly_location_id=stop_a, month_date=MONTH).one()
+    db.session.add(MonthlyStopClockEvent(id=1, monthly_location_month_id=mlm.id, sort_order=0, time_in_raw="08:00"))
+    db.session.commit()
+
+    delta = _worksheet(portal_client, since_revision=revision)
+    assert _stop_ids(delta) == [stop_a]
+
+
+def test_stop_leaving_the_route_is_reported_removed(portal_client):
+    stop_a, stop_b = _seed_settled_run()
+    revision = _worksheet(portal_client)["revision"]
+
+    db.session.get(MonthlyLocation, stop_b).monthly_route_id = None
+    db.session.commit()
+
+    delta = _worksheet(portal_client, since_revision=revision)
+    assert delta["delta"]["location_ids"] == [stop_a]
+    assert delta["delta"]["removed_location_ids"] == [stop_b]
+    assert _stop_ids(delta) == []
+
+
+def test_unusable_revision_falls_back_to_full_payload(portal_client):
+    stop_a, stop_b = _seed_settled_run()
+    payload = _worksheet(portal_client, since_revision="not-a-revision")
+    assert _stop_ids(payload) == [stop_a, stop_b]
+    assert "delta" not in payload
+
+
+def test_change_event_carries_touched_location_ids(portal_client):
+    stop_a, stop_b = _seed_settled_run()
+    sub = worksheet_change_hub().subscribe(1, MONTH)
+    try:
+        res = portal_client.patch(
+            f"{WORKSHEET_URL}/rows/{stop_a}?month=2026-05-01&tech_portal=1",
+            json={"changes": {"testing_procedures": "Ring twice"}},
+        )
+        assert res.status_code == 200, res.get_json()
+        event = sub.wait(0)
+    finally:
+        sub.close()
+
+    assert event is not None
+    assert event.location_ids == (stop_a,)
+    assert WorksheetChangeEvent.from_json(event.to_json()) == event
+
+
+def test_coalesced_events_accumulate_location_ids():
+    hub = WorksheetChangeHub()
+    sub = hub.subscribe(1, MONTH)
+    hub.publish(WorksheetChangeEvent(1, MONTH, "r1", (101,)))
+    hub.publish(WorksheetChangeEvent(1, MONTH, "r2", (9002,)))
+    assert sub.wait(0) == WorksheetChangeEvent(1, MONTH, "r2", (101, 9002))
+
+    hub.publish(WorksheetChangeEvent(1, MONTH, "r3", (101,)))
+    hub.publish(WorksheetChangeEvent(1, MONTH, "r4", None))
+    assert sub.wait(0).location_ids is None
+    sub.close()
@@ -0,0 +1,162 @@
+"""Batched worksheet mutation replay (``POST …/worksheet/mutations``)."""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from app import create_app
+from app.db_models import MonthlyLocationMonth, MonthlyRouteRun, MonthlyRouteWorksheetAuditEvent, db
+from tests.monthly_location_helpers import WORKSHEET_TABLES, seed_route_with_two_stops
+
+PACIFIC_TZ = ZoneInfo("America/Vancouver")
+MONTH = date(2026, 5, 1)
+BATCH_URL = "/api/monthly_routes/routes/1/worksheet/mutations?month=2026-05-01&tech_portal=1"
+
+
+@pytest.fixture
+def portal_client(monkeypatch):
+    from app.routes import monthly_routes as mr_mod
+
+    monkeypatch.setattr(mr_mod, "_current_pacific_month_first", lambda: MONTH)
+    monkeypatch.setenv("DATABASE_URL", "sqlite:///:memory:")
+    app = create_app()
+    app.config["TESTING"] = True
+
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=WORKSHEET_TABLES)
+        with app.test_client() as client:
+            with client.session_transaction() as sess:
+                sess["tech_portal_unlocked"] = True
+                sess["username"] = "field_tech"
+            yield client
+        db.session.remove()
+        db.metadata.drop_all(db.engine, tables=list(reversed(WORKSHEET_TABLES)))
+
+
+def _seed_open_run(**run_fields) -> tuple[int, int]:
+    from app.monthly.worksheet_locations import ensure_worksheet_stops_for_route_month
+
+    _, stop_a, stop_b = seed_route_with_two_stops()
+    run = MonthlyRouteRun(
+        id=5001,
+        monthly_route_id=1,
+        month_date=MONTH,
+        started_at=datetime(2026, 5, 2, 8, 0, tzinfo=PACIFIC_TZ),
+        status="open",
+        **{"source": "technician_app", **run_fields},
+    )
+    db.session.add(run)
+    db.session.commit()
+    ensure_worksheet_stops_for_route_month(1, MONTH, run)
+    db.session.commit()
+    return stop_a, stop_b
+
+
+def _offline_queue(stop_a: int, stop_b: int) -> list[dict]:
+    return [
+        {"client_mutation_id": "m-1", "location_id": stop_a, "changes": {"time_in": "08:00"}},
+        {"client_mutation_id": "m-2", "location_id": stop_a, "changes": {"testing_procedures": "Call monitoring"}},
+        # Stop A is still clocked in, so this one is rejected on its own.
+        {"client_mutation_id": "m-3", "location_id": stop_b, "changes": {"time_in": "09:00"}},
+        {"client_mutation_id": "m-4", "location_id": stop_a, "changes": {"time_out": "08:40", "result_status": "tested"}},
+        {"client_mutation_id": "m-5", "location_id": stop_b, "changes": {"time_in": "09:00"}},
+    ]
+
+
+def test_batch_applies_in_order_and_reports_each_mutation(portal_client):
+    stop_a, stop_b = _seed_open_run()
+
+    res = portal_client.post(BATCH_URL, json={"mutations": _offline_queue(stop_a, stop_b)})
+    assert res.status_code == 200
+    body = res.get_json()
+    assert body["ok"] is False
+    assert [(r["client_mutation_id"], r["status"]) for r in body["results"]] == [
+        ("m-1", 200),
+        ("m-2", 200),
+        ("m-3", 409),
+        ("m-4", 200),
+        ("m-5", 200),
+    ]
+    assert body["results"][2]["code"] == "open_clock_in_conflict"
+
+    stops = {s["location_id"]: s for s in body["stops"]}
+    assert stops[stop_a]["time_in"] == "08:00"
+    assert stops[stop_a]["result_status"] == "tested"
+    assert stops[stop_b]["time_in"] == "09:00"
+
+    row_a = MonthlyLocationMonth.query.filter_by(monthly_location_id=stop_a, month_date=MONTH).one()
+    assert row_a.testing_procedures == "Call monitoring"
+    recorded = {
+        e.client_mutation_id
+        for e in MonthlyRouteWorksheetAuditEvent.query.all()
+        if e.client_mutation_id is not None
+    }
+    assert recorded == {"m-1", "m-2", "m-4", "m-5"}
+
+
+def test_replayed_batch_is_deduped(portal_client):
+    stop_a, stop_b = _seed_open_run()
+    queue = _offline_queue(stop_a, stop_b)
+    assert portal_client.post(BATCH_URL, json={"mutations": queue}).status_code == 200
+    event_count = MonthlyRouteWorksheetAuditEvent.query.count()
+
+    replay = portal_client.post(BATCH_URL, json={"mutations": [queue[0], queue[1], queue[0]]}).get_json()
+    assert [r["deduped"] for r in replay["results"]] == [True, True, True]
+    assert MonthlyRouteWorksheetAuditEvent.query.count() == event_count
+
+
+def test_single_patch_replay_dedupes_multi_field_mutation(portal_client):
+    stop_a, _ = _seed_open_run()
+    url = f"/api/monthly_routes/routes/1/worksheet/locations/{stop_a}?month=2026-05-01&tech_portal=1"
+    payload = {"client_mutation_id": "m-9", "changes": {"ring": "R-9", "door_code": "1234"}}
+    assert portal_client.patch(url, json=payload).get_json().get("deduped") is None
+    assert portal_client.patch(url, json=payload).get_json()["deduped"] is True
+
+
+def test_run_lock_rejects_whole_batch(portal_client):
+    stop_a, stop_b = _seed_open_run(completed_at=datetime(2026, 5, 3, 16, 0, tzinfo=PACIFIC_TZ))
+
+    res = portal_client.post(BATCH_URL, json={"mutations": _offline_queue(stop_a, stop_b)})
+    assert res.status_code == 409
+    assert res.get_json()["code"] == "run_completed_locked"
+    assert MonthlyRouteWorksheetAuditEvent.query.count() == 0
+
+
+def test_row_mutations_and_bad_entries(portal_client):
+    stop_a, _ = _seed_open_run()
+
+    res = portal_client.post(
+        BATCH_URL,
+        json={
+            "mutations": [
+                {"kind": "row", "client_mutation_id": "r-1", "location_id": stop_a, "changes": {"ring": "R-77"}},
+                {"kind": "row", "location_id": stop_a, "changes": {"bogus": 1}},
+                {"kind": "deficiency", "location_id": stop_a, "changes": {"ring": "x"}},
+                {"changes": {"ring": "x"}},
+            ]
+        },
+    )
+    body = res.get_json()
+    assert [r["status"] for r in body["results"]] == [200, 400, 400, 400]
+    assert body["rows"][0]["ring"] == "R-77"
+    assert body["stops"] == []
+
+
+def test_stop_only_lock_rejects_just_the_stop_mutations(portal_client):
+    stop_a, stop_b = _seed_open_run(source="office_skip")
+    mutations = [
+        {"kind": "stop", "client_mutation_id": "s-1", "location_id": stop_a, "changes": {"time_in": "08:00"}},
+        {"kind": "row", "client_mutation_id": "r-1", "location_id": stop_b, "changes": {"ring": "R-77"}},
+    ]
+
+    body = portal_client.post(BATCH_URL, json={"mutations": mutations}).get_json()
+    assert [(r["client_mutation_id"], r["status"]) for r in body["results"]] == [("s-1", 409), ("r-1", 200)]
+    assert body["results"][0]["code"] == "portal_read_only"
+    assert body["rows"][0]["ring"] == "R-77"
+
+    res = portal_client.post(BATCH_URL, json={"mutations": mutations[:1]})
+    assert res.status_code == 409
+    assert res.get_json()["code"] == "portal_read_only"